@@ -238,9 +238,18 @@ def create_app(config_name='default'):
                             all_healthy = False
                             break
             
+            # Celery task telemetry is informational and does not change the status
+            try:
+                from celery_tasks import get_task_telemetry
+                tasks = get_task_telemetry()
+            except Exception as e:
+                logger.warning(f"Task telemetry unavailable: {str(e)}")
+                tasks = {'error': str(e)}
+            
             return {
                 'status': 'healthy' if all_healthy else 'degraded',
                 'services': status,
+                'tasks': tasks,
                 'timestamp': '2025-09-21T18:09:04+05:30'
             }, 200 if all_healthy else 503
             
@@ -106,6 +106,7 @@ class ChatConversation(db.Model):
     session_id = db.Column(db.String(100), unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     message_count = db.Column(db.Integer, default=0)
+    satisfaction_rating = db.Column(db.Float)  # 1-5, set by the fan after chatting
     customer = db.relationship('Customer', backref='chat_conversations')
 
 class ChatMessage(db.Model):
@@ -661,4 +661,33 @@ def api_realtime_dashboard():
         
         return jsonify(realtime_data)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+# Gate scanning
+@admin_bp.route('/api/gates/scan', methods=['POST'])
+@stadium_owner_required
+def api_gate_scan():
+    """Verify a ticket scanned at a stadium gate, admitting or releasing its holder"""
+    from qr_generator import qr_generator
+
+    data = request.get_json(silent=True) or {}
+    token = data.get('token')
+    stadium_id = data.get('stadium_id')
+    direction = data.get('direction', 'entry')
+    if not token or not data.get('gate'):
+        return jsonify({'error': 'token and gate are required'}), 400
+    if isinstance(stadium_id, bool) or not isinstance(stadium_id, int):
+        return jsonify({'error': 'stadium_id must be an integer'}), 400
+    if direction not in ('entry', 'exit'):
+        return jsonify({'error': "direction must be 'entry' or 'exit'"}), 400
+
+    if current_user.role != 'admin':
+        administered = {sa.stadium_id for sa in StadiumAdmin.query.filter_by(admin_id=current_user.id).all()}
+        if stadium_id not in administered:
+            return jsonify({'error': 'Access denied'}), 403
+
+    result = qr_generator.verify_qr_code(
+        token, ip_address=request.remote_addr, user_agent=request.user_agent.string,
+        stadium_id=stadium_id, gate=str(data['gate']), section=data.get('section'), direction=direction
+    )
+    return jsonify(result)
@@ -1,11 +1,34 @@
 from flask import Blueprint, jsonify, current_app
 import asyncio
+from single_flight import SingleFlightTimeout
 
 bbl_bp = Blueprint('bbl', __name__, url_prefix='/api/bbl')
 
 @bbl_bp.route('/live-scores', methods=['GET'])
 def live_scores():
     bbl_service = current_app.bbl_data_service
+    if not bbl_service:
+        return jsonify({
+            'success': False,
+            'error': 'Supabase BBL service not available. Please check your Supabase configuration.'
+        }), 503
+    
+    try:
+        live_scores = asyncio.run(bbl_service.get_live_scores())
+        return jsonify({
+            'success': True,
+            'live_scores': live_scores
+        })
+    except SingleFlightTimeout as e:
+        return jsonify({
+            'success': False,
+            'error': f'Live scores are taking too long to load: {str(e)}'
+        }), 504
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Failed to fetch live scores from Supabase: {str(e)}'
+        }), 500
 
 @bbl_bp.route('/standings', methods=['GET'])
 def standings():
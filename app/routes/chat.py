@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 import uuid
-from app.services.chatbot_service import get_chatbot_response, detect_user_intent, get_chat_suggestions
+from app.services.chatbot_service import (get_chatbot_response, detect_user_intent, get_chat_suggestions,
+                                          record_chat_satisfaction)
 
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
 
@@ -25,4 +26,21 @@ def get_suggestions():
     customer_id = session.get('customer_id')
     query_type = request.args.get('query_type', 'general')
     suggestions = get_chat_suggestions(customer_id, query_type)
-    return jsonify({'suggestions': suggestions})
\ No newline at end of file
+    return jsonify({'suggestions': suggestions})
+
+@chat_bp.route('/rating', methods=['POST'])
+def rate_chat():
+    customer_id = session.get('customer_id')
+    session_id = session.get('chat_session_id')
+    rating = (request.json or {}).get('rating')
+
+    if not customer_id:
+        return jsonify({'error': 'Login required'}), 401
+    if not session_id:
+        return jsonify({'error': 'No chat to rate'}), 400
+    if isinstance(rating, bool) or not isinstance(rating, (int, float)) or not 1 <= rating <= 5:
+        return jsonify({'error': 'Rating must be between 1 and 5'}), 400
+
+    if not record_chat_satisfaction(customer_id, session_id, rating):
+        return jsonify({'error': 'Rating could not be saved'}), 400
+    return jsonify({'success': True})
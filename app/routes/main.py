@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, redirect, url_for, current_app, send_from_directory, jsonify, request, flash
+from flask import Blueprint, render_template, redirect, url_for, current_app, send_from_directory, jsonify, request, flash, abort, make_response
 import os
 from pathlib import Path
 from flask_login import current_user
@@ -111,6 +111,11 @@ def order_concession(concession_id: int):
         )
         db.session.add(order)
         db.session.commit()
+        try:
+            from app.services.customer_feature_service import customer_feature_service
+            customer_feature_service.record_order(order.customer_id, concession_id, order.total_amount)
+        except Exception:
+            pass
         flash('Order placed successfully. Proceed to payment from your Dashboard.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -345,6 +350,25 @@ def generate_qr():
     """QR generation page."""
     return render_template('generate_qr.html')
 
+@main_bp.route('/qr/<token>.png')
+def ticket_qr_image(token: str):
+    """Ticket QR image, rendered on first request and cached by token hash."""
+    from qr_generator import qr_generator
+    from qr_tokens import InvalidQRToken
+    try:
+        digest, png = qr_generator.get_ticket_qr_png(token)
+    except InvalidQRToken:
+        abort(404)
+    # A token's image never changes, so clients and CDNs may keep it forever
+    if request.if_none_match.contains(digest):
+        response = make_response('', 304)
+    else:
+        response = make_response(png)
+        response.mimetype = 'image/png'
+    response.set_etag(digest)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @main_bp.route('/analytics')
 def analytics():
     """Analytics dashboard."""
@@ -16,6 +16,7 @@ from .enhanced_booking_service import enhanced_booking_service
 from .performance_service import performance_service
 from .security_service import security_service
 from .live_cricket_service import live_cricket_service
+from .chat_log_service import chat_log_service
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -39,7 +40,8 @@ class ServiceManager:
                 ('enhanced_booking', enhanced_booking_service),
                 ('performance', performance_service),
                 ('security', security_service),
-                ('live_cricket', live_cricket_service)
+                ('live_cricket', live_cricket_service),
+                ('chat_logging', chat_log_service)
             ]
             
             for service_name, service in services_to_init:
@@ -119,7 +121,8 @@ __all__ = [
     'enhanced_booking_service',
     'performance_service',
     'security_service',
-    'live_cricket_service'
+    'live_cricket_service',
+    'chat_log_service'
 ]
 
 # Service initialization function for Flask app
@@ -4,6 +4,7 @@ from app.models import Customer
 from app.models.event_match_team import Event
 from datetime import datetime
 from flask import session
+import os
 import time
 import random
 from app.models.payment_models import Payment
@@ -95,10 +96,23 @@ def book_seat(seat_id, event_id, customer_id):
                 'amount': seat_price
             }
 
+            # Keep chatbot personalisation features current (best-effort)
+            try:
+                from app.services.customer_feature_service import customer_feature_service
+                customer_feature_service.record_booking(customer_id, getattr(event, 'stadium_id', None), seat_price)
+            except Exception:
+                pass
+
             # Send email/SMS notifications (best-effort)
             try:
-                from notification import send_booking_notifications
-                if customer:
+                if os.getenv('POST_BOOKING_WORKFLOW') == 'celery':
+                    # E-ticket, ticket QR codes and email run on the task queues
+                    from booking_workflow import start_post_booking_workflow, send_booking_sms
+                    start_post_booking_workflow([booking_data['booking_id']])
+                    if customer and getattr(customer, 'phone', None):
+                        send_booking_sms.delay(customer.phone, booking_data)
+                elif customer:
+                    from notification import send_booking_notifications
                     send_booking_notifications(customer.email, getattr(customer, 'phone', None), booking_data)
             except Exception as _notify_err:
                 # Non-fatal; continue
@@ -274,10 +288,23 @@ def capture_payment_and_create_booking(order_id, customer_id):
                 'amount': pending_booking['total_amount']
             }
 
+            # Keep chatbot personalisation features current (best-effort)
+            try:
+                from app.services.customer_feature_service import customer_feature_service
+                customer_feature_service.record_booking(customer_id, getattr(event, 'stadium_id', None), pending_booking['total_amount'])
+            except Exception:
+                pass
+
             # Send email/SMS notifications (best-effort)
             try:
-                from notification import send_booking_notifications
-                if customer:
+                if os.getenv('POST_BOOKING_WORKFLOW') == 'celery':
+                    # E-ticket, ticket QR codes and email run on the task queues
+                    from booking_workflow import start_post_booking_workflow, send_booking_sms
+                    start_post_booking_workflow([booking_data['booking_id']])
+                    if customer and getattr(customer, 'phone', None):
+                        send_booking_sms.delay(customer.phone, booking_data)
+                elif customer:
+                    from notification import send_booking_notifications
                     send_booking_notifications(customer.email, getattr(customer, 'phone', None), booking_data)
             except Exception as _notify_err:
                 # Non-fatal; continue
@@ -0,0 +1,244 @@
+"""
+Chat Interaction Logging Service for CricVerse
+Buffers chatbot interactions in-process and writes them to the database in batches
+Big Bash League Cricket Platform
+"""
+
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Thread, Condition
+from typing import Dict, List, Any, Optional, Callable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+
+
+@dataclass
+class ChatInteraction:
+    """A single user/assistant exchange waiting to be persisted"""
+    session_id: Optional[str]
+    customer_id: Optional[int]
+    user_message: str
+    ai_response: str
+    tokens_used: int = 0
+    intent: Optional[str] = None
+    confidence: Optional[float] = None
+    ip_address: str = 'unknown'
+    user_agent: str = 'unknown'
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+class ChatLogService:
+    """Bounded in-process queue of chat interactions flushed to the DB by size or time"""
+
+    def __init__(self, max_queue_size: int = 10000, batch_size: int = 200, flush_interval: float = 1.0,
+                 enqueue_timeout: float = 0.005, drop_policy: str = DROP_OLDEST,
+                 writer: Optional[Callable[[List[ChatInteraction]], None]] = None):
+        if drop_policy not in (DROP_NEWEST, DROP_OLDEST):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.drop_policy = drop_policy
+        self.writer = writer or self._write_to_database
+        self.app = None
+        self.flush_listeners: List[Callable[[List[ChatInteraction]], None]] = []
+        self.initialized = False
+        self._queue = deque()
+        self._condition = Condition()
+        self._worker = None
+        self._running = False
+        self.stats = {
+            'enqueued': 0,
+            'dropped': 0,
+            'written': 0,
+            'batches': 0,
+            'flush_errors': 0,
+            'last_flush_ms': 0.0
+        }
+
+    def init_app(self, app):
+        """Bind the Flask app used for database access and start the flush worker"""
+        self.app = app
+        self.start()
+        self.initialized = True
+        logger.info("Chat log service initialized successfully")
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._worker = Thread(target=self._flush_loop, name='chat-log-flusher', daemon=True)
+        self._worker.start()
+
+    def shutdown(self):
+        """Stop the worker and write whatever is still queued"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._worker:
+            self._worker.join(timeout=self.flush_interval * 2)
+            self._worker = None
+        self.flush()
+
+    def add_flush_listener(self, listener: Callable[[List[ChatInteraction]], None]):
+        """Register a callback invoked with every batch after it is written"""
+        self.flush_listeners.append(listener)
+
+    def enqueue(self, interaction: ChatInteraction) -> bool:
+        """Queue an interaction; returns False if it was dropped under backpressure"""
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                # Give the flusher a brief chance to drain before applying the drop policy
+                self._condition.notify_all()
+                self._condition.wait_for(lambda: len(self._queue) < self.max_queue_size,
+                                         timeout=self.enqueue_timeout)
+            if len(self._queue) >= self.max_queue_size:
+                self.stats['dropped'] += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                self._queue.popleft()
+            self._queue.append(interaction)
+            self.stats['enqueued'] += 1
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+        return True
+
+    def flush(self) -> int:
+        """Synchronously write everything currently queued; returns the number written"""
+        written = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return written
+            self._write_batch(batch)
+            written += len(batch)
+
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {**self.stats, 'queue_depth': len(self._queue), 'running': self._running}
+
+    def health_check(self) -> Dict[str, Any]:
+        stats = self.get_stats()
+        return {'status': 'healthy' if stats['running'] else 'unhealthy', **stats}
+
+    # Internal helpers
+    def _take_batch(self) -> List[ChatInteraction]:
+        with self._condition:
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(count)]
+            if batch:
+                self._condition.notify_all()
+            return batch
+
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                if self._running and len(self._queue) < self.batch_size:
+                    self._condition.wait(timeout=self.flush_interval)
+                if not self._running:
+                    return
+            batch = self._take_batch()
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, batch: List[ChatInteraction]):
+        start_time = time.time()
+        try:
+            self.writer(batch)
+        except Exception as e:
+            self._record_flush(start_time, flush_errors=1)
+            logger.warning(f"Could not write chat log batch of {len(batch)} (database tables may not exist or other error): {e}")
+            return
+        self._record_flush(start_time, written=len(batch), batches=1)
+
+        for listener in self.flush_listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                logger.warning(f"Chat log flush listener failed: {e}")
+
+    def _record_flush(self, start_time: float, **counts: int):
+        # The flusher thread and synchronous flush() calls both write these
+        with self._condition:
+            for key, count in counts.items():
+                self.stats[key] += count
+            self.stats['last_flush_ms'] = round((time.time() - start_time) * 1000, 2)
+
+    def _write_to_database(self, batch: List[ChatInteraction]):
+        """Upsert conversations and bulk insert messages for a batch in one transaction"""
+        if self.app is None:
+            raise RuntimeError("Chat log service has no Flask app bound")
+
+        with self.app.app_context():
+            from app import db
+            from app.models import ChatConversation, ChatMessage
+
+            conversation_columns = set(ChatConversation.__table__.columns.keys())
+            message_columns = set(ChatMessage.__table__.columns.keys())
+
+            session_ids = {item.session_id for item in batch if item.session_id}
+            conversations = {}
+            if session_ids:
+                conversations = {
+                    conv.session_id: conv
+                    for conv in ChatConversation.query.filter(ChatConversation.session_id.in_(session_ids)).all()
+                }
+
+            for item in batch:
+                if item.session_id and item.session_id not in conversations:
+                    values = {
+                        'customer_id': item.customer_id,
+                        'session_id': item.session_id,
+                        'ip_address': item.ip_address,
+                        'user_agent': item.user_agent,
+                        'message_count': 0
+                    }
+                    conversation = ChatConversation(**{k: v for k, v in values.items() if k in conversation_columns})
+                    db.session.add(conversation)
+                    conversations[item.session_id] = conversation
+            db.session.flush()  # Assign IDs to new conversations
+
+            rows = []
+            for item in batch:
+                conversation = conversations.get(item.session_id)
+                if conversation is None:
+                    continue
+                for sender_type, message in (('user', item.user_message), ('bot', item.ai_response)):
+                    values = {
+                        'conversation_id': conversation.id,
+                        'sender_type': sender_type,
+                        'message': message,
+                        'intent': item.intent,
+                        'confidence_score': item.confidence,
+                        'tokens_used': item.tokens_used if sender_type == 'bot' else None,
+                        'created_at': item.created_at
+                    }
+                    rows.append({k: v for k, v in values.items() if k in message_columns})
+                conversation.message_count = (conversation.message_count or 0) + 2
+                if 'last_activity' in conversation_columns:
+                    conversation.last_activity = item.created_at
+
+            try:
+                if rows:
+                    db.session.bulk_insert_mappings(ChatMessage, rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+
+# Global chat log service instance
+chat_log_service = ChatLogService()
@@ -9,9 +9,13 @@ import uuid
 from datetime import datetime, date, timedelta
 import google.generativeai as genai
 import json
-from flask import request, current_app
+from flask import request, current_app, has_request_context
 import asyncio
+from contextlib import nullcontext
 from supabase_bbl_integration import BBLDataService
+from app.services.conversation_memory_service import conversation_memory_service
+from app.services.chat_log_service import chat_log_service, ChatInteraction
+from app.services.customer_feature_service import customer_feature_service, TTLCache
 
 from dotenv import load_dotenv
 
@@ -63,17 +67,20 @@ class CricVerseChatbot:
         self.api_key = os.getenv('GEMINI_API_KEY')
         # BBL live data service with Supabase integration
         try:
-            self.bbl_service = BBLDataService()
+            self.bbl_service = BBLDataService(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_ANON_KEY'))
         except (ValueError, ConnectionError) as e:
             logger.warning(f"⚠️ BBL service not available: {e}")
             self.bbl_service = None
         
+        # Optional per-stage timing hook used by the offline benchmark harness
+        self.stage_recorder = None
+        
         # Enhanced conversation context tracking
         self.conversation_context = {}
         self.user_preferences = {}
-        self.user_profiles = {}  # Cache user profiles for better performance
         self.database_cache = {}  # Cache frequently accessed data
         self.cache_timeout = 300  # 5 minutes cache timeout
+        self.user_profiles = TTLCache(max_entries=5000, ttl=self.cache_timeout)  # Bounded user profile cache
         
         # Enhanced system prompt with comprehensive cricket expertise and personalization
         self.system_prompt = """You are CricVerse Assistant, an intelligent AI specialized in Australian Big Bash League (BBL) cricket venues with advanced personalization capabilities.
@@ -134,13 +141,11 @@ Always prioritize database information over general knowledge, use personalizati
                 from app import db, Customer, Team, Booking
                 from app.models import CustomerProfile, ChatConversation, ChatMessage
                 
-                # Check cache first
+                # Check cache first (entries expire after cache_timeout)
                 cache_key = f"user_profile_{customer_id}"
-                if cache_key in self.user_profiles:
-                    profile_data = self.user_profiles[cache_key]
-                    # Check if cache is still valid (5 minutes)
-                    if datetime.now().timestamp() - profile_data.get('cached_at', 0) < self.cache_timeout:
-                        return profile_data['data']
+                cached_profile = self.user_profiles.get(cache_key)
+                if cached_profile is not None:
+                    return cached_profile
                 
                 customer = Customer.query.get(customer_id)
                 if not customer:
@@ -235,10 +240,7 @@ Always prioritize database information over general knowledge, use personalizati
                     logger.warning(f"Enhanced models not available for conversation analysis or error: {e}")
                 
                 # Cache the profile
-                self.user_profiles[cache_key] = {
-                    'data': profile,
-                    'cached_at': datetime.now().timestamp()
-                }
+                self.user_profiles.set(cache_key, profile)
                 
                 return profile
                 
@@ -271,21 +273,31 @@ Always prioritize database information over general knowledge, use personalizati
                 original_context['personalized_offers'] = self.get_personalized_offers(customer_id, user_profile)
                 original_context['loyalty_benefits'] = self.get_loyalty_benefits(user_profile)
                     
-                # Enhance stadiums with user preference scores
-                if 'stadiums' in original_context:
-                    for stadium in original_context['stadiums']:
-                        stadium['user_visited'] = self.has_user_visited_stadium(customer_id, stadium['id'])
-                        # Need to convert dict to object for calculate_stadium_preference_score
-                        StadiumObj = type('Stadium', (object,), stadium)
-                        stadium['user_preference_score'] = self.calculate_stadium_preference_score(user_profile, StadiumObj())
+                # Score all candidates against the customer's precomputed features (no per-item queries)
+                features = customer_feature_service.get_features(customer_id)
+                if features:
+                    # Enhance stadiums with user preference scores
+                    if 'stadiums' in original_context:
+                        stadium_scores = customer_feature_service.score_stadiums(features, original_context['stadiums'])
+                        for stadium, (visited, score) in zip(original_context['stadiums'], stadium_scores):
+                            stadium['user_visited'] = visited
+                            stadium['user_preference_score'] = score
                     
-                # Enhance matches with user interest scores
-                if 'matches' in original_context:
-                    for match in original_context['matches']:
-                        # Need to convert dict to object for is_favorite_team_match
-                        EventObj = type('Event', (object,), {'home_team_id': match.get('home_team_id'), 'away_team_id': match.get('away_team_id')})
-                        match['is_favorite_team'] = self.is_favorite_team_match(user_profile, EventObj())
-                        match['user_interest_score'] = 0.8 if match['is_favorite_team'] else 0.5
+                    # Enhance matches with user interest scores
+                    if 'matches' in original_context:
+                        match_scores = customer_feature_service.score_matches(features, original_context['matches'])
+                        for match, (is_favorite, interest) in zip(original_context['matches'], match_scores):
+                            match['is_favorite_team'] = is_favorite
+                            match['user_interest_score'] = interest
+                    
+                    # Rank menu items for personalized recommendations
+                    if original_context.get('menu_items'):
+                        item_scores = customer_feature_service.score_menu_items(features, original_context['menu_items'])
+                        ranked = sorted(zip(item_scores, original_context['menu_items']), key=lambda pair: pair[0], reverse=True)
+                        original_context['personalized_recommendations'] = [
+                            {'name': item['name'], 'price': item['price'], 'recommendation_score': score}
+                            for score, item in ranked[:5]
+                        ]
             
             # Add live BBL context (for all users; uses mock when Supabase not configured)
             bbl_context = self.get_bbl_live_context(message_lower)
@@ -313,16 +325,28 @@ Always prioritize database information over general knowledge, use personalizati
             wants_performers = any(w in message_lower for w in ['top', 'performer', 'performers', 'runs', 'wickets'])
             wants_teams = any(w in message_lower for w in ['team', 'teams'])
 
+            # One event loop for all datasets; concurrent fans asking the same
+            # thing share the in-flight Supabase fetches inside BBLDataService
+            fetches = {}
             if wants_scores:
-                ctx['live_scores'] = asyncio.run(self.bbl_service.get_live_scores())
+                fetches['live_scores'] = self.bbl_service.get_live_scores
             if wants_standings:
-                ctx['standings'] = asyncio.run(self.bbl_service.get_standings())
+                fetches['standings'] = self.bbl_service.get_standings
             if wants_performers:
-                tp = asyncio.run(self.bbl_service.get_top_performers())
-                ctx['top_runs'] = tp.get('top_runs', [])
-                ctx['top_wickets'] = tp.get('top_wickets', [])
+                fetches['top_performers'] = self.bbl_service.get_top_performers
             if wants_teams:
-                ctx['teams'] = asyncio.run(self.bbl_service.get_teams())
+                fetches['teams'] = self.bbl_service.get_teams
+
+            if fetches:
+                async def fetch_all():
+                    return await asyncio.gather(*(fetch() for fetch in fetches.values()))
+
+                results = dict(zip(fetches, asyncio.run(fetch_all())))
+                tp = results.pop('top_performers', None)
+                ctx.update(results)
+                if tp is not None:
+                    ctx['top_runs'] = tp.get('top_runs', [])
+                    ctx['top_wickets'] = tp.get('top_wickets', [])
 
         except Exception as e:
             logger.error(f"❌ BBL live context fetch failed from Supabase: {e}")
@@ -331,6 +355,19 @@ Always prioritize database information over general knowledge, use personalizati
         
         return ctx
     
+    def _event_schedule(self, event):
+        """Start time, venue and team names of an Event row as the chat context shows them"""
+        if event is None:
+            return {'match_date': 'TBD', 'venue': 'TBD', 'home_team': 'TBD', 'away_team': 'TBD'}
+        starts = datetime.combine(event.event_date, event.start_time) if event.event_date and event.start_time else None
+        return {
+            'match_date': starts.strftime('%Y-%m-%d %H:%M') if starts else
+                          event.event_date.strftime('%Y-%m-%d') if event.event_date else 'TBD',
+            'venue': event.stadium.name if event.stadium else 'TBD',
+            'home_team': event.home_team.team_name if event.home_team else 'TBD',
+            'away_team': event.away_team.team_name if event.away_team else 'TBD'
+        }
+    
     def get_original_database_context(self, user_message):
         """Original database context method - kept as fallback"""
         with current_app.app_context():
@@ -353,7 +390,7 @@ Always prioritize database information over general knowledge, use personalizati
                             'name': stadium.name,
                             'location': stadium.location,
                             'capacity': stadium.capacity,
-                            'facilities': stadium.facilities,
+                            'facilities': getattr(stadium, 'facilities', stadium.description),
                             'parking_info': getattr(stadium, 'parking_info', 'Parking available on-site'),
                             'accessibility': getattr(stadium, 'accessibility_features', 'Full accessibility services available'),
                             'public_transport': getattr(stadium, 'public_transport', 'Multiple transport options available'),
@@ -383,8 +420,8 @@ Always prioritize database information over general knowledge, use personalizati
                         concession_info = {
                             'id': concession.id,
                             'name': concession.name,
-                            'type': concession.type,
-                            'location': concession.location,
+                            'type': concession.category,
+                            'location': concession.location_zone,
                             'operating_hours': getattr(concession, 'operating_hours', 'Match day hours'),
                             'description': getattr(concession, 'description', ''),
                             'dietary_options': getattr(concession, 'dietary_options', 'Various dietary options available'),
@@ -412,6 +449,7 @@ Always prioritize database information over general knowledge, use personalizati
                             'dietary_info': getattr(item, 'dietary_info', ''),
                             'availability': getattr(item, 'availability', 'Available match days'),
                             'concession_id': item.concession_id,
+                            'is_vegetarian': bool(getattr(item, 'is_vegetarian', False)),
                             'calories': getattr(item, 'calories', None),
                             'ingredients': getattr(item, 'ingredients', []),
                             'allergens': getattr(item, 'allergens', []),
@@ -426,16 +464,17 @@ Always prioritize database information over general knowledge, use personalizati
                 
                 # Get comprehensive match and event data
                 if any(word in message_lower for word in ['match', 'game', 'fixture', 'schedule', 'ticket', 'book', 'buy', 'event', 'when', 'date', 'time', 'weather', 'forecast']):
-                    matches = Match.query.filter(Match.match_date >= datetime.now()).order_by(Match.match_date).limit(15).all()
+                    matches = Match.query.join(Event, Match.event_id == Event.id).filter(
+                        Event.event_date >= date.today()
+                    ).order_by(Event.event_date, Event.start_time).limit(15).all()
                     context_data['matches'] = []
                     for match in matches:
                         match_info = {
                             'id': match.id,
-                            'home_team': match.home_team,
-                            'away_team': match.away_team,
-                            'match_date': match.match_date.strftime('%Y-%m-%d %H:%M') if match.match_date else 'TBD',
-                            'venue': match.venue,
-                            'ticket_price': float(match.ticket_price) if match.ticket_price else None,
+                            'home_team_id': getattr(match, 'home_team_id', None),
+                            'away_team_id': getattr(match, 'away_team_id', None),
+                            **self._event_schedule(match.event),
+                            'ticket_price': None,
                             'status': getattr(match, 'status', 'Scheduled'),
                             'tickets_available': getattr(match, 'tickets_available', True),
                             'match_type': getattr(match, 'match_type', 'Regular Season'),
@@ -457,16 +496,16 @@ Always prioritize database information over general knowledge, use personalizati
                         context_data['matches'].append(match_info)
                     
                     # Get special events with enhanced details
-                    events = Event.query.filter(Event.event_date >= datetime.now()).order_by(Event.event_date).limit(8).all()
+                    events = Event.query.filter(Event.event_date >= date.today()).order_by(Event.event_date, Event.start_time).limit(8).all()
                     context_data['events'] = []
                     for event in events:
                         event_info = {
                             'id': event.id,
-                            'name': event.name,
-                            'event_date': event.event_date.strftime('%Y-%m-%d %H:%M') if event.event_date else 'TBD',
-                            'venue': event.venue,
+                            'name': event.event_name,
+                            'event_date': self._event_schedule(event)['match_date'],
+                            'venue': self._event_schedule(event)['venue'],
                             'description': getattr(event, 'description', ''),
-                            'ticket_price': float(event.ticket_price) if event.ticket_price else None,
+                            'ticket_price': None,
                             'category': getattr(event, 'category', 'Special Event'),
                             'capacity': getattr(event, 'capacity', 'Limited seating'),
                             'age_restriction': getattr(event, 'age_restriction', 'All ages welcome'),
@@ -488,7 +527,7 @@ Always prioritize database information over general knowledge, use personalizati
                     for team in teams:
                         team_info = {
                             'id': team.id,
-                            'name': team.name,
+                            'name': team.team_name,
                             'city': getattr(team, 'city', ''),
                             'home_stadium': getattr(team, 'home_stadium', ''),
                             'colors': getattr(team, 'colors', ''),
@@ -652,7 +691,7 @@ Always prioritize database information over general knowledge, use personalizati
                     if user_context_available:
                         try:
                             # Get current bookings and availability
-                            bookings = Booking.query.order_by(Booking.created_at.desc()).limit(50).all()
+                            bookings = Booking.query.order_by(Booking.booking_date.desc()).limit(50).all()
                             context_data['booking_data'] = []
                             
                             for booking in bookings:
@@ -665,7 +704,7 @@ Always prioritize database information over general knowledge, use personalizati
                                     'total_amount': getattr(booking, 'total_amount', 0),
                                     'booking_status': getattr(booking, 'status', 'confirmed'),
                                     'payment_status': getattr(booking, 'payment_status', 'pending'),
-                                    'booking_date': getattr(booking, 'created_at', datetime.now()).strftime('%Y-%m-%d %H:%M'),
+                                    'booking_date': (booking.booking_date or datetime.now()).strftime('%Y-%m-%d %H:%M'),
                                     'special_requests': getattr(booking, 'special_requests', ''),
                                     'discount_applied': getattr(booking, 'discount_applied', 0),
                                     'booking_reference': getattr(booking, 'booking_reference', ''),
@@ -711,23 +750,23 @@ Always prioritize database information over general knowledge, use personalizati
                                 context_data['real_time_availability'].append(availability_info)
                             
                             # Get upcoming events with detailed booking info
-                            upcoming_events = Event.query.filter(Event.event_date >= datetime.now()).order_by(Event.event_date).limit(10).all()
+                            upcoming_events = Event.query.filter(Event.event_date >= date.today()).order_by(Event.event_date, Event.start_time).limit(10).all()
                             context_data['bookable_events'] = []
                             
                             for event in upcoming_events:
                                 event_booking_info = {
                                     'event_id': event.id,
-                                    'event_name': event.name,
-                                    'event_date': event.event_date.strftime('%Y-%m-%d %H:%M') if event.event_date else 'TBD',
-                                    'venue': event.venue,
+                                    'event_name': event.event_name,
+                                    'event_date': self._event_schedule(event)['match_date'],
+                                    'venue': self._event_schedule(event)['venue'],
                                     'tickets_on_sale': getattr(event, 'tickets_on_sale', True),
                                     'sale_start_date': getattr(event, 'sale_start_date', datetime.now()).strftime('%Y-%m-%d'),
                                     'sale_end_date': getattr(event, 'sale_end_date', event.event_date).strftime('%Y-%m-%d') if event.event_date else 'TBD',
                                     'total_tickets': getattr(event, 'total_tickets', 1000),
                                     'tickets_sold': getattr(event, 'tickets_sold', 0),
                                     'tickets_remaining': getattr(event, 'total_tickets', 1000) - getattr(event, 'tickets_sold', 0),
-                                    'min_price': float(event.ticket_price) if event.ticket_price else 2000,
-                                    'max_price': getattr(event, 'max_ticket_price', float(event.ticket_price) * 3 if event.ticket_price else 6000),
+                                    'min_price': self.get_min_ticket_price(event.id) or 2000,
+                                    'max_price': getattr(event, 'max_ticket_price', 6000),
                                     'early_bird_available': getattr(event, 'early_bird_available', True),
                                     'early_bird_discount': getattr(event, 'early_bird_discount', 20),
                                     'group_discounts': getattr(event, 'group_discounts', True),
@@ -744,16 +783,15 @@ Always prioritize database information over general knowledge, use personalizati
                                 context_data['bookable_events'].append(event_booking_info)
                             
                             # Get upcoming matches with booking details
-                            upcoming_matches = Match.query.filter(Match.match_date >= datetime.now()).order_by(Match.match_date).limit(10).all()
+                            upcoming_matches = Match.query.join(Event, Match.event_id == Event.id).filter(
+                                Event.event_date >= date.today()
+                            ).order_by(Event.event_date, Event.start_time).limit(10).all()
                             context_data['bookable_matches'] = []
                             
                             for match in upcoming_matches:
                                 match_booking_info = {
                                     'match_id': match.id,
-                                    'home_team': match.home_team,
-                                    'away_team': match.away_team,
-                                    'match_date': match.match_date.strftime('%Y-%m-%d %H:%M') if match.match_date else 'TBD',
-                                    'venue': match.venue,
+                                    **self._event_schedule(match.event),
                                     'tickets_available': getattr(match, 'tickets_available', True),
                                     'tickets_on_sale': getattr(match, 'tickets_on_sale', True),
                                     'sale_phase': getattr(match, 'sale_phase', 'general_sale'),  # presale, member_sale, general_sale
@@ -761,7 +799,7 @@ Always prioritize database information over general knowledge, use personalizati
                                     'member_priority_hours': getattr(match, 'member_priority_hours', 24),
                                     'dynamic_pricing': getattr(match, 'dynamic_pricing_enabled', True),
                                     'surge_pricing_active': getattr(match, 'surge_pricing_active', False),
-                                    'base_price': float(match.ticket_price) if match.ticket_price else 2000,
+                                    'base_price': self.get_min_ticket_price(match.event_id) or 2000,
                                     'current_price_multiplier': getattr(match, 'current_price_multiplier', 1.0),
                                     'predicted_sellout': getattr(match, 'predicted_sellout', False),
                                     'high_demand_match': getattr(match, 'is_high_demand', False),
@@ -792,7 +830,8 @@ Always prioritize database information over general knowledge, use personalizati
                 session_id = str(uuid.uuid4())
             
             # Check if this is a booking request
-            booking_intent = self.extract_booking_intent(user_message)
+            with self._stage('intent'):
+                booking_intent = self.extract_booking_intent(user_message)
             if any(word in user_message.lower() for word in ['book', 'buy', 'purchase', 'reserve']) and customer_id:
                 # Get database context for booking
                 db_context = self.get_database_context(user_message, customer_id)
@@ -847,7 +886,8 @@ Need help with anything else?"""
                             response += f"• {step}\n"
                     
                     # Log the interaction
-                    self.log_interaction(user_message, response, customer_id, session_id, 0)
+                    with self._stage('logging'):
+                        self.log_interaction(user_message, response, customer_id, session_id, 0)
                     
                     return {
                         'response': response,
@@ -857,84 +897,43 @@ Need help with anything else?"""
                         'booking_data': booking_result
                     }
             
-            # Get enhanced database context for the query with personalization
-            db_context = self.get_database_context(user_message, customer_id)
-            
-            # Get user profile for personalization
-            user_profile = self.get_user_profile(customer_id) if customer_id else {}
-            
-            # Get conversation history with enhanced context
-            conversation_history = []
-            if customer_id and session_id:
-                conversation_history = self.get_enhanced_conversation_context(customer_id, session_id)
-            
-            # Build enhanced prompt with personalization
-            prompt_parts = [self.system_prompt]
-            
-            # Add user profile context
-            if user_profile:
-                profile_context = f"\nUser Profile Context:\n"
-                profile_context += f"- Name: {user_profile.get('name', 'Guest')}\n"
-                profile_context += f"- Membership Level: {user_profile.get('membership_level', 'Basic')}\n"
-                if user_profile.get('favorite_team'):
-                    profile_context += f"- Favorite Team: {user_profile['favorite_team']['name']}\n"
-                profile_context += f"- Total Bookings: {user_profile.get('total_bookings', 0)}\n"
-                profile_context += f"- Total Spent: ₹{user_profile.get('total_spent', 0):,.2f}\n"
-                
-                if user_profile.get('booking_patterns'):
-                    bp = user_profile['booking_patterns']
-                    profile_context += f"- Booking Patterns: Avg ₹{bp.get('average_booking_amount', 0):.0f} per booking\n"
-                
-                prompt_parts.append(profile_context)
-            
-            if db_context:
-                # Add personalized recommendations if available
-                if db_context.get('personalized_recommendations'):
-                    rec_context = "\nPersonalized Recommendations Based on User History:\n"
-                    for rec in db_context['personalized_recommendations'][:3]:
-                        rec_context += f"- {rec['name']}: ₹{rec['price']} (Score: {rec['recommendation_score']:.1f})\n"
-                    prompt_parts.append(rec_context)
-                
-                # Add user's recent activity if available
-                if db_context.get('user_booking_history'):
-                    activity_context = "\nUser's Recent Activity:\n"
-                    for booking in db_context['user_booking_history'][:3]:
-                        activity_context += f"- {booking['booking_date']}: ₹{booking['total_amount']} ({booking['seats_count']} seats)\n"
-                    prompt_parts.append(activity_context)
-                
-                prompt_parts.append(f"\nRelevant database information for this query:\n{json.dumps(db_context, indent=2)}")
-            
-            # Add conversation history with enhanced analysis
-            if conversation_history:
-                prompt_parts.append("\nRecent conversation with analysis:")
-                for msg in conversation_history[-6:]:
-                    role = "User" if msg["role"] == "user" else "Assistant" if msg["role"] == "assistant" else "System"
-                    prompt_parts.append(f"{role}: {msg['content']}")
-            
-            prompt_parts.append(f"\nUser: {user_message}")
-            prompt_parts.append("\nAssistant:")
+            with self._stage('db_context'):
+                # Get enhanced database context for the query with personalization
+                db_context = self.get_database_context(user_message, customer_id)
+                
+                # Get user profile for personalization
+                user_profile = self.get_user_profile(customer_id) if customer_id else {}
+                
+                # Get conversation history with enhanced context
+                conversation_history = []
+                if customer_id and session_id:
+                    conversation_history = self.get_enhanced_conversation_context(customer_id, session_id)
             
-            prompt_text = "\n".join(prompt_parts)
+            with self._stage('prompt_build'):
+                prompt_text = self.build_prompt(user_message, user_profile, db_context, conversation_history)
             
             # Generate response using Gemini
             if gemini_available:
                 try:
-                    genai.configure(api_key=self.api_key)
-                    model = genai.GenerativeModel(self.model)
-                    response = model.generate_content(prompt_text)
-                    ai_response = response.text.strip()
+                    with self._stage('model'):
+                        genai.configure(api_key=self.api_key)
+                        model = genai.GenerativeModel(self.model)
+                        response = model.generate_content(prompt_text)
+                        ai_response = response.text.strip()
                     tokens_used = len(prompt_text.split()) + len(ai_response.split())
                     
-                    # Enhance AI response with personalized features
-                    if customer_id and user_profile:
-                        ai_response = self.add_personalization_to_response(ai_response, user_profile, db_context)
-                    
-                    # Add booking capabilities if relevant
-                    if any(word in user_message.lower() for word in ['book', 'buy', 'purchase', 'reserve', 'ticket']):
-                        ai_response += self.add_booking_suggestions(db_context, customer_id)
+                    with self._stage('post_processing'):
+                        # Enhance AI response with personalized features
+                        if customer_id and user_profile:
+                            ai_response = self.add_personalization_to_response(ai_response, user_profile, db_context)
+                        
+                        # Add booking capabilities if relevant
+                        if any(word in user_message.lower() for word in ['book', 'buy', 'purchase', 'reserve', 'ticket']):
+                            ai_response += self.add_booking_suggestions(db_context, customer_id)
                     
                     # Log the interaction
-                    self.log_interaction(user_message, ai_response, customer_id, session_id, tokens_used)
+                    with self._stage('logging'):
+                        self.log_interaction(user_message, ai_response, customer_id, session_id, tokens_used)
                     
                     return {
                         'response': ai_response,
@@ -955,6 +954,63 @@ Need help with anything else?"""
             logger.error(f"Error generating response: {e}")
             return self.get_fallback_response(user_message, {})
 
+    def build_prompt(self, user_message, user_profile, db_context, conversation_history):
+        """Build the Gemini prompt with profile, database context and conversation history"""
+        # Build enhanced prompt with personalization
+        prompt_parts = [self.system_prompt]
+        
+        # Add user profile context
+        if user_profile:
+            profile_context = f"\nUser Profile Context:\n"
+            profile_context += f"- Name: {user_profile.get('name', 'Guest')}\n"
+            profile_context += f"- Membership Level: {user_profile.get('membership_level', 'Basic')}\n"
+            if user_profile.get('favorite_team'):
+                profile_context += f"- Favorite Team: {user_profile['favorite_team']['name']}\n"
+            profile_context += f"- Total Bookings: {user_profile.get('total_bookings', 0)}\n"
+            profile_context += f"- Total Spent: ₹{user_profile.get('total_spent', 0):,.2f}\n"
+            
+            if user_profile.get('booking_patterns'):
+                bp = user_profile['booking_patterns']
+                profile_context += f"- Booking Patterns: Avg ₹{bp.get('average_booking_amount', 0):.0f} per booking\n"
+            
+            prompt_parts.append(profile_context)
+        
+        if db_context:
+            # Add personalized recommendations if available
+            if db_context.get('personalized_recommendations'):
+                rec_context = "\nPersonalized Recommendations Based on User History:\n"
+                for rec in db_context['personalized_recommendations'][:3]:
+                    rec_context += f"- {rec['name']}: ₹{rec['price']} (Score: {rec['recommendation_score']:.1f})\n"
+                prompt_parts.append(rec_context)
+            
+            # Add user's recent activity if available
+            if db_context.get('user_booking_history'):
+                activity_context = "\nUser's Recent Activity:\n"
+                for booking in db_context['user_booking_history'][:3]:
+                    activity_context += f"- {booking['booking_date']}: ₹{booking['total_amount']} ({booking['seats_count']} seats)\n"
+                prompt_parts.append(activity_context)
+            
+            prompt_parts.append(f"\nRelevant database information for this query:\n{json.dumps(db_context, indent=2, default=str)}")
+        
+        # Add conversation history with enhanced analysis; the memory service
+        # already bounds it, and its summary comes first
+        if conversation_history:
+            prompt_parts.append("\nRecent conversation with analysis:")
+            for msg in conversation_history:
+                role = "User" if msg["role"] == "user" else "Assistant" if msg["role"] == "assistant" else "System"
+                prompt_parts.append(f"{role}: {msg['content']}")
+        
+        prompt_parts.append(f"\nUser: {user_message}")
+        prompt_parts.append("\nAssistant:")
+        
+        return "\n".join(prompt_parts)
+
+    def _stage(self, name):
+        """Time a response stage when a stage recorder is attached"""
+        if self.stage_recorder is None:
+            return nullcontext()
+        return self.stage_recorder.stage(name)
+
     def add_booking_suggestions(self, db_context, customer_id):
         """Add interactive booking suggestions to AI responses"""
         suggestions = "\n\n🎫 **Ready to Book?**\n"
@@ -1372,66 +1428,44 @@ What would you like to know about BBL cricket? I'm here to make your experience
 
     def get_enhanced_conversation_context(self, customer_id, session_id):
         """Get enhanced conversation history with user preferences and context"""
+        try:
+            # Cold sessions and profiles are loaded from the database once; every
+            # later turn is served from the bounded in-memory window.
+            if not conversation_memory_service.has_session(session_id):
+                conversation_memory_service.seed_session(
+                    session_id, customer_id, self.get_conversation_context(customer_id, session_id)
+                )
+            if customer_id and not conversation_memory_service.has_topic_profile(customer_id):
+                self.seed_topic_profile(customer_id)
+            
+            return conversation_memory_service.build_context(session_id, customer_id)
+            
+        except Exception as e:
+            logger.error(f"Error getting enhanced conversation context: {e}")
+            return []
+
+    def seed_topic_profile(self, customer_id, message_limit=200):
+        """Build the customer's topic profile and satisfaction from their stored chat history"""
         with current_app.app_context():
             try:
-                from app import db
                 from app.models import ChatConversation, ChatMessage
                 
-                # Get regular conversation context
-                conversation_history = self.get_conversation_context(customer_id, session_id)
+                rows = ChatMessage.query.join(ChatConversation).filter(
+                    ChatConversation.customer_id == customer_id,
+                    ChatMessage.sender_type == 'user'
+                ).order_by(ChatMessage.created_at.desc()).limit(message_limit).with_entities(ChatMessage.message).all()
                 
-                # Enhance with user preference analysis
-                try:
-                    
-                    # Get all conversations for this user to analyze patterns
-                    all_conversations = ChatConversation.query.filter_by(
-                        customer_id=customer_id
-                    ).order_by(ChatConversation.started_at.desc()).limit(10).all()
-                    
-                    # Analyze conversation patterns
-                    frequent_topics = {}
-                    interaction_style = 'casual'
-                    total_satisfaction = 0
-                    satisfaction_count = 0
-                    
-                    for conv in all_conversations:
-                        if conv.satisfaction_rating:
-                            total_satisfaction += conv.satisfaction_rating
-                            satisfaction_count += 1
-                        
-                        # Analyze messages for topics
-                        messages = ChatMessage.query.filter_by(
-                            conversation_id=conv.id,
-                            sender_type='user'
-                        ).all()
-                        
-                        for msg in messages:
-                            # Simple topic detection
-                            message_lower = msg.message.lower()
-                            if any(word in message_lower for word in ['book', 'ticket', 'reserve']):
-                                frequent_topics['booking'] = frequent_topics.get('booking', 0) + 1
-                            if any(word in message_lower for word in ['food', 'menu', 'eat']):
-                                frequent_topics['food'] = frequent_topics.get('food', 0) + 1
-                            if any(word in message_lower for word in ['team', 'player', 'match']):
-                                frequent_topics['teams'] = frequent_topics.get('teams', 0) + 1
-                            if any(word in message_lower for word in ['parking', 'drive']):
-                                frequent_topics['parking'] = frequent_topics.get('parking', 0) + 1
-                    
-                    # Add context analysis to conversation history
-                    if conversation_history:
-                        conversation_history.append({
-                            'role': 'system',
-                            'content': f"User Interaction Analysis: Frequent topics: {frequent_topics}, Average satisfaction: {total_satisfaction/satisfaction_count if satisfaction_count > 0 else 4.0:.1f}/5"
-                        })
-                    
-                except Exception as e:
-                    logger.warning(f"Enhanced models not available for conversation analysis or error: {e}")
+                ratings = [row[0] for row in ChatConversation.query.filter(
+                    ChatConversation.customer_id == customer_id,
+                    ChatConversation.satisfaction_rating.isnot(None)
+                ).with_entities(ChatConversation.satisfaction_rating).all()]
                 
-                return conversation_history
+                conversation_memory_service.seed_topic_profile(customer_id, (row[0] for row in rows), ratings)
                 
             except Exception as e:
-                logger.error(f"Error getting enhanced conversation context: {e}")
-                return []
+                logger.warning(f"Enhanced models not available for conversation analysis or error: {e}")
+                conversation_memory_service.seed_topic_profile(customer_id, [])
+
     def get_conversation_context(self, customer_id, session_id):
         """Get conversation history for context"""
         with current_app.app_context():
@@ -1468,78 +1502,47 @@ What would you like to know about BBL cricket? I'm here to make your experience
                 return []
 
     def log_interaction(self, user_message, ai_response, customer_id, session_id, tokens_used):
-        """Enhanced interaction logging with intelligent analysis"""
-        with current_app.app_context():
-            try:
-                from app import db
-                from app.models import ChatConversation, ChatMessage
-                enhanced_models_available = True
-            except ImportError:
-                logger.warning("Enhanced models not available, using simple logging")
-                enhanced_models_available = False
+        """Enhanced interaction logging with intelligent analysis (written to the DB in background batches)"""
+        conversation_memory_service.record_turn(session_id, customer_id, user_message, ai_response)
+        
+        try:
+            # Analyze user intent and extract metadata
+            intent = self.analyze_message_intent(user_message)
+            confidence = self.calculate_response_confidence(user_message, ai_response)
             
-            if enhanced_models_available:
-                try:
-                    # Get or create conversation
-                    conversation = ChatConversation.query.filter_by(
-                        customer_id=customer_id,
-                        session_id=session_id
-                    ).first()
-                    
-                    if not conversation:
-                        conversation = ChatConversation(
-                            customer_id=customer_id,
-                            session_id=session_id,
-                            ip_address=request.environ.get('REMOTE_ADDR', 'unknown'),
-                            user_agent=request.environ.get('HTTP_USER_AGENT', 'unknown')
-                        )
-                        db.session.add(conversation)
-                        db.session.flush()  # Get the ID
-                    
-                    # Analyze user intent and extract metadata
-                    intent = self.analyze_message_intent(user_message)
-                    confidence = self.calculate_response_confidence(user_message, ai_response)
-                    
-                    # Log user message with enhanced metadata
-                    user_msg = ChatMessage(
-                        conversation_id=conversation.id,
-                        sender_type='user',
-                        message=user_message,
-                        intent=intent,
-                        confidence_score=confidence
-                    )
-                    db.session.add(user_msg)
-                    
-                    # Log AI response with analysis
-                    ai_msg = ChatMessage(
-                        conversation_id=conversation.id,
-                        sender_type='bot',
-                        message=ai_response,
-                        intent=intent,
-                        confidence_score=confidence,
-                        tokens_used=tokens_used,
-                        response_time_ms=0  # Would be calculated in real implementation
-                    )
-                    db.session.add(ai_msg)
-                    
-                    # Update conversation metadata
-                    conversation.message_count = conversation.message_count + 2 if conversation.message_count else 2
-                    conversation.last_activity = datetime.utcnow()
-                    
-                    # Update user profile if available
-                    if customer_id:
-                        self.update_user_interaction_profile(customer_id, intent, user_message)
-                    
-                    db.session.commit()
-                    
-                    # Log for analytics
-                    logger.info(f"Enhanced chat logged - User: {customer_id}, Intent: {intent}, Confidence: {confidence:.2f}")
-                    
-                except Exception as e:
-                    logger.warning(f"Could not log interaction (database tables may not exist or other error): {e}")
-            else:
-                # Simple logging without enhanced models
-                logger.info(f"Chat interaction - User: {user_message[:100]}... | AI: {ai_response[:100]}...")
+            # Request details must be captured here; the flush worker runs outside the request
+            ip_address, user_agent = 'unknown', 'unknown'
+            if has_request_context():
+                ip_address = request.environ.get('REMOTE_ADDR', 'unknown')
+                user_agent = request.environ.get('HTTP_USER_AGENT', 'unknown')
+            
+            if chat_log_service.app is None:
+                chat_log_service.init_app(current_app._get_current_object())
+            
+            queued = chat_log_service.enqueue(ChatInteraction(
+                session_id=session_id,
+                customer_id=customer_id,
+                user_message=user_message,
+                ai_response=ai_response,
+                tokens_used=tokens_used,
+                intent=intent,
+                confidence=confidence,
+                ip_address=ip_address,
+                user_agent=user_agent
+            ))
+            
+            if not queued:
+                logger.warning(f"Chat log queue full, interaction dropped - User: {customer_id}, Intent: {intent}")
+            
+        except Exception as e:
+            logger.warning(f"Could not queue interaction for logging: {e}")
+            logger.info(f"Chat interaction - User: {user_message[:100]}... | AI: {ai_response[:100]}...")
+    
+    def on_interactions_logged(self, batch):
+        """Refresh interaction profiles once per customer for each written log batch, from their latest message"""
+        latest = {item.customer_id: item for item in batch if item.customer_id}
+        for customer_id, item in latest.items():
+            self.update_user_interaction_profile(customer_id, item.intent, item.user_message)
     
     def analyze_message_intent(self, message):
         """Analyze message to determine user intent"""
@@ -1602,9 +1605,7 @@ What would you like to know about BBL cricket? I'm here to make your experience
         try:
             # This would update user preferences based on interaction patterns
             # For now, just invalidate the cache to force refresh
-            cache_key = f"user_profile_{customer_id}"
-            if cache_key in self.user_profiles:
-                del self.user_profiles[cache_key]
+            self.user_profiles.pop(f"user_profile_{customer_id}")
         except Exception as e:
             logger.warning(f"Could not update user interaction profile: {e}")
 
@@ -1927,34 +1928,18 @@ What would you like to know about BBL cricket? I'm here to make your experience
     # Enhanced helper methods for personalization
     def has_user_visited_stadium(self, customer_id, stadium_id):
         """Check if user has visited a stadium before"""
-        if not customer_id:
-            return False
-        with current_app.app_context():
-            try:
-                from app import db, Booking, Event
-                booking = Booking.query.join(Event).filter(
-                    Booking.customer_id == customer_id,
-                    Event.stadium_id == stadium_id
-                ).first()
-                return booking is not None
-            except Exception as e:
-                logger.error(f"Error checking user stadium visit: {e}")
-                return False
+        features = customer_feature_service.get_features(customer_id)
+        return features.has_visited(stadium_id) if features else False
     
     def calculate_stadium_preference_score(self, user_profile, stadium):
         """Calculate user preference score for a stadium"""
-        score = 0.5  # Base score
-        
-        # Boost score if user has visited before
-        if user_profile.get('customer_id') and self.has_user_visited_stadium(user_profile['customer_id'], stadium.id):
-            score += 0.3
-        
-        # Boost score if favorite team plays there
-        if user_profile.get('favorite_team'):
-            if user_profile['favorite_team'].get('home_ground') == stadium.name:
+        features = customer_feature_service.get_features(user_profile.get('customer_id'))
+        if not features:
+            score = 0.5
+            if user_profile.get('favorite_team') and user_profile['favorite_team'].get('home_ground') == stadium.name:
                 score += 0.4
-        
-        return min(score, 1.0)
+            return min(score, 1.0)
+        return customer_feature_service.score_stadiums(features, [{'id': stadium.id, 'name': stadium.name}])[0][1]
     
     def get_real_time_wait_time(self, concession_id):
         """Get real-time wait time for a concession"""
@@ -2036,6 +2021,8 @@ What would you like to know about BBL cricket? I'm here to make your experience
 
 # Global instance of the chatbot
 cricverse_chatbot = CricVerseChatbot()
+# Interaction profiles are refreshed after log batches are written, off the response path
+chat_log_service.add_flush_listener(cricverse_chatbot.on_interactions_logged)
 
 # Lightweight, test-safe API expected by some tests
 def ask_gemini(message: str) -> str:
@@ -2079,6 +2066,41 @@ def get_chatbot_response(message, customer_id=None, session_id=None):
     """Main function for getting chatbot responses"""
     return cricverse_chatbot.generate_response(message, customer_id, session_id)
 
+def record_chat_satisfaction(customer_id, session_id, rating):
+    """Store a fan's 1-5 rating on their chat conversation and fold it into their topic profile
+    
+    Rating the same conversation again replaces the earlier rating. Returns
+    False when the conversation belongs to someone else or cannot be saved.
+    """
+    from app import db
+    from app.models import ChatConversation
+    
+    try:
+        conversation = ChatConversation.query.filter_by(session_id=session_id).first()
+        if conversation is None:
+            # Chat logs are written in batches; write this session's before rating it
+            chat_log_service.flush()
+            conversation = ChatConversation.query.filter_by(session_id=session_id).first()
+        if conversation is None:
+            conversation = ChatConversation(customer_id=customer_id, session_id=session_id, message_count=0)
+            db.session.add(conversation)
+        elif conversation.customer_id not in (None, customer_id):
+            return False
+        previous = conversation.satisfaction_rating
+        conversation.satisfaction_rating = rating
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error saving chat rating for session {session_id}: {e}")
+        return False
+    
+    if conversation_memory_service.has_topic_profile(customer_id):
+        conversation_memory_service.record_satisfaction(customer_id, rating, previous)
+    else:
+        # Seeding reads the stored ratings, this one included
+        cricverse_chatbot.seed_topic_profile(customer_id)
+    return True
+
 def detect_user_intent(message):
     """Simple intent detection, delegates to chatbot instance"""
     return cricverse_chatbot.analyze_message_intent(message)
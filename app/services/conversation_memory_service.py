@@ -0,0 +1,239 @@
+"""
+Conversation Memory Service for CricVerse
+Bounded per-session conversation windows, compacted summaries and incremental topic profiles
+Big Bash League Cricket Platform
+"""
+
+import logging
+from collections import OrderedDict, deque, Counter
+from threading import RLock
+from typing import Dict, List, Any, Optional, Iterable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Topic keywords used for fan interaction analysis
+TOPIC_KEYWORDS = {
+    'booking': ('book', 'ticket', 'reserve'),
+    'food': ('food', 'menu', 'eat'),
+    'teams': ('team', 'player', 'match'),
+    'parking': ('parking', 'drive'),
+}
+
+DEFAULT_SATISFACTION = 4.0
+
+
+def detect_topics(message: str) -> List[str]:
+    """Return the topics mentioned in a fan message"""
+    message_lower = (message or '').lower()
+    return [topic for topic, words in TOPIC_KEYWORDS.items()
+            if any(word in message_lower for word in words)]
+
+
+class SessionMemory:
+    """Rolling window of recent turns plus a compacted summary of older ones"""
+
+    __slots__ = ('customer_id', 'window', 'compacted_turns', 'compacted_topics', 'compacted_snippets')
+
+    def __init__(self, customer_id: Optional[int], summary_snippets: int):
+        self.customer_id = customer_id
+        self.window = deque()
+        self.compacted_turns = 0
+        self.compacted_topics = Counter()
+        self.compacted_snippets = deque(maxlen=summary_snippets)
+
+    def summary(self) -> Optional[str]:
+        """Describe the compacted part of the session in one line"""
+        if not self.compacted_turns:
+            return None
+        topics = ', '.join(f"{topic} ({count})" for topic, count in self.compacted_topics.most_common())
+        summary = f"Earlier in this session ({self.compacted_turns} messages): topics {topics or 'general chat'}"
+        if self.compacted_snippets:
+            summary += "; fan asked: " + " | ".join(self.compacted_snippets)
+        return summary
+
+
+class TopicProfile:
+    """Incrementally maintained topic frequencies and satisfaction for a customer"""
+
+    __slots__ = ('topics', 'satisfaction_total', 'satisfaction_count')
+
+    def __init__(self):
+        self.topics = Counter()
+        self.satisfaction_total = 0.0
+        self.satisfaction_count = 0
+
+    @property
+    def average_satisfaction(self) -> float:
+        if not self.satisfaction_count:
+            return DEFAULT_SATISFACTION
+        return self.satisfaction_total / self.satisfaction_count
+
+
+class ConversationMemoryService:
+    """In-process conversation memory with bounded windows per session"""
+
+    def __init__(self, window_size: int = 10, summary_snippets: int = 3,
+                 max_sessions: int = 5000, max_profiles: int = 20000, snippet_length: int = 80):
+        self.window_size = window_size
+        self.summary_snippets = summary_snippets
+        self.max_sessions = max_sessions
+        self.max_profiles = max_profiles
+        self.snippet_length = snippet_length
+        self._sessions: 'OrderedDict[str, SessionMemory]' = OrderedDict()
+        self._profiles: 'OrderedDict[int, TopicProfile]' = OrderedDict()
+        self._lock = RLock()
+        self.stats = {'turns_recorded': 0, 'messages_compacted': 0, 'sessions_evicted': 0}
+
+    # Session windows
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def seed_session(self, session_id: str, customer_id: Optional[int], messages: Iterable[Dict[str, str]]):
+        """Load an existing history (oldest first) into memory, compacting beyond the window"""
+        if not session_id:
+            return
+        with self._lock:
+            session = self._get_or_create_session(session_id, customer_id)
+            for message in messages:
+                self._append(session, message['role'], message['content'])
+
+    def record_turn(self, session_id: Optional[str], customer_id: Optional[int],
+                    user_message: str, ai_response: str):
+        """Record a user/assistant exchange and update the customer's topic profile"""
+        with self._lock:
+            if session_id:
+                session = self._get_or_create_session(session_id, customer_id)
+                self._append(session, 'user', user_message)
+                self._append(session, 'assistant', ai_response)
+            if customer_id:
+                self._get_or_create_profile(customer_id).topics.update(detect_topics(user_message))
+            self.stats['turns_recorded'] += 1
+
+    def get_window(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return list(session.window) if session else []
+
+    def forget_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    # Customer topic profiles
+    def has_topic_profile(self, customer_id: int) -> bool:
+        with self._lock:
+            return customer_id in self._profiles
+
+    def seed_topic_profile(self, customer_id: int, user_messages: Iterable[str],
+                           satisfaction_ratings: Iterable[float] = ()):
+        """Build a customer's profile once from stored history"""
+        with self._lock:
+            profile = self._get_or_create_profile(customer_id)
+            for message in user_messages:
+                profile.topics.update(detect_topics(message))
+            for rating in satisfaction_ratings:
+                if rating:
+                    profile.satisfaction_total += rating
+                    profile.satisfaction_count += 1
+
+    def record_satisfaction(self, customer_id: int, rating: float, previous: Optional[float] = None):
+        """Add a rating, or swap it in for ``previous`` when a conversation is rated again"""
+        with self._lock:
+            profile = self._get_or_create_profile(customer_id)
+            if previous is None:
+                profile.satisfaction_total += rating
+                profile.satisfaction_count += 1
+            else:
+                profile.satisfaction_total += rating - previous
+
+    def get_topic_profile(self, customer_id: int) -> Dict[str, Any]:
+        with self._lock:
+            profile = self._profiles.get(customer_id)
+            if not profile:
+                return {'frequent_topics': {}, 'average_satisfaction': DEFAULT_SATISFACTION}
+            return {
+                'frequent_topics': dict(profile.topics),
+                'average_satisfaction': round(profile.average_satisfaction, 1)
+            }
+
+    # Context assembly
+    def build_context(self, session_id: str, customer_id: Optional[int] = None) -> List[Dict[str, str]]:
+        """Assemble prompt context from the summary, window and profile (bounded by window size)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session or not (session.window or session.compacted_turns):
+                return []
+
+            context = []
+            summary = session.summary()
+            if summary:
+                context.append({'role': 'system', 'content': summary})
+            context.extend(session.window)
+
+            if customer_id:
+                profile = self.get_topic_profile(customer_id)
+                context.append({
+                    'role': 'system',
+                    'content': (f"User Interaction Analysis: Frequent topics: {profile['frequent_topics']}, "
+                                f"Average satisfaction: {profile['average_satisfaction']:.1f}/5")
+                })
+            return context
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'active_sessions': len(self._sessions),
+                'customer_profiles': len(self._profiles)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+            self._profiles.clear()
+
+    # Internal helpers
+    def _get_or_create_session(self, session_id: str, customer_id: Optional[int]) -> SessionMemory:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = SessionMemory(customer_id, self.summary_snippets)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats['sessions_evicted'] += 1
+        else:
+            self._sessions.move_to_end(session_id)
+            if customer_id and not session.customer_id:
+                session.customer_id = customer_id
+        return session
+
+    def _get_or_create_profile(self, customer_id: int) -> TopicProfile:
+        profile = self._profiles.get(customer_id)
+        if profile is None:
+            profile = TopicProfile()
+            self._profiles[customer_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        else:
+            self._profiles.move_to_end(customer_id)
+        return profile
+
+    def _append(self, session: SessionMemory, role: str, content: str):
+        session.window.append({'role': role, 'content': content})
+        while len(session.window) > self.window_size:
+            self._compact(session, session.window.popleft())
+
+    def _compact(self, session: SessionMemory, message: Dict[str, str]):
+        """Fold a message that fell out of the window into the session summary"""
+        session.compacted_turns += 1
+        self.stats['messages_compacted'] += 1
+        if message['role'] == 'user':
+            session.compacted_topics.update(detect_topics(message['content']))
+            snippet = ' '.join(message['content'].split())[:self.snippet_length]
+            if snippet:
+                session.compacted_snippets.append(snippet)
+
+
+# Global conversation memory instance
+conversation_memory_service = ConversationMemoryService()
@@ -0,0 +1,267 @@
+"""
+Customer Feature Store for CricVerse
+Precomputed per-customer personalisation features for chatbot scoring
+Big Bash League Cricket Platform
+"""
+
+import time
+import logging
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import RLock
+from typing import Dict, List, Any, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Lifetime spend thresholds for tiers 1..3 (tier 0 below the first)
+SPEND_TIER_THRESHOLDS = (5000, 20000, 50000)
+
+
+class CustomerFeatures:
+    """Compact feature vector for one customer
+
+    Stadiums and concessions the customer has been to are stored as integer
+    bitsets keyed by row id, so membership tests are a shift and a mask.
+    """
+
+    __slots__ = ('customer_id', 'favorite_team_id', 'home_ground', 'visited_stadiums',
+                 'ordered_concessions', 'total_spent', 'booking_count', 'order_count',
+                 'membership_level', 'loaded_at')
+
+    def __init__(self, customer_id: int, favorite_team_id: Optional[int] = None,
+                 home_ground: Optional[str] = None, membership_level: Optional[str] = None):
+        self.customer_id = customer_id
+        self.favorite_team_id = favorite_team_id
+        self.home_ground = home_ground
+        self.membership_level = membership_level
+        self.visited_stadiums = 0
+        self.ordered_concessions = 0
+        self.total_spent = 0.0
+        self.booking_count = 0
+        self.order_count = 0
+        self.loaded_at = time.time()
+
+    @property
+    def spend_tier(self) -> int:
+        return bisect_right(SPEND_TIER_THRESHOLDS, self.total_spent)
+
+    def has_visited(self, stadium_id: Optional[int]) -> bool:
+        return bool(stadium_id is not None and (self.visited_stadiums >> stadium_id) & 1)
+
+    def has_ordered_from(self, concession_id: Optional[int]) -> bool:
+        return bool(concession_id is not None and (self.ordered_concessions >> concession_id) & 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'customer_id': self.customer_id,
+            'favorite_team_id': self.favorite_team_id,
+            'home_ground': self.home_ground,
+            'visited_stadium_ids': _bit_positions(self.visited_stadiums),
+            'ordered_concession_ids': _bit_positions(self.ordered_concessions),
+            'total_spent': round(self.total_spent, 2),
+            'spend_tier': self.spend_tier,
+            'booking_count': self.booking_count,
+            'order_count': self.order_count
+        }
+
+
+def _bit_positions(mask: int) -> List[int]:
+    positions = []
+    index = 0
+    while mask:
+        if mask & 1:
+            positions.append(index)
+        mask >>= 1
+        index += 1
+    return positions
+
+
+class TTLCache:
+    """Small LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 5000, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry else default
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class CustomerFeatureService:
+    """Loads customer features once, keeps them fresh incrementally and scores candidates in bulk"""
+
+    def __init__(self, max_customers: int = 20000, ttl: float = 1800):
+        self._features = TTLCache(max_entries=max_customers, ttl=ttl)
+        self._lock = RLock()
+        self.stats = {'loads': 0, 'hits': 0, 'incremental_updates': 0}
+
+    # Feature access
+    def get_features(self, customer_id: Optional[int]) -> Optional[CustomerFeatures]:
+        """Return cached features, loading them from the database on a miss"""
+        if not customer_id:
+            return None
+        features = self._features.get(customer_id)
+        if features is not None:
+            self.stats['hits'] += 1
+            return features
+        features = self._load_features(customer_id)
+        if features is not None:
+            self._features.set(customer_id, features)
+        return features
+
+    def put_features(self, features: CustomerFeatures):
+        self._features.set(features.customer_id, features)
+
+    def invalidate(self, customer_id: int):
+        self._features.pop(customer_id)
+
+    # Incremental refresh
+    def record_booking(self, customer_id: int, stadium_id: Optional[int], amount: float = 0.0):
+        """Fold a completed booking into cached features without reloading"""
+        features = self._features.get(customer_id)
+        if features is None:
+            return
+        with self._lock:
+            if stadium_id is not None:
+                features.visited_stadiums |= 1 << stadium_id
+            features.total_spent += amount or 0.0
+            features.booking_count += 1
+            self.stats['incremental_updates'] += 1
+
+    def record_order(self, customer_id: int, concession_id: Optional[int], amount: float = 0.0):
+        """Fold a concession order into cached features without reloading"""
+        features = self._features.get(customer_id)
+        if features is None:
+            return
+        with self._lock:
+            if concession_id is not None:
+                features.ordered_concessions |= 1 << concession_id
+            features.total_spent += amount or 0.0
+            features.order_count += 1
+            self.stats['incremental_updates'] += 1
+
+    # Bulk scoring
+    def score_stadiums(self, features: CustomerFeatures, stadiums: List[Dict[str, Any]]) -> List[Tuple[bool, float]]:
+        """Return (visited, preference score) for every stadium in one pass"""
+        visited_mask = features.visited_stadiums
+        home_ground = features.home_ground
+        results = []
+        for stadium in stadiums:
+            visited = bool((visited_mask >> stadium['id']) & 1)
+            score = 0.5 + (0.3 if visited else 0.0) + (0.4 if home_ground and stadium.get('name') == home_ground else 0.0)
+            results.append((visited, min(score, 1.0)))
+        return results
+
+    def score_matches(self, features: CustomerFeatures, matches: List[Dict[str, Any]]) -> List[Tuple[bool, float]]:
+        """Return (favourite team playing, interest score) for every match in one pass"""
+        favorite = features.favorite_team_id
+        results = []
+        for match in matches:
+            is_favorite = bool(favorite) and favorite in (match.get('home_team_id'), match.get('away_team_id'))
+            results.append((is_favorite, 0.8 if is_favorite else 0.5))
+        return results
+
+    def score_menu_items(self, features: Optional[CustomerFeatures], menu_items: List[Dict[str, Any]]) -> List[float]:
+        """Return a recommendation score for every menu item in one pass"""
+        ordered_mask = features.ordered_concessions if features else 0
+        scores = []
+        for item in menu_items:
+            score = 0.5
+            if item.get('is_vegetarian'):
+                score += 0.1
+            if (item.get('price') or 0) < 500:
+                score += 0.1
+            concession_id = item.get('concession_id')
+            if concession_id is not None and (ordered_mask >> concession_id) & 1:
+                score += 0.1
+            scores.append(min(score, 1.0))
+        return scores
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'cached_customers': len(self._features)}
+
+    # Internal helpers
+    def _load_features(self, customer_id: int) -> Optional[CustomerFeatures]:
+        """Build a customer's feature vector with a fixed number of aggregate queries"""
+        try:
+            from app import db
+            from app.models import Customer, Team, Booking, Ticket, Event, Order
+
+            customer = db.session.get(Customer, customer_id)
+            if not customer:
+                return None
+
+            home_ground = None
+            if customer.favorite_team_id:
+                team = db.session.get(Team, customer.favorite_team_id)
+                home_ground = team.home_ground if team else None
+
+            features = CustomerFeatures(customer_id, customer.favorite_team_id, home_ground,
+                                        customer.membership_level)
+
+            for (stadium_id,) in db.session.query(Event.stadium_id).join(
+                    Ticket, Ticket.event_id == Event.id).filter(Ticket.customer_id == customer_id).distinct():
+                if stadium_id is not None:
+                    features.visited_stadiums |= 1 << stadium_id
+
+            booking_count, booking_total = db.session.query(
+                db.func.count(Booking.id), db.func.coalesce(db.func.sum(Booking.total_amount), 0.0)
+            ).filter(Booking.customer_id == customer_id).one()
+
+            order_rows = db.session.query(Order.concession_id, db.func.count(Order.id),
+                                          db.func.coalesce(db.func.sum(Order.total_amount), 0.0)).filter(
+                Order.customer_id == customer_id).group_by(Order.concession_id).all()
+
+            features.booking_count = booking_count or 0
+            features.total_spent = float(booking_total or 0.0)
+            for concession_id, count, total in order_rows:
+                if concession_id is not None:
+                    features.ordered_concessions |= 1 << concession_id
+                features.order_count += count
+                features.total_spent += float(total or 0.0)
+
+            self.stats['loads'] += 1
+            return features
+
+        except Exception as e:
+            logger.error(f"Error loading customer features: {e}")
+            return None
+
+
+# Global customer feature store instance
+customer_feature_service = CustomerFeatureService()
@@ -5,19 +5,60 @@ Real-time updates for scores, overs, runs, and wickets
 Big Bash League Cricket Platform
 """
 
+import copy
 import logging
+from threading import RLock
 from datetime import datetime, date
 from typing import Dict, List, Any, Optional
-from flask import current_app
+from flask import current_app, request
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from sqlalchemy import func
 from app import db
 from app.models import Match, Team, Event, Stadium
 from app.services.supabase_service import supabase_service
+from single_flight import bbl_single_flight
+from realtime_bus import broadcast, track_join, track_leave
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Maps update_match_score fields to their paths in the match status dict
+UPDATE_FIELD_PATHS = {
+    'team1_score': [('team1', 'score')],
+    'team1_wickets': [('team1', 'wickets')],
+    'team1_overs': [('team1', 'overs')],
+    'team2_score': [('team2', 'score')],
+    'team2_wickets': [('team2', 'wickets')],
+    'team2_overs': [('team2', 'overs')],
+    'current_over': [('current_over',)],
+    'current_innings': [('current_innings',), ('batting_team',)],
+    'is_live': [('is_live',)],
+    'match_status': [('status',)],
+}
+
+# Status fields that change on every read and are never sent as deltas
+VOLATILE_FIELDS = ('last_updated',)
+
+
+def flatten_status(status: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flatten a nested match status into dotted paths ('team1.score')"""
+    flat = {}
+    for key, value in status.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_status(value, f"{path}."))
+        elif path not in VOLATILE_FIELDS:
+            flat[path] = value
+    return flat
+
+
+def diff_status(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the dotted paths whose values differ between two statuses"""
+    old_flat = flatten_status(old) if old else {}
+    return {path: value for path, value in flatten_status(new).items()
+            if path not in old_flat or old_flat[path] != value}
+
+
 class LiveCricketService:
     """Service for live cricket scoring and real-time updates"""
     
@@ -25,10 +66,16 @@ class LiveCricketService:
         self.socketio = None
         self.active_matches = {}
         self.initialized = False
+        # Delta mode: per-match in-memory state and sequence numbers
+        self.delta_broadcasts = True
+        self.match_states = {}
+        self._state_lock = RLock()
+        self.broadcast_stats = {'deltas': 0, 'snapshots': 0, 'full_broadcasts': 0}
     
     def init_app(self, app, socketio_instance):
         """Initialize with Flask app and SocketIO"""
         self.socketio = socketio_instance
+        self.delta_broadcasts = app.config.get('LIVE_DELTA_BROADCASTS', True)
         self.initialized = True
         logger.info("✅ Live cricket service initialized")
         
@@ -47,8 +94,13 @@ class LiveCricketService:
                 match_id = data.get('match_id')
                 if match_id:
                     join_room(f'match_{match_id}')
+                    track_join(f'match_{match_id}', request.sid)
                     # Send current match status
-                    match_status = self.get_live_match_status(match_id)
+                    if self.delta_broadcasts:
+                        snapshot = self.get_match_snapshot(match_id)
+                        match_status = {**snapshot['state'], 'seq': snapshot['seq']}
+                    else:
+                        match_status = self.get_live_match_status(match_id)
                     emit('match_status', match_status)
                     logger.info(f"Client joined match room: match_{match_id}")
             except Exception as e:
@@ -61,10 +113,21 @@ class LiveCricketService:
                 match_id = data.get('match_id')
                 if match_id:
                     leave_room(f'match_{match_id}')
+                    track_leave(f'match_{match_id}', request.sid)
                     logger.info(f"Client left match room: match_{match_id}")
             except Exception as e:
                 logger.error(f"Error leaving match room: {str(e)}")
         
+        @self.socketio.on('request_match_snapshot')
+        def handle_request_match_snapshot(data):
+            """Handle a client that missed a delta and needs the full state"""
+            try:
+                match_id = data.get('match_id')
+                if match_id:
+                    emit('match_snapshot', self.get_match_snapshot(match_id))
+            except Exception as e:
+                logger.error(f"Error sending match snapshot: {str(e)}")
+        
         @self.socketio.on('get_live_matches')
         def handle_get_live_matches():
             """Handle request for all live matches"""
@@ -76,6 +139,15 @@ class LiveCricketService:
     
     def get_live_match_status(self, match_id: int) -> Dict[str, Any]:
         """Get current status of a live match"""
+        # Fans joining together share one lookup; each gets its own copy to extend
+        try:
+            return bbl_single_flight.do(f'live_match:{match_id}', self._load_live_match_status, match_id)
+        except Exception as e:
+            logger.error(f"Error getting match status for {match_id}: {str(e)}")
+            return {'error': str(e)}
+    
+    def _load_live_match_status(self, match_id: int) -> Dict[str, Any]:
+        """Load the current status of a match from the database"""
         try:
             match = Match.query.get(match_id)
             if not match:
@@ -108,29 +180,12 @@ class LiveCricketService:
                 'batting_team': getattr(match, 'current_innings', 1),
                 'venue': match.event.stadium.name if match.event and match.event.stadium else 'Unknown',
                 'match_type': getattr(match.event, 'event_type', 'T20'),
+                'is_live': match.is_live == True,
                 'last_updated': datetime.utcnow().isoformat()
             }
             
             # Add match summary
-            if match.is_live == True:
-                batting_team_name = match_status['team1']['name'] if match_status['batting_team'] == 1 else match_status['team2']['name']
-                batting_score = match_status['team1']['score'] if match_status['batting_team'] == 1 else match_status['team2']['score']
-                batting_wickets = match_status['team1']['wickets'] if match_status['batting_team'] == 1 else match_status['team2']['wickets']
-                batting_overs = match_status['team1']['overs'] if match_status['batting_team'] == 1 else match_status['team2']['overs']
-                
-                match_status['summary'] = f"{batting_team_name} {batting_score}/{batting_wickets} ({batting_overs} overs)"
-            elif match.is_live == False and match.event.match_status == 'Completed':
-                # Determine winner
-                team1_total = match_status['team1']['score']
-                team2_total = match_status['team2']['score']
-                if team1_total > team2_total:
-                    match_status['summary'] = f"{match_status['team1']['name']} won by {team1_total - team2_total} runs"
-                elif team2_total > team1_total:
-                    match_status['summary'] = f"{match_status['team2']['name']} won by {team2_total - team1_total} runs"
-                else:
-                    match_status['summary'] = "Match tied"
-            else:
-                match_status['summary'] = f"Match {match.event.match_status}"
+            match_status['summary'] = self._build_summary(match_status)
             
             return match_status
             
@@ -138,6 +193,94 @@ class LiveCricketService:
             logger.error(f"Error getting match status for {match_id}: {str(e)}")
             return {'error': str(e)}
     
+    @staticmethod
+    def _build_summary(match_status: Dict[str, Any]) -> str:
+        """One-line match summary from a match status dict"""
+        if match_status['is_live']:
+            batting_team_name = match_status['team1']['name'] if match_status['batting_team'] == 1 else match_status['team2']['name']
+            batting_score = match_status['team1']['score'] if match_status['batting_team'] == 1 else match_status['team2']['score']
+            batting_wickets = match_status['team1']['wickets'] if match_status['batting_team'] == 1 else match_status['team2']['wickets']
+            batting_overs = match_status['team1']['overs'] if match_status['batting_team'] == 1 else match_status['team2']['overs']
+            
+            return f"{batting_team_name} {batting_score}/{batting_wickets} ({batting_overs} overs)"
+        elif match_status['status'] == 'Completed':
+            # Determine winner
+            team1_total = match_status['team1']['score']
+            team2_total = match_status['team2']['score']
+            if team1_total > team2_total:
+                return f"{match_status['team1']['name']} won by {team1_total - team2_total} runs"
+            elif team2_total > team1_total:
+                return f"{match_status['team2']['name']} won by {team2_total - team1_total} runs"
+            else:
+                return "Match tied"
+        else:
+            return f"Match {match_status['status']}"
+    
+    def get_match_snapshot(self, match_id: int) -> Dict[str, Any]:
+        """Full in-memory state of a match with its current sequence number"""
+        with self._state_lock:
+            record = self.match_states.get(match_id)
+        if record is None:
+            match_status = self.get_live_match_status(match_id)
+            if 'error' in match_status:
+                return {'match_id': match_id, 'seq': 0, 'state': match_status}
+            with self._state_lock:
+                record = self.match_states.setdefault(match_id, {'seq': 0, 'state': match_status})
+        
+        self.broadcast_stats['snapshots'] += 1
+        with self._state_lock:
+            return {'match_id': match_id, 'seq': record['seq'], 'state': copy.deepcopy(record['state'])}
+    
+    def apply_match_delta(self, match_id: int, update_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Fold an update into the in-memory match state and return the delta
+        
+        Known score fields are applied in memory without touching the database.
+        Without update_data, or for a match not yet in memory, the state is
+        reloaded and diffed instead. The sequence number only advances when
+        something changed.
+        """
+        with self._state_lock:
+            record = self.match_states.get(match_id)
+            if record is not None and update_data is not None:
+                new_state = copy.deepcopy(record['state'])
+                for field, value in update_data.items():
+                    for path in UPDATE_FIELD_PATHS.get(field, []):
+                        target = new_state
+                        for key in path[:-1]:
+                            target = target.setdefault(key, {})
+                        target[path[-1]] = value
+                new_state['summary'] = self._build_summary(new_state)
+            else:
+                new_state = self._load_live_match_status(match_id)
+                if 'error' in new_state:
+                    return None
+            
+            new_state['last_updated'] = datetime.utcnow().isoformat()
+            old_state = record['state'] if record else None
+            changes = diff_status(old_state, new_state)
+            seq = record['seq'] if record else 0
+            if changes:
+                seq += 1
+            self.match_states[match_id] = {'seq': seq, 'state': new_state}
+        
+        if not changes:
+            return None
+        return {
+            'match_id': match_id,
+            'seq': seq,
+            'changes': changes,
+            'timestamp': new_state['last_updated']
+        }
+    
+    def broadcast_match_delta(self, match_id: int, update_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Send only the changed fields of one match to its room and the live list"""
+        delta = self.apply_match_delta(match_id, update_data)
+        if delta and self.socketio:
+            broadcast(self.socketio, 'match_delta', delta, f'match_{match_id}')
+            broadcast(self.socketio, 'live_match_delta', delta, 'live_matches')
+            self.broadcast_stats['deltas'] += 1
+        return delta
+    
     def get_all_live_matches(self) -> List[Dict[str, Any]]:
         """Get all currently live matches"""
         try:
@@ -145,7 +288,7 @@ class LiveCricketService:
             
             matches_data = []
             for match in live_matches:
-                match_status = self.get_live_match_status(match.id)
+                match_status = self._load_live_match_status(match.id)
                 if 'error' not in match_status:
                     matches_data.append(match_status)
             
@@ -189,13 +332,18 @@ class LiveCricketService:
             db.session.commit()
             
             # Broadcast update to all clients in match room
-            if self.socketio:
-                match_status = self.get_live_match_status(match_id)
-                self.socketio.emit('match_update', match_status, room=f'match_{match_id}')
+            if self.socketio and self.delta_broadcasts:
+                # One small delta per ball, independent of how many matches are live
+                self.broadcast_match_delta(match_id, update_data)
+            elif self.socketio:
+                # Read after the commit directly so an older in-flight lookup is never broadcast
+                match_status = self._load_live_match_status(match_id)
+                broadcast(self.socketio, 'match_update', match_status, f'match_{match_id}')
                 
                 # Also broadcast to general live matches room
                 live_matches = self.get_all_live_matches()
-                self.socketio.emit('live_matches_update', live_matches, room='live_matches')
+                broadcast(self.socketio, 'live_matches_update', live_matches, 'live_matches')
+                self.broadcast_stats['full_broadcasts'] += 1
             
             logger.info(f"Match {match_id} updated and broadcasted")
             return True
@@ -231,12 +379,16 @@ class LiveCricketService:
             
             # Broadcast match start
             if self.socketio:
-                match_status = self.get_live_match_status(match_id)
-                self.socketio.emit('match_started', match_status, room=f'match_{match_id}')
+                match_status = self._load_live_match_status(match_id)
+                broadcast(self.socketio, 'match_started', match_status, f'match_{match_id}')
                 
                 # Update live matches list
-                live_matches = self.get_all_live_matches()
-                self.socketio.emit('live_matches_update', live_matches, room='live_matches')
+                if self.delta_broadcasts:
+                    self.broadcast_match_delta(match_id)
+                else:
+                    live_matches = self.get_all_live_matches()
+                    broadcast(self.socketio, 'live_matches_update', live_matches, 'live_matches')
+                    self.broadcast_stats['full_broadcasts'] += 1
             
             logger.info(f"Match {match_id} started")
             return True
@@ -259,12 +411,20 @@ class LiveCricketService:
             
             # Broadcast match end
             if self.socketio:
-                match_status = self.get_live_match_status(match_id)
-                self.socketio.emit('match_ended', match_status, room=f'match_{match_id}')
+                match_status = self._load_live_match_status(match_id)
+                broadcast(self.socketio, 'match_ended', match_status, f'match_{match_id}')
                 
                 # Update live matches list
-                live_matches = self.get_all_live_matches()
-                self.socketio.emit('live_matches_update', live_matches, room='live_matches')
+                if self.delta_broadcasts:
+                    self.broadcast_match_delta(match_id)
+                else:
+                    live_matches = self.get_all_live_matches()
+                    broadcast(self.socketio, 'live_matches_update', live_matches, 'live_matches')
+                    self.broadcast_stats['full_broadcasts'] += 1
+            
+            # The final delta is out; completed matches get no more
+            with self._state_lock:
+                self.match_states.pop(match_id, None)
             
             logger.info(f"Match {match_id} ended")
             return True
@@ -307,6 +467,9 @@ class LiveCricketService:
                 'socketio_connected': self.socketio is not None,
                 'live_matches': live_matches_count,
                 'total_matches': total_matches,
+                'delta_broadcasts': self.delta_broadcasts,
+                'tracked_match_states': len(self.match_states),
+                'broadcast_stats': dict(self.broadcast_stats),
                 'timestamp': datetime.utcnow().isoformat()
             }
         except Exception as e:
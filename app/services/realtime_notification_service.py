@@ -4,20 +4,28 @@ Handles live scoring, booking updates, system notifications, and real-time featu
 Big Bash League Cricket Platform
 """
 
+import os
 import json
+import heapq
 import logging
+import itertools
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import asyncio
-from threading import Thread
+from threading import Thread, Condition
 import time
 
-from flask import current_app
+from flask import current_app, request
 from flask_socketio import emit, join_room, leave_room
+from flask_login import current_user
 from app import socketio, db
 from app.models import Event, Match, Booking, Customer, Stadium
+from match_event_log import match_event_store
+from match_registry import MatchRegistry, TimerScheduler, AdminScoreSource, score_source_from_env
+from realtime_bus import broadcast, track_join, track_leave, track_disconnect
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +59,171 @@ class NotificationMessage:
     target_users: Optional[List[int]] = None
     target_rooms: Optional[List[str]] = None
 
+# Dispatch order for NotificationMessage.priority (lower goes first)
+PRIORITY_RANKS = {'urgent': 0, 'high': 1, 'normal': 2, 'low': 3}
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class NotificationDispatcher:
+    """Priority dispatch engine for queued notifications
+    
+    Notifications wait in a heap ordered by priority then arrival. Workers
+    block on a condition variable instead of polling. A worker that pops a
+    notification also takes every other queued notification for the same
+    targets (up to ``max_batch``) and hands them to ``emit_batch`` together,
+    so a burst for one room becomes a single emit.
+    """
+    
+    def __init__(self, emit_batch: Callable[[Tuple, List[NotificationMessage]], None],
+                 workers: int = 2, max_batch: int = 50, latency_window: int = 1000):
+        self.emit_batch = emit_batch
+        self.workers = workers
+        self.max_batch = max_batch
+        self._heap = []
+        self._pending_by_target: Dict[Tuple, int] = {}
+        self._order = itertools.count()
+        self._condition = Condition()
+        self._threads: List[Thread] = []
+        self._running = False
+        self._latencies = deque(maxlen=latency_window)
+        self.stats = {'queued': 0, 'dispatched': 0, 'batches': 0, 'coalesced': 0, 'expired': 0, 'errors': 0}
+    
+    @staticmethod
+    def target_key(notification: NotificationMessage) -> Tuple:
+        return (tuple(notification.target_users or ()), tuple(notification.target_rooms or ()))
+    
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [Thread(target=self._worker_loop, name=f"notification-dispatch-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the workers once the queue has drained"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def put(self, notification: NotificationMessage):
+        key = self.target_key(notification)
+        rank = PRIORITY_RANKS.get(notification.priority, PRIORITY_RANKS['normal'])
+        with self._condition:
+            heapq.heappush(self._heap, (rank, next(self._order), time.monotonic(), key, notification))
+            self._pending_by_target[key] = self._pending_by_target.get(key, 0) + 1
+            self.stats['queued'] += 1
+            self._condition.notify()
+    
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._heap)
+    
+    def dispatch_pending(self) -> int:
+        """Dispatch everything queued on the calling thread (used when no workers run)"""
+        dispatched = 0
+        while True:
+            with self._condition:
+                batch = self._take_batch()
+            if not batch:
+                return dispatched
+            dispatched += self._dispatch(batch)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            depth_by_priority = {name: 0 for name in PRIORITY_RANKS}
+            rank_names = {rank: name for name, rank in PRIORITY_RANKS.items()}
+            for rank, *_ in self._heap:
+                depth_by_priority[rank_names[rank]] += 1
+            latencies = list(self._latencies)
+            return {
+                **self.stats,
+                'queue_depth': len(self._heap),
+                'queue_depth_by_priority': depth_by_priority,
+                'workers': len(self._threads),
+                'dispatch_latency_ms': {
+                    'p50': round(_percentile(latencies, 50), 3),
+                    'p95': round(_percentile(latencies, 95), 3),
+                    'max': round(max(latencies), 3) if latencies else 0.0
+                }
+            }
+    
+    # Internal helpers
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while self._running and not self._heap:
+                    self._condition.wait()
+                if not self._heap:
+                    return
+                batch = self._take_batch()
+            self._dispatch(batch)
+    
+    def _take_batch(self) -> List[Tuple]:
+        """Pop the next notification and any queued siblings for the same targets"""
+        if not self._heap:
+            return []
+        head = heapq.heappop(self._heap)
+        key = head[3]
+        batch = [head]
+        if self._pending_by_target[key] > 1:
+            remaining = []
+            for entry in self._heap:
+                if entry[3] == key and len(batch) < self.max_batch:
+                    batch.append(entry)
+                else:
+                    remaining.append(entry)
+            heapq.heapify(remaining)
+            self._heap = remaining
+        
+        left = self._pending_by_target[key] - len(batch)
+        if left:
+            self._pending_by_target[key] = left
+        else:
+            del self._pending_by_target[key]
+        batch.sort(key=lambda entry: entry[1])  # Arrival order within a batch
+        return batch
+    
+    def _dispatch(self, batch: List[Tuple]) -> int:
+        now = datetime.utcnow()
+        notifications = [entry[4] for entry in batch
+                         if not (entry[4].expires_at and entry[4].expires_at < now)]
+        expired = len(batch) - len(notifications)
+        
+        error = None
+        if notifications:
+            try:
+                self.emit_batch(batch[0][3], notifications)
+            except Exception as e:
+                error = e
+                logger.error(f"Error dispatching {len(notifications)} notifications: {str(e)}")
+        
+        finished = time.monotonic()
+        with self._condition:
+            self.stats['expired'] += expired
+            if error is not None:
+                self.stats['errors'] += 1
+            if error is not None or not notifications:
+                return 0
+            for entry in batch:
+                self._latencies.append((finished - entry[2]) * 1000)
+            self.stats['dispatched'] += len(notifications)
+            self.stats['batches'] += 1
+            self.stats['coalesced'] += len(notifications) - 1
+        return len(notifications)
+
+
 @dataclass
 class LiveScoreUpdate:
     """Structure for live score updates"""
@@ -81,30 +254,38 @@ class BookingNotification:
 class RealtimeNotificationService:
     """Service for managing real-time notifications and live updates"""
     
-    def __init__(self):
-        self.active_matches = {}
-        self.notification_queue = []
+    # Completed matches stay queryable for this long before they are dropped
+    COMPLETED_MATCH_RETENTION = 3600
+    
+    def __init__(self, event_store=None, dispatcher_workers: int = 2, max_batch: int = 50,
+                 score_source=None, scheduler: Optional[TimerScheduler] = None):
+        # match_id -> MatchEventLog; match state is rebuilt from ball-by-ball events
+        self.event_store = event_store or match_event_store
+        self.active_matches = MatchRegistry()
+        self.dispatcher = NotificationDispatcher(self._emit_notifications, workers=dispatcher_workers,
+                                                 max_batch=max_batch)
+        # One timer thread serves match cleanup and score source ticks for every match
+        self.scheduler = scheduler or TimerScheduler()
+        self.score_source = score_source or score_source_from_env()
+        self.score_source.attach(self.scheduler, self.update_live_score, self.get_match_status)
         self.user_subscriptions = {}
         self.room_subscriptions = {}
-        self.score_updater_thread = None
-        self.notification_processor_thread = None
         self._running = False
     
     def start_service(self):
         """Start the real-time service"""
         if not self._running:
             self._running = True
-            self.score_updater_thread = Thread(target=self._score_updater_loop, daemon=True)
-            self.notification_processor_thread = Thread(target=self._notification_processor_loop, daemon=True)
-            
-            self.score_updater_thread.start()
-            self.notification_processor_thread.start()
+            self.scheduler.start()
+            self.dispatcher.start()
             
-            logger.info("Real-time notification service started")
+            logger.info(f"Real-time notification service started (score source: {self.score_source.name})")
     
     def stop_service(self):
         """Stop the real-time service"""
         self._running = False
+        self.scheduler.stop()
+        self.dispatcher.stop()
         logger.info("Real-time notification service stopped")
     
     # Live Scoring Features
@@ -124,12 +305,14 @@ class RealtimeNotificationService:
                 'batting_team': team1,
                 'bowling_team': team2,
                 'status': 'live',
-                'start_time': datetime.utcnow(),
-                'last_update': datetime.utcnow(),
-                'commentary': []
+                'start_time': datetime.utcnow().isoformat(),
+                'last_update': datetime.utcnow().isoformat()
             }
             
-            self.active_matches[match_id] = match_data
+            event_log = self.event_store.get(match_id)
+            event_log.append('match_start', match_data)
+            self.active_matches.add(match_id, event_log)
+            self.score_source.start_match(match_id)
             
             # Notify match start
             notification = NotificationMessage(
@@ -152,18 +335,18 @@ class RealtimeNotificationService:
     def update_live_score(self, match_id: int, score_update: Dict[str, Any]):
         """Update live score for a match"""
         try:
-            if match_id not in self.active_matches:
+            event_log = self.active_matches.get(match_id)
+            if event_log is None:
                 logger.warning(f"Match {match_id} not found in active matches")
                 return
             
-            match_data = self.active_matches[match_id]
-            
-            # Update match data
-            for key, value in score_update.items():
-                if key in match_data:
-                    match_data[key] = value
-            
-            match_data['last_update'] = datetime.utcnow()
+            # Record the ball; only known match fields plus the ball description are kept
+            current = event_log.get_state()
+            ball_data = {key: value for key, value in score_update.items()
+                         if key in current or key in ('last_ball', 'commentary')}
+            ball_data['last_update'] = datetime.utcnow().isoformat()
+            event_log.append('score_update', ball_data)
+            match_data = event_log.get_state()
             
             # Create live score update
             live_update = LiveScoreUpdate(
@@ -181,8 +364,11 @@ class RealtimeNotificationService:
                 timestamp=datetime.utcnow()
             )
             
+            # Wickets are delivered straight away rather than conflated with runs
+            wicket = any(match_data[key] != current.get(key) for key in ('team1_wickets', 'team2_wickets'))
+            
             # Broadcast to subscribers
-            self._broadcast_live_score(live_update)
+            self._broadcast_live_score(live_update, 'wicket' if wicket else 'score_update')
             
             logger.info(f"Updated live score for match {match_id}")
             
@@ -192,13 +378,17 @@ class RealtimeNotificationService:
     def end_live_match(self, match_id: int, final_result: str):
         """End live scoring for a match"""
         try:
-            if match_id not in self.active_matches:
+            event_log = self.active_matches.get(match_id)
+            if event_log is None:
                 return
             
-            match_data = self.active_matches[match_id]
-            match_data['status'] = 'completed'
-            match_data['final_result'] = final_result
-            match_data['end_time'] = datetime.utcnow()
+            self.score_source.stop_match(match_id)
+            event_log.append('match_end', {
+                'status': 'completed',
+                'final_result': final_result,
+                'end_time': datetime.utcnow().isoformat()
+            })
+            match_data = event_log.get_state()
             
             # Notify match end
             notification = NotificationMessage(
@@ -218,13 +408,8 @@ class RealtimeNotificationService:
             
             self.queue_notification(notification)
             
-            # Remove from active matches after 1 hour
-            def cleanup_match():
-                time.sleep(3600)  # 1 hour
-                if match_id in self.active_matches:
-                    del self.active_matches[match_id]
-            
-            Thread(target=cleanup_match, daemon=True).start()
+            # Remove from active matches after the retention period
+            self.scheduler.call_later(self.COMPLETED_MATCH_RETENTION, self._remove_match, match_id, event_log)
             
             logger.info(f"Ended live match {match_id}: {final_result}")
             
@@ -388,6 +573,13 @@ class RealtimeNotificationService:
             
             self.queue_notification(notification)
             
+            # Lightweight stream for seat maps; compact clients get it in binary
+            broadcast(socketio, 'seat_availability', {
+                'event_id': event_id,
+                'available_seats': available_seats,
+                'timestamp': datetime.utcnow().isoformat()
+            }, f"event_{event_id}")
+            
         except Exception as e:
             logger.error(f"Error sending seat availability update {event_id}: {str(e)}")
     
@@ -412,114 +604,106 @@ class RealtimeNotificationService:
             self.room_subscriptions[room_name] = set()
         
         join_room(room_name)
+        track_join(room_name, request.sid)
         logger.info(f"Joined room: {room_name}")
     
     # Notification Processing
     def queue_notification(self, notification: NotificationMessage):
-        """Queue a notification for processing"""
-        self.notification_queue.append(notification)
+        """Queue a notification for prioritised dispatch"""
+        self.dispatcher.put(notification)
     
-    def _notification_processor_loop(self):
-        """Process queued notifications"""
-        while self._running:
-            try:
-                if self.notification_queue:
-                    notification = self.notification_queue.pop(0)
-                    self._process_notification(notification)
-                else:
-                    time.sleep(0.1)  # Short sleep when no notifications
-                    
-            except Exception as e:
-                logger.error(f"Error in notification processor: {str(e)}")
-                time.sleep(1)
+    @staticmethod
+    def _serialize_notification(notification: NotificationMessage) -> Dict[str, Any]:
+        return {
+            'id': notification.id,
+            'type': notification.type.value,
+            'title': notification.title,
+            'message': notification.message,
+            'data': notification.data,
+            'timestamp': notification.timestamp.isoformat(),
+            'priority': notification.priority
+        }
     
-    def _process_notification(self, notification: NotificationMessage):
-        """Process a single notification"""
-        try:
-            notification_data = {
-                'id': notification.id,
-                'type': notification.type.value,
-                'title': notification.title,
-                'message': notification.message,
-                'data': notification.data,
-                'timestamp': notification.timestamp.isoformat(),
-                'priority': notification.priority
+    def _emit_notifications(self, target_key: Tuple, notifications: List[NotificationMessage]):
+        """Emit one or more notifications that share the same targets"""
+        if len(notifications) == 1:
+            event_name = 'notification'
+            payload = self._serialize_notification(notifications[0])
+        else:
+            event_name = 'notification_batch'
+            payload = {
+                'count': len(notifications),
+                'notifications': [self._serialize_notification(n) for n in notifications]
             }
-            
-            # Send to specific users
-            if notification.target_users:
-                for user_id in notification.target_users:
-                    socketio.emit('notification', notification_data, room=f"user_{user_id}")
-            
-            # Send to specific rooms
-            if notification.target_rooms:
-                for room in notification.target_rooms:
-                    socketio.emit('notification', notification_data, room=room)
-            
-            # If no specific targets, broadcast to all
-            if not notification.target_users and not notification.target_rooms:
-                socketio.emit('notification', notification_data, broadcast=True)
-            
-            logger.debug(f"Processed notification: {notification.id}")
-            
-        except Exception as e:
-            logger.error(f"Error processing notification {notification.id}: {str(e)}")
+        
+        target_users, target_rooms = target_key
+        
+        # Send to specific users
+        for user_id in target_users:
+            broadcast(socketio, event_name, payload, f"user_{user_id}")
+        
+        # Send to specific rooms
+        for room in target_rooms:
+            broadcast(socketio, event_name, payload, room)
+        
+        # If no specific targets, broadcast to all
+        if not target_users and not target_rooms:
+            broadcast(socketio, event_name, payload)
+        
+        logger.debug(f"Dispatched {len(notifications)} notification(s) via {event_name}")
     
-    def _broadcast_live_score(self, live_update: LiveScoreUpdate):
+    def _broadcast_live_score(self, live_update: LiveScoreUpdate, update_type: str = 'score_update'):
         """Broadcast live score update"""
         try:
             score_data = asdict(live_update)
             score_data['timestamp'] = live_update.timestamp.isoformat()
+            score_data['type'] = update_type
             
             # Broadcast to match-specific room
-            socketio.emit('live_score_update', score_data, room=f"match_{live_update.match_id}")
+            broadcast(socketio, 'live_score_update', score_data, f"match_{live_update.match_id}")
             
             # Broadcast to general live matches room
-            socketio.emit('live_score_update', score_data, room="live_matches")
+            broadcast(socketio, 'live_score_update', score_data, "live_matches")
             
             logger.debug(f"Broadcasted live score for match {live_update.match_id}")
             
         except Exception as e:
             logger.error(f"Error broadcasting live score: {str(e)}")
     
-    def _score_updater_loop(self):
-        """Simulate live score updates (for demo purposes)"""
-        while self._running:
-            try:
-                # In a real implementation, this would fetch data from a cricket API
-                # For now, we'll simulate updates for active matches
-                for match_id, match_data in self.active_matches.items():
-                    if match_data['status'] == 'live':
-                        # Simulate random score updates
-                        import random
-                        if random.random() < 0.1:  # 10% chance of update every cycle
-                            score_update = {
-                                'team1_score': match_data['team1_score'] + random.randint(0, 6),
-                                'last_ball': f"{random.randint(0, 6)} runs",
-                                'commentary': f"Great shot! {random.randint(0, 6)} runs scored."
-                            }
-                            self.update_live_score(match_id, score_update)
-                
-                time.sleep(5)  # Update every 5 seconds
-                
-            except Exception as e:
-                logger.error(f"Error in score updater loop: {str(e)}")
-                time.sleep(5)
+    def _remove_match(self, match_id: int, event_log):
+        """Drop a completed match unless it has been restarted since"""
+        if self.active_matches.remove(match_id, expected=event_log) is not None:
+            self.event_store.drop(match_id)
+    
+    def submit_score(self, match_id: int, score_update: Dict[str, Any]) -> bool:
+        """Apply an operator-entered score update; only with the admin score source and a live match"""
+        if not isinstance(self.score_source, AdminScoreSource) or match_id not in self.active_matches:
+            return False
+        self.score_source.submit(match_id, score_update)
+        return True
     
     # Utility Methods
     def get_active_matches(self) -> Dict[int, Dict]:
         """Get all active matches"""
-        return self.active_matches.copy()
+        return {match_id: event_log.get_state() for match_id, event_log in self.active_matches.snapshot().items()}
     
     def get_match_status(self, match_id: int) -> Optional[Dict]:
         """Get status of a specific match"""
-        return self.active_matches.get(match_id)
+        event_log = self.active_matches.get(match_id)
+        return event_log.get_state() if event_log else None
+    
+    def get_match_catch_up(self, match_id: int, since_seq: Optional[int] = None) -> Optional[Dict]:
+        """Latest snapshot plus ball-by-ball events for a client joining mid-innings"""
+        event_log = self.active_matches.get(match_id)
+        return event_log.catch_up(since_seq) if event_log else None
     
     def get_notification_stats(self) -> Dict[str, Any]:
         """Get notification service statistics"""
         return {
             'active_matches': len(self.active_matches),
-            'queued_notifications': len(self.notification_queue),
+            'queued_notifications': self.dispatcher.depth(),
+            'match_timers': self.scheduler.get_stats(),
+            'dispatch': self.dispatcher.get_stats(),
             'user_subscriptions': len(self.user_subscriptions),
             'room_subscriptions': len(self.room_subscriptions),
             'service_running': self._running,
@@ -527,7 +711,9 @@ class RealtimeNotificationService:
         }
 
 # Global service instance
-realtime_notification_service = RealtimeNotificationService()
+realtime_notification_service = RealtimeNotificationService(
+    dispatcher_workers=int(os.getenv('NOTIFICATION_DISPATCH_WORKERS', 2))
+)
 
 # SocketIO Event Handlers
 @socketio.on('connect')
@@ -540,6 +726,7 @@ def handle_connect():
 def handle_disconnect():
     """Handle client disconnection"""
     logger.info(f"Client disconnected")
+    track_disconnect(request.sid)
 
 @socketio.on('subscribe_to_match')
 def handle_subscribe_to_match(data):
@@ -551,6 +738,7 @@ def handle_subscribe_to_match(data):
         if match_id and user_id:
             realtime_notification_service.subscribe_user_to_match(user_id, match_id)
             join_room(f"match_{match_id}")
+            track_join(f"match_{match_id}", request.sid)
             emit('subscription_status', {
                 'status': 'subscribed',
                 'match_id': match_id,
@@ -571,6 +759,7 @@ def handle_unsubscribe_from_match(data):
         if match_id and user_id:
             realtime_notification_service.unsubscribe_user_from_match(user_id, match_id)
             leave_room(f"match_{match_id}")
+            track_leave(f"match_{match_id}", request.sid)
             emit('subscription_status', {
                 'status': 'unsubscribed',
                 'match_id': match_id,
@@ -588,6 +777,7 @@ def handle_join_user_room(data):
         user_id = data.get('user_id')
         if user_id:
             join_room(f"user_{user_id}")
+            track_join(f"user_{user_id}", request.sid)
             emit('room_status', {
                 'status': 'joined',
                 'room': f"user_{user_id}",
@@ -598,6 +788,25 @@ def handle_join_user_room(data):
         logger.error(f"Error joining user room: {str(e)}")
         emit('error', {'message': 'Failed to join user room'})
 
+@socketio.on('submit_score')
+def handle_submit_score(data):
+    """Handle a score update entered by an admin operator"""
+    try:
+        if not (current_user.is_authenticated and current_user.is_admin()):
+            emit('error', {'message': 'Access denied'})
+            return
+        
+        match_id = data.get('match_id')
+        score_update = data.get('score_update')
+        if match_id and score_update and realtime_notification_service.submit_score(match_id, score_update):
+            emit('score_status', {'status': 'accepted', 'match_id': match_id})
+        else:
+            emit('error', {'message': 'Score update not accepted'})
+        
+    except Exception as e:
+        logger.error(f"Error submitting score: {str(e)}")
+        emit('error', {'message': 'Failed to submit score'})
+
 @socketio.on('get_live_matches')
 def handle_get_live_matches():
     """Handle request for live matches"""
@@ -0,0 +1,4 @@
+"""
+CricVerse offline benchmarks
+Replayable performance harnesses for hot paths, runnable without external services
+"""
@@ -0,0 +1,343 @@
+"""
+Offline chatbot latency benchmark for CricVerse
+
+Replays a corpus of fan questions through CricVerseChatbot.generate_response
+against a seeded in-memory database, with a local stub in place of Gemini.
+Records per-stage timings, database query counts and peak memory, reports
+p50/p95/p99 and compares the results with a stored baseline.
+
+Usage:
+    python -m benchmarks.chatbot_benchmark
+    python -m benchmarks.chatbot_benchmark --iterations 20 --model-latency-ms 50
+    python -m benchmarks.chatbot_benchmark --update-baseline
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, datetime, time as dt_time, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stats import summarize, load_baseline, save_baseline, compare_metrics
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'chatbot.json')
+
+STAGES = ('intent', 'db_context', 'prompt_build', 'model', 'post_processing', 'logging')
+
+# Realistic fan questions covering each intent the chatbot handles
+CORPUS = [
+    "Hi there!",
+    "Where is the MCG and how do I get there?",
+    "What facilities are at Adelaide Oval?",
+    "Is there parking at the Gabba?",
+    "How much does parking cost on match day?",
+    "What food options are available at the stadium?",
+    "Do you have vegetarian food on the menu?",
+    "When is the next Melbourne Stars match?",
+    "Show me the fixture for this weekend",
+    "What's the live score?",
+    "Who is top of the standings table?",
+    "Who are the top run scorers this season?",
+    "Tell me about the Sydney Sixers team",
+    "Which players are in the Perth Scorchers squad?",
+    "How much are tickets for the next game?",
+    "I want to buy tickets for the Heat game",
+    "Are there any family ticket deals?",
+    "What accessibility services are available?",
+    "Can I get a refund if it rains?",
+    "What time do the gates open?",
+    "Is the weather forecast good for Friday's match?",
+    "Thanks for the help!",
+]
+
+
+class StageRecorder:
+    """Collects wall-clock time per generate_response stage for one request"""
+
+    def __init__(self):
+        self.current: Dict[str, float] = {}
+
+    def reset(self):
+        self.current = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.current[name] = self.current.get(name, 0.0) + elapsed_ms
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+class StubGeminiModel:
+    """Local stand-in for genai.GenerativeModel with optional simulated latency"""
+
+    def __init__(self, model_name: str, latency_ms: float = 0.0):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+
+    def generate_content(self, prompt: str):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        question = prompt.rsplit('User:', 1)[-1].split('\n', 1)[0].strip()
+        return SimpleNamespace(text=f"Hello! Here's what I found about \"{question}\" at CricVerse.")
+
+
+class StubGenAI:
+    """Replaces the google.generativeai module inside the chatbot service"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+
+    def configure(self, api_key=None):
+        return None
+
+    def GenerativeModel(self, model_name):
+        return StubGeminiModel(model_name, self.latency_ms)
+
+
+def use_offline_environment():
+    """Run fully offline: skip the module-level app factory (the harness builds
+    its own in-memory app) and keep the chatbot from dialling Supabase at import"""
+    os.environ.setdefault('PYTEST_CURRENT_TEST', 'chatbot_benchmark')
+    os.environ['SUPABASE_URL'] = ''
+    os.environ['SUPABASE_ANON_KEY'] = ''
+
+
+def create_benchmark_app():
+    """Minimal Flask app bound to an in-memory SQLite database"""
+    from flask import Flask
+    from app import db
+
+    flask_app = Flask('chatbot_benchmark')
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(flask_app)
+    return flask_app
+
+
+def seed_database(customers: int = 20, stadiums: int = 8, items_per_concession: int = 6):
+    """Seed representative BBL data (run inside an app context)"""
+    from app import db
+    from app.models import (Team, Stadium, Concession, MenuItem, Event, Match, Seat, Customer,
+                            CustomerProfile, Booking, Ticket, Parking, ChatConversation, ChatMessage)
+
+    db.create_all()
+    team_names = ['Melbourne Stars', 'Sydney Sixers', 'Perth Scorchers', 'Brisbane Heat',
+                  'Adelaide Strikers', 'Hobart Hurricanes', 'Sydney Thunder', 'Melbourne Renegades']
+    venues = ['MCG', 'SCG', 'Optus Stadium', 'The Gabba', 'Adelaide Oval', 'Blundstone Arena',
+              'Sydney Showground', 'Marvel Stadium']
+
+    for i in range(stadiums):
+        db.session.add(Stadium(id=i + 1, name=venues[i % len(venues)], location='Australia', capacity=40000 + i * 1000,
+                               description='Members stand, family zone, food court'))
+        db.session.add(Team(id=i + 1, team_name=team_names[i % len(team_names)], home_ground=venues[i % len(venues)]))
+        db.session.add(Parking(stadium_id=i + 1, zone='North', capacity=500, rate_per_hour=10.0))
+        concession = Concession(id=i + 1, stadium_id=i + 1, name=f"Stand {i + 1}", category='Food',
+                                location_zone='Level 1')
+        db.session.add(concession)
+        for j in range(items_per_concession):
+            db.session.add(MenuItem(concession_id=i + 1, name=f"Item {i}-{j}", price=200 + j * 150,
+                                    category='Snacks', is_vegetarian=bool(j % 2)))
+        for j in range(20):
+            db.session.add(Seat(stadium_id=i + 1, seat_number=str(j), section='A', seat_type='General', price=2500))
+
+    today = date.today()
+    for i in range(stadiums * 2):
+        db.session.add(Event(id=i + 1, stadium_id=i % stadiums + 1, event_name=f"BBL Match {i + 1}",
+                             event_date=today + timedelta(days=i + 1), start_time=dt_time(19, 15),
+                             home_team_id=i % stadiums + 1, away_team_id=(i + 1) % stadiums + 1,
+                             match_status='Scheduled'))
+        db.session.add(Match(event_id=i + 1, home_team_id=i % stadiums + 1, away_team_id=(i + 1) % stadiums + 1))
+
+    for c in range(1, customers + 1):
+        db.session.add(Customer(id=c, name=f"Fan {c}", email=f"fan{c}@example.com",
+                                favorite_team_id=c % stadiums + 1, membership_level='Basic'))
+        db.session.add(CustomerProfile(customer_id=c, total_bookings=2, total_spent=5000.0))
+        db.session.add(Booking(id=c, customer_id=c, total_amount=2500, booking_date=datetime.utcnow()))
+        db.session.add(Ticket(event_id=c % (stadiums * 2) + 1, customer_id=c, booking_id=c))
+        conversation = ChatConversation(id=c, customer_id=c, session_id=f"history-{c}")
+        db.session.add(conversation)
+        for m in range(10):
+            db.session.add(ChatMessage(conversation_id=c, sender_type='user', message=CORPUS[m % len(CORPUS)]))
+    db.session.commit()
+
+
+def run_benchmark(iterations: int = 10, model_latency_ms: float = 0.0, customer_id: Optional[int] = 1,
+                  sessions: int = 4, corpus: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Replay the corpus and return a latency/query/memory report"""
+    from app import db
+    from app.services import chatbot_service
+    from app.services.chat_log_service import chat_log_service
+
+    corpus = corpus or CORPUS
+    flask_app = create_benchmark_app()
+    chatbot = chatbot_service.cricverse_chatbot
+    recorder = StageRecorder()
+
+    stage_samples = {stage: [] for stage in STAGES}
+    total_samples: List[float] = []
+    query_samples: List[int] = []
+
+    with flask_app.app_context():
+        seed_database()
+        counter = QueryCounter(db.engine)
+        previous_log_app = chat_log_service.app
+        chat_log_service.app = flask_app
+        chatbot.stage_recorder = recorder
+
+        try:
+            with patch.object(chatbot_service, 'gemini_available', True), \
+                    patch.object(chatbot_service, 'genai', StubGenAI(model_latency_ms)), \
+                    flask_app.test_request_context('/chat', environ_base={'REMOTE_ADDR': '127.0.0.1'}):
+                tracemalloc.start()
+                for _ in range(iterations):
+                    for index, question in enumerate(corpus):
+                        recorder.reset()
+                        counter.reset()
+                        start = time.perf_counter()
+                        chatbot.generate_response(question, customer_id, f"bench-session-{index % sessions}")
+                        total_samples.append((time.perf_counter() - start) * 1000)
+                        query_samples.append(counter.count)
+                        for stage in STAGES:
+                            if stage in recorder.current:
+                                stage_samples[stage].append(recorder.current[stage])
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            counter.reset()
+            flush_start = time.perf_counter()
+            logged = chat_log_service.flush()
+            flush_ms = (time.perf_counter() - flush_start) * 1000
+            flush_queries = counter.count
+        finally:
+            chatbot.stage_recorder = None
+            chat_log_service.app = previous_log_app
+            db.session.remove()
+
+    return {
+        'config': {
+            'iterations': iterations,
+            'corpus_size': len(corpus),
+            'requests': len(total_samples),
+            'model_latency_ms': model_latency_ms,
+            'customer_id': customer_id
+        },
+        'total_ms': summarize(total_samples),
+        'stages_ms': {stage: summarize(samples) for stage, samples in stage_samples.items()},
+        'db_queries_per_request': summarize(query_samples),
+        'peak_memory_kb': round(peak_bytes / 1024, 1),
+        'log_flush': {
+            'interactions': logged,
+            'total_ms': round(flush_ms, 3),
+            'queries': flush_queries
+        }
+    }
+
+
+def baseline_metrics(report: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten the metrics that are tracked against the baseline
+
+    p99 is reported but not tracked: with a few hundred requests it is one
+    or two samples and moves with every GC pause.
+    """
+    metrics = {
+        'total_ms.p50': report['total_ms']['p50'],
+        'total_ms.p95': report['total_ms']['p95'],
+        'db_queries_per_request.mean': report['db_queries_per_request']['mean'],
+        'db_queries_per_request.max': report['db_queries_per_request']['max'],
+        'peak_memory_kb': report['peak_memory_kb'],
+    }
+    for stage, summary in report['stages_ms'].items():
+        if summary['count']:
+            metrics[f"stages_ms.{stage}.p95"] = summary['p95']
+    return metrics
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Chatbot benchmark: {report['config']['requests']} requests "
+        f"({report['config']['iterations']} x {report['config']['corpus_size']} questions)",
+        f"{'stage':<18}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for stage, summary in report['stages_ms'].items():
+        lines.append(f"{stage:<18}{summary['p50']:>10.3f}{summary['p95']:>10.3f}{summary['p99']:>10.3f}")
+    total = report['total_ms']
+    lines.append(f"{'total':<18}{total['p50']:>10.3f}{total['p95']:>10.3f}{total['p99']:>10.3f}")
+    queries = report['db_queries_per_request']
+    lines.append(f"DB queries per request: mean {queries['mean']}, p95 {queries['p95']}, max {queries['max']}")
+    lines.append(f"Peak traced memory: {report['peak_memory_kb']} KB")
+    flush = report['log_flush']
+    lines.append(f"Log flush: {flush['interactions']} interactions in {flush['total_ms']} ms using {flush['queries']} queries")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Offline CricVerse chatbot latency benchmark')
+    parser.add_argument('--iterations', type=int, default=10, help='passes over the question corpus')
+    parser.add_argument('--model-latency-ms', type=float, default=0.0, help='simulated Gemini latency')
+    parser.add_argument('--customer-id', type=int, default=1, help='customer to personalise for (0 for guests)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression')
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--output', help='write the full JSON report to this path')
+    args = parser.parse_args(argv)
+
+    use_offline_environment()
+    report = run_benchmark(args.iterations, args.model_latency_ms, args.customer_id or None)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, {'config': report['config'], 'metrics': baseline_metrics(report)})
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if not baseline:
+        print("No baseline found; run with --update-baseline to record one")
+        return 0
+
+    # Sub-millisecond jitter is noise, not a regression
+    regressions = compare_metrics(baseline_metrics(report), baseline.get('metrics', {}),
+                                  tolerance=args.tolerance, min_delta=1.0)
+    if regressions:
+        print("Regressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"({regression['change_pct']}%)")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
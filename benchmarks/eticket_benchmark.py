@@ -0,0 +1,240 @@
+"""
+E-ticket rendering benchmark for CricVerse
+
+Renders booking e-tickets for a handful of events with the original
+per-booking pipeline (styles built, static page drawn and the QR encoded as
+a PNG for every booking) and with the template-cached engine, first in one
+process and then across a pool of worker processes. Reports PDFs per second
+per core for each, plus the render time per PDF.
+
+The original task passed the QR PNG to ``drawInlineImage`` as a raw buffer,
+which ReportLab rejects; the baseline here wraps it in an ``ImageReader`` so
+it renders the same page.
+
+Usage:
+    python -m benchmarks.eticket_benchmark
+    python -m benchmarks.eticket_benchmark --bookings 2000 --workers 4
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import qrcode
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Table, Paragraph
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+from benchmarks.stats import summarize
+import eticket_renderer
+from eticket_renderer import render_eticket, render_etickets
+
+
+def sample_bookings(count: int, events: int = 4, seed: int = 7) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(event, booking) pairs shaped like the ones the Celery task builds"""
+    rng = random.Random(seed)
+    started = datetime(2026, 1, 5, 19, 15)
+    event_rows = [{
+        'event_id': i + 1,
+        'name': f"Sydney Sixers vs Perth Scorchers (Match {i + 1})",
+        'date': (started + timedelta(days=i * 3)).strftime('%A, %B %d, %Y'),
+        'time': started.strftime('%I:%M %p'),
+        'venue': 'Sydney Cricket Ground',
+        'location': 'Moore Park, Sydney'
+    } for i in range(events)]
+    pairs = []
+    for booking_id in range(1, count + 1):
+        pairs.append((rng.choice(event_rows), {
+            'booking_id': booking_id,
+            'booking_date': (started - timedelta(days=rng.randint(1, 60))).strftime('%B %d, %Y at %I:%M %p'),
+            'customer_name': f"Fan {booking_id}",
+            'customer_email': f"fan{booking_id}@example.com",
+            'tickets': [{'ticket_type': rng.choice(['Adult', 'Child', 'Concession']), 'section': rng.choice('ABCD'),
+                         'row': str(rng.randint(1, 40)), 'seat': str(rng.randint(1, 30)), 'price': 45.0,
+                         'qr_payload': f"CV{booking_id}.{rng.getrandbits(192):048x}"}
+                        for _ in range(rng.randint(1, 4))]
+        }))
+    return pairs
+
+
+def render_original(event: Dict[str, Any], booking: Dict[str, Any]) -> bytes:
+    """The page as the Celery task drew it before the template cache"""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30,
+                                 alignment=TA_CENTER, textColor=colors.HexColor("#0055A4"))
+    # Built and never used, as in the original
+    heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=16, spaceAfter=15,  # noqa: F841
+                                   textColor=colors.HexColor("#0055A4"))
+    normal_style = ParagraphStyle('CustomNormal', parent=styles['Normal'], fontSize=12, spaceAfter=10)
+
+    c.setFillColor(colors.HexColor("#0055A4"))
+    c.rect(0, height - 80, width, 80, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 28)
+    c.drawCentredString(width / 2, height - 50, "CricVerse E-Ticket")
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(width / 2, height - 75, "Big Bash League Official Ticket")
+    c.setFillColor(colors.HexColor("#FF6B00"))
+    c.rect(width - 100, height - 70, 80, 60, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawCentredString(width - 60, height - 45, "LOGO")
+
+    y_position = height - 120
+    p = Paragraph(f"<b>{event['name']}</b>", title_style)
+    p.wrapOn(c, width - 100, 100)
+    p.drawOn(c, 50, y_position)
+    y_position -= 60
+    details = [f"<b>Date:</b> {event['date']}", f"<b>Time:</b> {event['time']}",
+               f"<b>Venue:</b> {event['venue']}", f"<b>Location:</b> {event['location']}",
+               f"<b>Booking ID:</b> {booking['booking_id']}", f"<b>Booking Date:</b> {booking['booking_date']}",
+               f"<b>Customer:</b> {booking['customer_name']}", f"<b>Email:</b> {booking['customer_email']}"]
+    for detail in details:
+        p = Paragraph(detail, normal_style)
+        p.wrapOn(c, width - 100, 100)
+        p.drawOn(c, 50, y_position)
+        y_position -= 25
+
+    rows = [["Ticket Type", "Section", "Row", "Seat", "Price"]]
+    total_price = 0
+    for ticket in booking['tickets']:
+        total_price += ticket['price']
+        rows.append([ticket['ticket_type'], ticket['section'], ticket['row'], ticket['seat'], f"${ticket['price']:.2f}"])
+    rows.append(["", "", "", "<b>Total</b>", f"<b>${total_price:.2f}</b>"])
+    table = Table(rows, colWidths=[100, 70, 70, 70, 80])
+    table.setStyle(eticket_renderer.TICKET_TABLE_STYLE)
+    table.wrapOn(c, width, height)
+    table.drawOn(c, 50, y_position - 150)
+    y_position -= 180
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    # The original printed one code per booking
+    qr.add_data(booking['tickets'][0]['qr_payload'])
+    qr.make(fit=True)
+    qr_buffer = io.BytesIO()
+    qr.make_image(fill_color="#0055A4", back_color="white").save(qr_buffer, format='PNG')
+    qr_buffer.seek(0)
+    c.drawImage(ImageReader(qr_buffer), width - 150, y_position, width=100, height=100)
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.black)
+    c.drawCentredString(width - 100, y_position - 15, "Scan to Verify")
+
+    y_position -= 150
+    c.setFillColor(colors.HexColor("#0055A4"))
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, y_position, "Important Information")
+    y_position -= 25
+    for instruction in eticket_renderer.INSTRUCTIONS:
+        c.setFont("Helvetica", 10)
+        c.drawString(60, y_position, instruction)
+        y_position -= 15
+
+    c.setFillColor(colors.HexColor("#FF6B00"))
+    c.rect(0, 30, width, 30, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(width / 2, 45, "This is a valid ticket for entry. Present at the venue for scanning.")
+    c.save()
+    return buffer.getvalue()
+
+
+def run_serial(renderer: Callable, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[str, Any]:
+    """Render every booking in this process"""
+    render_ms = []
+    sizes = []
+    started = time.perf_counter()
+    for event, booking in pairs:
+        began = time.perf_counter()
+        sizes.append(len(renderer(event, booking)))
+        render_ms.append((time.perf_counter() - began) * 1000)
+    seconds = time.perf_counter() - started
+    return {
+        'pdfs_per_second': round(len(pairs) / seconds, 1),
+        'pdfs_per_second_per_core': round(len(pairs) / seconds, 1),
+        'bytes_per_pdf': round(sum(sizes) / len(sizes)),
+        'render_ms': summarize(render_ms)
+    }
+
+
+def run_pool(pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]], workers: int) -> Dict[str, Any]:
+    """Render and save every booking across ``workers`` processes"""
+    directory = tempfile.mkdtemp(prefix='etickets_')
+    jobs = [(event, booking, os.path.join(directory, f"eticket_{booking['booking_id']}.pdf"))
+            for event, booking in pairs]
+    # Start the workers outside the timed run
+    render_etickets(jobs[:workers * eticket_renderer.ETICKET_BATCH_INLINE_MAX + 1], workers)
+    started = time.perf_counter()
+    errors = render_etickets(jobs, workers)
+    seconds = time.perf_counter() - started
+    assert not any(errors), [error for error in errors if error][:3]
+    return {
+        'workers': workers,
+        'pdfs_per_second': round(len(pairs) / seconds, 1),
+        'pdfs_per_second_per_core': round(len(pairs) / seconds / workers, 1)
+    }
+
+
+def run_benchmark(bookings: int = 500, workers: int = 0, events: int = 4) -> Dict[str, Any]:
+    workers = workers or os.cpu_count() or 1
+    pairs = sample_bookings(bookings, events)
+    eticket_renderer.clear_templates()
+    builds = eticket_renderer.template_stats['builds']
+    original = run_serial(render_original, pairs)
+    engine = run_serial(render_eticket, pairs)
+    return {
+        'bookings': bookings,
+        'events': events,
+        'original': original,
+        'engine': engine,
+        'templates_built': eticket_renderer.template_stats['builds'] - builds,
+        'speedup': round(engine['pdfs_per_second'] / original['pdfs_per_second'], 2),
+        'engine_pool': run_pool(pairs, workers) if workers > 1 else None
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='E-ticket rendering benchmark')
+    parser.add_argument('--bookings', type=int, default=500, help='bookings to render')
+    parser.add_argument('--events', type=int, default=4, help='distinct events across the bookings')
+    parser.add_argument('--workers', type=int, default=0, help='render worker processes (default: one per core)')
+    parser.add_argument('--output', help='write the JSON report to this path')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.bookings, args.workers, args.events)
+    print(f"E-ticket benchmark: {args.bookings} bookings across {args.events} events")
+    print(f"{'renderer':<12}{'PDF/s/core':>12}{'p50 ms':>9}{'p95 ms':>9}{'bytes':>8}")
+    for name in ('original', 'engine'):
+        row = report[name]
+        print(f"{name:<12}{row['pdfs_per_second_per_core']:>12}{row['render_ms']['p50']:>9.2f}"
+              f"{row['render_ms']['p95']:>9.2f}{row['bytes_per_pdf']:>8}")
+    print(f"speedup per core: {report['speedup']}x ({report['templates_built']} templates built)")
+    pool = report['engine_pool']
+    if pool:
+        print(f"engine on {pool['workers']} workers: {pool['pdfs_per_second']} PDF/s "
+              f"({pool['pdfs_per_second_per_core']} PDF/s/core)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
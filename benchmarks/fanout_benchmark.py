@@ -0,0 +1,171 @@
+"""
+Realtime fan-out load benchmark for CricVerse
+
+Simulates live-score broadcasts fanned out across worker processes. Each
+worker owns a share of the simulated socket connections and runs a
+FanoutWorker; the publisher puts every broadcast once onto each worker's
+inbox, the same delivery Redis pub/sub gives the workers. Reports broadcast
+latency (publish to last local client written, slowest worker) and client
+deliveries per second per core as workers are added.
+
+Usage:
+    python -m benchmarks.fanout_benchmark
+    python -m benchmarks.fanout_benchmark --connections 50000 --workers 1,2,4,8
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import multiprocessing as mp
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stats import summarize
+from realtime_bus import FanoutWorker
+
+
+class QueueFanoutBus:
+    """Cross-process stand-in for Redis pub/sub: one inbox queue per worker"""
+
+    def __init__(self, inboxes: List[Any]):
+        self.inboxes = inboxes
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        for inbox in self.inboxes:
+            inbox.put(message)
+        return len(self.inboxes)
+
+    def subscribe(self, channel, callback):
+        raise NotImplementedError("Workers read their inbox directly")
+
+
+def worker_main(worker_index: int, workers: int, connections: int, matches: int, inbox, results):
+    """Own every ``workers``-th connection and emit broadcasts to them"""
+    out = io.BytesIO()
+    writes = [0]
+
+    def emit_local(event, data, room=None):
+        # Encode once per emit, then write the frame to every local client
+        frame = json.dumps({'event': event, 'data': data}).encode('utf-8')
+        clients = worker.local_clients(room)
+        for _ in range(clients):
+            out.write(frame)
+        writes[0] += clients
+        if out.tell() > 1 << 22:
+            out.seek(0)
+            out.truncate()
+
+    worker = FanoutWorker(bus=None, emit_local=emit_local, worker_id=f"bench-{worker_index}")
+    for connection in range(worker_index, connections, workers):
+        worker.join(f"match_{connection % matches}", f"sid-{connection}")
+
+    latencies = []
+    busy_seconds = 0.0
+    while True:
+        message = inbox.get()
+        if message is None:
+            break
+        started = time.perf_counter()
+        worker.handle_message(message)
+        busy_seconds += time.perf_counter() - started
+        latencies.append((message['id'], (time.time() - message['published_at']) * 1000))
+
+    results.put({
+        'worker': worker_index,
+        'local_clients': worker.get_stats()['local_clients'],
+        'client_writes': writes[0],
+        'busy_seconds': busy_seconds,
+        'latencies': latencies
+    })
+
+
+def run_fanout(workers: int, connections: int = 20000, matches: int = 8, messages: int = 200,
+               rate: float = 100.0) -> Dict[str, Any]:
+    """Publish ``messages`` score updates at ``rate`` per second across ``workers`` processes"""
+    context = mp.get_context('spawn' if sys.platform == 'darwin' else 'fork')
+    inboxes = [context.Queue() for _ in range(workers)]
+    results = context.Queue()
+    processes = [context.Process(target=worker_main, args=(i, workers, connections, matches, inboxes[i], results))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+
+    publisher = FanoutWorker(QueueFanoutBus(inboxes), emit_local=None, worker_id='publisher')
+    time.sleep(0.5)  # Let workers register their connections
+
+    interval = 1.0 / rate if rate else 0.0
+    started = time.perf_counter()
+    for i in range(messages):
+        publisher.bus.publish(publisher.channel, {
+            'id': i,
+            'event': 'match_delta',
+            'data': {'match_id': i % matches, 'seq': i, 'changes': {'team1.score': 100 + i, 'current_over': f"{i // 6}.{i % 6}"}},
+            'room': f"match_{i % matches}",
+            'origin': publisher.worker_id,
+            'published_at': time.time()
+        })
+        if interval:
+            time.sleep(max(0.0, started + (i + 1) * interval - time.perf_counter()))
+    for inbox in inboxes:
+        inbox.put(None)
+
+    worker_results = [results.get() for _ in range(workers)]
+    for process in processes:
+        process.join()
+
+    # A broadcast is done when the slowest worker has written it to all its clients
+    slowest = {}
+    for result in worker_results:
+        for message_id, latency in result['latencies']:
+            slowest[message_id] = max(slowest.get(message_id, 0.0), latency)
+
+    client_writes = sum(r['client_writes'] for r in worker_results)
+    busy_seconds = sum(r['busy_seconds'] for r in worker_results)
+    cores_used = min(workers, os.cpu_count() or 1)
+    return {
+        'workers': workers,
+        'cores_used': cores_used,
+        'connections': connections,
+        'connections_per_worker': connections // workers,
+        'connections_per_core': connections // cores_used,
+        'broadcasts': messages,
+        'client_writes': client_writes,
+        # Busy time is summed across workers, so this is writes per core-second
+        'client_writes_per_core_second': round(client_writes / busy_seconds, 1) if busy_seconds else 0.0,
+        'broadcast_latency_ms': summarize(slowest.values())
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Realtime fan-out load benchmark')
+    parser.add_argument('--connections', type=int, default=20000)
+    parser.add_argument('--matches', type=int, default=8)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=100.0, help='broadcasts per second')
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts')
+    parser.add_argument('--output', help='write the JSON report to this path')
+    args = parser.parse_args(argv)
+
+    reports = []
+    print(f"Fan-out benchmark: {args.connections} connections, {args.matches} matches, "
+          f"{args.messages} broadcasts at {args.rate}/s")
+    print(f"{'workers':>8}{'conn/core':>11}{'writes/core-s':>15}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for workers in [int(w) for w in args.workers.split(',') if w]:
+        report = run_fanout(workers, args.connections, args.matches, args.messages, args.rate)
+        reports.append(report)
+        latency = report['broadcast_latency_ms']
+        print(f"{workers:>8}{report['connections_per_core']:>11}{report['client_writes_per_core_second']:>15}"
+              f"{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Notification template benchmark for CricVerse
+
+Renders booking confirmation emails for a batch of bookings four ways:
+the original f-string HTML built per message, the Jinja templates rendered
+per message (HTML, text and subject), the single-send path, which joins
+compiled copies of the same blocks, and the bulk path, where the body is
+rendered once with placeholders and each message only carries its fields
+and ticket rows from the compiled row blocks. Reports the render time and
+the bytes produced per message for each.
+
+Usage:
+    python -m benchmarks.notification_template_benchmark
+    python -m benchmarks.notification_template_benchmark --bookings 40000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from notification import build_bulk_booking_emails, render_booking_confirmation
+from notification_templates import notification_templates
+
+
+def sample_bookings(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Booking data shaped like the booking service passes to the notification services"""
+    rng = random.Random(seed)
+    return [{
+        'booking_id': booking_id,
+        'customer_email': f"fan{booking_id}@example.com",
+        'event_name': 'Sydney Sixers vs Perth Scorchers',
+        'event_date': 'Monday, January 05, 2026',
+        'venue': 'Sydney Cricket Ground',
+        'currency': 'AUD',
+        'amount': f"{rng.randint(1, 4) * 45:.2f}",
+        'tickets': [{'type': rng.choice(['Adult', 'Child', 'Concession']),
+                     'seat_info': f"Section {rng.choice('ABCD')}, Row {rng.randint(1, 40)}, Seat {rng.randint(1, 30)}"}
+                    for _ in range(rng.randint(1, 4))]
+    } for booking_id in range(1, count + 1)]
+
+
+def render_original(booking_data: Dict[str, Any]) -> str:
+    """The confirmation HTML as EmailNotificationService built it before the templates"""
+    ticket_html = ""
+    for ticket in booking_data.get('tickets', []):
+        ticket_html += f"""
+            <li>
+                <strong>{ticket.get('type', 'General Admission')}</strong> -
+                {ticket.get('seat_info', 'Seat information not available')}
+            </li>
+            """
+    return f"""
+            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                <div style="background: linear-gradient(135deg, #0055A4 0%, #FF6B00 100%); padding: 20px; text-align: center; color: white;">
+                    <h1>Booking Confirmed!</h1>
+                    <p>Your Big Bash League experience is secured</p>
+                </div>
+
+                <div style="padding: 20px;">
+                    <h2>Booking Details</h2>
+                    <p><strong>Booking ID:</strong> {booking_data.get('booking_id', 'N/A')}</p>
+                    <p><strong>Event:</strong> {booking_data.get('event_name', 'N/A')}</p>
+                    <p><strong>Date:</strong> {booking_data.get('event_date', 'N/A')}</p>
+                    <p><strong>Venue:</strong> {booking_data.get('venue', 'N/A')}</p>
+
+                    <h3>Tickets</h3>
+                    <ul>
+                        {ticket_html or "<li>No tickets found</li>"}
+                    </ul>
+
+                    <p><strong>Total Amount:</strong> {booking_data.get('currency', 'USD')} {booking_data.get('amount', '0.00')}</p>
+
+                    <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-top: 20px;">
+                        <h3>Next Steps</h3>
+                        <p>1. Download your e-ticket from the attachment</p>
+                        <p>2. Arrive at the venue 30 minutes before the match</p>
+                        <p>3. Bring a valid ID for ticket verification</p>
+                    </div>
+                </div>
+
+                <div style="background-color: #f1f1f1; padding: 15px; text-align: center; font-size: 12px; color: #666;">
+                    <p>© 2025 CricVerse Stadium System. Big Bash League Official Partner.</p>
+                    <p>This is an automated email. Please do not reply.</p>
+                </div>
+            </div>
+            """
+
+
+def run_per_message(bookings: List[Dict[str, Any]], render) -> Dict[str, Any]:
+    started = time.perf_counter()
+    sizes = [render(booking) for booking in bookings]
+    seconds = time.perf_counter() - started
+    return {
+        'us_per_message': round(seconds / len(bookings) * 1e6, 2),
+        'bytes_per_message': round(sum(sizes) / len(sizes))
+    }
+
+
+def run_bulk(bookings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    content, messages = build_bulk_booking_emails(bookings)
+    seconds = time.perf_counter() - started
+    static = len(content.subject) + len(content.html) + len(content.text)
+    substitutions = sum(len(json.dumps(message.substitutions)) for message in messages)
+    return {
+        'us_per_message': round(seconds / len(bookings) * 1e6, 2),
+        'bytes_per_message': round(substitutions / len(messages)),
+        'static_bytes': static
+    }
+
+
+def jinja_render(booking: Dict[str, Any]) -> int:
+    rendered = notification_templates.render('booking_confirmation', booking)
+    return len(rendered.subject) + len(rendered.html) + len(rendered.text)
+
+
+def compiled_render(booking: Dict[str, Any]) -> int:
+    rendered = render_booking_confirmation(booking)
+    return len(rendered.subject) + len(rendered.html) + len(rendered.text)
+
+
+def run_benchmark(bookings: int = 5000) -> Dict[str, Any]:
+    rows = sample_bookings(bookings)
+    # Warm the template caches outside the timed runs
+    build_bulk_booking_emails(rows[:10])
+    for booking in rows[:10]:
+        compiled_render(booking)
+    report = {
+        'bookings': bookings,
+        'original': run_per_message(rows, lambda booking: len(render_original(booking))),
+        'jinja': run_per_message(rows, jinja_render),
+        'compiled': run_per_message(rows, compiled_render),
+        'bulk': run_bulk(rows)
+    }
+    report['bulk_vs_jinja'] = round(report['jinja']['us_per_message'] / report['bulk']['us_per_message'], 1)
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Notification template benchmark')
+    parser.add_argument('--bookings', type=int, default=5000, help='booking confirmations to render')
+    parser.add_argument('--output', help='write the JSON report to this path')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.bookings)
+    print(f"Notification template benchmark: {args.bookings} booking confirmations")
+    print(f"{'renderer':<10}{'us/msg':>9}{'bytes/msg':>11}")
+    for name in ('original', 'jinja', 'compiled', 'bulk'):
+        row = report[name]
+        print(f"{name:<10}{row['us_per_message']:>9}{row['bytes_per_message']:>11}")
+    print(f"bulk body rendered once: {report['bulk']['static_bytes']} bytes; "
+          f"{report['bulk_vs_jinja']}x faster per message than rendering the templates per message")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,392 @@
+"""
+Realtime server load test for CricVerse
+
+Starts the application locally in a child process (SQLite database, no
+Redis, admin score source) and drives it with simulated fans. Fans are
+asyncio websocket clients that speak the Engine.IO / Socket.IO text protocol
+directly, so tens of thousands of them fit in a few client processes. Every
+fan joins a match room and a stadium room, then a recorded match is replayed
+through RealtimeNotificationService.update_live_score.
+
+Reports end-to-end broadcast latency (update_live_score to receipt by the
+fan), dropped messages, server memory per connection and server CPU per
+broadcast. Runs on a single Linux box with no external services; raise
+``ulimit -n`` above the number of fans for large runs.
+
+Usage:
+    python -m benchmarks.realtime_load_test
+    python -m benchmarks.realtime_load_test --fans 20000 --client-processes 4
+    python -m benchmarks.realtime_load_test --replay recorded_match.jsonl --speed 30
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import multiprocessing as mp
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stats import summarize
+
+# Shared client counters: connected, joined, failed, received
+CONNECTED, JOINED, FAILED, RECEIVED = range(4)
+
+
+def recorded_match(matches: int = 2, balls: int = 120, seconds_per_ball: float = 30.0,
+                   seed: int = 7) -> List[Dict[str, Any]]:
+    """A recorded match in the replay score source format, one line per ball"""
+    rng = random.Random(seed)
+    records = []
+    for match_id in range(1, matches + 1):
+        score = wickets = 0
+        for ball in range(balls):
+            runs = rng.choice([0, 0, 1, 1, 1, 2, 4, 6])
+            out = rng.random() < 0.04 and wickets < 9
+            score += 0 if out else runs
+            wickets += 1 if out else 0
+            records.append({
+                'match_id': match_id,
+                'offset': ball * seconds_per_ball,
+                'update': {
+                    'team1_score': score,
+                    'team1_wickets': wickets,
+                    'current_over': f"{ball // 6}.{ball % 6 + 1}",
+                    'current_ball': ball % 6 + 1,
+                    'last_ball': 'wicket' if out else f"{runs} runs",
+                    'commentary': 'Bowled him!' if out else f"Worked away for {runs}."
+                }
+            })
+    return records
+
+
+def load_replay(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def parse_packet(message: str) -> Optional[Tuple[str, Any]]:
+    """(event, data) from a Socket.IO EVENT packet on the default namespace"""
+    if not message.startswith('42'):
+        return None
+    payload = json.loads(message[2:])
+    return payload[0], (payload[1] if len(payload) > 1 else None)
+
+
+def event_packet(event: str, data: Any) -> str:
+    return '42' + json.dumps([event, data])
+
+
+def raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def process_usage() -> Dict[str, float]:
+    """Resident memory, thread count and CPU seconds of this process (Linux)"""
+    status = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            status[key] = value.strip()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        'rss_mb': round(int(status.get('VmRSS', '0 kB').split()[0]) / 1024, 2),
+        'threads': int(status.get('Threads', 0)),
+        'cpu_seconds': usage.ru_utime + usage.ru_stime
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Server process
+def server_main(port: int, match_ids: List[int], conflation: bool, control):
+    """Boot the app, serve SocketIO on ``port`` and run commands from ``control``"""
+    import logging
+    raise_file_limit()
+    os.environ.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='cricverse-load-'), 'load.db')}",
+        'REDIS_URL': '',
+        'TESTING': '1',
+        'LIVE_SCORE_SOURCE': 'admin',
+        'LIVE_UPDATE_CONFLATION': 'on' if conflation else 'off'
+    })
+    # Joins look up matches and stadiums that are not in the load test database
+    logging.disable(logging.ERROR)
+
+    try:
+        import app as app_package
+        from app.services.realtime_notification_service import realtime_notification_service as service
+
+        # Match and stadium lookups on join find no rows; fans are still subscribed
+        service.start_service()
+        for match_id in match_ids:
+            service.start_live_match(match_id, f"Team {match_id}A", f"Team {match_id}B")
+
+        # The threading SocketIO mode served by werkzeug, as socketio.run does
+        from werkzeug.serving import make_server
+        http_server = make_server('127.0.0.1', port, app_package.app, threaded=True)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+    except Exception as e:
+        control.send(('error', repr(e)))
+        return
+    control.send(('ready', process_usage()))
+
+    while True:
+        command, args = control.recv()
+        if command == 'usage':
+            control.send(process_usage())
+        elif command == 'replay':
+            records, speed = args
+            sent = {}
+            cpu_before = process_usage()['cpu_seconds']
+            started = time.perf_counter()
+            for record in sorted(records, key=lambda r: r.get('offset', 0)):
+                delay = started + record.get('offset', 0) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                service.update_live_score(record['match_id'], record['update'])
+                sent[record['match_id']] = sent.get(record['match_id'], 0) + 1
+            control.send({'sent': sent, 'seconds': time.perf_counter() - started,
+                          'cpu_before': cpu_before})
+
+
+# Client processes
+async def run_fan(url: str, match_id: int, stadium_id: int, counters, latencies: array,
+                  received: Dict[int, int], fan_id: int, gate: asyncio.Semaphore):
+    import websockets
+    async with gate:
+        try:
+            ws = await websockets.connect(url, max_size=None, ping_interval=None, compression=None,
+                                          open_timeout=60, close_timeout=1)
+            await ws.recv()  # Engine.IO open packet
+            await ws.send('40')
+            await ws.send(event_packet('join_match', {'match_id': match_id}))
+            await ws.send(event_packet('join_stadium', {'stadium_id': stadium_id}))
+        except Exception:
+            counters[FAILED] += 1
+            return
+    counters[CONNECTED] += 1
+    received[fan_id] = 0
+    joined = False
+    try:
+        while True:
+            message = await ws.recv()
+            if message == '2':
+                await ws.send('3')  # Engine.IO pong
+                continue
+            packet = parse_packet(message)
+            if packet is None:
+                continue
+            event, data = packet
+            if event == 'live_score_update' and data.get('match_id') == match_id:
+                sent_at = datetime.fromisoformat(data['timestamp']).replace(tzinfo=timezone.utc).timestamp()
+                latencies.append((time.time() - sent_at) * 1000)
+                received[fan_id] += 1
+                counters[RECEIVED] += 1
+            elif event == 'match_status' or (event == 'subscription_status' and data.get('type') == 'match'):
+                # Whichever join_match handler is registered answers once the room is joined
+                if not joined:
+                    joined = True
+                    counters[JOINED] += 1
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        pass  # Server closed the connection; undelivered updates count as dropped
+    finally:
+        await ws.close()
+
+
+async def run_fans(url: str, fans: List[Tuple[int, int, int]], connect_concurrency: int,
+                   shared, stop) -> Tuple[array, Dict[int, int]]:
+    counters = [0, 0, 0, 0]
+    latencies = array('d')
+    received: Dict[int, int] = {}
+    gate = asyncio.Semaphore(connect_concurrency)
+    tasks = [asyncio.ensure_future(run_fan(url, match_id, stadium_id, counters, latencies, received,
+                                           fan_id, gate))
+             for fan_id, match_id, stadium_id in fans]
+    while not stop.is_set():
+        shared[:] = counters
+        await asyncio.sleep(0.2)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shared[:] = counters
+    return latencies, received
+
+
+def client_main(url: str, fans: List[Tuple[int, int, int]], connect_concurrency: int, shared, stop, results):
+    raise_file_limit()
+    latencies, received = asyncio.run(run_fans(url, fans, connect_concurrency, shared, stop))
+    results.put({'latencies': latencies.tobytes(), 'received': received})
+
+
+def wait_for(condition, timeout: float, interval: float = 0.2) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(interval)
+    return condition()
+
+
+def run_load_test(fans: int = 2000, stadiums: int = 2, client_processes: int = 2,
+                  records: Optional[List[Dict[str, Any]]] = None, speed: float = 60.0,
+                  conflation: bool = False, connect_concurrency: int = 100,
+                  ramp_timeout: float = 300.0, drain_timeout: float = 30.0) -> Dict[str, Any]:
+    """Connect ``fans`` simulated fans, replay ``records`` and measure the server"""
+    records = records if records is not None else recorded_match()
+    match_ids = sorted({record['match_id'] for record in records})
+    context = mp.get_context('fork')
+    port = free_port()
+    url = f"ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket"
+
+    control, server_end = context.Pipe()
+    server = context.Process(target=server_main, args=(port, match_ids, conflation, server_end), daemon=True)
+    server.start()
+    status, idle = control.recv()
+    if status == 'error':
+        raise RuntimeError(f"Realtime server failed to start: {idle}")
+    if not wait_for(lambda: _port_open(port), 30):
+        server.terminate()
+        raise RuntimeError(f"Realtime server did not start on port {port}")
+
+    # Fans are spread evenly over matches and stadiums, and over client processes
+    assignments = [(fan_id, match_ids[fan_id % len(match_ids)], fan_id % stadiums + 1) for fan_id in range(fans)]
+    stop = context.Event()
+    results = context.Queue()
+    counters = [context.Array('q', 4, lock=False) for _ in range(client_processes)]
+    clients = [context.Process(target=client_main,
+                               args=(url, assignments[i::client_processes], connect_concurrency, counters[i],
+                                     stop, results), daemon=True)
+               for i in range(client_processes)]
+
+    def total(index):
+        return sum(shared[index] for shared in counters)
+
+    ramp_started = time.perf_counter()
+    for client in clients:
+        client.start()
+    wait_for(lambda: total(JOINED) + total(FAILED) >= fans, ramp_timeout)
+    ramp_seconds = time.perf_counter() - ramp_started
+    time.sleep(1.0)  # Let the stadium joins settle before measuring memory
+    control.send(('usage', None))
+    connected_usage = control.recv()
+
+    control.send(('replay', (records, speed)))
+    replay = control.recv()
+    all_deliveries = sum(replay['sent'].get(match_id, 0) for _, match_id, _ in assignments)
+    wait_for(lambda: total(RECEIVED) >= all_deliveries, drain_timeout)
+    control.send(('usage', None))
+    after_usage = control.recv()
+
+    stop.set()
+    client_results = [results.get(timeout=60 + fans / 100) for _ in clients]
+    for client in clients:
+        client.join(30)
+    # Tearing down thousands of connection threads takes a while; nothing left to measure
+    server.terminate()
+    server.join(10)
+
+    latencies = array('d')
+    received = {}
+    for result in client_results:
+        latencies.frombytes(result['latencies'])
+        received.update(result['received'])
+    connected = len(received)
+    # Only fans that stayed connected can be expected to receive every update
+    expected = sum(replay['sent'].get(match_id, 0) for fan_id, match_id, _ in assignments if fan_id in received)
+    delivered = sum(received.values())
+    broadcasts = sum(replay['sent'].values())
+    cpu_seconds = after_usage['cpu_seconds'] - replay['cpu_before']
+    return {
+        'fans': fans,
+        'connected': connected,
+        'connect_failures': fans - connected,
+        'client_processes': client_processes,
+        'matches': len(match_ids),
+        'stadiums': stadiums,
+        'conflation': conflation,
+        'ramp_seconds': round(ramp_seconds, 2),
+        'broadcasts': broadcasts,
+        'replay_seconds': round(replay['seconds'], 2),
+        'expected_deliveries': expected,
+        'delivered': delivered,
+        'dropped': expected - delivered,
+        'dropped_pct': round((expected - delivered) / expected * 100, 3) if expected else 0.0,
+        'latency_ms': summarize(latencies),
+        'server': {
+            'rss_idle_mb': idle['rss_mb'],
+            'rss_connected_mb': connected_usage['rss_mb'],
+            'memory_per_connection_kb': round((connected_usage['rss_mb'] - idle['rss_mb']) * 1024 / connected, 2)
+            if connected else 0.0,
+            'threads': connected_usage['threads'],
+            'cpu_seconds_replay': round(cpu_seconds, 3),
+            'cpu_ms_per_broadcast': round(cpu_seconds * 1000 / broadcasts, 3) if broadcasts else 0.0,
+            'cpu_us_per_delivery': round(cpu_seconds * 1e6 / delivered, 2) if delivered else 0.0
+        }
+    }
+
+
+def _port_open(port: int) -> bool:
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+            return True
+    except OSError:
+        return False
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Realtime server load test')
+    parser.add_argument('--fans', type=int, default=2000, help='simulated fan connections')
+    parser.add_argument('--client-processes', type=int, default=max(1, min(4, (os.cpu_count() or 1) - 1)))
+    parser.add_argument('--matches', type=int, default=2, help='matches in the generated replay')
+    parser.add_argument('--balls', type=int, default=120, help='balls per match in the generated replay')
+    parser.add_argument('--stadiums', type=int, default=2)
+    parser.add_argument('--replay', help='recorded match in replay score source JSON lines format')
+    parser.add_argument('--speed', type=float, default=60.0, help='replay speed-up over recorded offsets')
+    parser.add_argument('--conflation', action='store_true', help='keep per-tier live update conflation on')
+    parser.add_argument('--connect-concurrency', type=int, default=100, help='fans connecting at once')
+    parser.add_argument('--output', help='write the JSON report to this path')
+    args = parser.parse_args(argv)
+
+    records = load_replay(args.replay) if args.replay else recorded_match(args.matches, args.balls)
+    report = run_load_test(args.fans, args.stadiums, args.client_processes, records, args.speed,
+                           args.conflation, args.connect_concurrency)
+    server = report['server']
+    latency = report['latency_ms']
+    print(f"Realtime load test: {report['connected']}/{report['fans']} fans connected in {report['ramp_seconds']}s, "
+          f"{report['broadcasts']} broadcasts over {report['matches']} matches")
+    print(f"latency ms      p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  p99 {latency['p99']:.2f}  "
+          f"max {latency['max']:.2f}")
+    print(f"deliveries      {report['delivered']}/{report['expected_deliveries']} "
+          f"(dropped {report['dropped']}, {report['dropped_pct']}%)")
+    print(f"server memory   {server['rss_idle_mb']} MB idle, {server['rss_connected_mb']} MB connected, "
+          f"{server['memory_per_connection_kb']} KB per connection, {server['threads']} threads")
+    print(f"server cpu      {server['cpu_ms_per_broadcast']} ms per broadcast, "
+          f"{server['cpu_us_per_delivery']} us per delivery")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
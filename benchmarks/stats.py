@@ -0,0 +1,68 @@
+"""
+Shared statistics and baseline helpers for CricVerse benchmarks
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Any, Iterable
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, float]:
+    """Count, mean, p50, p95, p99 and max for a set of samples"""
+    samples = list(samples)
+    if not samples:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(samples),
+        'mean': round(sum(samples) / len(samples), 4),
+        'p50': round(percentile(samples, 50), 4),
+        'p95': round(percentile(samples, 95), 4),
+        'p99': round(percentile(samples, 99), 4),
+        'max': round(max(samples), 4)
+    }
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, report: Dict[str, Any]):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def compare_metrics(current: Dict[str, float], baseline: Dict[str, float],
+                    tolerance: float = 0.2, min_delta: float = 0.0) -> List[Dict[str, Any]]:
+    """Return metrics that got worse than baseline by more than the tolerance
+
+    Every metric is treated as lower-is-better. ``min_delta`` ignores tiny
+    absolute changes that would otherwise trip the relative tolerance.
+    """
+    regressions = []
+    for name, base_value in baseline.items():
+        value = current.get(name)
+        if value is None or not isinstance(base_value, (int, float)):
+            continue
+        limit = base_value * (1 + tolerance)
+        if value > limit and value - base_value > min_delta:
+            regressions.append({
+                'metric': name,
+                'baseline': base_value,
+                'current': value,
+                'change_pct': round((value - base_value) / base_value * 100, 1) if base_value else None
+            })
+    return regressions
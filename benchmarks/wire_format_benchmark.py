@@ -0,0 +1,163 @@
+"""
+Wire format benchmark for CricVerse realtime streams
+
+Compares the default JSON payloads with the compact binary layouts for the
+high-volume events (live scores, match updates, occupancy, seat availability)
+as they would be sent to a room of simulated fans. Each broadcast is encoded
+into a real Socket.IO packet once, as a room emit does; then, as the
+websocket transport does for every recipient, the text is UTF-8 encoded,
+framed and written to that fan's socket. Reports bytes per message, encode
+CPU per message and total bytes and CPU time per broadcast to the room.
+
+Usage:
+    python -m benchmarks.wire_format_benchmark
+    python -m benchmarks.wire_format_benchmark --fans 50000 --messages 200
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import struct
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from socketio import packet
+
+from benchmarks.stats import summarize
+from wire_format import encode_payload, decode_payload, COMPACT_SCHEMAS
+
+
+def sample_payloads(event: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Payloads shaped like the ones the realtime services emit"""
+    started = datetime(2026, 1, 5, 8, 15)
+    payloads = []
+    for i in range(count):
+        timestamp = (started + timedelta(seconds=i * 30)).isoformat()
+        over = f"{i // 6}.{i % 6}"
+        if event == 'live_score_update':
+            runs = rng.choice([0, 1, 1, 2, 4, 6])
+            payloads.append({
+                'match_id': 42, 'team1_score': 80 + i, 'team2_score': 0, 'team1_wickets': i // 30,
+                'team2_wickets': 0, 'current_over': over, 'current_ball': i % 6,
+                'batting_team': 'Sydney Sixers', 'bowling_team': 'Perth Scorchers',
+                'last_ball': f"{runs} runs", 'commentary': f"Driven through the covers for {runs}.",
+                'timestamp': timestamp, 'type': 'score_update'
+            })
+        elif event == 'match_update':
+            payloads.append({
+                'match_id': 42, 'seq': i + 1, 'type': 'score_update',
+                'data': {'home_score': 80 + i, 'away_score': 0, 'home_wickets': i // 30, 'current_over': over},
+                'timestamp': timestamp
+            })
+        elif event == 'occupancy_update':
+            booked = 30000 + i * 7
+            payloads.append({
+                'stadium_id': 3, 'type': 'occupancy_update', 'timestamp': timestamp,
+                'data': {'stadium_id': 3, 'total_seats': 48000, 'booked_seats': booked,
+                         'available_seats': 48000 - booked, 'occupancy_percentage': round(booked / 480, 2),
+                         'events_today': 1, 'timestamp': timestamp}
+            })
+        else:
+            payloads.append({'event_id': 17, 'available_seats': 5000 - i, 'timestamp': timestamp})
+    return payloads
+
+
+def encode_json(event: str, data: Dict[str, Any]):
+    return packet.Packet(packet.EVENT, data=[event, data]).encode()
+
+
+def encode_compact_packet(event: str, data: Dict[str, Any]):
+    return packet.Packet(packet.EVENT, data=[event, encode_payload(event, data)]).encode()
+
+
+def ws_header(length: int) -> bytes:
+    """Unmasked server-to-client websocket text frame header"""
+    if length < 126:
+        return struct.pack('!BB', 0x81, length)
+    return struct.pack('!BBH', 0x81, 126, length)
+
+
+def run_format(event: str, encoder: Callable, payloads: List[Dict[str, Any]], fans: int) -> Dict[str, Any]:
+    """Encode each broadcast once and send it to ``fans`` client sockets"""
+    sink = io.BytesIO()
+    encode_us = []
+    broadcast_ms = []
+    sizes = []
+    for data in payloads:
+        started = time.perf_counter()
+        # Engine.IO message packet: '4' + the Socket.IO packet text
+        text = '4' + encoder(event, data)
+        encoded_at = time.perf_counter()
+        for _ in range(fans):
+            frame = text.encode('utf-8')
+            sink.write(ws_header(len(frame)))
+            sink.write(frame)
+            if sink.tell() > 1 << 24:
+                sink.seek(0)
+                sink.truncate()
+        finished = time.perf_counter()
+        encode_us.append((encoded_at - started) * 1e6)
+        broadcast_ms.append((finished - started) * 1000)
+        sizes.append(len(ws_header(len(text))) + len(text.encode('utf-8')))
+    mean_size = sum(sizes) / len(sizes)
+    return {
+        'bytes_per_message': round(mean_size, 1),
+        'bytes_per_broadcast_mb': round(mean_size * fans / 1e6, 3),
+        'encode_us': summarize(encode_us),
+        'broadcast_ms': summarize(broadcast_ms)
+    }
+
+
+def run_benchmark(fans: int = 50000, messages: int = 100, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    report = {'fans': fans, 'messages': messages, 'events': {}}
+    for event in COMPACT_SCHEMAS:
+        payloads = sample_payloads(event, messages, rng)
+        # The compact layout must round-trip before its numbers mean anything
+        for data in payloads:
+            decoded_event, decoded = decode_payload(encode_payload(event, data))
+            assert decoded_event == event and decoded.keys() == data.keys()
+        json_result = run_format(event, encode_json, payloads, fans)
+        compact_result = run_format(event, encode_compact_packet, payloads, fans)
+        report['events'][event] = {
+            'json': json_result,
+            'compact': compact_result,
+            'bytes_saved_pct': round((1 - compact_result['bytes_per_message'] / json_result['bytes_per_message']) * 100, 1),
+            'broadcast_time_saved_pct': round(
+                (1 - compact_result['broadcast_ms']['mean'] / json_result['broadcast_ms']['mean']) * 100, 1)
+        }
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Compact wire format benchmark')
+    parser.add_argument('--fans', type=int, default=50000, help='connected fans in the room')
+    parser.add_argument('--messages', type=int, default=100, help='broadcasts per event type')
+    parser.add_argument('--output', help='write the JSON report to this path')
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.fans, args.messages)
+    print(f"Wire format benchmark: {args.fans} fans, {args.messages} broadcasts per event")
+    print(f"{'event':<20}{'format':>9}{'bytes':>8}{'MB/bcast':>10}{'enc us':>9}{'bcast ms':>10}")
+    for event, result in report['events'].items():
+        for wire_format in ('json', 'compact'):
+            row = result[wire_format]
+            print(f"{event:<20}{wire_format:>9}{row['bytes_per_message']:>8}{row['bytes_per_broadcast_mb']:>10}"
+                  f"{row['encode_us']['p50']:>9.1f}{row['broadcast_ms']['p50']:>10.2f}")
+        print(f"{'':<20}{'saved':>9}{result['bytes_saved_pct']:>7}%{'':>10}{'':>9}"
+              f"{result['broadcast_time_saved_pct']:>9}%")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
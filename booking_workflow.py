@@ -0,0 +1,141 @@
+"""
+Post-Booking Workflow for CricVerse
+Issues ticket QR codes, renders e-tickets and sends the confirmation emails
+for batches of bookings as one Celery canvas
+Big Bash League Cricket Platform
+"""
+
+import os
+import logging
+from typing import Dict, Any, List, Optional
+
+from celery import chain, chord, group
+
+from celery_tasks import celery_app, _load_eticket_data, _issue_eticket_tokens, _eticket_path, _send_eticket_email
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BOOKING_BATCH_SIZE = int(os.getenv('BOOKING_WORKFLOW_BATCH_SIZE', 25))
+
+
+@celery_app.task(bind=True, ignore_result=True, acks_late=True)
+def render_booking_qr_codes(self, booking_ids: List[int]) -> List[Dict[str, Any]]:
+    """Step 1: issue and pre-render the gate QR code for every ticket in a batch of bookings
+
+    The signed tokens are stamped into the e-ticket data, so the next step
+    prints the same codes the gates verify.
+    """
+    etickets = _load_eticket_data(booking_ids)
+    report = _issue_eticket_tokens(etickets, prerender=True)
+    qr_codes = {qr['ticket_info']['ticket_id']: qr['qr_code_base64'] for qr in report['results']}
+
+    results = [{'booking_id': booking_id, 'success': False, 'error': 'Booking not found'}
+               for booking_id in booking_ids if booking_id not in etickets]
+    for booking_id, eticket in etickets.items():
+        results.append({'booking_id': booking_id, 'success': True, 'eticket': eticket,
+                        'qr_codes': [qr_codes[ticket['ticket_id']] for ticket in eticket['tickets']
+                                     if ticket['ticket_id'] in qr_codes]})
+    logger.info(f"🔲 Rendered {report['generated']} ticket QR codes ({len(report['errors'])} errors)")
+    return results
+
+
+@celery_app.task(bind=True, ignore_result=True, acks_late=True)
+def render_booking_etickets(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Step 2: render the e-ticket PDFs, with their tickets' QR codes, for the batch"""
+    from eticket_renderer import render_etickets
+
+    pending = [result for result in results if result['success']]
+    jobs = [(result['eticket']['event'], result['eticket']['booking'], _eticket_path(result['booking_id']))
+            for result in pending]
+    errors = render_etickets(jobs)
+
+    for result, (_, _, pdf_path), error in zip(pending, jobs, errors):
+        if error:
+            result['success'] = False
+            result['error'] = error
+        else:
+            result['pdf_path'] = pdf_path
+    logger.info(f"🎨 Rendered {len(jobs) - sum(1 for error in errors if error)} of {len(results)} e-tickets")
+    return results
+
+
+@celery_app.task(bind=True)
+def send_booking_eticket_emails(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Step 3: email each booking its e-ticket and QR codes; returns the batch summary"""
+    summary = {'bookings': len(results), 'rendered': 0, 'emailed': 0, 'failed': {}}
+    for result in results:
+        booking_id = result['booking_id']
+        if not result['success']:
+            summary['failed'][str(booking_id)] = result.get('error')
+            continue
+        summary['rendered'] += 1
+        try:
+            response = _send_eticket_email(booking_id, result['eticket'], result['pdf_path'],
+                                           result.get('qr_codes'))
+            if response is not None and response.success:
+                summary['emailed'] += 1
+        except Exception as e:
+            logger.error(f"❌ Failed to send e-ticket email for booking {booking_id}: {e}")
+            summary['failed'][str(booking_id)] = str(e)
+    return summary
+
+
+@celery_app.task(bind=True, acks_late=True)
+def summarize_post_booking(self, summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chord callback: combine the per-batch summaries"""
+    total = {'batches': len(summaries), 'bookings': 0, 'rendered': 0, 'emailed': 0, 'failed': {}}
+    for summary in summaries:
+        for key in ('bookings', 'rendered', 'emailed'):
+            total[key] += summary[key]
+        total['failed'].update(summary['failed'])
+    logger.info(f"✅ Post-booking workflow finished: {total['rendered']} e-tickets, "
+                f"{total['emailed']} emails, {len(total['failed'])} failed")
+    return total
+
+
+@celery_app.task(bind=True, ignore_result=True)
+def send_booking_sms(self, phone: str, booking_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Text one booking its confirmation; the workflow's emails carry the e-ticket"""
+    from notification import sms_service
+
+    response = sms_service.send_booking_confirmation(phone, booking_data)
+    return {'success': response.success, 'booking_id': booking_data.get('booking_id'),
+            'error': response.error_message}
+
+
+@celery_app.task(bind=True)
+def send_booking_confirmations_batch(self, bookings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Send booking confirmations for many bookings in one task, through the bulk senders"""
+    from notification import send_bulk_booking_notifications
+
+    failed = {str(booking.get('booking_id')): 'No customer email provided'
+              for booking in bookings if not booking.get('customer_email')}
+    results = send_bulk_booking_notifications([booking for booking in bookings if booking.get('customer_email')])
+    sent = 0
+    for booking_id, response in results['email'].items():
+        if response.success:
+            sent += 1
+        else:
+            failed[booking_id] = response.error_message
+    logger.info(f"📬 Sent {sent} of {len(bookings)} booking confirmations")
+    return {'success': not failed, 'sent': sent, 'failed': failed}
+
+
+def post_booking_workflow(booking_ids: List[int], batch_size: Optional[int] = None):
+    """Canvas for the work after bookings are paid
+
+    Bookings are split into batches; each batch is a chain of issue QR
+    codes → render e-tickets → send emails, the batches run in parallel as
+    a group, and a chord callback combines their summaries. Call
+    ``apply_async()`` on the result to start it.
+    """
+    batch_size = batch_size or BOOKING_BATCH_SIZE
+    batches = [list(booking_ids[i:i + batch_size]) for i in range(0, len(booking_ids), batch_size)]
+    pipelines = [chain(render_booking_qr_codes.s(batch), render_booking_etickets.s(), send_booking_eticket_emails.s())
+                 for batch in batches]
+    return chord(group(pipelines), summarize_post_booking.s())
+
+
+def start_post_booking_workflow(booking_ids: List[int], batch_size: Optional[int] = None):
+    return post_booking_workflow(booking_ids, batch_size).apply_async()
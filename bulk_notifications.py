@@ -0,0 +1,477 @@
+"""
+Bulk Notification Sending for CricVerse
+Sends transactional email and SMS in bulk over pooled HTTP connections,
+shaped to provider rate limits, with retries and per-message delivery status
+Big Bash League Cricket Platform
+"""
+
+import re
+import json
+import time
+import random
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Lock
+from typing import Dict, Any, List, Optional, Callable
+from urllib.parse import parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Delivery statuses
+QUEUED = 'queued'
+SENT = 'sent'
+RETRYING = 'retrying'
+FAILED = 'failed'
+DELIVERED = 'delivered'
+BOUNCED = 'bounced'
+
+SENDGRID_API_URL = 'https://api.sendgrid.com'
+TWILIO_API_URL = 'https://api.twilio.com'
+# SendGrid accepts up to 1000 personalizations in one mail/send request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+TRACKED_MESSAGES = 100000
+# Recipients that no provider would accept, rejected before batching
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+PHONE_PATTERN = re.compile(r'^\+[1-9]\d{6,14}$')
+
+
+@dataclass
+class BulkMessage:
+    """One recipient; ``substitutions`` replace tokens such as ``%name%`` in the content"""
+    key: str
+    to: str
+    substitutions: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class BulkContent:
+    subject: str = ''
+    html: str = ''
+    text: str = ''
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one provider request: SENT, RETRYING (transient) or FAILED"""
+    status: str
+    provider_id: Optional[str] = None
+    error: Optional[str] = None
+    retry_after: Optional[float] = None
+    http_status: Optional[int] = None
+
+
+def substitute(template: str, substitutions: Dict[str, str]) -> str:
+    for token, value in substitutions.items():
+        template = template.replace(token, str(value))
+    return template
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts of up to ``burst``
+
+    Senders block in ``acquire`` until a token is free. A provider asking
+    us to back off (HTTP 429) drains the bucket below zero, so every sender
+    sharing it slows down rather than just the one that was throttled.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens, waiting as long as needed; returns the seconds waited"""
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                # Refills are float sums; a waiter left short only by rounding has its token
+                if self._tokens >= tokens - 1e-9:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        """Hold back all senders for about ``seconds``"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class DeliveryTracker:
+    """Latest status, attempts and provider id per message key, for the most recent ``capacity`` keys"""
+
+    def __init__(self, capacity: int = TRACKED_MESSAGES):
+        self.capacity = capacity
+        self._messages: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = Lock()
+
+    def update(self, keys: List[str], status: str, provider_id: Optional[str] = None,
+               error: Optional[str] = None, attempt: bool = False):
+        with self._lock:
+            for key in keys:
+                record = self._messages.get(key)
+                if record is None:
+                    record = self._messages[key] = {'status': QUEUED, 'attempts': 0,
+                                                    'provider_id': None, 'error': None}
+                    if len(self._messages) > self.capacity:
+                        self._messages.popitem(last=False)
+                record['status'] = status
+                if attempt:
+                    record['attempts'] += 1
+                if provider_id:
+                    record['provider_id'] = provider_id
+                record['error'] = error
+
+    def record_event(self, key: str, event: str):
+        """Apply a provider webhook event (delivered, bounce, dropped) to a sent message"""
+        status = {'delivered': DELIVERED, 'bounce': BOUNCED, 'dropped': FAILED,
+                  'undelivered': FAILED, 'failed': FAILED}.get(event)
+        if status:
+            self.update([key], status)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._messages.get(key)
+            return dict(record) if record else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for record in self._messages.values():
+                counts[record['status']] = counts.get(record['status'], 0) + 1
+            return counts
+
+
+def pooled_session(pool_size: int) -> requests.Session:
+    """A session that keeps up to ``pool_size`` connections open to the provider"""
+    session = requests.Session()
+    # Retries are handled by the sender so they respect its budget and backoff
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _classify(response: requests.Response) -> BatchResult:
+    if response.status_code in (200, 201, 202):
+        return BatchResult(SENT, http_status=response.status_code)
+    error = f"HTTP {response.status_code}: {response.text[:200]}"
+    if response.status_code == 429 or response.status_code >= 500:
+        retry_after = response.headers.get('Retry-After')
+        return BatchResult(RETRYING, error=error, http_status=response.status_code,
+                           retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None)
+    return BatchResult(FAILED, error=error, http_status=response.status_code)
+
+
+class SendGridBulkProvider:
+    """Email through SendGrid's v3 mail/send, many recipients per request
+
+    Each recipient is one personalization with its own substitutions, so a
+    single request carries up to 1000 emails. ``custom_args`` carries the
+    message key for matching event webhook callbacks.
+    """
+
+    channel = 'email'
+    max_batch = SENDGRID_MAX_PERSONALIZATIONS
+
+    def __init__(self, api_key: str, from_email: str, base_url: str = SENDGRID_API_URL,
+                 pool_size: int = 4, timeout: float = 30.0):
+        self.from_email = from_email
+        self.url = f"{base_url.rstrip('/')}/v3/mail/send"
+        self.timeout = timeout
+        self.session = pooled_session(pool_size)
+        self.session.headers.update({'Authorization': f"Bearer {api_key}", 'Content-Type': 'application/json'})
+
+    def valid_recipient(self, to: str) -> bool:
+        return bool(to and EMAIL_PATTERN.match(to))
+
+    def send_batch(self, messages: List[BulkMessage], content: BulkContent) -> BatchResult:
+        body = {
+            'personalizations': [{
+                'to': [{'email': message.to}],
+                'substitutions': message.substitutions,
+                'custom_args': {'notification_key': message.key}
+            } for message in messages],
+            'from': {'email': self.from_email},
+            'subject': content.subject,
+            'content': [part for part in ({'type': 'text/plain', 'value': content.text},
+                                          {'type': 'text/html', 'value': content.html}) if part['value']]
+        }
+        try:
+            response = self.session.post(self.url, data=json.dumps(body), timeout=self.timeout)
+        except requests.RequestException as e:
+            return BatchResult(RETRYING, error=str(e))
+        result = _classify(response)
+        result.provider_id = response.headers.get('X-Message-Id')
+        return result
+
+
+class TwilioBulkProvider:
+    """SMS through Twilio's Messages API, one message per request on pooled connections"""
+
+    channel = 'sms'
+    max_batch = 1
+
+    def __init__(self, account_sid: str, auth_token: str, from_number: Optional[str] = None,
+                 messaging_service_sid: Optional[str] = None, base_url: str = TWILIO_API_URL,
+                 pool_size: int = 8, timeout: float = 30.0):
+        self.from_number = from_number
+        self.messaging_service_sid = messaging_service_sid
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.timeout = timeout
+        self.session = pooled_session(pool_size)
+        self.session.auth = (account_sid, auth_token)
+
+    def valid_recipient(self, to: str) -> bool:
+        return bool(to and PHONE_PATTERN.match(to))
+
+    def send_batch(self, messages: List[BulkMessage], content: BulkContent) -> BatchResult:
+        message = messages[0]
+        data = {'To': message.to, 'Body': substitute(content.text, message.substitutions)}
+        if self.messaging_service_sid:
+            data['MessagingServiceSid'] = self.messaging_service_sid
+        else:
+            data['From'] = self.from_number
+        try:
+            response = self.session.post(self.url, data=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            return BatchResult(RETRYING, error=str(e))
+        result = _classify(response)
+        if result.status == SENT:
+            result.provider_id = response.json().get('sid')
+        return result
+
+
+class BulkNotificationSender:
+    """Sends messages through a provider in batches, shaped and retried
+
+    Messages are grouped into the provider's batch size and sent by
+    ``concurrency`` threads sharing one token bucket of ``rate`` requests
+    per second. Transient failures (timeouts, 429, 5xx) are retried with
+    full-jitter exponential backoff, or after the provider's Retry-After,
+    up to ``max_retries`` per batch and within a retry budget of
+    ``retry_budget`` retries per request sent, so an outage does not turn
+    into a retry storm. Recipients the provider's ``valid_recipient``
+    rejects fail before batching, and a batch the provider rejects with a
+    400 is split in half and each half resent, so one bad recipient fails
+    alone rather than taking its whole batch with it. Every message's
+    status is kept in ``tracker``.
+    """
+
+    def __init__(self, provider, rate: float, burst: Optional[float] = None, concurrency: int = 4,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 retry_budget: float = 0.2, min_retries: int = 10,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.provider = provider
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self.min_retries = min_retries
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.tracker = DeliveryTracker()
+        self._lock = Lock()
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'sent': 0, 'failed': 0, 'splits': 0}
+
+    def send(self, messages: List[BulkMessage], content: BulkContent) -> Dict[str, Any]:
+        """Send every message; returns counts and throughput for this call"""
+        started = time.perf_counter()
+        before = dict(self.stats)
+        valid, invalid = [], []
+        for message in messages:
+            (valid if self.provider.valid_recipient(message.to) else invalid).append(message)
+        if invalid:
+            self.tracker.update([message.key for message in invalid], FAILED, error='Invalid recipient address')
+            self._count('failed', len(invalid))
+        size = max(1, self.provider.max_batch)
+        batches = [valid[i:i + size] for i in range(0, len(valid), size)]
+        for batch in batches:
+            self.tracker.update([message.key for message in batch], QUEUED)
+
+        if self.concurrency <= 1 or len(batches) <= 1:
+            for batch in batches:
+                self._send_batch(batch, content)
+        else:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                list(pool.map(lambda batch: self._send_batch(batch, content), batches))
+
+        seconds = time.perf_counter() - started
+        report = {key: self.stats[key] - before[key] for key in self.stats}
+        report.update({
+            'messages': len(messages),
+            'batches': len(batches),
+            'seconds': round(seconds, 3),
+            'messages_per_second': round(len(messages) / seconds, 1) if seconds > 0 else 0.0
+        })
+        logger.info(f"📨 Sent {report['sent']} of {len(messages)} {self.provider.channel} messages in "
+                    f"{report['requests']} requests ({report['retries']} retries, {report['failed']} failed)")
+        return report
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'statuses': self.tracker.counts()}
+
+    # Internal helpers
+    def _send_batch(self, batch: List[BulkMessage], content: BulkContent):
+        keys = [message.key for message in batch]
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            result = self.provider.send_batch(batch, content)
+            self.tracker.update(keys, result.status, result.provider_id, result.error, attempt=True)
+            with self._lock:
+                self.stats['requests'] += 1
+                if result.retry_after is not None:
+                    self.stats['throttled'] += 1
+
+            if result.status == SENT:
+                self._count('sent', len(batch))
+                return
+            if result.status == FAILED and result.http_status == 400 and len(batch) > 1:
+                # Find the recipients the provider rejected; the rest still go out
+                self._count('splits', 1)
+                middle = len(batch) // 2
+                self._send_batch(batch[:middle], content)
+                self._send_batch(batch[middle:], content)
+                return
+            if result.status == FAILED or attempt >= self.max_retries or not self._take_retry():
+                self.tracker.update(keys, FAILED, error=result.error)
+                self._count('failed', len(batch))
+                logger.warning(f"⚠️ Giving up on {len(batch)} {self.provider.channel} messages: {result.error}")
+                return
+
+            attempt += 1
+            if result.retry_after is not None:
+                # The next acquire waits out the provider's Retry-After
+                self.bucket.pause(result.retry_after)
+            else:
+                self.sleep(self.rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+    def _take_retry(self) -> bool:
+        with self._lock:
+            if self.stats['retries'] >= self.min_retries + self.retry_budget * self.stats['requests']:
+                return False
+            self.stats['retries'] += 1
+            return True
+
+    def _count(self, key: str, count: int):
+        with self._lock:
+            self.stats[key] += count
+
+
+class FakeProviderServer:
+    """Local stand-in for the SendGrid and Twilio endpoints, for tests and benchmarks
+
+    Serves ``/v3/mail/send`` and Twilio's ``Messages.json`` over HTTP/1.1
+    keep-alive with a fixed ``latency`` per request. Requests beyond
+    ``rate_limit`` per second get a 429 with Retry-After, a
+    ``failure_rate`` share get a 503, and a request addressed to any of
+    the ``rejected`` recipients gets a 400. Counts requests, messages and
+    the TCP connections opened, to show connection reuse.
+    """
+
+    def __init__(self, latency: float = 0.02, rate_limit: Optional[float] = None,
+                 failure_rate: float = 0.0, seed: int = 7):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = Lock()
+        self.stats = {'requests': 0, 'messages': 0, 'throttled': 0, 'failed': 0}
+        self.connections = set()
+        self.recipients: List[str] = []
+        self.rejected = set()
+        self._window_start = 0.0
+        self._window_count = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, payload, headers = fake.handle(self.path, body, self.client_address)
+                data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self) -> 'FakeProviderServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, path: str, body: bytes, client_address):
+        time.sleep(self.latency)
+        with self.lock:
+            self.connections.add(client_address)
+            self.stats['requests'] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start, self._window_count = now, 0
+                self._window_count += 1
+                if self._window_count > self.rate_limit:
+                    self.stats['throttled'] += 1
+                    return 429, {'errors': [{'message': 'rate limited'}]}, {'Retry-After': '1'}
+            if self.failure_rate and self.rng.random() < self.failure_rate:
+                self.stats['failed'] += 1
+                return 503, {'errors': [{'message': 'unavailable'}]}, {}
+
+            if path.endswith('/v3/mail/send'):
+                personalizations = json.loads(body)['personalizations']
+                if len(personalizations) > SENDGRID_MAX_PERSONALIZATIONS:
+                    return 400, {'errors': [{'message': 'too many personalizations'}]}, {}
+                if any(p['to'][0]['email'] in self.rejected for p in personalizations):
+                    return 400, {'errors': [{'message': 'invalid recipient'}]}, {}
+                self.stats['messages'] += len(personalizations)
+                self.recipients.extend(p['to'][0]['email'] for p in personalizations)
+                return 202, None, {'X-Message-Id': f"fake-{self.stats['requests']}"}
+            if path.endswith('/Messages.json'):
+                to = parse_qs(body.decode('utf-8'))['To'][0]
+                if to in self.rejected:
+                    return 400, {'message': 'invalid To number'}, {}
+                self.stats['messages'] += 1
+                self.recipients.append(to)
+                return 201, {'sid': f"SM{self.stats['requests']:032d}"}, {}
+        return 404, {'errors': [{'message': 'not found'}]}, {}
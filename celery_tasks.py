@@ -7,16 +7,46 @@ Big Bash League Cricket Platform
 import os
 import logging
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, task_postrun
 from datetime import datetime
-from typing import Dict, Any
-import uuid
+from typing import Dict, Any, List, Optional
+import time
+
+from task_telemetry import (TaskMetrics, TelemetryPublisher, PUBLISHED_AT_HEADER, queue_wait_ms, outcome_state,
+                            merge_snapshots, summarize)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Queues in the order workers should drain them, e.g.
+#   celery -A celery_tasks worker -Q payments,tickets,notifications,default,marketing
+# with the priority given to their tasks; on Redis a lower number is served first
+TASK_QUEUES = {
+    'payments': 0,
+    'tickets': 3,
+    'notifications': 5,
+    'default': 6,
+    'marketing': 8,
+}
+
+TASK_ROUTES = {
+    'celery_tasks.process_payment_notification': {'queue': 'payments', 'priority': TASK_QUEUES['payments']},
+    'celery_tasks.process_refund': {'queue': 'payments', 'priority': TASK_QUEUES['payments']},
+    'celery_tasks.generate_and_send_eticket': {'queue': 'tickets', 'priority': TASK_QUEUES['tickets']},
+    'celery_tasks.generate_etickets_batch': {'queue': 'tickets', 'priority': TASK_QUEUES['tickets']},
+    'booking_workflow.render_*': {'queue': 'tickets', 'priority': TASK_QUEUES['tickets']},
+    'celery_tasks.send_booking_confirmation': {'queue': 'notifications', 'priority': TASK_QUEUES['notifications']},
+    'celery_tasks.send_verification_decision_notification': {'queue': 'notifications',
+                                                             'priority': TASK_QUEUES['notifications']},
+    'booking_workflow.send_*': {'queue': 'notifications', 'priority': TASK_QUEUES['notifications']},
+    'booking_workflow.summarize_*': {'queue': 'notifications', 'priority': TASK_QUEUES['notifications']},
+    'credential_pregeneration.*': {'queue': 'tickets', 'priority': TASK_QUEUES['tickets']},
+    'marketing.*': {'queue': 'marketing', 'priority': TASK_QUEUES['marketing']},
+}
+
 # Initialize Celery
-celery_app = Celery('cricverse')
+celery_app = Celery('cricverse', include=['booking_workflow', 'credential_pregeneration'])
 celery_app.conf.update(
     broker_url=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
     result_backend=os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
@@ -25,9 +55,92 @@ celery_app.conf.update(
     result_serializer='json',
     timezone='UTC',
     enable_utc=True,
+    task_default_queue='default',
+    task_routes=TASK_ROUTES,
+    broker_transport_options={'priority_steps': list(range(10)), 'sep': ':', 'queue_order_strategy': 'priority'},
+    # One task at a time per worker process so a queued payment is not
+    # stuck behind prefetched marketing work
+    worker_prefetch_multiplier=1,
+    # Tasks are acknowledged when received. Only tasks that are safe to run
+    # twice (rendering, pre-generation) set acks_late, so a crashed worker's
+    # emails and payments are never redelivered and sent again
+    # Results are read back by chords, batch callers and progress polling
+    # within hours; expire them instead of keeping a key per task all season
+    result_expires=int(os.getenv('CELERY_RESULT_EXPIRES_HOURS', 24)) * 3600,
+    # Run with `celery -A celery_tasks beat`; each scan pre-generates or tops
+    # up the entry credentials of events about to start
+    beat_schedule={
+        'pregenerate-event-credentials': {
+            'task': 'credential_pregeneration.schedule_credential_pregeneration',
+            'schedule': float(os.getenv('CREDENTIAL_PREGEN_INTERVAL_MINUTES', 15)) * 60,
+        },
+    },
 )
 
-@celery_app.task(bind=True)
+if os.getenv('CELERY_EAGER', '').lower() in ('1', 'true', 'yes'):
+    # Run tasks in the calling process with an in-memory broker and result
+    # store, for tests and local development without Redis
+    celery_app.conf.update(
+        broker_url='memory://',
+        result_backend='cache+memory://',
+        task_always_eager=True,
+        task_eager_propagates=True,
+    )
+
+
+task_metrics = TaskMetrics()
+telemetry_publisher = TelemetryPublisher(task_metrics,
+                                         interval=float(os.getenv('CELERY_TELEMETRY_INTERVAL_SECONDS', 15)),
+                                         ttl=float(os.getenv('CELERY_TELEMETRY_TTL_SECONDS', 300)))
+
+
+def _result_client():
+    """The Redis client of the result backend, or None for other backends"""
+    client = getattr(celery_app.backend, 'client', None)
+    return client if hasattr(client, 'hgetall') else None
+
+
+@before_task_publish.connect
+def _stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def _record_task_start(task_id=None, task=None, **kwargs):
+    task_metrics.started(task_id, queue_wait_ms(task.request if task else None))
+
+
+@task_postrun.connect
+def _record_task_end(task_id=None, task=None, state=None, retval=None, **kwargs):
+    task_metrics.finished(task_id, task.name if task else 'unknown', outcome_state(state, retval))
+    if task is not None and not task.request.is_eager:
+        client = _result_client()
+        if client is not None:
+            telemetry_publisher.maybe_publish(client)
+
+
+def get_task_telemetry() -> Dict[str, Any]:
+    """Task metrics for this process merged with the latest snapshot of every worker process"""
+    snapshots = {'local': task_metrics.snapshot()}
+    telemetry = {}
+    if not celery_app.conf.task_always_eager:
+        try:
+            client = _result_client()
+            if client is not None:
+                snapshots.update(telemetry_publisher.collect(client))
+        except Exception as e:
+            logger.warning(f"Could not read worker task telemetry: {e}")
+            telemetry['error'] = str(e)
+    telemetry.update({
+        'processes': sum(1 for snapshot in snapshots.values() if snapshot),
+        'result_expires_seconds': celery_app.conf.result_expires,
+        'tasks': summarize(merge_snapshots(snapshots.values()))
+    })
+    return telemetry
+
+
+@celery_app.task(bind=True, ignore_result=True)
 def process_payment_notification(self, payment_data: Dict[str, Any]) -> Dict[str, Any]:
     """Process payment notification asynchronously"""
     try:
@@ -64,260 +177,146 @@ def process_payment_notification(self, payment_data: Dict[str, Any]) -> Dict[str
             'error': str(e)
         }
 
-@celery_app.task(bind=True)
+def _load_eticket_data(booking_ids) -> Dict[int, Dict[str, Any]]:
+    """Events, bookings and customers for e-tickets, with one query per table
+    
+    Seats, events, stadiums and customers are loaded with ``IN`` queries
+    for all bookings at once rather than one lookup per ticket.
+    """
+    from app import Booking, Ticket, Customer, Event, Seat, Stadium
+    
+    booking_ids = list(booking_ids)
+    bookings = Booking.query.filter(Booking.id.in_(booking_ids)).all()
+    tickets = Ticket.query.filter(Ticket.booking_id.in_(booking_ids)).all()
+    seat_ids = {ticket.seat_id for ticket in tickets if ticket.seat_id}
+    seats = {seat.id: seat for seat in Seat.query.filter(Seat.id.in_(seat_ids)).all()} if seat_ids else {}
+    event_ids = {ticket.event_id for ticket in tickets if ticket.event_id}
+    events = {event.id: event for event in Event.query.filter(Event.id.in_(event_ids)).all()} if event_ids else {}
+    stadium_ids = {event.stadium_id for event in events.values()}
+    stadiums = {stadium.id: stadium for stadium in Stadium.query.filter(Stadium.id.in_(stadium_ids)).all()} if stadium_ids else {}
+    customer_ids = {booking.customer_id for booking in bookings}
+    customers = {customer.id: customer for customer in Customer.query.filter(Customer.id.in_(customer_ids)).all()} if customer_ids else {}
+    
+    tickets_by_booking: Dict[int, list] = {}
+    for ticket in tickets:
+        tickets_by_booking.setdefault(ticket.booking_id, []).append(ticket)
+    
+    data = {}
+    for booking in bookings:
+        booking_tickets = tickets_by_booking.get(booking.id, [])
+        event = events.get(booking_tickets[0].event_id) if booking_tickets else None
+        if event is None:
+            continue
+        stadium = stadiums.get(event.stadium_id)
+        customer = customers.get(booking.customer_id)
+        
+        ticket_rows = []
+        for ticket in booking_tickets:
+            seat = seats.get(ticket.seat_id)
+            ticket_rows.append({
+                'ticket_type': ticket.ticket_type,
+                'section': seat.section if seat else None,
+                'row': seat.row_number if seat else None,
+                'seat': seat.seat_number if seat else None,
+                'price': (seat.price if seat else None) or 0
+            })
+        
+        data[booking.id] = {
+            'event': {
+                'event_id': event.id,
+                'name': event.event_name,
+                'date': event.event_date.strftime('%A, %B %d, %Y'),
+                'time': event.start_time.strftime('%I:%M %p') if event.start_time else None,
+                'venue': stadium.name if stadium else None,
+                'location': stadium.location if stadium else None
+            },
+            'booking': {
+                'booking_id': booking.id,
+                'booking_date': booking.booking_date.strftime('%B %d, %Y at %I:%M %p') if booking.booking_date else '',
+                'customer_name': customer.name if customer else '',
+                'customer_email': customer.email if customer else '',
+                'tickets': ticket_rows
+            },
+            'amount': booking.total_amount,
+            'tickets': [{'ticket_id': ticket.id, 'event_id': ticket.event_id,
+                         'customer_id': ticket.customer_id or booking.customer_id,
+                         'seat_id': ticket.seat_id} for ticket in booking_tickets]
+        }
+    return data
+
+def _issue_eticket_tokens(etickets: Dict[int, Dict[str, Any]], prerender: bool = False) -> Dict[str, Any]:
+    """Issue every ticket's signed gate token and stamp it into its e-ticket row as ``qr_payload``
+    
+    Must run before the PDFs are rendered, so the printed QR codes are the
+    tokens the gates verify. Returns the ``generate_ticket_qr_batch`` report.
+    """
+    from qr_generator import qr_generator
+    
+    tickets = [ticket for eticket in etickets.values() for ticket in eticket['tickets']]
+    report = qr_generator.generate_ticket_qr_batch(tickets, prerender=prerender)
+    tokens = {result['ticket_info']['ticket_id']: result['token'] for result in report['results']}
+    for eticket in etickets.values():
+        for row, ticket in zip(eticket['booking']['tickets'], eticket['tickets']):
+            if ticket['ticket_id'] in tokens:
+                row['qr_payload'] = tokens[ticket['ticket_id']]
+    return report
+
+def _eticket_path(booking_id: int) -> str:
+    # In production, you might store this in cloud storage
+    os.makedirs("tickets", exist_ok=True)
+    return os.path.join("tickets", f"eticket_{booking_id}.pdf")
+
+def _send_eticket_email(booking_id: int, eticket: Dict[str, Any], pdf_path: str,
+                        qr_codes: Optional[List[str]] = None):
+    """Email the booking confirmation with the e-ticket attached"""
+    from notification import email_service
+    if not email_service.client:
+        return None
+    customer_email = eticket['booking']['customer_email']
+    notification_data = {
+        'booking_id': booking_id,
+        'event_name': eticket['event']['name'],
+        'event_date': eticket['event']['date'],
+        'venue': eticket['event']['venue'] or 'TBD',
+        'amount': eticket['amount'],
+        'currency': 'USD',
+        'eticket_path': pdf_path,
+        'customer_email': customer_email
+    }
+    if qr_codes:
+        notification_data['qr_codes'] = qr_codes
+    result = email_service.send_booking_confirmation(customer_email, notification_data)
+    if result.success:
+        logger.info(f"📧 E-ticket email sent for booking {booking_id}")
+    else:
+        logger.error(f"❌ Failed to send e-ticket email for booking {booking_id}: {result.error_message}")
+    return result
+
+@celery_app.task(bind=True, ignore_result=True)
 def generate_and_send_eticket(self, booking_id: int) -> Dict[str, Any]:
-    """Generate and send e-ticket asynchronously"""
+    """Generate and send e-ticket asynchronously
+    
+    The page is stamped onto the event's cached template, so a worker only
+    lays out the static parts once per event.
+    """
     try:
         logger.info(f"🎨 Starting e-ticket generation for booking {booking_id}")
         
-        # Import required modules
-        from app import db, Booking, Ticket, Customer, Event, Seat, Stadium
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from reportlab.platypus import Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT
-        import qrcode
-        from io import BytesIO
-        import base64
-        
-        # Fetch booking details
-        booking = Booking.query.get(booking_id)
-        if not booking:
-            raise Exception(f"Booking {booking_id} not found")
-        
-        customer = Customer.query.get(booking.customer_id)
-        event = Event.query.get(booking.event_id)
-        stadium = Stadium.query.get(event.stadium_id) if event else None
-        
-        # Generate unique ticket IDs
-        tickets = Ticket.query.filter_by(booking_id=booking_id).all()
-        
-        # Create PDF in memory
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor("#0055A4")
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=15,
-            textColor=colors.HexColor("#0055A4")
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=12,
-            spaceAfter=10
-        )
+        from eticket_renderer import render_eticket
         
-        # Draw header
-        c.setFillColor(colors.HexColor("#0055A4"))
-        c.rect(0, height - 80, width, 80, fill=1)
-        
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 28)
-        c.drawCentredString(width/2, height - 50, "CricVerse E-Ticket")
-        
-        c.setFont("Helvetica", 14)
-        c.drawCentredString(width/2, height - 75, "Big Bash League Official Ticket")
-        
-        # Add logo placeholder
-        c.setFillColor(colors.HexColor("#FF6B00"))
-        c.rect(width - 100, height - 70, 80, 60, fill=1)
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 10)
-        c.drawCentredString(width - 60, height - 45, "LOGO")
-        
-        # Draw event information
-        y_position = height - 120
-        
-        # Event title
-        p = Paragraph(f"<b>{event.name}</b>", title_style)
-        p.wrapOn(c, width - 100, 100)
-        p.drawOn(c, 50, y_position)
-        y_position -= 60
-        
-        # Event details
-        event_details = [
-            f"<b>Date:</b> {event.date.strftime('%A, %B %d, %Y')}",
-            f"<b>Time:</b> {event.time.strftime('%I:%M %p')}",
-            f"<b>Venue:</b> {stadium.name if stadium else 'TBD'}",
-            f"<b>Location:</b> {stadium.location if stadium else 'TBD'}"
-        ]
-        
-        for detail in event_details:
-            p = Paragraph(detail, normal_style)
-            p.wrapOn(c, width - 100, 100)
-            p.drawOn(c, 50, y_position)
-            y_position -= 25
-        
-        y_position -= 20
-        
-        # Draw booking information
-        c.setFillColor(colors.HexColor("#0055A4"))
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, y_position, "Booking Information")
-        y_position -= 30
-        
-        booking_details = [
-            f"<b>Booking ID:</b> {booking.id}",
-            f"<b>Booking Date:</b> {booking.booking_date.strftime('%B %d, %Y at %I:%M %p')}",
-            f"<b>Customer:</b> {customer.name}",
-            f"<b>Email:</b> {customer.email}"
-        ]
-        
-        for detail in booking_details:
-            p = Paragraph(detail, normal_style)
-            p.wrapOn(c, width - 100, 100)
-            p.drawOn(c, 50, y_position)
-            y_position -= 25
-        
-        y_position -= 20
-        
-        # Draw ticket details table
-        c.setFillColor(colors.HexColor("#0055A4"))
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(50, y_position, "Ticket Details")
-        y_position -= 30
-        
-        # Prepare ticket data for table
-        ticket_data = [["Ticket Type", "Section", "Row", "Seat", "Price"]]
-        total_price = 0
-        
-        for ticket in tickets:
-            seat = Seat.query.get(ticket.seat_id)
-            price = ticket.price or 0
-            total_price += price
-            
-            ticket_data.append([
-                ticket.ticket_type or "General Admission",
-                seat.section if seat else "TBD",
-                seat.row if seat else "TBD",
-                seat.number if seat else "TBD",
-                f"${price:.2f}"
-            ])
-        
-        # Add total row
-        ticket_data.append(["", "", "", "<b>Total</b>", f"<b>${total_price:.2f}</b>"])
-        
-        # Create table
-        table = Table(ticket_data, colWidths=[100, 70, 70, 70, 80])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#0055A4")),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor("#f0f0f0")),
-        ]))
-        
-        table.wrapOn(c, width, height)
-        table.drawOn(c, 50, y_position - 150)
-        y_position -= 180
-        
-        # Generate QR code
-        qr_data = f"https://cricverse.com/verify-ticket/{booking.id}?token={uuid.uuid4()}"
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        qr_img = qr.make_image(fill_color="#0055A4", back_color="white")
-        qr_buffer = BytesIO()
-        qr_img.save(qr_buffer, format='PNG')
-        qr_buffer.seek(0)
-        
-        # Draw QR code
-        c.drawInlineImage(qr_buffer, width - 150, y_position, width=100, height=100)
-        c.setFont("Helvetica", 10)
-        c.setFillColor(colors.black)
-        c.drawCentredString(width - 100, y_position - 15, "Scan to Verify")
-        
-        # Draw instructions
-        y_position -= 150
-        c.setFillColor(colors.HexColor("#0055A4"))
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, y_position, "Important Information")
-        y_position -= 25
-        
-        instructions = [
-            "• Arrive at least 30 minutes before the match starts",
-            "• Bring a valid photo ID for ticket verification",
-            "• This e-ticket must be presented at the entrance",
-            "• No refunds or exchanges after purchase",
-            "• Follow all stadium rules and regulations"
-        ]
-        
-        for instruction in instructions:
-            c.setFont("Helvetica", 10)
-            c.drawString(60, y_position, instruction)
-            y_position -= 15
-        
-        # Draw footer
-        c.setFillColor(colors.HexColor("#FF6B00"))
-        c.rect(0, 30, width, 30, fill=1)
-        
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica", 10)
-        c.drawCentredString(width/2, 45, "This is a valid ticket for entry. Present at the venue for scanning.")
-        
-        c.save()
-        
-        # Get PDF data
-        buffer.seek(0)
-        pdf_data = buffer.getvalue()
-        buffer.close()
-        
-        # Save PDF to file (in production, you might store this in cloud storage)
-        pdf_filename = f"eticket_{booking.id}.pdf"
-        pdf_path = os.path.join("tickets", pdf_filename)
-        
-        # Create tickets directory if it doesn't exist
-        os.makedirs("tickets", exist_ok=True)
+        eticket = _load_eticket_data([booking_id]).get(booking_id)
+        if not eticket:
+            raise Exception(f"Booking {booking_id} not found")
+        _issue_eticket_tokens({booking_id: eticket})
         
+        pdf_path = _eticket_path(booking_id)
         with open(pdf_path, "wb") as f:
-            f.write(pdf_data)
+            f.write(render_eticket(eticket['event'], eticket['booking']))
         
         logger.info(f"✅ E-ticket generated for booking {booking_id}")
         
         # Send email with attachment
-        from notification import email_service
-        if email_service.client:
-            notification_data = {
-                'booking_id': booking.id,
-                'event_name': event.name,
-                'event_date': event.date.strftime('%B %d, %Y'),
-                'venue': stadium.name if stadium else 'TBD',
-                'amount': booking.total_amount,
-                'currency': 'USD',
-                'eticket_path': pdf_path,
-                'customer_email': customer.email
-            }
-            
-            result = email_service.send_booking_confirmation(customer.email, notification_data)
-            if result.success:
-                logger.info(f"📧 E-ticket email sent for booking {booking_id}")
-            else:
-                logger.error(f"❌ Failed to send e-ticket email for booking {booking_id}: {result.error_message}")
+        _send_eticket_email(booking_id, eticket, pdf_path)
         
         return {
             'success': True,
@@ -334,6 +333,50 @@ def generate_and_send_eticket(self, booking_id: int) -> Dict[str, Any]:
         }
 
 @celery_app.task(bind=True)
+def generate_etickets_batch(self, booking_ids: List[int], send_email: bool = True) -> Dict[str, Any]:
+    """Generate e-tickets for many bookings across render worker processes"""
+    try:
+        logger.info(f"🎨 Starting e-ticket generation for {len(booking_ids)} bookings")
+        
+        from eticket_renderer import render_etickets
+        
+        etickets = _load_eticket_data(booking_ids)
+        _issue_eticket_tokens(etickets)
+        jobs, paths = [], {}
+        for booking_id, eticket in etickets.items():
+            paths[booking_id] = _eticket_path(booking_id)
+            jobs.append((eticket['event'], eticket['booking'], paths[booking_id]))
+        
+        started = time.perf_counter()
+        errors = render_etickets(jobs)
+        seconds = time.perf_counter() - started
+        
+        generated, failed = [], {booking_id: 'Booking not found' for booking_id in booking_ids
+                                 if booking_id not in etickets}
+        for booking_id, error in zip(etickets, errors):
+            if error:
+                failed[booking_id] = error
+                continue
+            generated.append(booking_id)
+            if send_email:
+                _send_eticket_email(booking_id, etickets[booking_id], paths[booking_id])
+        
+        logger.info(f"✅ Generated {len(generated)} e-tickets in {seconds:.2f}s ({len(failed)} failed)")
+        return {
+            'success': not failed,
+            'generated': generated,
+            'failed': failed,
+            'seconds': round(seconds, 3)
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ Batch e-ticket generation failed: {e}")
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+@celery_app.task(bind=True, ignore_result=True)
 def send_booking_confirmation(self, booking_data: Dict[str, Any]) -> Dict[str, Any]:
     """Send booking confirmation notifications asynchronously"""
     try:
@@ -370,7 +413,7 @@ def send_booking_confirmation(self, booking_data: Dict[str, Any]) -> Dict[str, A
             'error': str(e)
         }
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, ignore_result=True)
 def process_refund(self, refund_data: Dict[str, Any]) -> Dict[str, Any]:
     """Process refund asynchronously"""
     try:
@@ -404,7 +447,7 @@ def health_check() -> Dict[str, Any]:
         'timestamp': datetime.utcnow().isoformat()
     }
 
-@celery_app.task(bind=True)
+@celery_app.task(bind=True, ignore_result=True)
 def send_verification_decision_notification(self, notification_data: Dict[str, Any]) -> Dict[str, Any]:
     """Send verification decision notification email asynchronously"""
     try:
@@ -0,0 +1,180 @@
+"""
+WebSocket Connection Registry for CricVerse
+Maintained connection and room indexes so realtime stats never scan keys
+Big Bash League Cricket Platform
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from threading import RLock
+from typing import Dict, Any, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def room_kind(room: str) -> str:
+    """Room type used for per-kind counts ('match_12' -> 'match')"""
+    return room.split('_', 1)[0] if '_' in room else room
+
+
+class RedisConnectionRegistry:
+    """Connection registry kept in Redis sorted sets
+
+    Keys:
+        ws_connection:{sid}       hash with connection details
+        ws:connections            sorted set of sids scored by connect time
+        ws:client_rooms:{sid}     set of rooms a connection has joined
+        ws:room:{room}            sorted set of sids scored by join time
+        ws:room_counts:{kind}     sorted set of rooms scored by member count
+
+    Connection and room counts are ZCARD/ZCOUNT reads and expiry is a
+    score range query, so nothing walks the keyspace.
+    """
+
+    CONNECTIONS_KEY = 'ws:connections'
+
+    def __init__(self, redis_client, connection_ttl: int = 3600):
+        self.redis = redis_client
+        self.connection_ttl = connection_ttl
+
+    def connect(self, sid: str, info: Optional[Dict[str, Any]] = None, connected_at: Optional[float] = None):
+        connected_at = connected_at if connected_at is not None else time.time()
+        mapping = {key: value for key, value in (info or {}).items() if value is not None}
+        pipe = self.redis.pipeline()
+        if mapping:
+            pipe.hset(f'ws_connection:{sid}', mapping=mapping)
+            pipe.expire(f'ws_connection:{sid}', self.connection_ttl)
+        pipe.zadd(self.CONNECTIONS_KEY, {sid: connected_at})
+        pipe.execute()
+
+    def disconnect(self, sid: str):
+        rooms = self.redis.smembers(f'ws:client_rooms:{sid}')
+        for room in rooms:
+            self.leave(sid, room)
+        pipe = self.redis.pipeline()
+        pipe.delete(f'ws_connection:{sid}', f'ws:client_rooms:{sid}')
+        pipe.zrem(self.CONNECTIONS_KEY, sid)
+        pipe.execute()
+
+    def join(self, sid: str, room: str):
+        pipe = self.redis.pipeline()
+        pipe.zadd(f'ws:room:{room}', {sid: time.time()})
+        pipe.sadd(f'ws:client_rooms:{sid}', room)
+        added, _ = pipe.execute()
+        if added:
+            self.redis.zincrby(f'ws:room_counts:{room_kind(room)}', 1, room)
+
+    def leave(self, sid: str, room: str):
+        pipe = self.redis.pipeline()
+        pipe.zrem(f'ws:room:{room}', sid)
+        pipe.srem(f'ws:client_rooms:{sid}', room)
+        removed, _ = pipe.execute()
+        if removed:
+            counts_key = f'ws:room_counts:{room_kind(room)}'
+            pipe = self.redis.pipeline()
+            pipe.zincrby(counts_key, -1, room)
+            pipe.zremrangebyscore(counts_key, '-inf', 0)
+            pipe.execute()
+
+    def count_connections(self) -> int:
+        return self.redis.zcard(self.CONNECTIONS_KEY)
+
+    def count_rooms(self, kind: str) -> int:
+        return self.redis.zcount(f'ws:room_counts:{kind}', 1, '+inf')
+
+    def room_size(self, room: str) -> int:
+        return self.redis.zcard(f'ws:room:{room}')
+
+    def get_connection(self, sid: str) -> Dict[str, Any]:
+        return self.redis.hgetall(f'ws_connection:{sid}')
+
+    def expire_connections(self, max_age: float, now: Optional[float] = None) -> int:
+        """Remove connections older than ``max_age`` seconds with a score range query"""
+        cutoff = (now if now is not None else time.time()) - max_age
+        stale = self.redis.zrangebyscore(self.CONNECTIONS_KEY, '-inf', cutoff)
+        for sid in stale:
+            self.disconnect(sid)
+        self.redis.zremrangebyscore(self.CONNECTIONS_KEY, '-inf', cutoff)
+        return len(stale)
+
+
+class InMemoryConnectionRegistry:
+    """Process-local connection registry used when Redis is not available
+
+    Connections are kept in connect order, so expiry pops from the front
+    until it reaches a connection young enough to keep.
+    """
+
+    def __init__(self, connection_ttl: int = 3600):
+        self.connection_ttl = connection_ttl
+        self._connections: OrderedDict = OrderedDict()
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._client_rooms: Dict[str, set] = {}
+        self._rooms: Dict[str, set] = {}
+        self._room_counts: Dict[str, int] = {}
+        self._lock = RLock()
+
+    def connect(self, sid: str, info: Optional[Dict[str, Any]] = None, connected_at: Optional[float] = None):
+        connected_at = connected_at if connected_at is not None else time.time()
+        with self._lock:
+            self._connections.pop(sid, None)
+            self._connections[sid] = connected_at
+            self._info[sid] = dict(info or {})
+
+    def disconnect(self, sid: str):
+        with self._lock:
+            for room in list(self._client_rooms.get(sid, ())):
+                self.leave(sid, room)
+            self._connections.pop(sid, None)
+            self._info.pop(sid, None)
+            self._client_rooms.pop(sid, None)
+
+    def join(self, sid: str, room: str):
+        with self._lock:
+            members = self._rooms.setdefault(room, set())
+            if sid in members:
+                return
+            if not members:
+                kind = room_kind(room)
+                self._room_counts[kind] = self._room_counts.get(kind, 0) + 1
+            members.add(sid)
+            self._client_rooms.setdefault(sid, set()).add(room)
+
+    def leave(self, sid: str, room: str):
+        with self._lock:
+            members = self._rooms.get(room)
+            if not members or sid not in members:
+                return
+            members.discard(sid)
+            self._client_rooms.get(sid, set()).discard(room)
+            if not members:
+                del self._rooms[room]
+                kind = room_kind(room)
+                self._room_counts[kind] -= 1
+
+    def count_connections(self) -> int:
+        return len(self._connections)
+
+    def count_rooms(self, kind: str) -> int:
+        return self._room_counts.get(kind, 0)
+
+    def room_size(self, room: str) -> int:
+        return len(self._rooms.get(room, ()))
+
+    def get_connection(self, sid: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._info.get(sid, {}))
+
+    def expire_connections(self, max_age: float, now: Optional[float] = None) -> int:
+        cutoff = (now if now is not None else time.time()) - max_age
+        expired = 0
+        with self._lock:
+            while self._connections:
+                sid, connected_at = next(iter(self._connections.items()))
+                if connected_at > cutoff:
+                    break
+                self.disconnect(sid)
+                expired += 1
+        return expired
@@ -0,0 +1,193 @@
+"""
+Credential Pre-generation for CricVerse
+Generates every ticket, entry, digital pass and parking credential for an
+event in bulk hours before its gates open, then tops up late bookings
+Big Bash League Cricket Platform
+"""
+
+import os
+import logging
+from datetime import datetime, date, time, timezone, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Callable
+from zoneinfo import ZoneInfo
+
+from celery_tasks import celery_app
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Events starting within this many hours get their credentials generated
+PREGEN_LEAD_HOURS = float(os.getenv('CREDENTIAL_PREGEN_LEAD_HOURS', 6))
+# Credentials stay valid this long after the event starts
+PREGEN_VALID_HOURS = float(os.getenv('CREDENTIAL_PREGEN_VALID_HOURS', 12))
+PREGEN_CHUNK_SIZE = int(os.getenv('CREDENTIAL_PREGEN_CHUNK_SIZE', 5000))
+PASS_TYPE = 'event'
+# Event dates and start times are stored as naive local stadium times
+EVENT_TIMEZONE = ZoneInfo(os.getenv('EVENT_TIMEZONE', 'Australia/Sydney'))
+
+# The field that identifies each credential type's items, for top-ups
+ID_FIELDS = {'ticket': 'ticket_id', 'entry': 'customer_id', 'pass': 'customer_id', 'parking': 'booking_id'}
+
+
+def event_starts_at(event_date: date, start_time: time) -> datetime:
+    """An event's stored local date and start time as an aware datetime"""
+    return datetime.combine(event_date, start_time).replace(tzinfo=EVENT_TIMEZONE)
+
+
+def events_starting_within(events: Iterable[Any], now: datetime, lead_hours: float) -> List[Dict[str, Any]]:
+    """The events starting between ``now`` and ``lead_hours`` from now"""
+    horizon = now + timedelta(hours=lead_hours)
+    upcoming = []
+    for event in events:
+        starts_at = event_starts_at(event.event_date, event.start_time)
+        if now <= starts_at <= horizon:
+            upcoming.append({'event_id': event.id, 'event_name': event.event_name,
+                             'starts_at': starts_at.isoformat()})
+    return upcoming
+
+
+def _load_upcoming_events(now: datetime, lead_hours: float) -> List[Dict[str, Any]]:
+    """Scheduled events starting between ``now`` (aware) and ``lead_hours`` from now"""
+    from app import Event
+
+    local_now = now.astimezone(EVENT_TIMEZONE)
+    horizon = local_now + timedelta(hours=lead_hours)
+    events = Event.query.filter(Event.event_date >= local_now.date(), Event.event_date <= horizon.date(),
+                                Event.match_status == 'Scheduled').all()
+    return events_starting_within(events, now, lead_hours)
+
+
+def _load_event_credentials(event_id: int) -> Optional[Dict[str, Any]]:
+    """An event's booked tickets, their holders and the parking booked at its stadium that day"""
+    from app import Event, Ticket, Customer, Parking, ParkingBooking
+
+    event = Event.query.get(event_id)
+    if event is None:
+        return None
+    tickets = Ticket.query.filter_by(event_id=event_id, ticket_status='Booked').all()
+    customer_ids = {ticket.customer_id for ticket in tickets if ticket.customer_id}
+    customers = Customer.query.with_entities(Customer.id, Customer.name).filter(
+        Customer.id.in_(customer_ids)).all() if customer_ids else []
+    day_start = datetime.combine(event.event_date, datetime.min.time())
+    parking = ParkingBooking.query.join(Parking, ParkingBooking.parking_id == Parking.id).filter(
+        Parking.stadium_id == event.stadium_id,
+        ParkingBooking.arrival_time >= day_start,
+        ParkingBooking.arrival_time < day_start + timedelta(days=1)).all()
+
+    return {
+        'starts_at': event_starts_at(event.event_date, event.start_time).isoformat(),
+        'tickets': [{'ticket_id': ticket.id, 'event_id': event_id, 'seat_id': ticket.seat_id,
+                     'customer_id': ticket.customer_id} for ticket in tickets],
+        'customers': [{'customer_id': customer_id, 'customer_name': name} for customer_id, name in customers],
+        'parking': [{'booking_id': booking.id, 'parking_id': booking.parking_id,
+                     'vehicle_number': booking.vehicle_number} for booking in parking]
+    }
+
+
+def pregenerate_event(event_id: int, force: bool = False, now: Optional[datetime] = None,
+                      on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Generate every credential an event still needs and publish them for the gates
+
+    Tickets get signed tokens with their images pre-rendered; each ticket
+    holder gets an entry QR code and an event digital pass; each parking
+    booking at the stadium that day gets a parking QR code. Items already
+    in the event's manifest are skipped unless ``force``, so running this
+    again only covers late bookings. Each chunk is saved to the manifest
+    as it finishes, with the progress so far, and ``on_progress`` is
+    called with the same progress dict.
+    """
+    from qr_generator import qr_generator
+
+    data = _load_event_credentials(event_id)
+    if data is None:
+        return {'event_id': event_id, 'success': False, 'error': 'Event not found'}
+
+    now = now or datetime.now(timezone.utc)
+    starts_at = datetime.fromisoformat(data['starts_at'])
+    expiry_hours = max(1.0, (starts_at - now).total_seconds() / 3600 + PREGEN_VALID_HOURS)
+    expires_at = (now + timedelta(hours=expiry_hours)).isoformat()
+    ticket_ids = [ticket['ticket_id'] for ticket in data['tickets']]
+
+    store = qr_generator.get_pregenerated_store()
+    generated = store.generated_ids(event_id)
+    items = {
+        'ticket': data['tickets'],
+        'entry': [{**customer, 'event_id': event_id} for customer in data['customers']],
+        'pass': [{**customer, 'event_id': event_id} for customer in data['customers']],
+        'parking': data['parking']
+    }
+    if not force:
+        items = {credential_type: [item for item in type_items
+                                   if item[ID_FIELDS[credential_type]] not in generated[credential_type]]
+                 for credential_type, type_items in items.items()}
+
+    progress = {
+        'event_id': event_id,
+        'stage': 'starting',
+        'started_at': now.isoformat(),
+        'types': {credential_type: {'total': len(type_items), 'done': 0, 'errors': 0}
+                  for credential_type, type_items in items.items()}
+    }
+    for credential_type, type_items in items.items():
+        progress['stage'] = credential_type
+        for start in range(0, len(type_items), PREGEN_CHUNK_SIZE):
+            chunk = type_items[start:start + PREGEN_CHUNK_SIZE]
+            if credential_type == 'ticket':
+                report = qr_generator.generate_ticket_qr_batch(chunk, expiry_hours, prerender=True)
+                done = [result['ticket_info']['ticket_id'] for result in report['results']]
+            else:
+                report = qr_generator.generate_credentials_batch(credential_type, chunk, expiry_hours,
+                                                                 pass_type=PASS_TYPE)
+                failed = {error['item'].get(ID_FIELDS[credential_type]) for error in report['errors']}
+                done = [item[ID_FIELDS[credential_type]] for item in chunk
+                        if item[ID_FIELDS[credential_type]] not in failed]
+            progress['types'][credential_type]['done'] += len(done)
+            progress['types'][credential_type]['errors'] += len(report['errors'])
+            store.save(event_id, report['credentials'], {credential_type: done}, ticket_ids, expires_at, progress)
+            if on_progress is not None:
+                on_progress(progress)
+
+    progress['stage'] = 'done'
+    # Tickets in the manifest are the gate list, even if nothing new was generated
+    store.save(event_id, {}, {}, ticket_ids, expires_at, progress)
+    qr_generator.gate_index.preload(event_id, ticket_ids)
+    total = sum(counts['done'] for counts in progress['types'].values())
+    errors = sum(counts['errors'] for counts in progress['types'].values())
+    logger.info(f"🎟️ Pre-generated {total} credentials for event {event_id} ({errors} errors)")
+    return {**progress, 'success': errors == 0, 'generated': total, 'errors': errors}
+
+
+def get_pregeneration_status(event_id: int) -> Optional[Dict[str, Any]]:
+    """Credential counts and the last run's progress for an event, from its manifest"""
+    from qr_generator import qr_generator
+
+    return qr_generator.get_pregenerated_store().status(event_id)
+
+
+@celery_app.task(bind=True, acks_late=True)
+def pregenerate_event_credentials(self, event_id: int, force: bool = False) -> Dict[str, Any]:
+    """Pre-generate an event's credentials, reporting progress as the task's PROGRESS state"""
+    def report_progress(progress):
+        if self.request.id and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta=progress)
+
+    return pregenerate_event(event_id, force=force, on_progress=report_progress)
+
+
+@celery_app.task(bind=True, ignore_result=True, acks_late=True)
+def schedule_credential_pregeneration(self, lead_hours: Optional[float] = None) -> Dict[str, Any]:
+    """Beat task: queue pre-generation for every event starting within the lead time
+
+    Runs every few minutes, so the first run inside the lead time
+    generates everything and the later ones top up late bookings until
+    the event starts. Manifests of finished events are pruned.
+    """
+    from qr_generator import qr_generator
+
+    events = _load_upcoming_events(datetime.now(timezone.utc),
+                                   lead_hours if lead_hours is not None else PREGEN_LEAD_HOURS)
+    scheduled = {str(event['event_id']): pregenerate_event_credentials.delay(event['event_id']).id
+                 for event in events}
+    pruned = qr_generator.get_pregenerated_store().prune()
+    logger.info(f"⏰ Queued credential pre-generation for {len(scheduled)} upcoming events")
+    return {'scheduled': scheduled, 'pruned': pruned}
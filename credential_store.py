@@ -0,0 +1,197 @@
+"""
+Pre-generated Credential Store for CricVerse
+Per-event manifests of entry credentials generated ahead of the gates opening,
+shared between the workers that generate them and the processes that serve them
+Big Bash League Cricket Platform
+"""
+
+import os
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Credential types kept in a manifest, each with the ids already generated
+CREDENTIAL_TYPES = ('ticket', 'entry', 'pass', 'parking')
+MANIFEST_PREFIX = 'event_'
+MANIFEST_SUFFIX = '.json'
+
+
+class PregeneratedCredentials:
+    """Credentials generated for an event before match day, one manifest file per event
+
+    A manifest holds each credential by the cache key the on-demand
+    generators look up, the ids already generated per credential type (so
+    later runs only top up late bookings), the event's ticket ids for the
+    gate index, and the progress of the last run. Workers write manifests
+    with ``save``; web and gate processes read them through ``get`` and
+    ``ticket_ids``, which re-read changed files at most once every
+    ``refresh_interval`` seconds when a lookup misses.
+    """
+
+    def __init__(self, directory: str, refresh_interval: float = 30.0, clock=time.monotonic):
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._credentials: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[int, Dict[str, Any]] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'refreshes': 0}
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """The pre-generated credential for an on-demand cache key, if any"""
+        credential = self._credentials.get(cache_key)
+        if credential is None and self.refresh():
+            credential = self._credentials.get(cache_key)
+        self.stats['hits' if credential is not None else 'misses'] += 1
+        return credential
+
+    def ticket_ids(self, event_id: int, refresh: bool = False) -> Optional[Set[int]]:
+        """Ticket ids pre-generated for an event, or None if it has no manifest"""
+        if refresh or event_id not in self._events:
+            self.refresh()
+        manifest = self._events.get(event_id)
+        return set(manifest['ticket_ids']) if manifest is not None else None
+
+    def generated_ids(self, event_id: int) -> Dict[str, Set]:
+        """Ids already generated per credential type, read straight from the manifest"""
+        manifest = self._read(self._path(event_id)) or {}
+        return {credential_type: set(manifest.get('generated', {}).get(credential_type, ()))
+                for credential_type in CREDENTIAL_TYPES}
+
+    def save(self, event_id: int, credentials: Dict[str, Dict[str, Any]], generated: Dict[str, Iterable],
+             ticket_ids: Iterable[int], expires_at: str, progress: Optional[Dict[str, Any]] = None) -> int:
+        """Merge newly generated credentials into the event's manifest; returns its credential count
+
+        ``ticket_ids`` replaces the event's ticket list, since cancelled
+        tickets must drop out of the gate index.
+        """
+        path = self._path(event_id)
+        manifest = self._read(path) or {'event_id': event_id, 'credentials': {}, 'generated': {}}
+        manifest['credentials'].update(credentials)
+        for credential_type, ids in generated.items():
+            manifest['generated'][credential_type] = sorted(set(manifest['generated'].get(credential_type, ()))
+                                                            | set(ids))
+        manifest['ticket_ids'] = sorted(set(ticket_ids))
+        manifest['expires_at'] = max(expires_at, manifest.get('expires_at', expires_at))
+        manifest['updated_at'] = datetime.now(timezone.utc).isoformat()
+        if progress is not None:
+            manifest['progress'] = progress
+        self._write(path, manifest)
+        with self._lock:
+            self._load(path, manifest)
+        return len(manifest['credentials'])
+
+    def status(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """Counts per credential type and the progress of the last run for an event"""
+        manifest = self._read(self._path(event_id))
+        if manifest is None:
+            return None
+        return {
+            'event_id': event_id,
+            'credentials': len(manifest['credentials']),
+            'generated': {credential_type: len(ids) for credential_type, ids in manifest['generated'].items()},
+            'tickets': len(manifest['ticket_ids']),
+            'expires_at': manifest['expires_at'],
+            'updated_at': manifest['updated_at'],
+            'progress': manifest.get('progress')
+        }
+
+    def prune(self, now: Optional[datetime] = None) -> List[int]:
+        """Delete the manifests of events whose credentials have all expired"""
+        now = (now or datetime.now(timezone.utc)).isoformat()
+        pruned = []
+        for name in self._manifest_names():
+            path = os.path.join(self.directory, name)
+            manifest = self._read(path)
+            if manifest is not None and manifest['expires_at'] < now:
+                os.remove(path)
+                pruned.append(manifest['event_id'])
+        if pruned:
+            self.refresh(force=True)
+            logger.info(f"Pruned expired credential manifests for events {pruned}")
+        return pruned
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-read manifests that changed on disk; False if throttled or nothing changed"""
+        now = self.clock()
+        with self._lock:
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return False
+            self._refreshed_at = now
+            self.stats['refreshes'] += 1
+            names = set(self._manifest_names())
+            changed = False
+            for path in [path for path in self._mtimes if os.path.basename(path) not in names]:
+                self._unload(path)
+                changed = True
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+                if self._mtimes.get(path) != mtime:
+                    manifest = self._read(path)
+                    if manifest is not None:
+                        self._load(path, manifest, mtime)
+                        changed = True
+            return changed
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'events': len(self._events),
+                'credentials': len(self._credentials)
+            }
+
+    # Internal helpers
+    def _path(self, event_id: int) -> str:
+        return os.path.join(self.directory, f"{MANIFEST_PREFIX}{event_id}{MANIFEST_SUFFIX}")
+
+    def _manifest_names(self) -> List[str]:
+        try:
+            return [name for name in os.listdir(self.directory)
+                    if name.startswith(MANIFEST_PREFIX) and name.endswith(MANIFEST_SUFFIX)]
+        except FileNotFoundError:
+            return []
+
+    def _read(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.error(f"Unreadable credential manifest {path}: {e}")
+            return None
+
+    def _write(self, path: str, manifest: Dict[str, Any]):
+        # Write then rename so readers never see a half-written manifest
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def _load(self, path: str, manifest: Dict[str, Any], mtime: Optional[float] = None):
+        self._unload(path)
+        self._events[manifest['event_id']] = manifest
+        self._credentials.update(manifest['credentials'])
+        self._mtimes[path] = mtime if mtime is not None else os.path.getmtime(path)
+
+    def _unload(self, path: str):
+        self._mtimes.pop(path, None)
+        for event_id, manifest in list(self._events.items()):
+            if self._path(event_id) == path:
+                del self._events[event_id]
+                for cache_key in manifest['credentials']:
+                    self._credentials.pop(cache_key, None)
@@ -0,0 +1,329 @@
+"""
+E-Ticket PDF Rendering for CricVerse
+Renders booking e-tickets from a per-event page template; kept free of Flask
+and database imports so render worker processes start quickly
+Big Bash League Cricket Platform
+"""
+
+import io
+import os
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, Any, List, Optional, Tuple
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_M
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.platypus import Table, TableStyle, Paragraph
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BRAND_BLUE = colors.HexColor("#0055A4")
+BRAND_ORANGE = colors.HexColor("#FF6B00")
+PAGE_WIDTH, PAGE_HEIGHT = A4
+
+# Vertical layout; the static template and the stamped fields share it
+EVENT_TITLE_Y = PAGE_HEIGHT - 120
+EVENT_DETAILS_Y = PAGE_HEIGHT - 180
+BOOKING_HEADING_Y = PAGE_HEIGHT - 300
+BOOKING_DETAILS_Y = PAGE_HEIGHT - 330
+TICKETS_HEADING_Y = PAGE_HEIGHT - 450
+TICKETS_TABLE_TOP = PAGE_HEIGHT - 465
+QR_Y = PAGE_HEIGHT - 630
+QR_SIZE = 100
+QR_GAP = 10
+INSTRUCTIONS_HEADING_Y = PAGE_HEIGHT - 680
+
+INSTRUCTIONS = [
+    "• Arrive at least 30 minutes before the match starts",
+    "• Bring a valid photo ID for ticket verification",
+    "• This e-ticket must be presented at the entrance",
+    "• No refunds or exchanges after purchase",
+    "• Follow all stadium rules and regulations"
+]
+
+TEMPLATE_CACHE_SIZE = 64
+ETICKET_BATCH_INLINE_MAX = 8
+
+
+def _build_styles() -> Dict[str, ParagraphStyle]:
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30,
+                                alignment=TA_CENTER, textColor=BRAND_BLUE),
+        'normal': ParagraphStyle('CustomNormal', parent=styles['Normal'], fontSize=12, spaceAfter=10)
+    }
+
+
+# Built once per process rather than per ticket
+STYLES = _build_styles()
+
+TICKET_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), BRAND_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor("#f0f0f0")),
+])
+
+
+def _draw_paragraph(c, text: str, style: ParagraphStyle, y: float):
+    p = Paragraph(text, style)
+    p.wrapOn(c, PAGE_WIDTH - 100, 100)
+    p.drawOn(c, 50, y)
+
+
+def draw_static_page(c, event: Dict[str, Any]):
+    """Everything on the page that is the same for every booking of an event"""
+    # Header
+    c.setFillColor(BRAND_BLUE)
+    c.rect(0, PAGE_HEIGHT - 80, PAGE_WIDTH, 80, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 28)
+    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - 50, "CricVerse E-Ticket")
+    c.setFont("Helvetica", 14)
+    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - 75, "Big Bash League Official Ticket")
+
+    # Logo placeholder
+    c.setFillColor(BRAND_ORANGE)
+    c.rect(PAGE_WIDTH - 100, PAGE_HEIGHT - 70, 80, 60, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawCentredString(PAGE_WIDTH - 60, PAGE_HEIGHT - 45, "LOGO")
+
+    # Event
+    _draw_paragraph(c, f"<b>{event.get('name', '')}</b>", STYLES['title'], EVENT_TITLE_Y)
+    y = EVENT_DETAILS_Y
+    for label, key in (('Date', 'date'), ('Time', 'time'), ('Venue', 'venue'), ('Location', 'location')):
+        _draw_paragraph(c, f"<b>{label}:</b> {event.get(key) or 'TBD'}", STYLES['normal'], y)
+        y -= 25
+
+    # Section headings
+    c.setFillColor(BRAND_BLUE)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, BOOKING_HEADING_Y, "Booking Information")
+    c.drawString(50, TICKETS_HEADING_Y, "Ticket Details")
+    c.setFont("Helvetica", 10)
+    c.setFillColor(colors.black)
+    c.drawCentredString(PAGE_WIDTH - 100, QR_Y - 15, "Scan to Verify")
+
+    # Instructions
+    c.setFillColor(BRAND_BLUE)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, INSTRUCTIONS_HEADING_Y, "Important Information")
+    c.setFont("Helvetica", 10)
+    y = INSTRUCTIONS_HEADING_Y - 25
+    for instruction in INSTRUCTIONS:
+        c.drawString(60, y, instruction)
+        y -= 15
+
+    # Footer
+    c.setFillColor(BRAND_ORANGE)
+    c.rect(0, 30, PAGE_WIDTH, 30, fill=1)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica", 10)
+    c.drawCentredString(PAGE_WIDTH / 2, 45, "This is a valid ticket for entry. Present at the venue for scanning.")
+
+
+class EticketTemplate:
+    """The static page for one event, drawn once and replayed into each PDF
+
+    The header, event details, headings, instructions and footer are drawn
+    on a scratch canvas and kept as literal PDF page operations together
+    with the fonts they reference. Each booking's PDF registers those fonts
+    in the same order, so the internal font names match, and adds the
+    operations in one call before stamping the booking fields.
+    """
+
+    def __init__(self, event: Dict[str, Any]):
+        self.event = dict(event)
+        c = canvas.Canvas(io.BytesIO(), pagesize=A4)
+        start = len(c._code)
+        c.saveState()
+        draw_static_page(c, self.event)
+        c.restoreState()
+        self.operations = '\n'.join(c._code[start:])
+        self.fonts = sorted(c._doc.fontMapping.items(), key=lambda item: int(item[1][2:]))
+
+    def apply(self, c) -> bool:
+        """Replay the static page onto a fresh canvas; False if its fonts do not line up"""
+        for font_name, internal_name in self.fonts:
+            if c._doc.getInternalFontName(font_name) != internal_name:
+                return False
+        c.addLiteral(self.operations)
+        return True
+
+
+def draw_qr(c, payload: str, x: float, y: float, size: float = QR_SIZE):
+    """Draw a QR code as vector modules, avoiding a PNG encode and decode per ticket"""
+    qr = qrcode.QRCode(error_correction=ERROR_CORRECT_M, border=0)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    count = len(matrix)
+    # One rectangle per run of dark modules, in whole-module units
+    rects = []
+    for row_index, row in enumerate(matrix):
+        bottom = count - row_index - 1
+        col = 0
+        while col < count:
+            if row[col]:
+                run_start = col
+                while col < count and row[col]:
+                    col += 1
+                rects.append(f"{run_start} {bottom} {col - run_start} 1 re")
+            else:
+                col += 1
+    c.saveState()
+    c.setFillColor(BRAND_BLUE)
+    c.translate(x, y)
+    c.scale(size / count, size / count)
+    c.addLiteral('\n'.join(rects) + '\nf')
+    c.restoreState()
+
+
+def draw_booking_fields(c, booking: Dict[str, Any]):
+    """The per-booking part of the page: booking details, ticket table and each ticket's QR code"""
+    y = BOOKING_DETAILS_Y
+    for label, key in (('Booking ID', 'booking_id'), ('Booking Date', 'booking_date'),
+                       ('Customer', 'customer_name'), ('Email', 'customer_email')):
+        _draw_paragraph(c, f"<b>{label}:</b> {booking.get(key, '')}", STYLES['normal'], y)
+        y -= 25
+
+    rows = [["Ticket Type", "Section", "Row", "Seat", "Price"]]
+    total_price = 0
+    for ticket in booking.get('tickets', []):
+        price = ticket.get('price') or 0
+        total_price += price
+        rows.append([
+            ticket.get('ticket_type') or "General Admission",
+            ticket.get('section') or "TBD",
+            ticket.get('row') or "TBD",
+            ticket.get('seat') or "TBD",
+            f"${price:.2f}"
+        ])
+    rows.append(["", "", "", "Total", f"${total_price:.2f}"])
+    table = Table(rows, colWidths=[100, 70, 70, 70, 80])
+    table.setStyle(TICKET_TABLE_STYLE)
+    _, table_height = table.wrapOn(c, PAGE_WIDTH, PAGE_HEIGHT)
+    table.drawOn(c, 50, TICKETS_TABLE_TOP - table_height)
+
+    # One gate QR code per ticket, right-aligned and shrunk to fit the row
+    payloads = [ticket['qr_payload'] for ticket in booking.get('tickets', []) if ticket.get('qr_payload')]
+    if payloads:
+        size = min(QR_SIZE, (PAGE_WIDTH - 100) / len(payloads) - QR_GAP)
+        for index, payload in enumerate(payloads):
+            draw_qr(c, payload, PAGE_WIDTH - 50 - (index + 1) * (size + QR_GAP) + QR_GAP, QR_Y, size)
+
+
+_templates: 'OrderedDict[Any, EticketTemplate]' = OrderedDict()
+_templates_lock = Lock()
+template_stats = {'hits': 0, 'builds': 0}
+
+
+def get_template(event: Dict[str, Any]) -> EticketTemplate:
+    """Cached template for an event, rebuilt if the event details change"""
+    key = event.get('event_id')
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None and template.event == event:
+            _templates.move_to_end(key)
+            template_stats['hits'] += 1
+            return template
+
+    template = EticketTemplate(event)
+    with _templates_lock:
+        _templates[key] = template
+        _templates.move_to_end(key)
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+        template_stats['builds'] += 1
+    return template
+
+
+def clear_templates():
+    with _templates_lock:
+        _templates.clear()
+
+
+def render_eticket(event: Dict[str, Any], booking: Dict[str, Any]) -> bytes:
+    """PDF bytes for one booking: the event's cached template plus the booking's fields"""
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    if not get_template(event).apply(c):
+        draw_static_page(c, event)
+    draw_booking_fields(c, booking)
+    c.save()
+    return buffer.getvalue()
+
+
+def render_eticket_batch(jobs: List[Tuple[Dict[str, Any], Dict[str, Any], str]]) -> List[Optional[str]]:
+    """Render and save ``(event, booking, path)`` jobs; returns an error message or None per job
+
+    Runs in render worker processes, so each worker keeps its own templates.
+    """
+    errors = []
+    for event, booking, path in jobs:
+        try:
+            pdf = render_eticket(event, booking)
+            temp_path = f"{path}.tmp{os.getpid()}"
+            with open(temp_path, 'wb') as f:
+                f.write(pdf)
+            os.replace(temp_path, path)
+            errors.append(None)
+        except Exception as e:
+            errors.append(str(e))
+    return errors
+
+
+_render_pool = None
+_render_pool_workers = 0
+_render_pool_lock = Lock()
+
+
+def _get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """Render worker processes, started on first use and kept for later batches"""
+    global _render_pool, _render_pool_workers
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_workers != workers:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False)
+            _render_pool = ProcessPoolExecutor(max_workers=workers)
+            _render_pool_workers = workers
+        return _render_pool
+
+
+def render_etickets(jobs: List[Tuple[Dict[str, Any], Dict[str, Any], str]],
+                    workers: Optional[int] = None) -> List[Optional[str]]:
+    """Render ``(event, booking, path)`` jobs across worker processes
+
+    Jobs are grouped by event before being split into chunks, so each
+    worker builds an event's template once and reuses it for the chunk.
+    """
+    workers = workers if workers is not None else int(os.getenv('ETICKET_RENDER_WORKERS', os.cpu_count() or 1))
+    if workers <= 1 or len(jobs) <= ETICKET_BATCH_INLINE_MAX:
+        return render_eticket_batch(jobs)
+
+    order = sorted(range(len(jobs)), key=lambda i: str(jobs[i][0].get('event_id')))
+    ordered = [jobs[i] for i in order]
+    chunk_size = max(ETICKET_BATCH_INLINE_MAX, -(-len(jobs) // (workers * 4)))
+    chunks = [ordered[i:i + chunk_size] for i in range(0, len(ordered), chunk_size)]
+    errors: List[Optional[str]] = [None] * len(jobs)
+    position = 0
+    for chunk_errors in _get_render_pool(workers).map(render_eticket_batch, chunks):
+        for error in chunk_errors:
+            errors[order[position]] = error
+            position += 1
+    return errors
@@ -0,0 +1,313 @@
+"""
+Ball-by-ball Match Event Log for CricVerse
+Append-only per-match event records with periodic snapshots and replay
+Big Bash League Cricket Platform
+"""
+
+import os
+import json
+import time
+import struct
+import logging
+from array import array
+from threading import RLock
+from typing import Dict, List, Any, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Record layout: payload length, sequence number, unix timestamp, then the
+# compact JSON payload ({"t": type, "d": data})
+RECORD_HEADER = struct.Struct('<IId')
+
+# Commentary lines kept in match state; the full history stays in the log
+RECENT_COMMENTARY = 12
+
+
+def apply_event(state: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold one event into match state
+
+    Events carry absolute values (new totals, new status), so scalar fields
+    simply overwrite state. Commentary is kept as a bounded recent list and
+    wickets are tracked as the last dismissal plus a running count. Applying
+    the same events in order always produces the same state.
+    """
+    data = event.get('data') or {}
+    if event.get('type') == 'wicket':
+        state['last_wicket'] = dict(data)
+        state['wickets_fallen'] = state.get('wickets_fallen', 0) + 1
+
+    for key, value in data.items():
+        if key == 'commentary':
+            if value:
+                recent = state.setdefault('recent_commentary', [])
+                recent.append(value)
+                del recent[:-RECENT_COMMENTARY]
+        elif not isinstance(value, (dict, list)):
+            state[key] = value
+
+    state['seq'] = event['seq']
+    state['last_event_type'] = event.get('type')
+    state['updated_at'] = event['timestamp']
+    return state
+
+
+class MatchEventLog:
+    """Append-only event log for one match
+
+    Records are written to a file when ``path`` is given, otherwise to an
+    in-memory buffer. A byte offset is kept per sequence number, so the tail
+    after any snapshot can be read back with a single read. Every
+    ``snapshot_interval`` events the current state is snapshotted, which lets
+    a joining client start from the snapshot instead of the first ball.
+    """
+
+    def __init__(self, match_id: int, path: Optional[str] = None, snapshot_interval: int = 30,
+                 max_snapshots: int = 4):
+        self.match_id = match_id
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.max_snapshots = max_snapshots
+        self._lock = RLock()
+        self._offsets = array('Q')
+        self._size = 0
+        self._buffer = bytearray() if path is None else None
+        self._file = None
+        self._state: Dict[str, Any] = {'match_id': match_id, 'seq': 0}
+        self._snapshots: List[Dict[str, Any]] = []
+        # Wall-clock time of the last append, for idle eviction
+        self.touched_at = time.time()
+
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._file = open(path, 'a+b')
+            self._recover()
+
+    # Writing
+    def append(self, event_type: str, data: Optional[Dict[str, Any]] = None,
+               timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """Append an event, fold it into state and return it with its sequence number"""
+        with self._lock:
+            seq = len(self._offsets) + 1
+            event = {
+                'seq': seq,
+                'type': event_type,
+                'data': data or {},
+                'timestamp': timestamp if timestamp is not None else time.time()
+            }
+            payload = json.dumps({'t': event_type, 'd': event['data']}, separators=(',', ':'),
+                                 default=str).encode('utf-8')
+            record = RECORD_HEADER.pack(len(payload), seq, event['timestamp']) + payload
+
+            self._offsets.append(self._size)
+            self._write(record)
+            self._size += len(record)
+
+            apply_event(self._state, event)
+            self.touched_at = event['timestamp']
+            if seq % self.snapshot_interval == 0:
+                self._take_snapshot()
+            return event
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Snapshot the current state now"""
+        with self._lock:
+            return self._take_snapshot()
+
+    # Reading
+    @property
+    def last_seq(self) -> int:
+        return len(self._offsets)
+
+    def get_state(self) -> Dict[str, Any]:
+        with self._lock:
+            return _copy_state(self._state)
+
+    def latest_snapshot(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._snapshots[-1] if self._snapshots else None
+
+    def events_since(self, seq: int = 0) -> List[Dict[str, Any]]:
+        """Events with a sequence number greater than ``seq``, read in one pass"""
+        with self._lock:
+            seq = max(seq, 0)
+            if seq >= len(self._offsets):
+                return []
+            start = self._offsets[seq]
+            raw = self._read(start, self._size - start)
+        return list(_decode_records(raw))
+
+    def catch_up(self, since_seq: Optional[int] = None) -> Dict[str, Any]:
+        """Everything a client needs to reach the current state
+
+        A client that already has ``since_seq`` gets only the events after it.
+        Otherwise it gets the latest snapshot plus the events after that.
+        """
+        with self._lock:
+            snapshot = self.latest_snapshot()
+            if since_seq is not None and (snapshot is None or since_seq >= snapshot['seq']):
+                snapshot_payload = None
+                start_seq = since_seq
+            else:
+                snapshot_payload = snapshot
+                start_seq = snapshot['seq'] if snapshot else 0
+            events = self.events_since(start_seq)
+            return {
+                'match_id': self.match_id,
+                'seq': self.last_seq,
+                'snapshot': snapshot_payload,
+                'events': events
+            }
+
+    def replay(self, upto_seq: Optional[int] = None) -> Dict[str, Any]:
+        """Rebuild match state from the first event, optionally stopping at ``upto_seq``"""
+        state = {'match_id': self.match_id, 'seq': 0}
+        for event in self.events_since(0):
+            if upto_seq is not None and event['seq'] > upto_seq:
+                break
+            apply_event(state, event)
+        return state
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __len__(self):
+        return len(self._offsets)
+
+    # Internal helpers
+    def _take_snapshot(self) -> Dict[str, Any]:
+        snapshot = {'seq': self.last_seq, 'state': _copy_state(self._state)}
+        self._snapshots.append(snapshot)
+        del self._snapshots[:-self.max_snapshots]
+        return snapshot
+
+    def _write(self, record: bytes):
+        if self._file is None:
+            self._buffer.extend(record)
+        else:
+            self._file.write(record)
+            self._file.flush()
+
+    def _read(self, offset: int, length: int) -> bytes:
+        if self._file is None:
+            return bytes(self._buffer[offset:offset + length])
+        return os.pread(self._file.fileno(), length, offset)
+
+    def _recover(self):
+        """Rebuild offsets and state from an existing log file, dropping a torn final record"""
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        raw = os.pread(self._file.fileno(), size, 0) if size else b''
+
+        offset = 0
+        for event, end in _scan_records(raw):
+            self._offsets.append(offset)
+            apply_event(self._state, event)
+            offset = end
+
+        if offset < size:
+            logger.warning(f"Truncating torn record in match {self.match_id} event log at byte {offset}")
+            self._file.truncate(offset)
+        self._size = offset
+        if self._offsets:
+            self._take_snapshot()
+
+
+def _copy_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    copied = dict(state)
+    for key, value in state.items():
+        if isinstance(value, list):
+            copied[key] = list(value)
+        elif isinstance(value, dict):
+            copied[key] = dict(value)
+    return copied
+
+
+def _scan_records(raw: bytes):
+    """Yield (event, end offset) for every complete record in ``raw``"""
+    offset = 0
+    header_size = RECORD_HEADER.size
+    while offset + header_size <= len(raw):
+        length, seq, timestamp = RECORD_HEADER.unpack_from(raw, offset)
+        end = offset + header_size + length
+        if end > len(raw):
+            return
+        payload = json.loads(raw[offset + header_size:end])
+        yield {'seq': seq, 'type': payload['t'], 'data': payload['d'], 'timestamp': timestamp}, end
+        offset = end
+
+
+def _decode_records(raw: bytes):
+    for event, _ in _scan_records(raw):
+        yield event
+
+
+class MatchEventStore:
+    """Registry of match event logs, file-backed when a directory is configured
+
+    Logs with no events for ``max_idle`` seconds (finished or abandoned
+    matches) are closed and forgotten whenever a new match's log is opened,
+    and by ``evict_idle``. A file-backed log is recovered from its file if
+    the match comes back.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, snapshot_interval: int = 30,
+                 max_idle: float = 6 * 3600, clock=time.time):
+        self.base_dir = base_dir
+        self.snapshot_interval = snapshot_interval
+        self.max_idle = max_idle
+        self.clock = clock
+        self._logs: Dict[int, MatchEventLog] = {}
+        self._lock = RLock()
+        self.stats = {'evicted': 0}
+
+    def get(self, match_id: int, create: bool = True) -> Optional[MatchEventLog]:
+        with self._lock:
+            log = self._logs.get(match_id)
+            if log is None and create:
+                self.evict_idle()
+                path = os.path.join(self.base_dir, f"match_{match_id}.log") if self.base_dir else None
+                log = MatchEventLog(match_id, path, self.snapshot_interval)
+                self._logs[match_id] = log
+            return log
+
+    def append(self, match_id: int, event_type: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self.get(match_id).append(event_type, data)
+
+    def drop(self, match_id: int):
+        """Close a match log and forget it (the file, if any, is kept)"""
+        with self._lock:
+            log = self._logs.pop(match_id, None)
+        if log:
+            log.close()
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> List[int]:
+        """Drop every log with no events for ``max_idle`` seconds; returns their match ids"""
+        cutoff = self.clock() - (self.max_idle if max_idle is None else max_idle)
+        with self._lock:
+            idle = [match_id for match_id, log in self._logs.items() if log.touched_at < cutoff]
+            for match_id in idle:
+                self.drop(match_id)
+            self.stats['evicted'] += len(idle)
+        return idle
+
+    def match_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._logs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'matches': len(self._logs),
+                'events': sum(len(log) for log in self._logs.values()),
+                'evicted': self.stats['evicted'],
+                'file_backed': self.base_dir is not None
+            }
+
+
+# Global match event store (file-backed when MATCH_EVENT_LOG_DIR is set)
+match_event_store = MatchEventStore(os.getenv('MATCH_EVENT_LOG_DIR') or None,
+                                    max_idle=float(os.getenv('MATCH_EVENT_LOG_IDLE_HOURS', 6)) * 3600)
@@ -0,0 +1,297 @@
+"""
+Live Match Registry for CricVerse
+Copy-on-write registry of live matches, one timer thread for match lifecycle
+and pluggable live score sources
+Big Bash League Cricket Platform
+"""
+
+import os
+import json
+import heapq
+import random
+import logging
+import itertools
+import time
+from threading import Thread, Condition, Lock
+from typing import Dict, List, Any, Optional, Callable, Iterator, Mapping
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class TimerHandle:
+    """A scheduled callback; ``cancel`` stops it (and any repeats) from running"""
+
+    __slots__ = ('due', 'callback', 'args', 'interval', 'cancelled')
+
+    def __init__(self, due: float, callback: Callable, args: tuple, interval: Optional[float]):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerScheduler:
+    """Heap of timers served by a single thread
+
+    Every match timer (cleanup after a match ends, simulator ticks, replayed
+    balls) is an entry in one heap, so the number of background threads is
+    the same whether one match is live or a whole round. Cancelled timers
+    stay in the heap and are skipped when they come due.
+
+    Callbacks run on the scheduler thread and should be quick; ``run_due``
+    runs them on the calling thread instead (used when the thread is off).
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, name: str = 'match-timers'):
+        self.clock = clock
+        self.name = name
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+        self._condition = Condition()
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self.stats = {'scheduled': 0, 'fired': 0, 'cancelled': 0, 'errors': 0}
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def call_later(self, delay: float, callback: Callable, *args) -> TimerHandle:
+        return self._push(TimerHandle(self.clock() + delay, callback, args, None))
+
+    def call_every(self, interval: float, callback: Callable, *args) -> TimerHandle:
+        """Run ``callback`` every ``interval`` seconds until the handle is cancelled"""
+        return self._push(TimerHandle(self.clock() + interval, callback, args, interval))
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Run every timer that is due; returns how many callbacks ran"""
+        now = self.clock() if now is None else now
+        ran = 0
+        while True:
+            with self._condition:
+                if not self._heap or self._heap[0][0] > now:
+                    return ran
+                _, _, handle = heapq.heappop(self._heap)
+            if self._fire(handle):
+                ran += 1
+
+    def pending(self) -> int:
+        with self._condition:
+            return sum(1 for _, _, handle in self._heap if not handle.cancelled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'pending': self.pending(), 'running': self._running}
+
+    # Internal helpers
+    def _push(self, handle: TimerHandle) -> TimerHandle:
+        with self._condition:
+            heapq.heappush(self._heap, (handle.due, next(self._order), handle))
+            self.stats['scheduled'] += 1
+            if self._heap[0][2] is handle:
+                self._condition.notify()
+        return handle
+
+    def _fire(self, handle: TimerHandle) -> bool:
+        if handle.cancelled:
+            self.stats['cancelled'] += 1
+            return False
+        try:
+            handle.callback(*handle.args)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Match timer {getattr(handle.callback, '__name__', handle.callback)} failed: {e}")
+        self.stats['fired'] += 1
+        if handle.interval is not None and not handle.cancelled:
+            handle.due += handle.interval
+            self._push(handle)
+        return True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and (not self._heap or self._heap[0][0] > self.clock()):
+                    self._condition.wait(self._heap[0][0] - self.clock() if self._heap else None)
+                if not self._running:
+                    return
+                _, _, handle = heapq.heappop(self._heap)
+            self._fire(handle)
+
+
+class MatchRegistry(Mapping):
+    """Thread-safe registry of live matches with copy-on-write snapshots
+
+    Writers copy the current mapping, change the copy and publish it under a
+    lock; readers just take the published mapping, which is never mutated
+    afterwards. Iterating, counting or looking up matches therefore never
+    races with a match being added or removed, and needs no lock.
+    """
+
+    def __init__(self):
+        self._matches: Dict[int, Any] = {}
+        self._write_lock = Lock()
+
+    # Writers
+    def add(self, match_id: int, value: Any):
+        with self._write_lock:
+            matches = dict(self._matches)
+            matches[match_id] = value
+            self._matches = matches
+
+    def remove(self, match_id: int, expected: Any = None) -> Any:
+        """Remove a match, only if it still maps to ``expected`` when that is given"""
+        with self._write_lock:
+            current = self._matches.get(match_id)
+            if current is None or (expected is not None and current is not expected):
+                return None
+            matches = dict(self._matches)
+            del matches[match_id]
+            self._matches = matches
+            return current
+
+    # Readers
+    def snapshot(self) -> Mapping:
+        """The current mapping; later writes do not change it"""
+        return self._matches
+
+    def __getitem__(self, match_id: int) -> Any:
+        return self._matches[match_id]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._matches)
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+
+class ScoreSource:
+    """Where live score updates come from
+
+    The service attaches a source to its scheduler and gives it
+    ``on_update(match_id, score_update)`` to call, plus ``get_state`` for the
+    current match state. ``start_match`` and ``stop_match`` bracket each
+    live match.
+    """
+
+    name = 'none'
+
+    def attach(self, scheduler: TimerScheduler, on_update: Callable[[int, Dict[str, Any]], None],
+               get_state: Callable[[int], Optional[Dict[str, Any]]]):
+        self.scheduler = scheduler
+        self.on_update = on_update
+        self.get_state = get_state
+
+    def start_match(self, match_id: int):
+        pass
+
+    def stop_match(self, match_id: int):
+        pass
+
+
+class AdminScoreSource(ScoreSource):
+    """Scores entered by an operator; nothing runs in the background"""
+
+    name = 'admin'
+
+    def submit(self, match_id: int, score_update: Dict[str, Any]):
+        self.on_update(match_id, score_update)
+
+
+class SimulatedScoreSource(ScoreSource):
+    """Random score updates for demos, one scheduler timer per live match"""
+
+    name = 'simulator'
+
+    def __init__(self, interval: float = 5.0, probability: float = 0.1, rng: Optional[random.Random] = None):
+        self.interval = interval
+        self.probability = probability
+        self.rng = rng or random.Random()
+        self._timers: Dict[int, TimerHandle] = {}
+
+    def start_match(self, match_id: int):
+        self.stop_match(match_id)
+        self._timers[match_id] = self.scheduler.call_every(self.interval, self._tick, match_id)
+
+    def stop_match(self, match_id: int):
+        timer = self._timers.pop(match_id, None)
+        if timer:
+            timer.cancel()
+
+    def _tick(self, match_id: int):
+        match_data = self.get_state(match_id)
+        if not match_data or match_data.get('status') != 'live':
+            return
+        if self.rng.random() < self.probability:
+            runs = self.rng.randint(0, 6)
+            self.on_update(match_id, {
+                'team1_score': match_data['team1_score'] + runs,
+                'last_ball': f"{runs} runs",
+                'commentary': f"Great shot! {runs} runs scored."
+            })
+
+
+class ReplayScoreSource(ScoreSource):
+    """Replays recorded score updates from a JSON lines file
+
+    Each line is ``{"match_id": 1, "offset": 12.5, "update": {...}}`` where
+    ``offset`` is seconds from the start of the match; ``speed`` compresses
+    the timeline (2.0 replays twice as fast).
+    """
+
+    name = 'replay'
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._timers: Dict[int, List[TimerHandle]] = {}
+
+    def load(self, match_id: int) -> List[Dict[str, Any]]:
+        events = []
+        with open(self.path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get('match_id', match_id) == match_id:
+                    events.append(record)
+        return sorted(events, key=lambda record: record.get('offset', 0))
+
+    def start_match(self, match_id: int):
+        self.stop_match(match_id)
+        self._timers[match_id] = [
+            self.scheduler.call_later(record.get('offset', 0) / self.speed, self.on_update, match_id,
+                                      record['update'])
+            for record in self.load(match_id)
+        ]
+
+    def stop_match(self, match_id: int):
+        for timer in self._timers.pop(match_id, []):
+            timer.cancel()
+
+
+def score_source_from_env(spec: Optional[str] = None) -> ScoreSource:
+    """Score source from LIVE_SCORE_SOURCE: 'simulator', 'admin' or 'replay:<path>'"""
+    spec = spec if spec is not None else os.getenv('LIVE_SCORE_SOURCE', 'simulator')
+    if spec.startswith('replay:'):
+        return ReplayScoreSource(spec.split(':', 1)[1], float(os.getenv('LIVE_SCORE_REPLAY_SPEED', 1.0)))
+    if spec == 'admin':
+        return AdminScoreSource()
+    return SimulatedScoreSource()
@@ -6,7 +6,7 @@ Big Bash League Cricket Platform
 
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -17,10 +17,19 @@ from sendgrid.helpers.mail import Mail, Email, To, Content
 # SMS sending libraries
 from twilio.rest import Client
 
+from bulk_notifications import (BulkMessage, BulkContent, BulkNotificationSender,
+                                SendGridBulkProvider, TwilioBulkProvider, SENT)
+from markupsafe import Markup
+
+from notification_templates import notification_templates, placeholder_values, RenderedNotification
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Per-recipient fields of the bulk booking confirmations, sent as %field% substitutions
+BOOKING_FIELDS = ('booking_id', 'event_name', 'event_date', 'venue', 'currency', 'amount')
+
 @dataclass
 class NotificationResponse:
     """Notification response data structure"""
@@ -35,6 +44,7 @@ class EmailNotificationService:
         self.api_key = os.getenv('SENDGRID_API_KEY')
         self.from_email = os.getenv('SENDGRID_FROM_EMAIL', 'noreply@cricverse.com')
         self.client = None
+        self._bulk_sender = None
         
         if self.api_key:
             self.client = sendgrid.SendGridAPIClient(api_key=self.api_key)
@@ -51,50 +61,14 @@ class EmailNotificationService:
                     error_message="SendGrid not configured"
                 )
             
-            subject = f"Booking Confirmation - {booking_data.get('event_name', 'CricVerse Event')}"
-            
-            # HTML content for the email
-            html_content = f"""
-            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background: linear-gradient(135deg, #0055A4 0%, #FF6B00 100%); padding: 20px; text-align: center; color: white;">
-                    <h1>Booking Confirmed!</h1>
-                    <p>Your Big Bash League experience is secured</p>
-                </div>
-                
-                <div style="padding: 20px;">
-                    <h2>Booking Details</h2>
-                    <p><strong>Booking ID:</strong> {booking_data.get('booking_id', 'N/A')}</p>
-                    <p><strong>Event:</strong> {booking_data.get('event_name', 'N/A')}</p>
-                    <p><strong>Date:</strong> {booking_data.get('event_date', 'N/A')}</p>
-                    <p><strong>Venue:</strong> {booking_data.get('venue', 'N/A')}</p>
-                    
-                    <h3>Tickets</h3>
-                    <ul>
-                        {self._generate_ticket_list(booking_data.get('tickets', []))}
-                    </ul>
-                    
-                    <p><strong>Total Amount:</strong> {booking_data.get('currency', 'USD')} {booking_data.get('amount', '0.00')}</p>
-                    
-                    <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-top: 20px;">
-                        <h3>Next Steps</h3>
-                        <p>1. Download your e-ticket from the attachment</p>
-                        <p>2. Arrive at the venue 30 minutes before the match</p>
-                        <p>3. Bring a valid ID for ticket verification</p>
-                    </div>
-                </div>
-                
-                <div style="background-color: #f1f1f1; padding: 15px; text-align: center; font-size: 12px; color: #666;">
-                    <p>© 2025 CricVerse Stadium System. Big Bash League Official Partner.</p>
-                    <p>This is an automated email. Please do not reply.</p>
-                </div>
-            </div>
-            """
+            rendered = render_booking_confirmation(booking_data)
             
             message = Mail(
                 from_email=Email(self.from_email),
                 to_emails=To(to_email),
-                subject=subject,
-                html_content=Content("text/html", html_content)
+                subject=rendered.subject,
+                plain_text_content=Content("text/plain", rendered.text),
+                html_content=Content("text/html", rendered.html)
             )
             
             # Add attachment if e-ticket is available
@@ -129,20 +103,31 @@ class EmailNotificationService:
                 error_message=str(e)
             )
     
-    def _generate_ticket_list(self, tickets: list) -> str:
-        """Generate HTML list of tickets"""
-        if not tickets:
-            return "<li>No tickets found</li>"
+    def get_bulk_sender(self) -> Optional[BulkNotificationSender]:
+        """Shared bulk sender over pooled SendGrid connections, or None if not configured"""
+        if not self.api_key:
+            return None
+        if self._bulk_sender is None:
+            concurrency = int(os.getenv('SENDGRID_BULK_CONCURRENCY', 4))
+            self._bulk_sender = BulkNotificationSender(
+                SendGridBulkProvider(self.api_key, self.from_email, pool_size=concurrency),
+                rate=float(os.getenv('SENDGRID_BULK_RATE', 10)),
+                concurrency=concurrency
+            )
+        return self._bulk_sender
+    
+    def send_bulk_booking_confirmations(self, bookings: List[Dict[str, Any]]) -> Dict[str, NotificationResponse]:
+        """Send booking confirmation emails for many bookings, keyed by booking ID
         
-        ticket_html = ""
-        for ticket in tickets:
-            ticket_html += f"""
-            <li>
-                <strong>{ticket.get('type', 'General Admission')}</strong> - 
-                {ticket.get('seat_info', 'Seat information not available')}
-            </li>
-            """
-        return ticket_html
+        Recipients go to SendGrid up to 1000 per request, each with its own
+        substitutions. Bulk emails carry no e-ticket attachment.
+        """
+        sender = self.get_bulk_sender()
+        content, messages = build_bulk_booking_emails(bookings)
+        if not sender:
+            return {message.key: NotificationResponse(success=False, error_message="SendGrid not configured")
+                    for message in messages}
+        return _send_bulk(sender, messages, content)
     
     def send_payment_confirmation(self, to_email: str, payment_data: Dict[str, Any]) -> NotificationResponse:
         """Send payment confirmation email"""
@@ -153,41 +138,17 @@ class EmailNotificationService:
                     error_message="SendGrid not configured"
                 )
             
-            subject = f"Payment Confirmation - Booking #{payment_data.get('booking_id', 'N/A')}"
-            
-            html_content = f"""
-            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background: linear-gradient(135deg, #0055A4 0%, #FF6B00 100%); padding: 20px; text-align: center; color: white;">
-                    <h1>Payment Confirmed!</h1>
-                    <p>Your transaction was successful</p>
-                </div>
-                
-                <div style="padding: 20px;">
-                    <h2>Payment Details</h2>
-                    <p><strong>Booking ID:</strong> {payment_data.get('booking_id', 'N/A')}</p>
-                    <p><strong>Transaction ID:</strong> {payment_data.get('transaction_id', 'N/A')}</p>
-                    <p><strong>Amount:</strong> {payment_data.get('currency', 'USD')} {payment_data.get('amount', '0.00')}</p>
-                    <p><strong>Payment Method:</strong> {payment_data.get('payment_method', 'N/A')}</p>
-                    <p><strong>Date:</strong> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-                    
-                    <div style="background-color: #d4edda; padding: 15px; border-radius: 5px; margin-top: 20px; border: 1px solid #c3e6cb;">
-                        <h3 style="color: #155724;">Payment Successful</h3>
-                        <p style="color: #155724;">Your payment has been processed successfully.</p>
-                    </div>
-                </div>
-                
-                <div style="background-color: #f1f1f1; padding: 15px; text-align: center; font-size: 12px; color: #666;">
-                    <p>© 2025 CricVerse Stadium System. Big Bash League Official Partner.</p>
-                    <p>This is an automated email. Please do not reply.</p>
-                </div>
-            </div>
-            """
+            rendered = notification_templates.render('payment_confirmation', {
+                **payment_data,
+                'date': datetime.now().strftime('%B %d, %Y at %I:%M %p')
+            })
             
             message = Mail(
                 from_email=Email(self.from_email),
                 to_emails=To(to_email),
-                subject=subject,
-                html_content=Content("text/html", html_content)
+                subject=rendered.subject,
+                plain_text_content=Content("text/plain", rendered.text),
+                html_content=Content("text/html", rendered.html)
             )
             
             response = self.client.send(message)
@@ -216,6 +177,7 @@ class SMSNotificationService:
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         self.from_number = os.getenv('TWILIO_PHONE_NUMBER')
         self.client = None
+        self._bulk_sender = None
         
         if self.account_sid and self.auth_token and self.from_number:
             self.client = Client(self.account_sid, self.auth_token)
@@ -232,15 +194,7 @@ class SMSNotificationService:
                     error_message="Twilio not configured"
                 )
             
-            message_body = f"""
-CricVerse Booking Confirmed! 
-Booking ID: {booking_data.get('booking_id', 'N/A')}
-Event: {booking_data.get('event_name', 'N/A')}
-Date: {booking_data.get('event_date', 'N/A')}
-Amount: {booking_data.get('currency', 'USD')} {booking_data.get('amount', '0.00')}
-            
-Download your e-ticket from the email attachment.
-            """.strip()
+            message_body = render_booking_confirmation(booking_data, blocks=('sms',)).sms
             
             message = self.client.messages.create(
                 body=message_body,
@@ -261,6 +215,35 @@ Download your e-ticket from the email attachment.
                 error_message=str(e)
             )
     
+    def get_bulk_sender(self) -> Optional[BulkNotificationSender]:
+        """Shared bulk sender over pooled Twilio connections, or None if not configured"""
+        if not self.client:
+            return None
+        if self._bulk_sender is None:
+            concurrency = int(os.getenv('TWILIO_BULK_CONCURRENCY', 4))
+            self._bulk_sender = BulkNotificationSender(
+                TwilioBulkProvider(self.account_sid, self.auth_token, self.from_number,
+                                   messaging_service_sid=os.getenv('TWILIO_MESSAGING_SERVICE_SID'),
+                                   pool_size=concurrency),
+                # A single long code is limited to about one message per second
+                rate=float(os.getenv('TWILIO_BULK_RATE', 1)),
+                concurrency=concurrency
+            )
+        return self._bulk_sender
+    
+    def send_bulk_booking_confirmations(self, bookings: List[Dict[str, Any]]) -> Dict[str, NotificationResponse]:
+        """Send booking confirmation SMS for many bookings, keyed by booking ID"""
+        sender = self.get_bulk_sender()
+        messages = [BulkMessage(str(booking['booking_id']), booking['customer_phone'],
+                                _substitutions(booking, html=False))
+                    for booking in bookings if booking.get('customer_phone')]
+        if not sender:
+            return {message.key: NotificationResponse(success=False, error_message="Twilio not configured")
+                    for message in messages}
+        
+        rendered = notification_templates.substitution_template('booking_confirmation', BOOKING_FIELDS)
+        return _send_bulk(sender, messages, BulkContent(text=rendered.sms))
+    
     def send_payment_confirmation(self, to_phone: str, payment_data: Dict[str, Any]) -> NotificationResponse:
         """Send payment confirmation SMS"""
         try:
@@ -270,13 +253,7 @@ Download your e-ticket from the email attachment.
                     error_message="Twilio not configured"
                 )
             
-            message_body = f"""
-CricVerse Payment Confirmed!
-Booking ID: {payment_data.get('booking_id', 'N/A')}
-Amount: {payment_data.get('currency', 'USD')} {payment_data.get('amount', '0.00')}
-Payment Method: {payment_data.get('payment_method', 'N/A')}
-Transaction ID: {payment_data.get('transaction_id', 'N/A')}
-            """.strip()
+            message_body = notification_templates.render_block('payment_confirmation', 'sms', payment_data)
             
             message = self.client.messages.create(
                 body=message_body,
@@ -297,6 +274,63 @@ Transaction ID: {payment_data.get('transaction_id', 'N/A')}
                 error_message=str(e)
             )
 
+def render_booking_confirmation(booking_data: Dict[str, Any],
+                                blocks: Tuple[str, ...] = ('subject', 'html', 'text')) -> RenderedNotification:
+    """One booking's confirmation, joined from compiled blocks rather than run through Jinja
+    
+    The booking fields fill the compiled email blocks and the ticket lists
+    come from the compiled ticket rows, as in the bulk path.
+    """
+    values = {name: booking_data[name] for name in BOOKING_FIELDS if name in booking_data}
+    if 'html' in blocks or 'text' in blocks:
+        tickets = booking_data.get('tickets') or []
+        values['ticket_items_html'] = Markup(notification_templates.render_list(
+            'booking_confirmation', 'ticket_items', 'ticket_item', 'ticket', tickets))
+        values['ticket_lines_text'] = notification_templates.render_list(
+            'booking_confirmation', 'ticket_lines', 'ticket_line', 'ticket', tickets)
+    return notification_templates.render_compiled('booking_confirmation', values, blocks)
+
+def build_bulk_booking_emails(bookings: List[Dict[str, Any]]) -> Tuple[BulkContent, List[BulkMessage]]:
+    """Booking confirmation content rendered once with placeholders, plus one message per booking
+    
+    Each message carries only the booking's fields and its ticket list,
+    rendered through the template's compiled ticket rows.
+    """
+    rendered = notification_templates.substitution_template('booking_confirmation', BOOKING_FIELDS, {
+        'ticket_items_html': '%tickets%',
+        'ticket_lines_text': '%ticket_lines%'
+    })
+    messages = []
+    for booking in bookings:
+        if not booking.get('customer_email'):
+            continue
+        tickets = booking.get('tickets') or []
+        substitutions = _substitutions(booking)
+        substitutions['%tickets%'] = notification_templates.render_list(
+            'booking_confirmation', 'ticket_items', 'ticket_item', 'ticket', tickets)
+        substitutions['%ticket_lines%'] = notification_templates.render_list(
+            'booking_confirmation', 'ticket_lines', 'ticket_line', 'ticket', tickets)
+        messages.append(BulkMessage(str(booking['booking_id']), booking['customer_email'], substitutions))
+    return BulkContent(rendered.subject, rendered.html, rendered.text), messages
+
+def _substitutions(booking_data: Dict[str, Any], html: bool = True) -> Dict[str, str]:
+    defaults = {'currency': 'USD', 'amount': '0.00'}
+    return placeholder_values({name: booking_data.get(name, defaults.get(name, 'N/A')) for name in BOOKING_FIELDS},
+                              html=html)
+
+def _send_bulk(sender: BulkNotificationSender, messages: List[BulkMessage],
+               content: BulkContent) -> Dict[str, NotificationResponse]:
+    sender.send(messages, content)
+    responses = {}
+    for message in messages:
+        status = sender.tracker.get(message.key)
+        responses[message.key] = NotificationResponse(
+            success=status['status'] == SENT,
+            message_id=status['provider_id'],
+            error_message=status['error']
+        )
+    return responses
+
 # Initialize notification services
 email_service = EmailNotificationService()
 sms_service = SMSNotificationService()
@@ -327,4 +361,11 @@ def send_payment_notifications(customer_email: str, customer_phone: str,
     if customer_phone:
         results['sms'] = sms_service.send_payment_confirmation(customer_phone, payment_data)
     
-    return results
\ No newline at end of file
+    return results
+
+def send_bulk_booking_notifications(bookings: List[Dict[str, Any]]) -> Dict[str, Dict[str, NotificationResponse]]:
+    """Send booking notifications for many bookings at once, keyed by channel then booking ID"""
+    return {
+        'email': email_service.send_bulk_booking_confirmations(bookings),
+        'sms': sms_service.send_bulk_booking_confirmations(bookings)
+    }
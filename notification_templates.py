@@ -0,0 +1,212 @@
+"""
+Notification Templates for CricVerse
+Jinja templates for notification emails and SMS, compiled once at startup,
+with placeholder renders cached for bulk sends
+Big Bash League Cricket Platform
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader
+from jinja2.utils import concat
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'notifications')
+TEMPLATE_SUFFIX = '.jinja'
+BLOCKS = ('subject', 'html', 'text', 'sms')
+# Wraps each field while compiling a block; the '<' shows whether the template escaped it.
+# Not whitespace, so a |trim on the field cannot strip it
+MARKER = '\x00'
+
+
+@dataclass
+class RenderedNotification:
+    subject: str = ''
+    html: str = ''
+    text: str = ''
+    sms: str = ''
+
+
+def _escape(value: Any) -> str:
+    """The same escaping as the templates' autoescape, without building Markup objects"""
+    if hasattr(value, '__html__'):
+        return value.__html__()
+    return (str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&#34;').replace("'", '&#39;'))
+
+
+def placeholder(field: str, html: bool = False) -> str:
+    """The substitution token for a field; the HTML part has its own so its values can be escaped"""
+    return f"%{field}_html%" if html else f"%{field}%"
+
+
+def placeholder_values(values: Dict[str, Any], html: bool = True) -> Dict[str, str]:
+    """Substitutions for ``substitution_template`` tokens: raw values, plus escaped ones for the HTML part"""
+    substitutions = {placeholder(field): str(value) for field, value in values.items()}
+    if html:
+        substitutions.update({placeholder(field, html=True): _escape(value) for field, value in values.items()})
+    return substitutions
+
+
+class CompiledBlock:
+    """A block rendered once with a marker for each field, split into static text and slots
+
+    Rendering joins the static text with the field values, escaping the
+    ones the template escapes, without running the template again. This
+    only holds for blocks that interpolate fields without branching on
+    their values, such as the per-ticket rows.
+    """
+
+    __slots__ = ('head', 'slots')
+
+    def __init__(self, static: List[str], slots: List[Tuple[str, bool]]):
+        self.head = static[0]
+        # (field, escaped, static text after the field)
+        self.slots = [(field, escaped, text) for (field, escaped), text in zip(slots, static[1:])]
+
+    @classmethod
+    def parse(cls, rendered: str, fields: Iterable[str]) -> Optional['CompiledBlock']:
+        """Split a marker render; None if a field was filtered or changed by the template"""
+        pieces = rendered.split(MARKER)
+        slots = []
+        for slot in pieces[1::2]:
+            if slot.endswith('&lt;'):
+                slots.append((slot[:-4], True))
+            elif slot.endswith('<'):
+                slots.append((slot[:-1], False))
+            else:
+                return None
+            if slots[-1][0] not in fields:
+                return None
+        return cls(pieces[0::2], slots)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        parts = [self.head]
+        for field, escaped, text in self.slots:
+            parts.append(_escape(values[field]) if escaped else str(values[field]))
+            parts.append(text)
+        return ''.join(parts)
+
+
+class NotificationTemplates:
+    """Compiled notification templates
+
+    Each template is one file defining ``subject``, ``html``, ``text`` and
+    ``sms`` blocks (any may be left out), so the HTML and plain-text
+    variants share one definition. Every template is compiled when this is
+    built and rendered block by block afterwards. For bulk sends,
+    ``substitution_template`` renders a template once with placeholders
+    for the provider to fill in from ``placeholder_values``, and ``render_list`` renders
+    repeated rows through compiled blocks, so the per-recipient work is
+    joining a few strings rather than running the template. Single sends
+    get the same treatment from ``render_compiled``.
+    """
+
+    def __init__(self, directory: str = TEMPLATE_DIR):
+        self.env = Environment(loader=FileSystemLoader(directory), trim_blocks=True, lstrip_blocks=True,
+                               autoescape=False, auto_reload=False)
+        self.templates = {
+            name[:-len(TEMPLATE_SUFFIX)]: self.env.get_template(name)
+            for name in self.env.list_templates(filter_func=lambda name: name.endswith(TEMPLATE_SUFFIX)
+                                                and not os.path.basename(name).startswith('_'))
+        }
+        self._placeholders: Dict[Tuple, RenderedNotification] = {}
+        self._compiled: Dict[Tuple, Optional[CompiledBlock]] = {}
+        self._lock = Lock()
+        logger.info(f"✅ Compiled {len(self.templates)} notification templates")
+
+    def names(self) -> Iterable[str]:
+        return self.templates.keys()
+
+    def render(self, name: str, data: Dict[str, Any]) -> RenderedNotification:
+        """Render every block of a template for one message"""
+        template = self.templates[name]
+        context = template.new_context(data)
+        return RenderedNotification(**{
+            block: concat(template.blocks[block](context)).strip()
+            for block in BLOCKS if block in template.blocks
+        })
+
+    def render_block(self, name: str, block: str, data: Dict[str, Any]) -> str:
+        template = self.templates[name]
+        return concat(template.blocks[block](template.new_context(data))).strip()
+
+    def substitution_template(self, name: str, fields: Iterable[str],
+                              extra: Optional[Dict[str, str]] = None) -> RenderedNotification:
+        """The template rendered with a placeholder in place of each field, cached
+
+        The HTML block gets ``%field_html%`` and every other block
+        ``%field%``, since providers substitute the same values into every
+        part of a message and only the HTML part wants them escaped.
+        """
+        fields = tuple(fields)
+        key = (name, fields, tuple(sorted((extra or {}).items())))
+        rendered = self._placeholders.get(key)
+        if rendered is None:
+            rendered = self.render(name, {**{field: placeholder(field) for field in fields}, **(extra or {})})
+            if rendered.html:
+                rendered.html = self.render_block(name, 'html', {
+                    **{field: placeholder(field, html=True) for field in fields}, **(extra or {})})
+            with self._lock:
+                self._placeholders[key] = rendered
+        return rendered
+
+    def render_compiled(self, name: str, data: Dict[str, Any], blocks: Iterable[str] = BLOCKS) -> RenderedNotification:
+        """Render blocks from compiled copies, giving what ``render`` gives for the same ``data``
+
+        Each block is compiled once per set of keys in ``data``, so this is
+        only for templates that interpolate those fields without branching
+        on their values. Pre-rendered HTML is passed as ``Markup`` so it is
+        not escaped again; a block that filters a field is rendered by Jinja.
+        """
+        template = self.templates[name]
+        fields = tuple(data)
+        rendered = {}
+        for block in blocks:
+            if block not in template.blocks:
+                continue
+            compiled = self._compile(name, block, None, fields)
+            if compiled is None:
+                rendered[block] = concat(template.blocks[block](template.new_context(data))).strip()
+            else:
+                rendered[block] = compiled.render(data).strip()
+        return RenderedNotification(**rendered)
+
+    def render_list(self, name: str, block: str, row_block: str, var: str, items: List[Dict[str, Any]]) -> str:
+        """Render a list block whose loop renders the scoped ``row_block`` for each ``var`` in ``items``
+
+        Rows go through a compiled copy of ``row_block`` per set of item
+        keys; an empty list renders ``block`` itself for its empty branch.
+        """
+        if not items:
+            return self.render_block(name, block, {})
+        rows = []
+        for item in items:
+            compiled = self._compile(name, row_block, var, tuple(item))
+            if compiled is None:
+                template = self.templates[name]
+                rows.append(concat(template.blocks[row_block](template.new_context({var: item}))))
+            else:
+                rows.append(compiled.render(item))
+        return ''.join(rows).strip()
+
+    # Internal helpers
+    def _compile(self, name: str, block: str, var: Optional[str], fields: Tuple[str, ...]) -> Optional[CompiledBlock]:
+        """``block`` compiled with ``fields`` as the top-level context, or as the fields of ``var``"""
+        key = (name, block, var, fields)
+        if key not in self._compiled:
+            template = self.templates[name]
+            markers = {field: f"{MARKER}{field}<{MARKER}" for field in fields}
+            rendered = concat(template.blocks[block](template.new_context(markers if var is None else {var: markers})))
+            with self._lock:
+                self._compiled[key] = CompiledBlock.parse(rendered, fields)
+        return self._compiled[key]
+
+
+notification_templates = NotificationTemplates()
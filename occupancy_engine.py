@@ -0,0 +1,240 @@
+"""
+Live Stadium Occupancy Engine for CricVerse
+Aggregates gate scans in memory and publishes occupancy at a fixed cadence
+Big Bash League Cricket Platform
+"""
+
+import time
+import logging
+from array import array
+from datetime import datetime
+from threading import RLock
+from typing import Dict, List, Any, Optional, Callable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ENTRY = 'entry'
+EXIT = 'exit'
+
+
+class SlidingWindowCounter:
+    """Event count over the last ``window`` seconds in a ring of one-second buckets
+
+    Each bucket remembers which second it holds, so stale buckets are reset
+    lazily when they are reused and ignored when summing. Memory is fixed
+    by the window length, however many scans arrive.
+    """
+
+    __slots__ = ('window', 'resolution', '_counts', '_stamps')
+
+    def __init__(self, window: float = 60.0, resolution: float = 1.0):
+        self.window = window
+        self.resolution = resolution
+        size = max(1, int(window / resolution))
+        self._counts = array('I', [0] * size)
+        self._stamps = array('q', [-1] * size)
+
+    def add(self, now: float, count: int = 1):
+        tick = int(now / self.resolution)
+        slot = tick % len(self._counts)
+        if self._stamps[slot] != tick:
+            self._stamps[slot] = tick
+            self._counts[slot] = 0
+        self._counts[slot] += count
+
+    def total(self, now: float) -> int:
+        tick = int(now / self.resolution)
+        oldest = tick - len(self._counts)
+        return sum(count for count, stamp in zip(self._counts, self._stamps) if oldest < stamp <= tick)
+
+    def rate_per_minute(self, now: float) -> float:
+        return round(self.total(now) * 60.0 / self.window, 2)
+
+
+class GateCounter:
+    """Entries and exits through one gate"""
+
+    __slots__ = ('entries', 'exits', 'recent')
+
+    def __init__(self, window: float):
+        self.entries = 0
+        self.exits = 0
+        self.recent = SlidingWindowCounter(window)
+
+
+class StadiumOccupancy:
+    """Running counts for one stadium, fed only by scans"""
+
+    def __init__(self, stadium_id: int, capacity: Optional[int], window: float):
+        self.stadium_id = stadium_id
+        self.capacity = capacity
+        self.window = window
+        self.inside = 0
+        self.entries = 0
+        self.exits = 0
+        self.rejected = 0
+        self.gates: Dict[str, GateCounter] = {}
+        self.sections: Dict[str, int] = {}
+        self.recent_entries = SlidingWindowCounter(window)
+        self.last_scan_at = 0.0
+        self.changed = False
+        self.window_open = False
+
+    def record(self, now: float, direction: str, gate: str, section: Optional[str]):
+        gate_counter = self.gates.get(gate)
+        if gate_counter is None:
+            gate_counter = self.gates[gate] = GateCounter(self.window)
+        if direction == EXIT:
+            self.exits += 1
+            gate_counter.exits += 1
+            self.inside = max(0, self.inside - 1)
+            if section is not None:
+                self.sections[section] = max(0, self.sections.get(section, 0) - 1)
+        else:
+            self.entries += 1
+            gate_counter.entries += 1
+            gate_counter.recent.add(now)
+            self.recent_entries.add(now)
+            self.inside += 1
+            if section is not None:
+                self.sections[section] = self.sections.get(section, 0) + 1
+        self.last_scan_at = now
+        self.changed = True
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        occupancy = (self.inside / self.capacity * 100) if self.capacity else 0.0
+        return {
+            'stadium_id': self.stadium_id,
+            'source': 'gate_scans',
+            'in_stadium': self.inside,
+            'entries': self.entries,
+            'exits': self.exits,
+            'rejected_scans': self.rejected,
+            'total_seats': self.capacity,
+            'occupancy_percentage': round(occupancy, 2),
+            'entry_rate_per_min': self.recent_entries.rate_per_minute(now),
+            'gates': {
+                gate: {
+                    'entries': counter.entries,
+                    'exits': counter.exits,
+                    'entry_rate_per_min': counter.recent.rate_per_minute(now)
+                }
+                for gate, counter in self.gates.items()
+            },
+            'sections': dict(self.sections),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+
+class OccupancyEngine:
+    """Live in-stadium occupancy from QR verification events
+
+    ``record_scan`` takes verification events from gate scanners and only
+    updates in-memory counters. On a fixed cadence ``publish_due`` sends a
+    snapshot for every stadium that had scans since the last publish, and
+    keeps publishing while entry rates are still winding down, so clients
+    see true live numbers without any database counting.
+
+    Counts are per process; gate scans for a stadium should reach the same
+    worker.
+    """
+
+    def __init__(self, publish: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+                 window: float = 60.0, clock: Callable[[], float] = time.time,
+                 capacity_lookup: Optional[Callable[[int], Optional[int]]] = None):
+        self.publish = publish
+        self.capacity_lookup = capacity_lookup
+        self.window = window
+        self.clock = clock
+        self._stadiums: Dict[int, StadiumOccupancy] = {}
+        self._capacities: Dict[int, Optional[int]] = {}
+        self._lock = RLock()
+        self._timer = None
+        self.stats = {'scans': 0, 'ignored': 0, 'published': 0}
+
+    def set_capacity(self, stadium_id: int, capacity: Optional[int]):
+        with self._lock:
+            self._capacities[stadium_id] = capacity
+            if stadium_id in self._stadiums:
+                self._stadiums[stadium_id].capacity = capacity
+
+    def record_scan(self, scan: Dict[str, Any]):
+        """Apply one verification event: stadium_id, gate, section, direction, valid"""
+        stadium_id = scan.get('stadium_id')
+        if stadium_id is None:
+            self.stats['ignored'] += 1
+            return
+        if stadium_id not in self._capacities and self.capacity_lookup:
+            # Looked up once per stadium, outside the lock
+            try:
+                self.set_capacity(stadium_id, self.capacity_lookup(stadium_id))
+            except Exception as e:
+                logger.warning(f"Could not look up capacity for stadium {stadium_id}: {e}")
+                self._capacities[stadium_id] = None
+        now = self.clock()
+        with self._lock:
+            stadium = self._stadiums.get(stadium_id)
+            if stadium is None:
+                stadium = self._stadiums[stadium_id] = StadiumOccupancy(
+                    stadium_id, self._capacities.get(stadium_id), self.window)
+            if not scan.get('valid', True):
+                stadium.rejected += 1
+                stadium.changed = True
+                return
+            stadium.record(now, scan.get('direction') or ENTRY, str(scan.get('gate') or 'unknown'),
+                           scan.get('section'))
+            self.stats['scans'] += 1
+
+    def snapshot(self, stadium_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stadium = self._stadiums.get(stadium_id)
+            return stadium.snapshot(self.clock()) if stadium else None
+
+    def stadium_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._stadiums)
+
+    def reset(self, stadium_id: int):
+        """Forget a stadium's counts (after the last event of the day)"""
+        with self._lock:
+            self._stadiums.pop(stadium_id, None)
+
+    def publish_due(self) -> int:
+        """Publish stadiums that changed or whose entry rates are still winding down"""
+        now = self.clock()
+        snapshots = []
+        with self._lock:
+            for stadium in self._stadiums.values():
+                if stadium.changed or stadium.window_open:
+                    snapshots.append(stadium.snapshot(now))
+                    stadium.changed = False
+                    # Keep publishing until a snapshot with the window empty has gone out
+                    stadium.window_open = now - stadium.last_scan_at < self.window
+        if self.publish:
+            for snapshot in snapshots:
+                try:
+                    self.publish(snapshot['stadium_id'], snapshot)
+                except Exception as e:
+                    logger.error(f"Failed to publish occupancy for stadium {snapshot['stadium_id']}: {e}")
+        self.stats['published'] += len(snapshots)
+        return len(snapshots)
+
+    def start(self, scheduler, interval: float = 2.0):
+        """Publish every ``interval`` seconds on a match timer scheduler"""
+        self.stop()
+        self._timer = scheduler.call_every(interval, self.publish_due)
+        return self
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'stadiums': len(self._stadiums), 'publishing': self._timer is not None}
+
+
+# Global occupancy engine; realtime_server wires its publisher and cadence
+occupancy_engine = OccupancyEngine()
@@ -0,0 +1,314 @@
+"""
+QR Verification Analytics for CricVerse
+Fixed-memory record of QR generation and verification attempts with
+per-minute, per-hour, per-gate and per-code counters updated on write
+Big Bash League Cricket Platform
+"""
+
+import time
+import logging
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RECENT_ATTEMPTS = 10000
+MINUTE_BUCKETS = 24 * 60
+HOUR_BUCKETS = 31 * 24
+GATE_MINUTE_BUCKETS = 60
+TRACKED_CODES = 50000
+
+
+def _isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+class BucketSeries:
+    """Attempt and success counts per fixed-width time bucket, in a ring
+
+    Like the occupancy engine's sliding window, each slot remembers which
+    bucket it holds and is reset lazily when reused, so the series covers
+    the last ``slots`` buckets in fixed memory.
+    """
+
+    __slots__ = ('width', '_totals', '_successes', '_stamps')
+
+    def __init__(self, width: float, slots: int):
+        self.width = width
+        self._totals = array('I', [0] * slots)
+        self._successes = array('I', [0] * slots)
+        self._stamps = array('q', [-1] * slots)
+
+    def add(self, now: float, success: bool):
+        tick = int(now // self.width)
+        slot = tick % len(self._stamps)
+        if self._stamps[slot] != tick:
+            self._stamps[slot] = tick
+            self._totals[slot] = 0
+            self._successes[slot] = 0
+        self._totals[slot] += 1
+        if success:
+            self._successes[slot] += 1
+
+    def buckets(self, now: float, count: Optional[int] = None) -> List[Tuple[float, int, int]]:
+        """(bucket start, attempts, successes) for the non-empty buckets among the last ``count``, oldest first"""
+        tick = int(now // self.width)
+        count = len(self._stamps) if count is None else min(count, len(self._stamps))
+        result = []
+        for bucket in range(tick - count + 1, tick + 1):
+            slot = bucket % len(self._stamps)
+            if self._stamps[slot] == bucket and self._totals[slot]:
+                result.append((bucket * self.width, self._totals[slot], self._successes[slot]))
+        return result
+
+    def total(self, now: float, count: int) -> int:
+        return sum(attempts for _, attempts, _ in self.buckets(now, count))
+
+
+class AttemptRing:
+    """The most recent attempts in preallocated parallel arrays
+
+    Types, actions and gates are stored as small integer ids; the ring
+    overwrites its oldest slot once full, so memory does not grow with the
+    number of scans.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array('d', [0.0] * capacity)
+        self.successes = array('B', [0] * capacity)
+        self.types = array('H', [0] * capacity)
+        self.actions = array('H', [0] * capacity)
+        self.gates = array('H', [0] * capacity)
+        self.codes: List[Optional[str]] = [None] * capacity
+        self.errors: List[Optional[str]] = [None] * capacity
+        self.ip_addresses: List[Optional[str]] = [None] * capacity
+        self.user_agents: List[Optional[str]] = [None] * capacity
+        self.size = 0
+        self._next = 0
+
+    def append(self, timestamp: float, success: bool, type_id: int, action_id: int, gate_id: int,
+               code: str, error: Optional[str], ip_address: Optional[str], user_agent: Optional[str]):
+        slot = self._next
+        self.timestamps[slot] = timestamp
+        self.successes[slot] = 1 if success else 0
+        self.types[slot] = type_id
+        self.actions[slot] = action_id
+        self.gates[slot] = gate_id
+        self.codes[slot] = code
+        self.errors[slot] = error
+        self.ip_addresses[slot] = ip_address
+        self.user_agents[slot] = user_agent
+        self._next = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def latest(self, limit: int) -> List[int]:
+        """Slots of the newest ``limit`` attempts, newest first"""
+        return [(self._next - 1 - i) % self.capacity for i in range(min(limit, self.size))]
+
+
+class QRAnalytics:
+    """In-memory analytics for QR code generation and verification attempts
+
+    Every attempt goes into a fixed-size ring of recent attempts and bumps
+    counters kept up to date on write: per-minute totals for the last day,
+    per-hour totals by QR type for the last month, per-gate totals with a
+    per-minute series for the last hour, and per-code totals for the most
+    recently seen codes. The stats methods read those counters, so their
+    cost depends on the number of buckets rather than on the scan volume,
+    and memory stays constant under sustained gate-scan load.
+    """
+
+    def __init__(self, capacity: int = RECENT_ATTEMPTS, tracked_codes: int = TRACKED_CODES,
+                 clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self.tracked_codes = tracked_codes
+        self.lock = Lock()
+        self._recent = AttemptRing(capacity)
+        self._names: Dict[str, int] = {'': 0}
+        self._name_list: List[str] = ['']
+        self._minutes = BucketSeries(60, MINUTE_BUCKETS)
+        self._hours_by_type: Dict[str, BucketSeries] = {}
+        self._types: Dict[str, List[int]] = {}
+        self._gates: Dict[str, List[Any]] = {}
+        self._codes: 'OrderedDict[str, List[Any]]' = OrderedDict()
+        self.total_attempts = 0
+
+    def track_verification_attempt(self, verification_code: str, qr_type: str,
+                                   action: str, success: bool,
+                                   ip_address: Optional[str] = None, user_agent: Optional[str] = None,
+                                   error_message: Optional[str] = None, gate: Optional[str] = None) -> None:
+        """Track QR code verification attempt"""
+        try:
+            now = self.clock()
+            with self.lock:
+                self._recent.append(now, success, self._intern(qr_type), self._intern(action),
+                                    self._intern(gate or ''), verification_code, error_message,
+                                    ip_address, user_agent)
+                self.total_attempts += 1
+                self._minutes.add(now, success)
+
+                hours = self._hours_by_type.get(qr_type)
+                if hours is None:
+                    hours = self._hours_by_type[qr_type] = BucketSeries(3600, HOUR_BUCKETS)
+                    self._types[qr_type] = [0, 0]
+                hours.add(now, success)
+                self._types[qr_type][0] += 1
+                self._types[qr_type][1] += 1 if success else 0
+
+                if gate:
+                    counters = self._gates.get(gate)
+                    if counters is None:
+                        counters = self._gates[gate] = [0, 0, BucketSeries(60, GATE_MINUTE_BUCKETS)]
+                    counters[0] += 1
+                    counters[1] += 1 if success else 0
+                    counters[2].add(now, success)
+
+                if verification_code:
+                    code = self._codes.get(verification_code)
+                    if code is None:
+                        code = self._codes[verification_code] = [0, 0, now, now]
+                        if len(self._codes) > self.tracked_codes:
+                            self._codes.popitem(last=False)
+                    else:
+                        self._codes.move_to_end(verification_code)
+                    code[0] += 1
+                    code[1] += 1 if success else 0
+                    code[3] = now
+
+            logger.debug(f"Tracked {action} for {qr_type} QR code: {verification_code[:8]}... (success: {success})")
+        except Exception as e:
+            logger.error(f"Failed to track verification attempt: {e}")
+
+    def get_verification_stats(self, verification_code: str) -> Dict:
+        """Get verification statistics for a QR code"""
+        with self.lock:
+            code = self._codes.get(verification_code)
+            code = list(code) if code else None
+        if not code:
+            return {
+                'total_attempts': 0,
+                'successful_attempts': 0,
+                'failed_attempts': 0,
+                'first_attempt': None,
+                'last_attempt': None
+            }
+        total, successful, first, last = code
+        return {
+            'total_attempts': total,
+            'successful_attempts': successful,
+            'failed_attempts': total - successful,
+            'first_attempt': _isoformat(first),
+            'last_attempt': _isoformat(last)
+        }
+
+    def get_daily_stats(self, days: int = 7) -> List[Dict]:
+        """Get daily verification statistics"""
+        now = self.clock()
+        with self.lock:
+            series = {qr_type: hours.buckets(now, days * 24) for qr_type, hours in self._hours_by_type.items()}
+
+        daily_stats = {}
+        for qr_type, buckets in series.items():
+            for started, attempts, successes in buckets:
+                log_date = datetime.fromtimestamp(started, timezone.utc).date().isoformat()
+                stats = daily_stats.get((log_date, qr_type))
+                if stats is None:
+                    stats = daily_stats[(log_date, qr_type)] = {
+                        'date': log_date,
+                        'qr_type': qr_type,
+                        'total_attempts': 0,
+                        'successful_attempts': 0
+                    }
+                stats['total_attempts'] += attempts
+                stats['successful_attempts'] += successes
+
+        result = []
+        for stats in daily_stats.values():
+            stats['success_rate'] = stats['successful_attempts'] / stats['total_attempts'] * 100
+            result.append(stats)
+        return sorted(result, key=lambda x: x['date'], reverse=True)
+
+    def get_hourly_stats(self, hours: int = 24, qr_type: Optional[str] = None) -> List[Dict]:
+        """Attempts per hour, newest first, for one QR type or all of them"""
+        now = self.clock()
+        with self.lock:
+            series = [self._hours_by_type[qr_type]] if qr_type in self._hours_by_type else (
+                [] if qr_type else list(self._hours_by_type.values()))
+            buckets = [bucket for hourly in series for bucket in hourly.buckets(now, hours)]
+
+        hourly = {}
+        for started, attempts, successes in buckets:
+            counts = hourly.setdefault(started, [0, 0])
+            counts[0] += attempts
+            counts[1] += successes
+        return [{
+            'hour': _isoformat(started),
+            'total_attempts': attempts,
+            'successful_attempts': successes
+        } for started, (attempts, successes) in sorted(hourly.items(), reverse=True)]
+
+    def get_minute_stats(self, minutes: int = 60) -> List[Dict]:
+        """Attempts per minute over the last ``minutes``, newest first"""
+        now = self.clock()
+        with self.lock:
+            buckets = self._minutes.buckets(now, minutes)
+        return [{
+            'minute': _isoformat(started),
+            'total_attempts': attempts,
+            'successful_attempts': successes
+        } for started, attempts, successes in reversed(buckets)]
+
+    def get_gate_stats(self, minutes: int = 15) -> Dict[str, Dict[str, Any]]:
+        """Totals per gate, plus attempts over the last ``minutes``"""
+        now = self.clock()
+        with self.lock:
+            return {gate: {
+                'total_attempts': total,
+                'successful_attempts': successful,
+                'failed_attempts': total - successful,
+                'recent_attempts': series.total(now, minutes)
+            } for gate, (total, successful, series) in self._gates.items()}
+
+    def get_recent_attempts(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """The newest attempts from the ring, newest first"""
+        with self.lock:
+            ring = self._recent
+            return [{
+                'verification_code': ring.codes[slot],
+                'qr_type': self._name_list[ring.types[slot]],
+                'action': self._name_list[ring.actions[slot]],
+                'gate': self._name_list[ring.gates[slot]] or None,
+                'success': bool(ring.successes[slot]),
+                'ip_address': ring.ip_addresses[slot],
+                'user_agent': ring.user_agents[slot],
+                'error_message': ring.errors[slot],
+                'timestamp': _isoformat(ring.timestamps[slot])
+            } for slot in ring.latest(limit)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'total_attempts': self.total_attempts,
+                'recent_attempts': self._recent.size,
+                'recent_capacity': self._recent.capacity,
+                'tracked_codes': len(self._codes),
+                'qr_types': {qr_type: {'total_attempts': total, 'successful_attempts': successful}
+                             for qr_type, (total, successful) in self._types.items()},
+                'gates': len(self._gates)
+            }
+
+    # Internal helpers
+    def _intern(self, name: str) -> int:
+        name_id = self._names.get(name)
+        if name_id is None:
+            if len(self._name_list) > 0xFFFF:
+                # Ids are stored as unsigned shorts
+                return 0
+            name_id = self._names[name] = len(self._name_list)
+            self._name_list.append(name)
+        return name_id
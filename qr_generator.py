@@ -1,4 +1,3 @@
-import qrcode
 import os
 import json
 import hashlib
@@ -11,14 +10,21 @@ from typing import Dict, Any, Optional, List
 from flask import current_app
 from threading import Lock
 from collections import OrderedDict
-import qrcode
-from qrcode import constants
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from qr_render import build_qr_image, render_batch, content_key, QRImageStore
+from qr_analytics import QRAnalytics
+from qr_tokens import QRTokenSigner, GateVerificationIndex, InvalidQRToken, ADMITTED, EXITED, NOT_INSIDE
+from credential_store import PregeneratedCredentials
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Batches up to this size render in-process; larger ones use the process pool
+QR_BATCH_INLINE_MAX = 32
+QR_BATCH_MIN_CHUNK = 16
+QR_IMAGE_URL = '/qr/{token}.png'
+
 
 class QRCodeCache:
     """Thread-safe LRU cache for QR codes"""
@@ -74,114 +80,6 @@ class QRCodeCache:
             }
 
 
-class QRAnalytics:
-    """Simple in-memory analytics tracking for QR code verification attempts"""
-    
-    def __init__(self):
-        self.verification_logs = []
-        self.lock = Lock()
-    
-    def track_verification_attempt(self, verification_code: str, qr_type: str, 
-                                 action: str, success: bool, 
-                                 ip_address: Optional[str] = None, user_agent: Optional[str] = None, 
-                                 error_message: Optional[str] = None) -> None:
-        """Track QR code verification attempt"""
-        try:
-            with self.lock:
-                log_entry = {
-                    'verification_code': verification_code,
-                    'qr_type': qr_type,
-                    'action': action,
-                    'success': success,
-                    'ip_address': ip_address,
-                    'user_agent': user_agent,
-                    'error_message': error_message,
-                    'timestamp': datetime.now(timezone.utc).isoformat()
-                }
-                self.verification_logs.append(log_entry)
-                
-                # Keep only last 10000 entries to prevent memory issues
-                if len(self.verification_logs) > 10000:
-                    self.verification_logs = self.verification_logs[-5000:]
-                    
-                logger.info(f"Tracked {action} for {qr_type} QR code: {verification_code[:8]}... (success: {success})")
-        except Exception as e:
-            logger.error(f"Failed to track verification attempt: {e}")
-    
-    def get_verification_stats(self, verification_code: str) -> Dict:
-        """Get verification statistics for a QR code"""
-        try:
-            with self.lock:
-                matching_logs = [log for log in self.verification_logs if log['verification_code'] == verification_code]
-                
-                if not matching_logs:
-                    return {
-                        'total_attempts': 0,
-                        'successful_attempts': 0,
-                        'failed_attempts': 0,
-                        'first_attempt': None,
-                        'last_attempt': None
-                    }
-                
-                successful = sum(1 for log in matching_logs if log['success'])
-                total = len(matching_logs)
-                
-                return {
-                    'total_attempts': total,
-                    'successful_attempts': successful,
-                    'failed_attempts': total - successful,
-                    'first_attempt': matching_logs[0]['timestamp'] if matching_logs else None,
-                    'last_attempt': matching_logs[-1]['timestamp'] if matching_logs else None
-                }
-        except Exception as e:
-            logger.error(f"Failed to get verification stats: {e}")
-            return {
-                'total_attempts': 0,
-                'successful_attempts': 0,
-                'failed_attempts': 0,
-                'first_attempt': None,
-                'last_attempt': None
-            }
-    
-    def get_daily_stats(self, days: int = 7) -> List[Dict]:
-        """Get daily verification statistics"""
-        try:
-            with self.lock:
-                cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
-                recent_logs = [log for log in self.verification_logs 
-                             if datetime.fromisoformat(log['timestamp']) >= cutoff_date]
-                
-                # Group by date and type
-                daily_stats = {}
-                for log in recent_logs:
-                    log_date = datetime.fromisoformat(log['timestamp']).date().isoformat()
-                    qr_type = log['qr_type']
-                    key = f"{log_date}_{qr_type}"
-                    
-                    if key not in daily_stats:
-                        daily_stats[key] = {
-                            'date': log_date,
-                            'qr_type': qr_type,
-                            'total_attempts': 0,
-                            'successful_attempts': 0
-                        }
-                    
-                    daily_stats[key]['total_attempts'] += 1
-                    if log['success']:
-                        daily_stats[key]['successful_attempts'] += 1
-                
-                # Calculate success rates
-                result = []
-                for stats in daily_stats.values():
-                    stats['success_rate'] = (stats['successful_attempts'] / stats['total_attempts'] * 100) if stats['total_attempts'] > 0 else 0
-                    result.append(stats)
-                
-                return sorted(result, key=lambda x: x['date'], reverse=True)
-        except Exception as e:
-            logger.error(f"Failed to get daily stats: {e}")
-            return []
-
-
 def retry_on_failure(max_retries=3, delay=1):
     """Decorator for retrying failed operations"""
     def decorator(func):
@@ -210,6 +108,16 @@ class QRGenerator:
         self.cache = QRCodeCache(max_size=cache_size, ttl_seconds=cache_ttl)
         self.analytics = QRAnalytics()
         self.default_expiry_hours = default_expiry_hours
+        self.verification_listeners = []
+        self.token_signer = QRTokenSigner.from_env()
+        self.gate_index = GateVerificationIndex()
+        self._render_pool = None
+        self._render_pool_workers = 0
+        self._render_pool_lock = Lock()
+        self._image_store = None
+        self._image_store_lock = Lock()
+        self._pregenerated = None
+        self._pregenerated_lock = Lock()
         logger.info(f"QRGenerator initialized with cache_size={cache_size}, cache_ttl={cache_ttl}s, default_expiry={default_expiry_hours}h")
     
     def _get_qr_directory(self):
@@ -230,6 +138,52 @@ class QRGenerator:
             logger.warning(f"Using fallback QR directory: {temp_dir}")
             return temp_dir
     
+    def _get_image_store(self) -> QRImageStore:
+        """Content-addressed ticket QR images, created on first use
+        
+        Only signed ticket tokens go in the store, because ``/qr/<token>.png``
+        can re-render them after an eviction. Entry, parking and pass codes
+        embed unsigned JSON that no endpoint could render again, so they are
+        kept as files under static/qrcodes that are never evicted.
+        """
+        with self._image_store_lock:
+            if self._image_store is None:
+                self._image_store = QRImageStore(
+                    os.path.join(self._get_qr_directory(), 'tokens'),
+                    disk_budget=int(os.getenv('QR_IMAGE_DISK_BUDGET_MB', 512)) * 1024 * 1024,
+                    memory_budget=int(os.getenv('QR_IMAGE_MEMORY_BUDGET_MB', 32)) * 1024 * 1024
+                )
+            return self._image_store
+    
+    def get_pregenerated_store(self) -> PregeneratedCredentials:
+        """Credentials generated ahead of each event, created on first use"""
+        with self._pregenerated_lock:
+            if self._pregenerated is None:
+                self._pregenerated = PregeneratedCredentials(
+                    os.path.join(self._get_qr_directory(), 'pregenerated'),
+                    refresh_interval=float(os.getenv('QR_PREGENERATED_REFRESH_SECONDS', 30))
+                )
+            return self._pregenerated
+    
+    def _get_cached(self, cache_key: str) -> Optional[Dict]:
+        """A cached credential, falling back to the ones pre-generated for upcoming events"""
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            cached = self.get_pregenerated_store().get(cache_key)
+            if cached is not None:
+                self.cache.put(cache_key, cached)
+        return cached
+    
+    def get_ticket_qr_png(self, token: str):
+        """(content hash, PNG bytes) for a ticket token, rendered on first request
+        
+        Only tokens we signed are rendered, so the image endpoint cannot be
+        used to fill the cache with arbitrary codes. Expired tokens still
+        render; the gates reject them.
+        """
+        self.token_signer.verify(token, check_expiry=False)
+        return self._get_image_store().get_png(token)
+    
     def _generate_cache_key(self, data_type: str, data: Dict) -> str:
         """Generate cache key for QR code data"""
         # Create deterministic key from essential data
@@ -258,24 +212,13 @@ class QRGenerator:
             logger.warning(f"Error checking QR code expiry: {e}")
             return False
     
-    def _create_qr_image(self, qr_data: Dict):
-        """Create QR code image with enhanced error handling"""
+    def _create_qr_image(self, qr_data):
+        """Create QR code image with enhanced error handling
+        
+        ``qr_data`` is a signed token string or a dict embedded as JSON.
+        """
         try:
-            from qrcode.constants import ERROR_CORRECT_H
-            
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=ERROR_CORRECT_H,
-                box_size=10,
-                border=4,
-            )
-            
-            qr.add_data(json.dumps(qr_data))
-            qr.make(fit=True)
-            
-            # Create image with better error correction for important codes
-            img = qr.make_image(fill_color="black", back_color="white")
-            return img
+            return build_qr_image(qr_data)
         except Exception as e:
             logger.error(f"Failed to create QR image: {e}")
             raise
@@ -314,7 +257,7 @@ class QRGenerator:
             
             # Check cache first
             cache_key = self._generate_cache_key('ticket', ticket_data)
-            cached_result = self.cache.get(cache_key)
+            cached_result = self._get_cached(cache_key)
             if cached_result and not self._is_qr_code_expired(cached_result):
                 logger.info(f"QR code cache hit for ticket {ticket_data.get('ticket_id')}")
                 self.analytics.track_verification_attempt(
@@ -328,6 +271,11 @@ class QRGenerator:
             # Calculate expiry
             expires_at = self._calculate_expiry_time(expiry_hours)
             
+            # Signed token the gates verify offline
+            token = self.token_signer.issue(ticket_data.get('ticket_id'), ticket_data.get('event_id'),
+                                            ticket_data.get('seat_id'), expires_at.timestamp())
+            self.gate_index.add(ticket_data.get('event_id'), ticket_data.get('ticket_id'))
+            
             # Create QR code data with expiry
             qr_data = {
                 'ticket_id': ticket_data.get('ticket_id'),
@@ -335,30 +283,22 @@ class QRGenerator:
                 'seat_id': ticket_data.get('seat_id'),
                 'customer_id': ticket_data.get('customer_id'),
                 'verification_code': verification_code,
+                'token': token,
                 'timestamp': datetime.now(timezone.utc).isoformat(),
                 'expires_at': expires_at.isoformat(),
                 'qr_type': 'ticket',
-                'version': '2.0'
+                'version': '3.0'
             }
             
-            # Generate QR code image
-            img = self._create_qr_image(qr_data)
+            # The image is rendered when first requested; only the token is embedded
+            qr_url = QR_IMAGE_URL.format(token=token)
             
-            # Save QR code image
-            timestamp_str = datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')
-            qr_filename = f"ticket_{ticket_data.get('ticket_id')}_{verification_code[:8]}_{timestamp_str}.png"
-            qr_directory = self._get_qr_directory()
-            qr_path = os.path.join(qr_directory, qr_filename)
-            
-            self._save_qr_image(img, qr_path)
-            logger.info(f"QR code saved: {qr_path}")
-            
-            # Update ticket with QR code path
+            # Update ticket with QR code URL
             with current_app.app_context():
                 try:
                     ticket = Ticket.query.get(ticket_data.get('ticket_id'))
                     if ticket:
-                        ticket.qr_code = f"/static/qrcodes/{qr_filename}"
+                        ticket.qr_code = qr_url
                         db.session.commit()
                         logger.info(f"Updated ticket {ticket.id} with QR code path")
                     else:
@@ -368,8 +308,9 @@ class QRGenerator:
                     db.session.rollback()
             
             result = {
-                'qr_code_base64': f"/static/qrcodes/{qr_filename}",
+                'qr_code_base64': qr_url,
                 'verification_code': verification_code,
+                'token': token,
                 'ticket_info': qr_data,
                 'expires_at': expires_at.isoformat(),
                 'created_at': datetime.now(timezone.utc).isoformat()
@@ -405,6 +346,219 @@ class QRGenerator:
                 'error_type': 'generation_error'
             }
     
+    def generate_ticket_qr_batch(self, tickets: List[Dict], expiry_hours: Optional[int] = None,
+                                 workers: Optional[int] = None, prerender: bool = False) -> Dict[str, Any]:
+        """Generate QR codes for many tickets at once (corporate allocations, on-sale spikes)
+        
+        Tokens are issued in this process and every ``Ticket.qr_code`` URL is
+        set in one bulk UPDATE. Images are normally rendered when first
+        requested; with ``prerender`` they are rendered into the image store
+        up front by a pool of worker processes. Returns the per-ticket
+        results (also keyed by cache key under ``credentials``), any
+        per-ticket errors and the throughput in tickets per second.
+        """
+        started = time.perf_counter()
+        created_at = datetime.now(timezone.utc)
+        expires_at = self._calculate_expiry_time(expiry_hours)
+        store = self._get_image_store() if prerender else None
+        
+        pending, jobs, errors = [], [], []
+        for ticket_data in tickets:
+            missing_fields = [field for field in ['ticket_id', 'event_id', 'customer_id'] if not ticket_data.get(field)]
+            if missing_fields:
+                errors.append({
+                    'ticket_id': ticket_data.get('ticket_id'),
+                    'error': f"Missing required fields: {missing_fields}",
+                    'error_type': 'validation_error'
+                })
+                continue
+            
+            verification_code = secrets.token_urlsafe(16)
+            token = self.token_signer.issue(ticket_data.get('ticket_id'), ticket_data.get('event_id'),
+                                            ticket_data.get('seat_id'), expires_at.timestamp())
+            qr_data = {
+                'ticket_id': ticket_data.get('ticket_id'),
+                'event_id': ticket_data.get('event_id'),
+                'seat_id': ticket_data.get('seat_id'),
+                'customer_id': ticket_data.get('customer_id'),
+                'verification_code': verification_code,
+                'token': token,
+                'timestamp': created_at.isoformat(),
+                'expires_at': expires_at.isoformat(),
+                'qr_type': 'ticket',
+                'version': '3.0'
+            }
+            pending.append((ticket_data, {
+                'qr_code_base64': QR_IMAGE_URL.format(token=token),
+                'verification_code': verification_code,
+                'token': token,
+                'ticket_info': qr_data,
+                'expires_at': expires_at.isoformat(),
+                'created_at': created_at.isoformat()
+            }))
+            if store is not None:
+                jobs.append((token, store.path_for(content_key(token))))
+        
+        render_errors = self._render_batch(jobs, workers, store) if store is not None else [None] * len(pending)
+        results, credentials = [], {}
+        for (ticket_data, result), error in zip(pending, render_errors):
+            if error:
+                errors.append({'ticket_id': ticket_data.get('ticket_id'), 'error': error,
+                               'error_type': 'generation_error'})
+                continue
+            results.append(result)
+            self.gate_index.add(ticket_data.get('event_id'), ticket_data.get('ticket_id'))
+            cache_key = self._generate_cache_key('ticket', ticket_data)
+            credentials[cache_key] = result
+            self.cache.put(cache_key, result)
+            self.analytics.track_verification_attempt(result['verification_code'], 'ticket', 'generated', True)
+        
+        updated = self._bulk_update_ticket_paths(
+            {result['ticket_info']['ticket_id']: result['qr_code_base64'] for result in results})
+        
+        seconds = time.perf_counter() - started
+        tickets_per_second = len(results) / seconds if seconds > 0 else 0.0
+        logger.info(f"Generated {len(results)} ticket QR codes in {seconds:.2f}s "
+                    f"({tickets_per_second:.0f} tickets/s, {len(errors)} errors)")
+        return {
+            'results': results,
+            'credentials': credentials,
+            'errors': errors,
+            'generated': len(results),
+            'updated': updated,
+            'seconds': round(seconds, 3),
+            'tickets_per_second': round(tickets_per_second, 1)
+        }
+    
+    def generate_credentials_batch(self, qr_type: str, items: List[Dict], expiry_hours: Optional[int] = None,
+                                   workers: Optional[int] = None, pass_type: str = 'general') -> Dict[str, Any]:
+        """Generate many entry, parking or digital pass QR codes at once
+        
+        ``qr_type`` is 'entry', 'parking' or 'pass'. Each result has the
+        shape ``generate_event_entry_qr``, ``generate_parking_qr`` or
+        ``generate_digital_pass`` returns and is cached under the key they
+        look up, so a later on-demand call with the same data is a cache
+        hit. The images are rendered by the render worker pool into
+        static/qrcodes, not the image store (see ``_get_image_store``).
+        Returns the results by cache key and any per-item errors.
+        """
+        required_fields = {'entry': ['customer_id', 'event_id'], 'parking': ['booking_id', 'parking_id'],
+                           'pass': ['customer_name']}[qr_type]
+        cache_type = f'pass_{pass_type}' if qr_type == 'pass' else qr_type
+        info_key = f"{qr_type}_info"
+        created_at = datetime.now(timezone.utc)
+        expires_at = self._calculate_expiry_time(expiry_hours)
+        timestamp_str = created_at.strftime('%Y%m%d_%H%M%S')
+        qr_directory = self._get_qr_directory()
+        
+        pending, jobs, errors = [], [], []
+        for data in items:
+            missing_fields = [field for field in required_fields if not data.get(field)]
+            if missing_fields:
+                errors.append({'item': data, 'error': f"Missing required fields: {missing_fields}",
+                               'error_type': 'validation_error'})
+                continue
+            verification_code = secrets.token_urlsafe(16)
+            qr_data = {'verification_code': verification_code, 'timestamp': created_at.isoformat(),
+                       'expires_at': expires_at.isoformat(), 'qr_type': cache_type, 'version': '2.0'}
+            if qr_type == 'entry':
+                qr_data.update(customer_id=data.get('customer_id'), customer_name=data.get('customer_name'),
+                               event_id=data.get('event_id'))
+                qr_filename = (f"entry_{data.get('customer_id')}_{data.get('event_id')}_"
+                               f"{verification_code[:8]}_{timestamp_str}.png")
+            elif qr_type == 'parking':
+                qr_data.update(booking_id=data.get('booking_id'), parking_id=data.get('parking_id'),
+                               vehicle_number=data.get('vehicle_number'))
+                qr_filename = f"parking_{data.get('booking_id')}_{verification_code[:8]}_{timestamp_str}.png"
+            else:
+                qr_data.update(customer_name=data.get('customer_name'), pass_type=pass_type)
+                for field in ('event_id', 'valid_until'):
+                    if field in data:
+                        qr_data[field] = data[field]
+                qr_filename = f"pass_{pass_type}_{verification_code[:8]}_{timestamp_str}.png"
+        
+            result = {
+                'qr_code_base64': f"/static/qrcodes/{qr_filename}",
+                'verification_code': verification_code,
+                info_key: qr_data,
+                'expires_at': expires_at.isoformat(),
+                'created_at': created_at.isoformat()
+            }
+            if qr_type == 'pass':
+                result['pass_image_base64'] = result['qr_code_base64']
+            pending.append((self._generate_cache_key(cache_type, data), result, data))
+            jobs.append((qr_data, os.path.join(qr_directory, qr_filename)))
+        
+        credentials = {}
+        for (cache_key, result, data), error in zip(pending, self._render_batch(jobs, workers)):
+            if error:
+                errors.append({'item': data, 'error': error, 'error_type': 'generation_error'})
+                continue
+            credentials[cache_key] = result
+            self.cache.put(cache_key, result)
+            self.analytics.track_verification_attempt(result['verification_code'], cache_type, 'generated', True)
+        
+        logger.info(f"Generated {len(credentials)} {cache_type} QR codes ({len(errors)} errors)")
+        return {'credentials': credentials, 'errors': errors, 'generated': len(credentials)}
+    
+    def _render_batch(self, jobs: List[tuple], workers: Optional[int] = None,
+                      store: Optional[QRImageStore] = None) -> List[Optional[str]]:
+        """Render and save ``(payload, path)`` jobs across worker processes"""
+        for directory in {os.path.dirname(path) for _, path in jobs}:
+            os.makedirs(directory, exist_ok=True)
+        workers = workers if workers is not None else int(os.getenv('QR_RENDER_WORKERS', os.cpu_count() or 1))
+        if workers <= 1 or len(jobs) <= QR_BATCH_INLINE_MAX:
+            errors = render_batch(jobs)
+        else:
+            # A few chunks per worker keeps them all busy without per-ticket IPC
+            chunk_size = max(QR_BATCH_MIN_CHUNK, -(-len(jobs) // (workers * 4)))
+            chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+            errors = []
+            for chunk_errors in self._get_render_pool(workers).map(render_batch, chunks):
+                errors.extend(chunk_errors)
+        
+        if store is not None:
+            for (payload, path), error in zip(jobs, errors):
+                if not error:
+                    store.register(content_key(payload), os.path.getsize(path))
+        return errors
+    
+    def _get_render_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Render worker processes, started on first use and kept for later batches"""
+        with self._render_pool_lock:
+            if self._render_pool is None or self._render_pool_workers != workers:
+                if self._render_pool is not None:
+                    self._render_pool.shutdown(wait=False)
+                self._render_pool = ProcessPoolExecutor(max_workers=workers)
+                self._render_pool_workers = workers
+            return self._render_pool
+    
+    def _bulk_update_ticket_paths(self, paths: Dict[int, str]) -> int:
+        """Set Ticket.qr_code for every ticket in one UPDATE round trip"""
+        if not paths:
+            return 0
+        try:
+            from sqlalchemy import update
+            from app import db
+            from app.models import Ticket
+        except Exception as e:
+            logger.error(f"Failed to bulk update ticket QR code paths: {e}")
+            return 0
+        try:
+            with current_app.app_context():
+                db.session.execute(update(Ticket), [{'id': ticket_id, 'qr_code': path}
+                                                    for ticket_id, path in paths.items()])
+                db.session.commit()
+            logger.info(f"Updated {len(paths)} tickets with QR code paths")
+            return len(paths)
+        except Exception as e:
+            logger.error(f"Failed to bulk update ticket QR code paths: {e}")
+            try:
+                db.session.rollback()
+            except Exception:
+                pass
+            return 0
+    
     @retry_on_failure(max_retries=3, delay=1)
     def generate_parking_qr(self, parking_data, expiry_hours: Optional[int] = None):
         """Generate QR code for parking pass with enhanced features"""
@@ -417,7 +571,7 @@ class QRGenerator:
             
             # Check cache first
             cache_key = self._generate_cache_key('parking', parking_data)
-            cached_result = self.cache.get(cache_key)
+            cached_result = self._get_cached(cache_key)
             if cached_result and not self._is_qr_code_expired(cached_result):
                 logger.info(f"QR code cache hit for parking {parking_data.get('booking_id')}")
                 self.analytics.track_verification_attempt(
@@ -505,7 +659,7 @@ class QRGenerator:
             
             # Check cache first
             cache_key = self._generate_cache_key('entry', entry_data)
-            cached_result = self.cache.get(cache_key)
+            cached_result = self._get_cached(cache_key)
             if cached_result and not self._is_qr_code_expired(cached_result):
                 logger.info(f"QR code cache hit for entry {entry_data.get('customer_id')}")
                 self.analytics.track_verification_attempt(
@@ -593,7 +747,7 @@ class QRGenerator:
             
             # Check cache first
             cache_key = self._generate_cache_key(f'pass_{pass_type}', pass_data)
-            cached_result = self.cache.get(cache_key)
+            cached_result = self._get_cached(cache_key)
             if cached_result and not self._is_qr_code_expired(cached_result):
                 logger.info(f"QR code cache hit for pass {pass_type}")
                 self.analytics.track_verification_attempt(
@@ -675,31 +829,96 @@ class QRGenerator:
                 'error_type': 'generation_error'
             }
     
-    def verify_qr_code(self, verification_code, ip_address=None, user_agent=None):
-        """Verify QR code using verification code with enhanced analytics"""
+    def add_verification_listener(self, listener):
+        """Call ``listener(scan)`` for every gate verification (e.g. live occupancy)"""
+        if listener not in self.verification_listeners:
+            self.verification_listeners.append(listener)
+    
+    def _notify_verification(self, scan):
+        for listener in self.verification_listeners:
+            try:
+                listener(scan)
+            except Exception as e:
+                logger.error(f"Verification listener failed: {e}")
+    
+    def preload_gate_index(self, event_id: int) -> int:
+        """Load an event's booked tickets into the gate index before gates open"""
+        from app.models import Ticket
+        with current_app.app_context():
+            rows = Ticket.query.with_entities(Ticket.id).filter_by(event_id=event_id, ticket_status='Booked').all()
+        count = self.gate_index.preload(event_id, (row[0] for row in rows))
+        logger.info(f"Gate index loaded {count} tickets for event {event_id}")
+        return count
+    
+    def _prime_gate_index(self, event_id: int, ticket_id: int):
+        """Load the gate index from the event's pre-generated tickets, topping it up for late bookings"""
+        if not self.gate_index.is_loaded(event_id):
+            ticket_ids = self.get_pregenerated_store().ticket_ids(event_id)
+            if ticket_ids is not None:
+                count = self.gate_index.preload(event_id, ticket_ids)
+                logger.info(f"Gate index loaded {count} pre-generated tickets for event {event_id}")
+        elif not self.gate_index.is_issued(event_id, ticket_id):
+            ticket_ids = self.get_pregenerated_store().ticket_ids(event_id, refresh=True)
+            if ticket_ids and ticket_id in ticket_ids:
+                self.gate_index.extend(event_id, ticket_ids)
+    
+    def verify_qr_code(self, verification_code, ip_address=None, user_agent=None,
+                       stadium_id=None, gate=None, section=None, direction='entry'):
+        """Verify a scanned ticket token at a gate
+        
+        The token's signature and expiry are checked locally, then the gate
+        index decides the entry: admitted once, duplicates and cancelled
+        tickets refused. Gate scanners pass ``stadium_id``, ``gate``,
+        ``section`` and ``direction`` ('entry' or 'exit') so listeners can
+        track who is inside.
+        """
+        verified_at = datetime.now(timezone.utc)
+        scan = {
+            'verification_code': verification_code,
+            'stadium_id': stadium_id,
+            'gate': gate,
+            'section': section,
+            'direction': direction,
+            'verified_at': verified_at.isoformat()
+        }
         try:
-            # Track verification attempt
+            token = self.token_signer.verify(verification_code, verified_at.timestamp())
+            if direction == 'exit':
+                status, first_use = self.gate_index.release(token.event_id, token.ticket_id), None
+            else:
+                self._prime_gate_index(token.event_id, token.ticket_id)
+                status, first_use = self.gate_index.admit(token.event_id, token.ticket_id, gate,
+                                                          verified_at.timestamp())
+            valid = status in (ADMITTED, EXITED)
+            
             self.analytics.track_verification_attempt(
-                verification_code, 'unknown', 'verification_attempt', True,
-                ip_address=ip_address, user_agent=user_agent
+                verification_code, 'ticket', status, valid,
+                ip_address=ip_address, user_agent=user_agent, gate=gate
             )
+            self._notify_verification({**scan, 'valid': valid, 'status': status, 'event_id': token.event_id})
             
-            # In a real implementation, you would look up the verification code in a database
-            # For now, we'll just return a success response
-            return {
-                'valid': True,
-                'data': {
-                    'verification_code': verification_code,
-                    'verified_at': datetime.now(timezone.utc).isoformat()
-                }
+            result = {
+                'valid': valid,
+                'status': status,
+                'data': {**token.to_dict(), 'verification_code': verification_code,
+                         'verified_at': scan['verified_at']}
             }
-        except Exception as e:
+            if first_use:
+                result['first_use'] = first_use
+            if not valid:
+                result['error'] = ('Ticket already used' if first_use else
+                                   'Ticket holder has not entered' if status == NOT_INSIDE else
+                                   'Ticket is not valid for this event')
+            return result
+        except InvalidQRToken as e:
             self.analytics.track_verification_attempt(
-                verification_code, 'unknown', 'verification_failed', False,
-                ip_address=ip_address, user_agent=user_agent, error_message=str(e)
+                verification_code, 'ticket', 'verification_failed', False,
+                ip_address=ip_address, user_agent=user_agent, error_message=str(e), gate=gate
             )
+            self._notify_verification({**scan, 'valid': False, 'status': e.reason})
             return {
                 'valid': False,
+                'status': e.reason,
                 'error': str(e)
             }
 
@@ -0,0 +1,209 @@
+"""
+QR Image Rendering for CricVerse
+Renders QR code PNGs and caches them by content; kept free of Flask and
+database imports so render worker processes start quickly
+Big Bash League Cricket Platform
+"""
+
+import io
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Any, List, Tuple, Optional, Union
+
+import qrcode
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_M
+
+from single_flight import SingleFlight
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def build_qr_image(qr_data: Union[str, dict]):
+    """QR image for a signed token string or a dict embedded as JSON"""
+    # Signed tokens are short enough that medium error correction
+    # still gives a sparse code that scans quickly
+    is_token = isinstance(qr_data, str)
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=ERROR_CORRECT_M if is_token else ERROR_CORRECT_H,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(qr_data if is_token else json.dumps(qr_data))
+    qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white")
+
+
+def render_png(qr_data: Union[str, dict]) -> bytes:
+    buffer = io.BytesIO()
+    build_qr_image(qr_data).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def write_file(path: str, content: bytes):
+    """Write via a temporary name so readers never see a partial PNG"""
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+def render_batch(jobs: List[Tuple[str, str]]) -> List[Optional[str]]:
+    """Render and save ``(payload, path)`` jobs; returns an error message or None per job
+
+    Runs in render worker processes, so each worker writes its own files.
+    """
+    errors = []
+    for payload, path in jobs:
+        try:
+            write_file(path, render_png(payload))
+            errors.append(None)
+        except Exception as e:
+            errors.append(str(e))
+    return errors
+
+
+def content_key(payload: str) -> str:
+    """Content address of a QR payload: the SHA-256 of the token"""
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class QRImageStore:
+    """Content-addressed QR PNGs, rendered on first request
+
+    Images live under ``directory`` as ``<hash[:2]>/<hash>.png``, so the
+    same token always maps to the same file and nothing is written until
+    someone asks for it. A byte-bounded in-memory LRU holds the hot PNGs;
+    the files on disk are evicted least recently used first once they go
+    over ``disk_budget`` bytes. Concurrent misses for one token render once.
+    """
+
+    def __init__(self, directory: str, disk_budget: int = 512 * 1024 * 1024,
+                 memory_budget: int = 32 * 1024 * 1024):
+        self.directory = directory
+        self.disk_budget = disk_budget
+        self.memory_budget = memory_budget
+        self._memory: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: Optional['OrderedDict[str, int]'] = None
+        self._disk_bytes = 0
+        self._lock = Lock()
+        self._renders = SingleFlight('qr_render')
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'renders': 0, 'evictions': 0}
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.png")
+
+    def get_png(self, payload: str) -> Tuple[str, bytes]:
+        """(content hash, PNG bytes) for a payload, rendering it on a miss"""
+        digest = content_key(payload)
+        with self._lock:
+            png = self._memory.get(digest)
+            if png is not None:
+                self._memory.move_to_end(digest)
+                if self._disk is not None and digest in self._disk:
+                    self._disk.move_to_end(digest)
+                self.stats['memory_hits'] += 1
+                return digest, png
+        return digest, self._renders.do(digest, self._load, digest, payload)
+
+    def register(self, digest: str, size: int):
+        """Track a file written straight to ``path_for(digest)`` by a render worker"""
+        with self._lock:
+            self._track(digest, size)
+            evicted = self._evict()
+        self._unlink(evicted)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': len(self._disk or ()),
+                'disk_bytes': self._disk_bytes
+            }
+
+    # Internal helpers
+    def _load(self, digest: str, payload: str) -> bytes:
+        path = self.path_for(digest)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+            # Recency survives a restart through the file's mtime
+            os.utime(path)
+            hit = 'disk_hits'
+        except FileNotFoundError:
+            png = render_png(payload)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_file(path, png)
+            hit = 'renders'
+
+        with self._lock:
+            self.stats[hit] += 1
+            self._track(digest, len(png))
+            self._remember(digest, png)
+            evicted = self._evict()
+        self._unlink(evicted)
+        return png
+
+    def _track(self, digest: str, size: int):
+        if self._disk is None:
+            self._scan()
+        previous = self._disk.pop(digest, None)
+        if previous is not None:
+            self._disk_bytes -= previous
+        self._disk[digest] = size
+        self._disk_bytes += size
+
+    def _scan(self):
+        """Index files left by earlier processes, oldest first"""
+        entries = []
+        if os.path.isdir(self.directory):
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.png'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        entries.sort()
+        self._disk = OrderedDict((digest, size) for _, digest, size in entries)
+        self._disk_bytes = sum(size for _, _, size in entries)
+
+    def _remember(self, digest: str, png: bytes):
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return
+        self._memory[digest] = png
+        self._memory_bytes += len(png)
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    def _evict(self) -> List[str]:
+        """Drop the least recently used files over budget; returns their paths"""
+        evicted = []
+        while self._disk_bytes > self.disk_budget and len(self._disk) > 1:
+            digest, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(self.path_for(digest))
+        self.stats['evictions'] += len(evicted)
+        return evicted
+
+    def _unlink(self, paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Failed to evict QR image {path}: {e}")
@@ -0,0 +1,284 @@
+"""
+Signed QR Ticket Tokens for CricVerse
+Compact tokens that gate scanners verify offline, plus an in-memory index of
+issued and used tickets per event for duplicate-entry detection
+Big Bash League Cricket Platform
+"""
+
+import os
+import hmac
+import time
+import base64
+import struct
+import hashlib
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Any, Optional, Iterable, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TOKEN_PREFIX = 'CV'
+TOKEN_VERSION = 1
+ALGORITHM_HMAC = 1
+ALGORITHM_ED25519 = 2
+HMAC_TAG_BYTES = 10
+ED25519_SIGNATURE_BYTES = 64
+
+# version/algorithm, key id, ticket id, event id, seat id (0 = none), expiry (epoch seconds)
+TOKEN_BODY = struct.Struct('>BBQIII')
+
+# Gate decisions
+ADMITTED = 'admitted'
+DUPLICATE = 'duplicate'
+NOT_ISSUED = 'not_issued'
+EXITED = 'exited'
+NOT_INSIDE = 'not_inside'
+
+
+class InvalidQRToken(ValueError):
+    """A token that is malformed, forged or expired; ``reason`` is a short code"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class TicketToken:
+    ticket_id: int
+    event_id: int
+    seat_id: Optional[int]
+    expires_at: int
+    key_id: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ticket_id': self.ticket_id,
+            'event_id': self.event_id,
+            'seat_id': self.seat_id,
+            'expires_at': self.expires_at
+        }
+
+
+def _b32encode(raw: bytes) -> str:
+    # Base32 stays inside the QR alphanumeric set, which packs 5.5 bits per character
+    return base64.b32encode(raw).decode('ascii').rstrip('=')
+
+
+def _b32decode(text: str) -> bytes:
+    return base64.b32decode(text + '=' * (-len(text) % 8))
+
+
+class QRTokenSigner:
+    """Issues and verifies compact signed ticket tokens
+
+    A token is the packed ticket id, event, seat and expiry followed by a
+    signature, base32 encoded behind a ``CV`` prefix: about 50 characters,
+    against several hundred for the JSON payload. With HMAC the signature is
+    a 10-byte truncated HMAC-SHA256 and scanners hold the shared secret; with
+    Ed25519 scanners only need the public key. Either way verification is a
+    single local computation with no database lookup.
+
+    Keys are held by id, so old keys can stay verifiable during rotation.
+    """
+
+    def __init__(self, key: Any, key_id: int = 1, algorithm: int = ALGORITHM_HMAC):
+        self.algorithm = algorithm
+        self.key_id = key_id
+        self._signing_key = key
+        self._verify_keys: Dict[int, Any] = {}
+        self.add_verify_key(key_id, key)
+
+    def add_verify_key(self, key_id: int, key: Any):
+        """Accept tokens signed with another key (an Ed25519 public or private key, or an HMAC secret)"""
+        if self.algorithm == ALGORITHM_HMAC:
+            # Keyed once; each verification copies the prepared state
+            self._verify_keys[key_id] = hmac.new(key, digestmod=hashlib.sha256)
+        else:
+            self._verify_keys[key_id] = key.public_key() if hasattr(key, 'public_key') else key
+
+    @classmethod
+    def from_env(cls) -> 'QRTokenSigner':
+        """Signer from QR_SIGNING_ALGORITHM and QR_SIGNING_KEY / QR_SIGNING_PUBLIC_KEY (HMAC falls back to SECRET_KEY)"""
+        key_id = int(os.getenv('QR_SIGNING_KEY_ID', 1))
+        if os.getenv('QR_SIGNING_ALGORITHM', 'hmac').lower() == 'ed25519':
+            from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+            private_key = os.getenv('QR_SIGNING_KEY')
+            if private_key:
+                key = Ed25519PrivateKey.from_private_bytes(bytes.fromhex(private_key))
+            else:
+                # Scanners only verify
+                key = Ed25519PublicKey.from_public_bytes(bytes.fromhex(os.environ['QR_SIGNING_PUBLIC_KEY']))
+            return cls(key, key_id, ALGORITHM_ED25519)
+
+        secret = os.getenv('QR_SIGNING_KEY')
+        if not secret:
+            # The Flask app's secret, so every web and worker process signs alike
+            from config import Config
+            secret = Config.SECRET_KEY
+        return cls(secret.encode('utf-8'), key_id, ALGORITHM_HMAC)
+
+    def issue(self, ticket_id: int, event_id: int, seat_id: Optional[int], expires_at: float) -> str:
+        body = TOKEN_BODY.pack((TOKEN_VERSION << 4) | self.algorithm, self.key_id, int(ticket_id),
+                               int(event_id), int(seat_id or 0), int(expires_at))
+        return TOKEN_PREFIX + _b32encode(body + self._sign(body))
+
+    def verify(self, token: str, now: Optional[float] = None, check_expiry: bool = True) -> TicketToken:
+        """Decode a token, check its signature and expiry; raises InvalidQRToken"""
+        if not isinstance(token, str) or not token.startswith(TOKEN_PREFIX):
+            raise InvalidQRToken('malformed', 'Not a CricVerse ticket token')
+        try:
+            raw = _b32decode(token[len(TOKEN_PREFIX):])
+            header, key_id, ticket_id, event_id, seat_id, expires_at = TOKEN_BODY.unpack_from(raw)
+        except (ValueError, struct.error):
+            raise InvalidQRToken('malformed', 'Ticket token could not be decoded')
+
+        if header >> 4 != TOKEN_VERSION or header & 0x0F != self.algorithm:
+            raise InvalidQRToken('malformed', 'Unsupported ticket token version')
+        key = self._verify_keys.get(key_id)
+        if key is None:
+            raise InvalidQRToken('unknown_key', 'Ticket token signed with an unknown key')
+
+        body, signature = raw[:TOKEN_BODY.size], raw[TOKEN_BODY.size:]
+        if not self._check(key, body, signature):
+            raise InvalidQRToken('bad_signature', 'Ticket token signature is invalid')
+        if check_expiry and (time.time() if now is None else now) > expires_at:
+            raise InvalidQRToken('expired', 'Ticket token has expired')
+        return TicketToken(ticket_id, event_id, seat_id or None, expires_at, key_id)
+
+    # Internal helpers
+    def _sign(self, body: bytes) -> bytes:
+        if self.algorithm == ALGORITHM_HMAC:
+            mac = self._verify_keys[self.key_id].copy()
+            mac.update(body)
+            return mac.digest()[:HMAC_TAG_BYTES]
+        if not hasattr(self._signing_key, 'sign'):
+            raise ValueError("This signer only holds a public key and cannot issue tokens")
+        return self._signing_key.sign(body)
+
+    def _check(self, key: Any, body: bytes, signature: bytes) -> bool:
+        if self.algorithm == ALGORITHM_HMAC:
+            mac = key.copy()
+            mac.update(body)
+            return hmac.compare_digest(mac.digest()[:HMAC_TAG_BYTES], signature)
+        if len(signature) != ED25519_SIGNATURE_BYTES:
+            return False
+        try:
+            key.verify(signature, body)
+            return True
+        except Exception:
+            return False
+
+
+class EventGateIndex:
+    """Issued, revoked and used tickets for one event; ``issued`` is None until preloaded"""
+
+    __slots__ = ('issued', 'revoked', 'used')
+
+    def __init__(self, ticket_ids: Optional[Iterable[int]] = None):
+        self.issued = set(ticket_ids) if ticket_ids is not None else None
+        self.revoked = set()
+        self.used: Dict[int, Tuple[Optional[str], float]] = {}
+
+
+class GateVerificationIndex:
+    """In-memory gate state: which tickets exist and which are already inside
+
+    Loaded per event before gates open with the booked ticket ids. After
+    that every scan is two set/dict lookups under one lock, so duplicate
+    entries are caught in constant time at any scan rate. Tickets for an
+    event that was never preloaded are admitted on their signature alone,
+    and still only once.
+    """
+
+    def __init__(self):
+        self._events: Dict[int, EventGateIndex] = {}
+        self._lock = Lock()
+        self.stats = {ADMITTED: 0, DUPLICATE: 0, NOT_ISSUED: 0, EXITED: 0, NOT_INSIDE: 0}
+
+    def preload(self, event_id: int, ticket_ids: Iterable[int]) -> int:
+        """Replace an event's issued tickets, keeping who is already inside"""
+        index = EventGateIndex(ticket_ids)
+        with self._lock:
+            previous = self._events.get(event_id)
+            if previous is not None:
+                index.used = previous.used
+                index.revoked = previous.revoked
+            self._events[event_id] = index
+        return len(index.issued)
+
+    def add(self, event_id: int, ticket_id: int):
+        """Record a ticket issued after the event was preloaded"""
+        with self._lock:
+            index = self._events.get(event_id)
+            if index is not None:
+                index.revoked.discard(ticket_id)
+                if index.issued is not None:
+                    index.issued.add(ticket_id)
+
+    def extend(self, event_id: int, ticket_ids: Iterable[int]) -> int:
+        """Add tickets issued since the preload; revoked tickets stay revoked"""
+        with self._lock:
+            index = self._events.get(event_id)
+            if index is None or index.issued is None:
+                return 0
+            before = len(index.issued)
+            index.issued.update(ticket_ids)
+            return len(index.issued) - before
+
+    def is_issued(self, event_id: int, ticket_id: int) -> bool:
+        """False only for a preloaded event that does not list the ticket"""
+        index = self._events.get(event_id)
+        return index is None or index.issued is None or ticket_id in index.issued
+
+    def revoke(self, event_id: int, ticket_id: int):
+        """Stop admitting a cancelled or refunded ticket"""
+        with self._lock:
+            index = self._events.setdefault(event_id, EventGateIndex())
+            index.revoked.add(ticket_id)
+
+    def is_loaded(self, event_id: int) -> bool:
+        index = self._events.get(event_id)
+        return index is not None and index.issued is not None
+
+    def admit(self, event_id: int, ticket_id: int, gate: Optional[str] = None,
+              now: Optional[float] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Decide an entry scan: (status, first use for duplicates)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            index = self._events.get(event_id)
+            if index is None:
+                index = self._events[event_id] = EventGateIndex()
+            if ticket_id in index.revoked or (index.issued is not None and ticket_id not in index.issued):
+                status, first_use = NOT_ISSUED, None
+            elif ticket_id in index.used:
+                first_gate, first_at = index.used[ticket_id]
+                status, first_use = DUPLICATE, {'gate': first_gate, 'at': first_at}
+            else:
+                index.used[ticket_id] = (gate, now)
+                status, first_use = ADMITTED, None
+            self.stats[status] += 1
+        return status, first_use
+
+    def release(self, event_id: int, ticket_id: int) -> str:
+        """Decide an exit scan: a ticket holder who is inside leaves and may come back in"""
+        with self._lock:
+            index = self._events.get(event_id)
+            status = EXITED if index is not None and index.used.pop(ticket_id, None) else NOT_INSIDE
+            self.stats[status] += 1
+        return status
+
+    def clear(self, event_id: int):
+        with self._lock:
+            self._events.pop(event_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'events': len(self._events),
+                'issued': sum(len(index.issued or ()) for index in self._events.values()),
+                'inside': sum(len(index.used) for index in self._events.values())
+            }
@@ -0,0 +1,298 @@
+"""
+Realtime Message Bus for CricVerse
+Publishes live score and notification events once and lets every worker
+process emit them to its own connected clients
+Big Bash League Cricket Platform
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+from threading import RLock
+from typing import Dict, List, Any, Optional, Callable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Pub/sub channel carrying realtime events between workers
+DEFAULT_CHANNEL = 'cricverse:realtime'
+
+
+class LocalMessageBus:
+    """In-process stand-in for Redis pub/sub
+
+    Messages are serialised on publish and decoded by each subscriber, the
+    same as they would be when crossing process boundaries.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._lock = RLock()
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        payload = json.dumps(message, default=str)
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, []))
+        for callback in subscribers:
+            try:
+                callback(json.loads(payload))
+            except Exception as e:
+                logger.error(f"Message bus subscriber failed on {channel}: {e}")
+        return len(subscribers)
+
+    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+    def unsubscribe(self, channel: str, callback: Callable):
+        with self._lock:
+            if callback in self._subscribers.get(channel, []):
+                self._subscribers[channel].remove(callback)
+
+    def close(self):
+        with self._lock:
+            self._subscribers.clear()
+
+
+class RedisMessageBus:
+    """Redis pub/sub message bus; each subscription runs its own listener thread"""
+
+    def __init__(self, redis_client, poll_interval: float = 0.01):
+        self.redis_client = redis_client
+        self.poll_interval = poll_interval
+        self._listeners = []
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> int:
+        return self.redis_client.publish(channel, json.dumps(message, default=str))
+
+    def subscribe(self, channel: str, callback: Callable[[Dict[str, Any]], None]):
+        def handler(raw):
+            try:
+                callback(json.loads(raw['data']))
+            except Exception as e:
+                logger.error(f"Message bus subscriber failed on {channel}: {e}")
+
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{channel: handler})
+        self._listeners.append(pubsub.run_in_thread(sleep_time=self.poll_interval, daemon=True))
+
+    def close(self):
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+
+
+class FanoutWorker:
+    """One worker process's side of the fan-out
+
+    ``publish`` sends an event to the bus once. Every worker, including the
+    one that published it, receives the event and passes it to
+    ``emit_local`` only if it has local clients in the target room. This
+    worker's room membership is tracked here from join, leave and
+    disconnect.
+    """
+
+    def __init__(self, bus, emit_local: Callable, channel: str = DEFAULT_CHANNEL,
+                 worker_id: Optional[str] = None):
+        self.bus = bus
+        self.emit_local = emit_local
+        self.channel = channel
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._rooms: Dict[str, set] = {}
+        self._client_rooms: Dict[str, set] = {}
+        self._lock = RLock()
+        self.stats = {'published': 0, 'delivered': 0, 'skipped': 0, 'errors': 0, 'latency_ms_total': 0.0}
+
+    def start(self):
+        self.bus.subscribe(self.channel, self.handle_message)
+        return self
+
+    def stop(self):
+        if hasattr(self.bus, 'unsubscribe'):
+            self.bus.unsubscribe(self.channel, self.handle_message)
+
+    # Publishing
+    def publish(self, event: str, data: Any, room: Optional[str] = None):
+        self.bus.publish(self.channel, {
+            'event': event,
+            'data': data,
+            'room': room,
+            'origin': self.worker_id,
+            'published_at': time.time()
+        })
+        self.stats['published'] += 1
+
+    def emit(self, event: str, data: Any, room: Optional[str] = None, **kwargs):
+        """socketio.emit-compatible entry point that publishes through the bus"""
+        self.publish(event, data, room or kwargs.get('to'))
+
+    def handle_message(self, message: Dict[str, Any]):
+        room = message.get('room')
+        if room and not self.has_local_clients(room):
+            self.stats['skipped'] += 1
+            return
+        try:
+            if room:
+                self.emit_local(message['event'], message['data'], room=room)
+            else:
+                self.emit_local(message['event'], message['data'])
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Fan-out emit of {message.get('event')} failed: {e}")
+            return
+        self.stats['delivered'] += 1
+        self.stats['latency_ms_total'] += (time.time() - message.get('published_at', time.time())) * 1000
+
+    # Local room membership
+    def join(self, room: str, sid: str):
+        with self._lock:
+            self._rooms.setdefault(room, set()).add(sid)
+            self._client_rooms.setdefault(sid, set()).add(room)
+
+    def leave(self, room: str, sid: str):
+        with self._lock:
+            self._discard(room, sid)
+            rooms = self._client_rooms.get(sid)
+            if rooms is not None:
+                rooms.discard(room)
+                if not rooms:
+                    del self._client_rooms[sid]
+
+    def disconnect(self, sid: str):
+        with self._lock:
+            for room in self._client_rooms.pop(sid, set()):
+                self._discard(room, sid)
+
+    def has_local_clients(self, room: str) -> bool:
+        return bool(self._rooms.get(room))
+
+    def local_clients(self, room: str) -> int:
+        return len(self._rooms.get(room, ()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        delivered = self.stats['delivered']
+        with self._lock:
+            return {
+                'worker_id': self.worker_id,
+                **{key: value for key, value in self.stats.items() if key != 'latency_ms_total'},
+                'avg_delivery_latency_ms': round(self.stats['latency_ms_total'] / delivered, 3) if delivered else 0.0,
+                'local_rooms': len(self._rooms),
+                'local_clients': len(self._client_rooms)
+            }
+
+    def _discard(self, room: str, sid: str):
+        members = self._rooms.get(room)
+        if members is not None:
+            members.discard(sid)
+            if not members:
+                del self._rooms[room]
+
+
+# Active fan-out worker for this process (None in single-process mode)
+fanout_worker: Optional[FanoutWorker] = None
+
+# Per-tier conflation of live updates for this process's clients (None when disabled)
+update_conflator = None
+
+# Per-client wire format selection, applied after conflation (None when not set up)
+wire_router = None
+
+
+def init_fanout(bus, emit_local: Callable, channel: str = DEFAULT_CHANNEL) -> FanoutWorker:
+    """Enable multi-process fan-out for this process"""
+    global fanout_worker
+    if fanout_worker is not None:
+        fanout_worker.stop()
+    fanout_worker = FanoutWorker(bus, emit_local, channel).start()
+    logger.info(f"✅ Realtime fan-out enabled for worker {fanout_worker.worker_id}")
+    return fanout_worker
+
+
+def shutdown_fanout():
+    global fanout_worker
+    if fanout_worker is not None:
+        fanout_worker.stop()
+        fanout_worker = None
+
+
+def init_conflation(conflator):
+    """Route this process's local emits through a LiveUpdateConflator"""
+    global update_conflator
+    if update_conflator is not None:
+        update_conflator.stop()
+    update_conflator = conflator.start()
+    return update_conflator
+
+
+def shutdown_conflation():
+    global update_conflator
+    if update_conflator is not None:
+        update_conflator.stop()
+        update_conflator = None
+
+
+def init_wire_format(router):
+    """Route this process's local emits through a WireFormatRouter"""
+    global wire_router
+    wire_router = router
+    return wire_router
+
+
+def broadcast(socketio, event: str, data: Any, room: Optional[str] = None):
+    """Emit through the message bus in fan-out mode, otherwise directly
+
+    In fan-out mode conflation and wire encoding happen on each worker,
+    after the bus.
+    """
+    if fanout_worker is not None:
+        fanout_worker.publish(event, data, room)
+    elif update_conflator is not None:
+        update_conflator.emit(event, data, room)
+    elif wire_router is not None:
+        wire_router.emit(event, data, room)
+    elif socketio is not None:
+        if room:
+            socketio.emit(event, data, room=room)
+        else:
+            socketio.emit(event, data)
+
+
+def track_join(room: str, sid: str):
+    if fanout_worker is not None:
+        fanout_worker.join(room, sid)
+    if update_conflator is not None:
+        update_conflator.join(room, sid)
+    if wire_router is not None:
+        wire_router.join(room, sid)
+
+
+def track_leave(room: str, sid: str):
+    if fanout_worker is not None:
+        fanout_worker.leave(room, sid)
+    if update_conflator is not None:
+        update_conflator.leave(room, sid)
+    if wire_router is not None:
+        wire_router.leave(room, sid)
+
+
+def track_disconnect(sid: str):
+    if fanout_worker is not None:
+        fanout_worker.disconnect(sid)
+    if update_conflator is not None:
+        update_conflator.disconnect(sid)
+    if wire_router is not None:
+        wire_router.disconnect(sid)
+
+
+def track_tier(sid: str, tier: Optional[str]):
+    """Set the live update tier for a connection"""
+    if update_conflator is not None:
+        update_conflator.set_tier(sid, tier)
+
+
+def track_wire_format(sid: str, wire_format: Optional[str]):
+    """Set the wire format a connection negotiated at connect"""
+    if wire_router is not None:
+        wire_router.set_format(sid, wire_format)
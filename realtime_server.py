@@ -11,6 +11,16 @@ from flask import request, session
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
 from flask_login import current_user
 import redis
+from match_event_log import match_event_store
+from connection_registry import RedisConnectionRegistry, InMemoryConnectionRegistry
+from realtime_bus import (LocalMessageBus, RedisMessageBus, init_fanout, init_conflation, init_wire_format,
+                          broadcast, track_join, track_leave, track_disconnect, track_tier, track_wire_format)
+import realtime_bus
+from update_conflation import (LiveUpdateConflator, conflation_enabled, parse_tier_rates,
+                               tier_for_membership)
+from wire_format import WireFormatRouter
+from match_registry import TimerScheduler
+from occupancy_engine import occupancy_engine
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,10 +29,12 @@ logger = logging.getLogger(__name__)
 # Initialize SocketIO
 socketio = None
 redis_client = None
+connection_registry = InMemoryConnectionRegistry()
+occupancy_scheduler = None
 
 def init_socketio(app):
     """Initialize SocketIO with the Flask app"""
-    global socketio, redis_client
+    global socketio, redis_client, connection_registry, occupancy_scheduler
     
     # Initialize Redis for message passing between server instances
     redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -42,8 +54,15 @@ def init_socketio(app):
     else:
         logger.info("ℹ️ Redis not configured or using default URL, skipping Redis connection")
     
+    # Connection and room indexes (Redis sorted sets, or in-process without Redis)
+    connection_registry = RedisConnectionRegistry(redis_client) if redis_client else InMemoryConnectionRegistry()
+    
+    # Fan-out mode: events are published once to a message bus and every
+    # worker emits them to its own clients, instead of SocketIO's own queue
+    fanout_mode = os.getenv('REALTIME_FANOUT', 'socketio').lower() == 'bus'
+    
     # Initialize SocketIO with Redis adapter if available
-    if redis_client:
+    if redis_client and not fanout_mode:
         socketio = SocketIO(app, 
                           cors_allowed_origins="*",
                           message_queue=redis_url,
@@ -53,6 +72,40 @@ def init_socketio(app):
                           cors_allowed_origins="*",
                           async_mode='threading')
     
+    # Send each client the wire format it negotiated at connect
+    router = init_wire_format(WireFormatRouter(
+        socketio.emit,
+        enter_room=lambda sid, room: socketio.server.enter_room(sid, room),
+        leave_room=lambda sid, room: socketio.server.leave_room(sid, room)
+    ))
+    emit_local = router.emit
+    
+    # Throttle live score events per client tier on this worker
+    if conflation_enabled():
+        conflator = LiveUpdateConflator(
+            router.emit,
+            enter_room=router.enter_room,
+            leave_room=router.leave_room,
+            tier_rates=parse_tier_rates(os.getenv('LIVE_UPDATE_TIER_RATES'))
+        )
+        emit_local = init_conflation(conflator).emit
+    
+    if fanout_mode:
+        bus = RedisMessageBus(redis_client) if redis_client else LocalMessageBus()
+        init_fanout(bus, emit_local)
+    
+    # Live occupancy from gate scans, broadcast at a fixed cadence
+    occupancy_engine.publish = broadcast_stadium_occupancy
+    occupancy_engine.capacity_lookup = lookup_stadium_capacity
+    try:
+        from qr_generator import qr_generator
+        qr_generator.add_verification_listener(occupancy_engine.record_scan)
+    except Exception as e:
+        logger.warning(f"⚠️ Gate scans not connected to live occupancy: {e}")
+    if occupancy_scheduler is None:
+        occupancy_scheduler = TimerScheduler(name='occupancy-timers').start()
+    occupancy_engine.start(occupancy_scheduler, float(os.getenv('OCCUPANCY_BROADCAST_INTERVAL', 2.0)))
+    
     # Register event handlers after SocketIO is initialized
     register_socketio_handlers()
     
@@ -64,7 +117,7 @@ def register_socketio_handlers():
     global socketio
 
     @socketio.on('connect')
-    def handle_connect():
+    def handle_connect(auth=None):
         """Handle client connection"""
         try:
             # Log connection
@@ -74,21 +127,26 @@ def register_socketio_handlers():
             
             logger.info(f"🔌 Client connected: {client_id} from {ip_address}")
             
-            # Store connection info in Redis if available
-            if redis_client:
-                connection_data = {
-                    'connected_at': datetime.utcnow().isoformat(),
-                    'ip_address': ip_address,
-                    'user_agent': user_agent[:500],  # Truncate long user agents
-                    'customer_id': current_user.id if current_user.is_authenticated else None
-                }
-                redis_client.hset(f'ws_connection:{client_id}', mapping=connection_data)
-                redis_client.expire(f'ws_connection:{client_id}', 3600)  # Expire after 1 hour
+            # Register the connection
+            connection_data = {
+                'connected_at': datetime.utcnow().isoformat(),
+                'ip_address': ip_address,
+                'user_agent': user_agent[:500],  # Truncate long user agents
+                'customer_id': current_user.id if current_user.is_authenticated else None
+            }
+            connection_registry.connect(client_id, connection_data)
+            track_tier(client_id, tier_for_membership(
+                getattr(current_user, 'membership_level', None) if current_user.is_authenticated else None))
+            
+            # Clients opt in to compact binary payloads with auth={'wire_format': 'compact'}
+            requested_format = (auth if isinstance(auth, dict) else {}).get('wire_format') or request.args.get('wire_format')
+            track_wire_format(client_id, requested_format)
             
             # Send welcome message
             emit('connection_status', {
                 'status': 'connected',
                 'message': 'Welcome to CricVerse live updates!',
+                'wire_format': realtime_bus.wire_router.get_format(client_id) if realtime_bus.wire_router else 'json',
                 'timestamp': datetime.utcnow().isoformat()
             })
             
@@ -101,10 +159,10 @@ def register_socketio_handlers():
         try:
             client_id = request.sid
             logger.info(f"🔌 Client disconnected: {client_id}")
+            track_disconnect(client_id)
             
-            # Clean up Redis data
-            if redis_client:
-                redis_client.delete(f'ws_connection:{client_id}')
+            # Drop the connection and its room memberships
+            connection_registry.disconnect(client_id)
             
         except Exception as e:
             logger.error(f"❌ Disconnection error: {e}")
@@ -123,11 +181,10 @@ def register_socketio_handlers():
             # Join the match room
             room = f'match_{match_id}'
             join_room(room)
+            track_join(room, client_id)
             
-            # Store subscription in Redis
-            if redis_client:
-                redis_client.sadd(f'match_subscribers:{match_id}', client_id)
-                redis_client.expire(f'match_subscribers:{match_id}', 7200)  # 2 hours
+            # Record the subscription
+            connection_registry.join(client_id, room)
             
             logger.info(f"👥 Client {client_id} joined match {match_id}")
             
@@ -142,6 +199,9 @@ def register_socketio_handlers():
             # Send current match status if available
             send_current_match_status(match_id)
             
+            # Bring the client up to date on ball-by-ball events
+            send_match_catch_up(match_id, data.get('since_seq'))
+            
         except Exception as e:
             logger.error(f"❌ Join match error: {e}")
             emit('error', {'message': 'Failed to join match updates'})
@@ -160,10 +220,10 @@ def register_socketio_handlers():
             # Leave the match room
             room = f'match_{match_id}'
             leave_room(room)
+            track_leave(room, client_id)
             
-            # Remove subscription from Redis
-            if redis_client:
-                redis_client.srem(f'match_subscribers:{match_id}', client_id)
+            # Remove the subscription
+            connection_registry.leave(client_id, room)
             
             logger.info(f"👥 Client {client_id} left match {match_id}")
             
@@ -179,6 +239,21 @@ def register_socketio_handlers():
             logger.error(f"❌ Leave match error: {e}")
             emit('error', {'message': 'Failed to leave match updates'})
 
+    @socketio.on('match_catch_up')
+    def handle_match_catch_up(data):
+        """Send the latest snapshot and missed events for a match"""
+        try:
+            match_id = data.get('match_id')
+            if not match_id:
+                emit('error', {'message': 'Match ID is required'})
+                return
+            
+            send_match_catch_up(match_id, data.get('since_seq'))
+            
+        except Exception as e:
+            logger.error(f"❌ Match catch-up error: {e}")
+            emit('error', {'message': 'Failed to get match events'})
+
     @socketio.on('join_stadium')
     def handle_join_stadium(data):
         """Subscribe to stadium updates (booking notifications, occupancy)"""
@@ -193,11 +268,10 @@ def register_socketio_handlers():
             # Join the stadium room
             room = f'stadium_{stadium_id}'
             join_room(room)
+            track_join(room, client_id)
             
-            # Store subscription in Redis
-            if redis_client:
-                redis_client.sadd(f'stadium_subscribers:{stadium_id}', client_id)
-                redis_client.expire(f'stadium_subscribers:{stadium_id}', 7200)  # 2 hours
+            # Record the subscription
+            connection_registry.join(client_id, room)
             
             logger.info(f"🏟️ Client {client_id} joined stadium {stadium_id}")
             
@@ -226,21 +300,19 @@ def broadcast_match_update(match_id, update_type, update_data):
         
         room = f'match_{match_id}'
         
+        # Record in the match event log first so the sequence number goes out with the update
+        event = match_event_store.append(match_id, update_type, update_data)
+        
         update_message = {
             'match_id': match_id,
+            'seq': event['seq'],
             'type': update_type,
             'data': update_data,
             'timestamp': datetime.utcnow().isoformat()
         }
         
         # Broadcast to room
-        socketio.emit('match_update', update_message, room=room)
-        
-        # Store in Redis for persistence
-        if redis_client:
-            redis_client.lpush(f'match_updates:{match_id}', json.dumps(update_message))
-            redis_client.ltrim(f'match_updates:{match_id}', 0, 99)  # Keep last 100 updates
-            redis_client.expire(f'match_updates:{match_id}', 86400)  # 24 hours
+        broadcast(socketio, 'match_update', update_message, room)
         
         logger.info(f"📡 Broadcasted match update for match {match_id}: {update_type}")
         
@@ -265,7 +337,7 @@ def broadcast_booking_notification(stadium_id, booking_data):
         }
         
         # Broadcast to room
-        socketio.emit('booking_notification', notification_message, room=room)
+        broadcast(socketio, 'booking_notification', notification_message, room)
         
         logger.info(f"📡 Broadcasted booking notification for stadium {stadium_id}")
         
@@ -290,7 +362,7 @@ def broadcast_stadium_occupancy(stadium_id, occupancy_data):
         }
         
         # Broadcast to room
-        socketio.emit('occupancy_update', occupancy_message, room=room)
+        broadcast(socketio, 'occupancy_update', occupancy_message, room)
         
         # Store in Redis
         if redis_client:
@@ -343,10 +415,37 @@ def send_current_match_status(match_id):
         emit('error', {'message': 'Failed to get current match status'})
 
 
+def send_match_catch_up(match_id, since_seq=None):
+    """Send snapshot plus event tail so a mid-innings joiner reaches the current state"""
+    try:
+        event_log = match_event_store.get(match_id, create=False)
+        if not event_log or not len(event_log):
+            return
+        
+        since_seq = int(since_seq) if since_seq is not None else None
+        emit('match_catch_up', event_log.catch_up(since_seq))
+        
+    except Exception as e:
+        logger.error(f"❌ Send match catch-up error: {e}")
+
+
+def lookup_stadium_capacity(stadium_id):
+    """Stadium capacity for live occupancy percentages"""
+    from app import Stadium
+    stadium = Stadium.query.get(stadium_id)
+    return stadium.capacity if stadium else None
+
+
 def send_stadium_occupancy(stadium_id):
     """Send current stadium occupancy to client"""
     try:
-        # Get occupancy from Redis first
+        # Live counts from gate scans on this worker
+        occupancy_data = occupancy_engine.snapshot(stadium_id)
+        if occupancy_data:
+            emit('current_occupancy', occupancy_data)
+            return
+        
+        # Then the last broadcast occupancy in Redis
         if redis_client:
             occupancy_data = redis_client.get(f'stadium_occupancy:{stadium_id}')
             if occupancy_data:
@@ -400,12 +499,7 @@ def send_stadium_occupancy(stadium_id):
 def get_active_connections():
     """Get count of active WebSocket connections"""
     try:
-        if not redis_client:
-            return 0
-        
-        # Get all connection keys
-        connection_keys = redis_client.keys('ws_connection:*')
-        return len(connection_keys)
+        return connection_registry.count_connections()
         
     except Exception as e:
         logger.error(f"❌ Get active connections error: {e}")
@@ -472,20 +566,13 @@ def notify_new_booking(stadium_id, booking_info):
 def cleanup_expired_connections():
     """Clean up expired WebSocket connections (run periodically)"""
     try:
-        if not redis_client:
-            return
-        
         # This would be called by a background task (e.g., Celery)
-        connection_keys = redis_client.keys('ws_connection:*')
-        current_time = datetime.utcnow()
-        
-        for key in connection_keys:
-            connection_data = redis_client.hgetall(key)
-            if connection_data:
-                connected_at = datetime.fromisoformat(connection_data.get('connected_at', ''))
-                if current_time - connected_at > timedelta(hours=2):
-                    redis_client.delete(key)
-                    logger.info(f"🧹 Cleaned up expired connection: {key}")
+        expired = connection_registry.expire_connections(timedelta(hours=2).total_seconds())
+        if expired:
+            logger.info(f"🧹 Cleaned up {expired} expired connections")
+        evicted = match_event_store.evict_idle()
+        if evicted:
+            logger.info(f"🧹 Closed event logs of {len(evicted)} idle matches")
     
     except Exception as e:
         logger.error(f"❌ Cleanup connections error: {e}")
@@ -497,20 +584,19 @@ def get_realtime_stats():
     try:
         stats = {
             'active_connections': get_active_connections(),
+            'match_event_logs': match_event_store.get_stats(),
             'timestamp': datetime.utcnow().isoformat()
         }
         
-        if redis_client:
-            # Get active matches
-            match_keys = redis_client.keys('match_subscribers:*')
-            stats['active_matches'] = len(match_keys)
-            
-            # Get active stadiums
-            stadium_keys = redis_client.keys('stadium_subscribers:*')
-            stats['active_stadiums'] = len(stadium_keys)
-        else:
-            stats['active_matches'] = 0
-            stats['active_stadiums'] = 0
+        # Rooms with at least one subscriber
+        stats['active_matches'] = connection_registry.count_rooms('match')
+        stats['active_stadiums'] = connection_registry.count_rooms('stadium')
+        
+        if realtime_bus.update_conflator is not None:
+            stats['live_update_conflation'] = realtime_bus.update_conflator.get_stats()
+        if realtime_bus.wire_router is not None:
+            stats['wire_formats'] = realtime_bus.wire_router.get_stats()
+        stats['live_occupancy'] = occupancy_engine.get_stats()
         
         return stats
         
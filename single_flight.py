@@ -0,0 +1,152 @@
+"""
+Single-flight request coalescing for CricVerse
+Concurrent lookups for the same key share one in-flight fetch
+Big Bash League Cricket Platform
+"""
+
+import copy
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Optional, Callable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised when a caller gives up waiting for a shared fetch"""
+
+    def __init__(self, key: str, timeout: float):
+        super().__init__(f"Timed out after {timeout}s waiting for '{key}'")
+        self.key = key
+        self.timeout = timeout
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into a single fetch
+
+    The first caller for a key (the leader) runs the fetch; callers that
+    arrive while it is in flight wait on the leader's result instead of
+    issuing their own. Nothing is cached once the fetch completes, so the
+    next caller after that starts a fresh fetch.
+
+    Flask handlers run each ``asyncio.run`` on its own event loop, so calls
+    are shared through a thread-safe ``concurrent.futures.Future`` that both
+    sync and async waiters can block on.
+
+    Timeouts are resolved per key: an explicit ``timeout`` argument, then an
+    exact key in ``key_timeouts``, then the key's namespace (the part before
+    the first ':'), then ``default_timeout``.
+
+    With ``copy_result`` set, every caller, the leader included, gets its
+    own copy of the shared result, so one caller mutating it cannot change
+    what the others see.
+    """
+
+    def __init__(self, name: str = 'single_flight', default_timeout: float = 10.0,
+                 key_timeouts: Optional[Dict[str, float]] = None,
+                 copy_result: Optional[Callable[[Any], Any]] = None):
+        self.name = name
+        self.copy_result = copy_result
+        self.default_timeout = default_timeout
+        self.key_timeouts = dict(key_timeouts or {})
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'shared': 0, 'timeouts': 0, 'errors': 0}
+
+    def set_timeout(self, key: str, timeout: float):
+        self.key_timeouts[key] = timeout
+
+    def timeout_for(self, key: str, timeout: Optional[float] = None) -> float:
+        if timeout is not None:
+            return timeout
+        if key in self.key_timeouts:
+            return self.key_timeouts[key]
+        return self.key_timeouts.get(key.split(':', 1)[0], self.default_timeout)
+
+    def do(self, key: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run ``fn(*args, **kwargs)`` once for all concurrent callers of ``key``"""
+        future, leader = self._join(key)
+        if not leader:
+            return self._own(self._wait(key, future, timeout))
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return self._own(result)
+
+    async def do_async(self, key: str, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Await ``fn(*args, **kwargs)`` once for all concurrent callers of ``key``"""
+        future, leader = self._join(key)
+        wait_for = self.timeout_for(key, timeout)
+        if not leader:
+            try:
+                return self._own(await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), wait_for))
+            except asyncio.TimeoutError:
+                self.stats['timeouts'] += 1
+                raise SingleFlightTimeout(key, wait_for)
+
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), wait_for)
+        except asyncio.TimeoutError:
+            error = SingleFlightTimeout(key, wait_for)
+            self.stats['timeouts'] += 1
+            self._finish(key, future, error=error)
+            raise error
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return self._own(result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'name': self.name, **self.stats, 'in_flight': self.in_flight()}
+
+    # Internal helpers
+    def _own(self, result):
+        return self.copy_result(result) if self.copy_result is not None else result
+
+    def _join(self, key: str):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats['shared'] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.stats['leaders'] += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result=None, error: Optional[BaseException] = None):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            self.stats['errors'] += 1
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _wait(self, key: str, future: Future, timeout: Optional[float]):
+        wait_for = self.timeout_for(key, timeout)
+        try:
+            return future.result(timeout=wait_for)
+        except FutureTimeoutError:
+            self.stats['timeouts'] += 1
+            raise SingleFlightTimeout(key, wait_for)
+
+
+# Shared coalescer for live BBL data (Supabase lookups and live match status)
+bbl_single_flight = SingleFlight('bbl', default_timeout=10.0, key_timeouts={
+    'bbl:live_scores': 5.0,
+    'live_match': 3.0,
+}, copy_result=copy.deepcopy)
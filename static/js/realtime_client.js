@@ -3,8 +3,90 @@
  * Handles live match updates, booking notifications, and stadium occupancy tracking
  */
 
+// Compact binary layouts; must match COMPACT_SCHEMAS in wire_format.py
+const COMPACT_SCHEMAS = {
+    1: ['live_score_update', [
+        ['match_id', 'u32'], ['type', 'str'], ['timestamp', 'ts'],
+        ['team1_score', 'u16'], ['team2_score', 'u16'], ['team1_wickets', 'u8'], ['team2_wickets', 'u8'],
+        ['current_over', 'str'], ['current_ball', 'u8'], ['batting_team', 'str'], ['bowling_team', 'str'],
+        ['last_ball', 'str'], ['commentary', 'text'], ['_extra', 'json']
+    ]],
+    2: ['match_update', [
+        ['match_id', 'u32'], ['seq', 'u32'], ['type', 'str'], ['timestamp', 'ts'],
+        ['data.home_score', 'u16'], ['data.away_score', 'u16'], ['data.home_wickets', 'u8'],
+        ['data.away_wickets', 'u8'], ['data.current_over', 'str'], ['data.team', 'str'],
+        ['data.batsman', 'str'], ['data.bowler', 'str'], ['data.wicket_type', 'str'],
+        ['data.current_score', 'json'], ['data.status', 'str'], ['data.winner', 'str'], ['_extra', 'json']
+    ]],
+    3: ['occupancy_update', [
+        ['stadium_id', 'u32'], ['type', 'str'], ['timestamp', 'ts'],
+        ['data.stadium_id', 'u32'], ['data.total_seats', 'u32'], ['data.booked_seats', 'u32'],
+        ['data.available_seats', 'u32'], ['data.occupancy_percentage', 'f32'], ['data.events_today', 'u16'],
+        ['data.timestamp', 'ts'], ['_extra', 'json']
+    ]],
+    4: ['seat_availability', [
+        ['event_id', 'u32'], ['available_seats', 'u32'], ['timestamp', 'ts'], ['_extra', 'json']
+    ]]
+};
+
+function setPath(target, path, value) {
+    const keys = path.split('.');
+    keys.slice(0, -1).forEach((key) => {
+        target[key] = target[key] || {};
+        target = target[key];
+    });
+    target[keys[keys.length - 1]] = value;
+}
+
+const FIXED_KINDS = new Set(['u8', 'u16', 'u32', 'f32', 'ts']);
+
+// A frame holds every present fixed-width field first, then the variable-length
+// fields, each group in schema order, with the extras field last (see wire_format.py)
+function decodeCompact(buffer) {
+    const view = new DataView(buffer);
+    const decoder = new TextDecoder();
+    const [, fields] = COMPACT_SCHEMAS[view.getUint8(0)];
+    const present = view.getUint32(2, true);
+    const data = {};
+    let offset = 6;
+    
+    const readBytes = (length) => {
+        const text = decoder.decode(new Uint8Array(buffer, offset, length));
+        offset += length;
+        return text;
+    };
+    
+    const slots = fields.map(([path, kind], index) => [path, kind, index])
+        .filter(([, , index]) => present & (1 << index));
+    const fixed = slots.filter(([, kind]) => FIXED_KINDS.has(kind));
+    const variable = slots.filter(([path, kind]) => !FIXED_KINDS.has(kind) && path !== '_extra');
+    const extras = slots.filter(([path]) => path === '_extra');
+    
+    fixed.concat(variable, extras).forEach(([path, kind]) => {
+        let value;
+        switch (kind) {
+            case 'u8': value = view.getUint8(offset); offset += 1; break;
+            case 'u16': value = view.getUint16(offset, true); offset += 2; break;
+            case 'u32': value = view.getUint32(offset, true); offset += 4; break;
+            case 'f32': value = view.getFloat32(offset, true); offset += 4; break;
+            case 'ts': value = new Date(view.getFloat64(offset, true) * 1000).toISOString(); offset += 8; break;
+            case 'str': { const length = view.getUint8(offset); offset += 1; value = readBytes(length); break; }
+            case 'text': { const length = view.getUint16(offset, true); offset += 2; value = readBytes(length); break; }
+            case 'json': { const length = view.getUint16(offset, true); offset += 2; value = JSON.parse(readBytes(length)); break; }
+        }
+        if (path === '_extra') {
+            Object.keys(value).forEach((extraPath) => setPath(data, extraPath, value[extraPath]));
+        } else {
+            setPath(data, path, value);
+        }
+    });
+    return data;
+}
+
 class CricVerseRealtime {
-    constructor() {
+    constructor(options = {}) {
+        // 'compact' asks the server for binary payloads on high-volume streams
+        this.wireFormat = options.wireFormat || window.CRICVERSE_WIRE_FORMAT || 'json';
         this.socket = null;
         this.isConnected = false;
         this.subscribers = {
@@ -12,6 +94,7 @@ class CricVerseRealtime {
             stadiums: new Set()
         };
         this.eventHandlers = {};
+        this.matchStates = {};
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
         this.reconnectDelay = 1000;
@@ -39,7 +122,8 @@ class CricVerseRealtime {
         this.socket = io({
             transports: ['websocket', 'polling'],
             timeout: 20000,
-            forceNew: true
+            forceNew: true,
+            auth: { wire_format: this.wireFormat }
         });
         
         this.setupEventHandlers();
@@ -72,12 +156,23 @@ class CricVerseRealtime {
         });
         
         // Match events
-        this.socket.on('match_update', (data) => {
+        this.socket.on('match_update', (payload) => {
+            const data = this.decodePayload(payload);
             console.log('Match update received:', data);
             this.handleMatchUpdate(data);
             this.trigger('match_update', data);
         });
         
+        // Delta-encoded live scores: apply in sequence, resync on gaps
+        this.socket.on('match_delta', (data) => {
+            this.handleMatchDelta(data);
+        });
+        
+        this.socket.on('match_snapshot', (data) => {
+            console.log('Match snapshot:', data);
+            this.handleMatchSnapshot(data);
+        });
+        
         this.socket.on('current_match_status', (data) => {
             console.log('Current match status:', data);
             this.handleCurrentMatchStatus(data);
@@ -91,7 +186,8 @@ class CricVerseRealtime {
             this.trigger('booking_notification', data);
         });
         
-        this.socket.on('occupancy_update', (data) => {
+        this.socket.on('occupancy_update', (payload) => {
+            const data = this.decodePayload(payload);
             console.log('Occupancy update:', data);
             this.handleOccupancyUpdate(data);
             this.trigger('occupancy_update', data);
@@ -103,6 +199,14 @@ class CricVerseRealtime {
             this.trigger('current_occupancy', data);
         });
         
+        this.socket.on('live_score_update', (payload) => {
+            this.trigger('live_score_update', this.decodePayload(payload));
+        });
+        
+        this.socket.on('seat_availability', (payload) => {
+            this.trigger('seat_availability', this.decodePayload(payload));
+        });
+        
         // Subscription confirmations
         this.socket.on('subscription_status', (data) => {
             console.log('Subscription status:', data);
@@ -214,6 +318,51 @@ class CricVerseRealtime {
         }
     }
     
+    decodePayload(payload) {
+        // Compact frames arrive as base64 text (or raw bytes); JSON clients get objects
+        if (typeof payload === 'string') {
+            return decodeCompact(Uint8Array.from(atob(payload), (c) => c.charCodeAt(0)).buffer);
+        }
+        return payload instanceof ArrayBuffer ? decodeCompact(payload) : payload;
+    }
+    
+    handleMatchDelta(data) {
+        const { match_id, seq, changes } = data;
+        const current = this.matchStates[match_id];
+        // Throttled clients get merged deltas that apply on top of base_seq
+        const baseSeq = data.base_seq !== undefined ? data.base_seq : seq - 1;
+        
+        if (current && seq <= current.seq) {
+            return; // Already applied
+        }
+        if (!current || current.seq < baseSeq) {
+            console.log('Missed match delta for ' + match_id + ', requesting snapshot');
+            this.socket.emit('request_match_snapshot', { match_id: match_id });
+            return;
+        }
+        
+        Object.keys(changes).forEach((path) => {
+            const keys = path.split('.');
+            let target = current.state;
+            keys.slice(0, -1).forEach((key) => {
+                target[key] = target[key] || {};
+                target = target[key];
+            });
+            target[keys[keys.length - 1]] = changes[path];
+        });
+        current.seq = seq;
+        
+        this.updateMatchScoreboard(match_id, current.state);
+        this.trigger('match_delta', data);
+        this.trigger('match_state', current.state);
+    }
+    
+    handleMatchSnapshot(data) {
+        this.matchStates[data.match_id] = { seq: data.seq, state: data.state };
+        this.updateMatchScoreboard(data.match_id, data.state);
+        this.trigger('match_state', data.state);
+    }
+    
     handleCurrentMatchStatus(data) {
         this.updateMatchScoreboard(data.match_id, data);
     }
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import httpx
 from supabase import create_client, Client
+from single_flight import bbl_single_flight
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +46,10 @@ class BBLDataService:
             raise ConnectionError(f"Supabase connection test failed: {e}")
     
     async def get_live_scores(self) -> List[Dict[str, Any]]:
+        """Get live BBL match scores from Supabase"""
+        return await bbl_single_flight.do_async('bbl:live_scores', self._fetch_live_scores)
+    
+    async def _fetch_live_scores(self) -> List[Dict[str, Any]]:
         """Get live BBL match scores from Supabase"""
         try:
             # Query live matches from Supabase
@@ -86,6 +91,10 @@ class BBLDataService:
             raise
     
     async def get_standings(self) -> List[Dict[str, Any]]:
+        """Get BBL team standings from Supabase"""
+        return await bbl_single_flight.do_async('bbl:standings', self._fetch_standings)
+    
+    async def _fetch_standings(self) -> List[Dict[str, Any]]:
         """Get BBL team standings from Supabase"""
         try:
             # Fallback to team table since team_standings doesn't exist
@@ -101,6 +110,10 @@ class BBLDataService:
             raise
     
     async def get_teams(self) -> List[Dict[str, Any]]:
+        """Get all BBL teams from Supabase"""
+        return await bbl_single_flight.do_async('bbl:teams', self._fetch_teams)
+    
+    async def _fetch_teams(self) -> List[Dict[str, Any]]:
         """Get all BBL teams from Supabase"""
         try:
             response = self.supabase.table('team').select(
@@ -115,6 +128,10 @@ class BBLDataService:
             raise
     
     async def get_top_performers(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get top performers (runs and wickets) from Supabase"""
+        return await bbl_single_flight.do_async('bbl:top_performers', self._fetch_top_performers)
+    
+    async def _fetch_top_performers(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get top performers (runs and wickets) from Supabase"""
         try:
             # Fallback to player table since player_stats doesn't exist
@@ -141,6 +158,9 @@ class BBLDataService:
     
     async def _get_team_name(self, team_id: int) -> str:
         """Get team name by ID from Supabase"""
+        return await bbl_single_flight.do_async(f'bbl:team_name:{team_id}', self._fetch_team_name, team_id)
+    
+    async def _fetch_team_name(self, team_id: int) -> str:
         try:
             response = self.supabase.table('team').select('team_name').eq('id', team_id).execute()
             if response.data:
@@ -0,0 +1,213 @@
+"""
+Task Telemetry for CricVerse
+Queue wait, run time and failures per Celery task, collected in each worker
+process from task signals and shared through the Redis result backend
+Big Bash League Cricket Platform
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Any, Iterable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Message header stamped when a task is published, for the queue wait
+PUBLISHED_AT_HEADER = 'published_at'
+# Redis hash holding the latest snapshot of every worker process
+TELEMETRY_KEY = 'cricverse:task_telemetry'
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def queue_wait_ms(request, now: Optional[float] = None) -> Optional[float]:
+    """Milliseconds a task waited between publish (or its ETA) and starting; None if not stamped"""
+    published_at = request.get(PUBLISHED_AT_HEADER) if request is not None else None
+    if published_at is None:
+        return None
+    now = time.time() if now is None else now
+    ready_at = float(published_at)
+    eta = request.get('eta')
+    if eta:
+        try:
+            ready_at = max(ready_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    return max(0.0, (now - ready_at) * 1000)
+
+
+def outcome_state(state: Optional[str], retval: Any) -> Optional[str]:
+    """The task's state, or FAILURE for a task that caught its error and returned ``{'success': False}``"""
+    if state == 'SUCCESS' and isinstance(retval, dict) and retval.get('success') is False:
+        return 'FAILURE'
+    return state
+
+
+class TaskMetrics:
+    """Queue wait, run time, failures and retries per task name, recorded from Celery's task signals
+
+    Counters are totals since the process started (or ``reset``); the
+    percentiles come from the last ``samples`` runs of each task.
+    """
+
+    def __init__(self, samples: int = 500):
+        self.samples = samples
+        self._started: Dict[str, float] = {}
+        self._waits: Dict[str, float] = {}
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+
+    def started(self, task_id: str, queue_wait_ms: Optional[float] = None):
+        self._started[task_id] = time.perf_counter()
+        if queue_wait_ms is not None:
+            self._waits[task_id] = queue_wait_ms
+
+    def finished(self, task_id: str, task_name: str, state: Optional[str]):
+        started = self._started.pop(task_id, None)
+        wait_ms = self._waits.pop(task_id, None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._tasks.get(task_name)
+            if stats is None:
+                stats = self._tasks[task_name] = {'count': 0, 'failures': 0, 'retries': 0, 'total_ms': 0.0,
+                                                  'max_ms': 0.0, 'recent_ms': deque(maxlen=self.samples),
+                                                  'waits': 0, 'wait_total_ms': 0.0, 'wait_max_ms': 0.0,
+                                                  'recent_wait_ms': deque(maxlen=self.samples)}
+            stats['count'] += 1
+            if state == 'RETRY':
+                stats['retries'] += 1
+            elif state != 'SUCCESS':
+                stats['failures'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['recent_ms'].append(elapsed_ms)
+            if wait_ms is not None:
+                stats['waits'] += 1
+                stats['wait_total_ms'] += wait_ms
+                stats['wait_max_ms'] = max(stats['wait_max_ms'], wait_ms)
+                stats['recent_wait_ms'].append(wait_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Raw counters and recent samples, JSON-serialisable and mergeable across processes"""
+        with self._lock:
+            return {task_name: {**stats, 'recent_ms': list(stats['recent_ms']),
+                                'recent_wait_ms': list(stats['recent_wait_ms'])}
+                    for task_name, stats in self._tasks.items()}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return summarize(self.snapshot())
+
+    def reset(self):
+        with self._lock:
+            self._tasks.clear()
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Combine the snapshots of several processes: counters add up, samples are pooled"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for task_name, stats in snapshot.items():
+            total = merged.get(task_name)
+            if total is None:
+                merged[task_name] = {**stats, 'recent_ms': list(stats['recent_ms']),
+                                     'recent_wait_ms': list(stats['recent_wait_ms'])}
+                continue
+            for key in ('count', 'failures', 'retries', 'total_ms', 'waits', 'wait_total_ms'):
+                total[key] += stats[key]
+            for key in ('max_ms', 'wait_max_ms'):
+                total[key] = max(total[key], stats[key])
+            total['recent_ms'].extend(stats['recent_ms'])
+            total['recent_wait_ms'].extend(stats['recent_wait_ms'])
+    return merged
+
+
+def summarize(snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per task: counts, failure rate, and mean/p50/p95/max of run time and queue wait in ms"""
+    report = {}
+    for task_name, stats in snapshot.items():
+        if not stats['count']:
+            continue
+        recent = sorted(stats['recent_ms'])
+        report[task_name] = {
+            'count': stats['count'],
+            'failures': stats['failures'],
+            'retries': stats['retries'],
+            'failure_rate': round(stats['failures'] / stats['count'], 4),
+            'mean_ms': round(stats['total_ms'] / stats['count'], 3),
+            'p50_ms': round(percentile(recent, 0.5), 3),
+            'p95_ms': round(percentile(recent, 0.95), 3),
+            'max_ms': round(stats['max_ms'], 3)
+        }
+        if stats['waits']:
+            waits = sorted(stats['recent_wait_ms'])
+            report[task_name]['queue_wait'] = {
+                'mean_ms': round(stats['wait_total_ms'] / stats['waits'], 3),
+                'p50_ms': round(percentile(waits, 0.5), 3),
+                'p95_ms': round(percentile(waits, 0.95), 3),
+                'max_ms': round(stats['wait_max_ms'], 3)
+            }
+    return report
+
+
+class TelemetryPublisher:
+    """Shares a worker process's metrics through a Redis hash, one field per process
+
+    Celery's prefork pool runs tasks, and so the task signals, in child
+    processes the web app cannot see into. Each child writes its snapshot
+    at most every ``interval`` seconds; ``collect`` reads every process's
+    snapshot that is fresher than ``ttl`` seconds.
+    """
+
+    def __init__(self, metrics: TaskMetrics, interval: float = 15.0, ttl: float = 300.0, clock=time.time):
+        self.metrics = metrics
+        self.interval = interval
+        self.ttl = ttl
+        self.clock = clock
+        self._published_at: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def field(self) -> str:
+        # Read per call: prefork children inherit this object from the parent
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def maybe_publish(self, client) -> bool:
+        """Write this process's snapshot if the last one is ``interval`` seconds old"""
+        now = self.clock()
+        with self._lock:
+            if self._published_at is not None and now - self._published_at < self.interval:
+                return False
+            self._published_at = now
+        try:
+            client.hset(TELEMETRY_KEY, self.field,
+                        json.dumps({'updated_at': now, 'tasks': self.metrics.snapshot()}))
+            client.expire(TELEMETRY_KEY, int(self.ttl))
+            return True
+        except Exception as e:
+            logger.warning(f"Could not publish task telemetry: {e}")
+            return False
+
+    def collect(self, client) -> Dict[str, Dict[str, Any]]:
+        """Fresh snapshots by process, skipping (and deleting) ones that stopped updating"""
+        now = self.clock()
+        snapshots, stale = {}, []
+        for field, value in client.hgetall(TELEMETRY_KEY).items():
+            field = field.decode() if isinstance(field, bytes) else field
+            snapshot = json.loads(value)
+            if now - snapshot['updated_at'] > self.ttl:
+                stale.append(field)
+            else:
+                snapshots[field] = snapshot['tasks']
+        if stale:
+            client.hdel(TELEMETRY_KEY, *stale)
+        return snapshots
@@ -67,6 +67,22 @@ class TestBookingService(unittest.TestCase):
         self.assertIn('ticket_id', result)
         self.assertEqual(result['message'], 'Seat booked successfully')
 
+    def test_celery_workflow_keeps_the_booking_sms(self):
+        """Test bookings handed to the Celery workflow still text the customer."""
+        seat = MagicMock(price=50.0, section='A')
+        self.mock_session.query.return_value.with_for_update.return_value.get.return_value = seat
+        self.mock_session.query.return_value.filter.return_value.with_for_update.return_value.first.return_value = None
+        self.mock_session.query.return_value.get.return_value = MagicMock(phone='+61400000000')
+
+        with patch.dict(os.environ, {'POST_BOOKING_WORKFLOW': 'celery'}), \
+                patch('booking_workflow.start_post_booking_workflow') as workflow, \
+                patch('booking_workflow.send_booking_sms') as sms:
+            result = book_seat(1, 1, 1)
+
+        self.assertTrue(result['success'])
+        workflow.assert_called_once()
+        self.assertEqual(sms.delay.call_args[0][0], '+61400000000')
+
     def test_book_seat_seat_not_found(self):
         """Test booking when seat is not found."""
         # Mock the seat query to return None
@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+import sys
+import os
+from unittest.mock import patch, MagicMock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from celery_tasks import celery_app, task_metrics, TASK_QUEUES
+import booking_workflow
+from booking_workflow import post_booking_workflow
+from qr_generator import qr_generator
+
+
+def eticket(booking_id):
+    return {
+        'event': {'event_id': 3, 'name': 'Sixers vs Scorchers', 'date': 'Monday, January 05, 2026',
+                  'time': '07:15 PM', 'venue': 'SCG', 'location': 'Sydney'},
+        'booking': {'booking_id': booking_id, 'booking_date': 'January 01, 2026 at 10:00 AM',
+                    'customer_name': 'Fan', 'customer_email': f"fan{booking_id}@example.com",
+                    'tickets': [{'ticket_type': 'Adult', 'section': 'A', 'row': '1', 'seat': '2', 'price': 45.0}]},
+        'amount': 45.0,
+        'tickets': [{'ticket_id': booking_id * 10, 'event_id': 3, 'customer_id': 7, 'seat_id': 2}]
+    }
+
+
+class TestPostBookingWorkflow(unittest.TestCase):
+    """Test cases for the post-booking Celery canvas."""
+
+    def setUp(self):
+        celery_app.conf.update(task_always_eager=True, task_eager_propagates=True)
+        self.addCleanup(celery_app.conf.update, task_always_eager=False, task_eager_propagates=False)
+        directory = tempfile.mkdtemp()
+        self.emails = []
+        patch('booking_workflow._load_eticket_data',
+              side_effect=lambda ids: {i: eticket(i) for i in ids if i != 404}).start()
+        patch('booking_workflow._eticket_path', side_effect=lambda i: os.path.join(directory, f"{i}.pdf")).start()
+        patch('booking_workflow._send_eticket_email',
+              side_effect=lambda *args: self.emails.append(args) or MagicMock(success=True)).start()
+        patch.object(qr_generator, '_get_qr_directory', return_value=directory).start()
+        patch.object(qr_generator, '_bulk_update_ticket_paths', side_effect=len).start()
+        self.addCleanup(patch.stopall)
+        task_metrics.reset()
+
+    def test_chained_batches_fan_in_to_one_summary(self):
+        """Test each batch issues QR codes, prints them on the e-tickets and emails before the chord combines them."""
+        summary = post_booking_workflow([1, 2, 3, 404, 5], batch_size=2).apply_async().get()
+        self.assertEqual(summary['batches'], 3)
+        self.assertEqual((summary['bookings'], summary['rendered'], summary['emailed']), (5, 4, 4))
+        self.assertEqual(summary['failed'], {'404': 'Booking not found'})
+
+        booking_id, sent_eticket, pdf_path, qr_codes = self.emails[0]
+        self.assertTrue(os.path.exists(pdf_path))
+        self.assertEqual(len(qr_codes), 1)
+        self.assertTrue(qr_codes[0].startswith('/qr/CV'))
+        printed = sent_eticket['booking']['tickets'][0]['qr_payload']
+        self.assertEqual(qr_codes[0], f"/qr/{printed}.png")
+        self.assertEqual(qr_generator.token_signer.verify(printed).ticket_id, booking_id * 10)
+
+        metrics = task_metrics.get_stats()
+        self.assertEqual(metrics['booking_workflow.render_booking_etickets']['count'], 3)
+        self.assertEqual(metrics['booking_workflow.summarize_post_booking']['count'], 1)
+        self.assertGreater(metrics['booking_workflow.render_booking_etickets']['mean_ms'], 0)
+
+    def test_tasks_route_to_priority_queues(self):
+        """Test payment work is routed ahead of ticket, notification and marketing work."""
+        def route(name):
+            options = celery_app.amqp.router.route({}, name)
+            return options['queue'].name, options.get('priority')
+
+        self.assertEqual(route('celery_tasks.process_payment_notification'), ('payments', TASK_QUEUES['payments']))
+        self.assertEqual(route('booking_workflow.render_booking_qr_codes')[0], 'tickets')
+        self.assertEqual(route('booking_workflow.send_booking_eticket_emails')[0], 'notifications')
+        self.assertEqual(route('marketing.send_newsletter')[0], 'marketing')
+        self.assertEqual(route('celery_tasks.health_check')[0], 'default')
+        self.assertLess(TASK_QUEUES['payments'], TASK_QUEUES['notifications'])
+        self.assertLess(TASK_QUEUES['notifications'], TASK_QUEUES['marketing'])
+
+
+    def test_only_rerunnable_tasks_ack_late(self):
+        """Test redelivery after a lost worker is limited to tasks that are safe to run twice."""
+        celery_app.loader.import_default_modules()
+        self.assertFalse(celery_app.conf.task_acks_late)
+        for name in ('booking_workflow.render_booking_qr_codes', 'booking_workflow.render_booking_etickets',
+                     'booking_workflow.summarize_post_booking',
+                     'credential_pregeneration.pregenerate_event_credentials'):
+            self.assertTrue(celery_app.tasks[name].acks_late, name)
+        for name in ('booking_workflow.send_booking_eticket_emails', 'booking_workflow.send_booking_sms',
+                     'booking_workflow.send_booking_confirmations_batch', 'celery_tasks.send_booking_confirmation',
+                     'celery_tasks.process_payment_notification', 'celery_tasks.process_refund'):
+            self.assertFalse(celery_app.tasks[name].acks_late, name)
+
+if __name__ == '__main__':
+    unittest.main()
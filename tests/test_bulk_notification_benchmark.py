@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bulk_notification_benchmark import sample_messages, run_benchmark
+
+
+def test_sample_messages_per_channel():
+    """Test generated recipients match the channel."""
+    assert sample_messages(3, 'email')[0].to == 'fan1@example.com'
+    assert sample_messages(3, 'sms')[2].to.startswith('+61')
+
+
+def test_benchmark_compares_original_and_bulk_senders():
+    """Test a small run reports the original and bulk senders for both channels."""
+    report = run_benchmark(emails=30, sms=6, latency=0, concurrency=2, sms_rate=1000)
+    assert report['email_original']['requests'] == 6
+    assert report['email_original']['connections'] == 6
+    assert report['email_bulk']['requests'] == 1
+    assert report['sms_bulk']['messages'] == 6
+    assert report['sms_bulk']['connections'] <= 2
+    assert report['email_speedup'] > 0
@@ -0,0 +1,216 @@
+import unittest
+import random
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bulk_notifications import (BulkMessage, BulkContent, BulkNotificationSender, BatchResult, TokenBucket,
+                                FakeProviderServer, SendGridBulkProvider, TwilioBulkProvider,
+                                SENT, RETRYING, FAILED, DELIVERED)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ScriptedProvider:
+    """Returns queued results in order, then SENT"""
+
+    channel = 'email'
+
+    def __init__(self, results, max_batch=2):
+        self.results = list(results)
+        self.max_batch = max_batch
+        self.batches = []
+
+    def send_batch(self, messages, content):
+        self.batches.append([message.key for message in messages])
+        return self.results.pop(0) if self.results else BatchResult(SENT, provider_id='ok')
+
+    def valid_recipient(self, to):
+        return '@' in to
+
+
+def messages(count):
+    return [BulkMessage(str(i), f"fan{i}@example.com", {'%name%': f"Fan {i}"}) for i in range(count)]
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases for the send-rate token bucket."""
+
+    def test_waits_for_tokens_after_burst(self):
+        """Test the burst is free and later tokens arrive at the configured rate."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertAlmostEqual(bucket.acquire(), 0.1)
+        self.assertAlmostEqual(clock.now, 1000.1)
+
+    def test_pause_holds_back_next_acquire(self):
+        """Test a pause delays the next token by the requested time, without stacking."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+        bucket.pause(1.0)
+        bucket.pause(1.0)
+        self.assertAlmostEqual(bucket.acquire(), 1.1)
+
+
+class TestBulkNotificationSender(unittest.TestCase):
+    """Test cases for batching, retries and delivery tracking."""
+
+    def make_sender(self, provider, **kwargs):
+        clock = FakeClock()
+        self.clock = clock
+        sender = BulkNotificationSender(provider, rate=100, concurrency=1, sleep=clock.sleep,
+                                        rng=random.Random(1), **kwargs)
+        # Built on the fake clock, not time.monotonic(), or refills depend on the machine's uptime
+        sender.bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+        return sender
+
+    def test_batches_by_provider_size_and_tracks_status(self):
+        """Test messages are grouped into provider batches and marked sent."""
+        provider = ScriptedProvider([])
+        sender = self.make_sender(provider)
+        report = sender.send(messages(5), BulkContent(subject='Hi'))
+        self.assertEqual(provider.batches, [['0', '1'], ['2', '3'], ['4']])
+        self.assertEqual(report['sent'], 5)
+        self.assertEqual(report['requests'], 3)
+        self.assertEqual(sender.tracker.get('4')['status'], SENT)
+        self.assertEqual(sender.tracker.get('4')['provider_id'], 'ok')
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        """Test retryable results are resent and permanent ones fail at once."""
+        provider = ScriptedProvider([BatchResult(RETRYING, error='503'), BatchResult(FAILED, error='400')])
+        sender = self.make_sender(provider)
+        report = sender.send(messages(2), BulkContent())
+        self.assertEqual(report['retries'], 1)
+        self.assertEqual(report['failed'], 2)
+        self.assertEqual(sender.tracker.get('0')['attempts'], 2)
+        self.assertEqual(sender.tracker.get('0')['error'], '400')
+        self.assertGreater(self.clock.now, 1000.0)
+
+    def test_retry_after_pauses_the_bucket(self):
+        """Test a throttled batch waits out Retry-After before resending."""
+        provider = ScriptedProvider([BatchResult(RETRYING, error='429', retry_after=2.0)])
+        sender = self.make_sender(provider)
+        report = sender.send(messages(1), BulkContent())
+        self.assertEqual((report['sent'], report['throttled']), (1, 1))
+        self.assertGreaterEqual(self.clock.now, 1002.0)
+
+    def test_retry_budget_stops_retry_storm(self):
+        """Test retries stop once the budget is spent even if max_retries allows more."""
+        provider = ScriptedProvider([BatchResult(RETRYING, error='503')] * 50, max_batch=1)
+        sender = self.make_sender(provider, retry_budget=0.0, min_retries=3)
+        report = sender.send(messages(4), BulkContent())
+        self.assertEqual(report['retries'], 3)
+        self.assertEqual(report['failed'], 4)
+
+    def test_bad_recipients_fail_alone(self):
+        """Test invalid addresses never reach the provider and a rejected batch is split down to the bad one."""
+        provider = ScriptedProvider([BatchResult(FAILED, error='400', http_status=400),
+                                     BatchResult(SENT), BatchResult(FAILED, error='400', http_status=400),
+                                     BatchResult(FAILED, error='400', http_status=400)], max_batch=4)
+        sender = self.make_sender(provider)
+        report = sender.send(messages(4) + [BulkMessage('bad', 'not-an-address')], BulkContent())
+        self.assertEqual(provider.batches, [['0', '1', '2', '3'], ['0', '1'], ['2', '3'], ['2'], ['3']])
+        self.assertEqual((report['sent'], report['failed'], report['splits']), (3, 2, 2))
+        self.assertEqual(sender.tracker.get('2')['status'], FAILED)
+        self.assertEqual(sender.tracker.get('bad')['error'], 'Invalid recipient address')
+
+    def test_webhook_events_update_status(self):
+        """Test provider delivery events move a sent message on."""
+        sender = self.make_sender(ScriptedProvider([]))
+        sender.send(messages(1), BulkContent())
+        sender.tracker.record_event('0', 'delivered')
+        self.assertEqual(sender.tracker.get('0')['status'], DELIVERED)
+        self.assertEqual(sender.get_stats()['statuses'], {DELIVERED: 1})
+
+
+class TestProvidersAgainstFakeServer(unittest.TestCase):
+    """Test cases for the SendGrid and Twilio providers over HTTP."""
+
+    def setUp(self):
+        self.server = FakeProviderServer(latency=0).start()
+        self.addCleanup(self.server.stop)
+
+    def test_sendgrid_batches_personalizations_on_pooled_connections(self):
+        """Test emails go out as personalization batches over reused connections."""
+        provider = SendGridBulkProvider('key', 'noreply@cricverse.com', base_url=self.server.base_url, pool_size=2)
+        provider.max_batch = 10
+        sender = BulkNotificationSender(provider, rate=1000, concurrency=2)
+        report = sender.send(messages(45), BulkContent(subject='Refund', html='<p>%name%</p>'))
+        self.assertEqual(report['sent'], 45)
+        self.assertEqual(self.server.stats['requests'], 5)
+        self.assertLessEqual(len(self.server.connections), 2)
+        self.assertEqual(sorted(self.server.recipients), sorted(m.to for m in messages(45)))
+
+    def test_sendgrid_rejected_recipient_does_not_fail_the_batch(self):
+        """Test a 400 for one address in a batch still delivers every other email."""
+        self.server.rejected.add('fan6@example.com')
+        provider = SendGridBulkProvider('key', 'noreply@cricverse.com', base_url=self.server.base_url)
+        sender = BulkNotificationSender(provider, rate=1000, concurrency=1)
+        report = sender.send(messages(20), BulkContent(subject='Refund'))
+        self.assertEqual((report['sent'], report['failed']), (19, 1))
+        self.assertEqual(sender.tracker.get('6')['status'], FAILED)
+        self.assertEqual(len(self.server.recipients), 19)
+
+    def test_twilio_retries_throttled_messages(self):
+        """Test SMS rejected with 429 are resent after Retry-After."""
+        self.server.rate_limit = 3
+        provider = TwilioBulkProvider('ACfake', 'token', '+61400000000', base_url=self.server.base_url)
+        sender = BulkNotificationSender(provider, rate=1000, concurrency=1)
+        report = sender.send([BulkMessage('1', '+61411111111'), BulkMessage('2', '+61422222222'),
+                              BulkMessage('3', '+61433333333'), BulkMessage('4', '+61444444444')],
+                             BulkContent(text='Hi'))
+        self.assertEqual(report['sent'], 4)
+        self.assertEqual(report['throttled'], 1)
+        self.assertTrue(sender.tracker.get('4')['provider_id'].startswith('SM'))
+        self.assertEqual(len(self.server.connections), 1)
+
+
+class TestNotificationServiceBulk(unittest.TestCase):
+    """Test cases for the bulk booking confirmations in the notification services."""
+
+    def test_bulk_confirmations_substitute_booking_fields(self):
+        """Test each booking becomes a personalization with its own fields."""
+        import notification
+
+        server = FakeProviderServer(latency=0).start()
+        self.addCleanup(server.stop)
+        sender = BulkNotificationSender(SendGridBulkProvider('key', 'noreply@cricverse.com',
+                                                             base_url=server.base_url), rate=1000)
+        sent = []
+        original = SendGridBulkProvider.send_batch
+
+        def record(provider, batch, content):
+            sent.append((batch, content))
+            return original(provider, batch, content)
+
+        bookings = [{'booking_id': 7, 'customer_email': 'fan7@example.com', 'event_name': 'Sixers vs Stars',
+                     'amount': '90.00', 'tickets': [{'type': 'Adult', 'seat_info': 'A1'}]},
+                    {'booking_id': 8, 'customer_email': None}]
+        with patch.object(notification.email_service, 'get_bulk_sender', return_value=sender), \
+                patch.object(SendGridBulkProvider, 'send_batch', record):
+            responses = notification.email_service.send_bulk_booking_confirmations(bookings)
+
+        self.assertEqual(list(responses), ['7'])
+        self.assertTrue(responses['7'].success)
+        batch, content = sent[0]
+        self.assertEqual(content.subject, 'Booking Confirmation - %event_name%')
+        self.assertIn('%booking_id_html%', content.html)
+        self.assertEqual(batch[0].substitutions['%amount%'], '90.00')
+        self.assertEqual(batch[0].substitutions['%venue%'], 'N/A')
+        self.assertIn('A1', batch[0].substitutions['%tickets%'])
+
+
+if __name__ == '__main__':
+    unittest.main()
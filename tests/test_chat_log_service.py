@@ -0,0 +1,125 @@
+import unittest
+import threading
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.chat_log_service import ChatLogService, ChatInteraction, DROP_NEWEST
+
+
+def make_interaction(i, session_id='s1', customer_id=1):
+    return ChatInteraction(session_id=session_id, customer_id=customer_id,
+                           user_message=f"question {i}", ai_response=f"answer {i}")
+
+
+class TestChatLogService(unittest.TestCase):
+    """Test cases for the batched chat log pipeline."""
+
+    def setUp(self):
+        self.batches = []
+        self.service = ChatLogService(max_queue_size=5, batch_size=2, flush_interval=0.05,
+                                      enqueue_timeout=0, writer=self.batches.append)
+
+    def test_flush_writes_in_batches(self):
+        """Test that queued interactions are written in batch_size chunks."""
+        for i in range(5):
+            self.assertTrue(self.service.enqueue(make_interaction(i)))
+
+        self.assertEqual(self.service.flush(), 5)
+        self.assertEqual([len(batch) for batch in self.batches], [2, 2, 1])
+        self.assertEqual(self.service.get_stats()['written'], 5)
+        self.assertEqual(self.service.queue_depth(), 0)
+
+    def test_drop_oldest_policy(self):
+        """Test that the oldest interaction is evicted when the queue is full."""
+        for i in range(7):
+            self.service.enqueue(make_interaction(i))
+
+        self.service.flush()
+        written = [item.user_message for batch in self.batches for item in batch]
+        self.assertEqual(written, [f"question {i}" for i in range(2, 7)])
+        self.assertEqual(self.service.get_stats()['dropped'], 2)
+
+    def test_drop_newest_policy(self):
+        """Test that new interactions are rejected when the queue is full."""
+        service = ChatLogService(max_queue_size=2, enqueue_timeout=0, drop_policy=DROP_NEWEST,
+                                 writer=self.batches.append)
+        self.assertTrue(service.enqueue(make_interaction(0)))
+        self.assertTrue(service.enqueue(make_interaction(1)))
+        self.assertFalse(service.enqueue(make_interaction(2)))
+        self.assertEqual(service.get_stats()['dropped'], 1)
+
+    def test_worker_flushes_on_interval_and_listeners_run(self):
+        """Test the background worker flushes by time and notifies listeners."""
+        flushed = threading.Event()
+        self.service.add_flush_listener(lambda batch: flushed.set())
+        self.service.start()
+        try:
+            self.service.enqueue(make_interaction(0))
+            self.assertTrue(flushed.wait(timeout=2))
+        finally:
+            self.service.shutdown()
+        self.assertEqual(len(self.batches), 1)
+
+    def test_writer_errors_are_counted(self):
+        """Test that failed batches do not raise into the caller."""
+        def failing_writer(batch):
+            raise RuntimeError("database down")
+
+        service = ChatLogService(writer=failing_writer)
+        service.enqueue(make_interaction(0))
+        service.flush()
+        self.assertEqual(service.get_stats()['flush_errors'], 1)
+
+    def test_invalid_drop_policy(self):
+        """Test that unknown drop policies are rejected."""
+        with self.assertRaises(ValueError):
+            ChatLogService(drop_policy='drop_random')
+
+
+def test_database_writer_bulk_inserts():
+    """Test that a batch creates each conversation once and inserts all messages."""
+    from flask import Flask
+    from app import db
+    from app.models import ChatConversation, ChatMessage
+
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(flask_app)
+
+    with flask_app.app_context():
+        db.create_all()
+
+    service = ChatLogService()
+    service.app = flask_app
+    service.enqueue(make_interaction(0, session_id='db-s1'))
+    service.enqueue(make_interaction(1, session_id='db-s1'))
+    service.enqueue(make_interaction(2, session_id='db-s2', customer_id=2))
+    assert service.flush() == 3
+    assert service.get_stats()['flush_errors'] == 0
+
+    with flask_app.app_context():
+        conversation = ChatConversation.query.filter_by(session_id='db-s1').one()
+        assert conversation.message_count == 4
+        assert ChatMessage.query.filter_by(conversation_id=conversation.id).count() == 4
+        assert ChatConversation.query.count() == 2
+
+
+
+def test_chatbot_refreshes_profiles_from_one_listener():
+    """Test the chatbot listens once however many instances exist, and passes each customer's latest message."""
+    from unittest.mock import patch
+    from app.services.chat_log_service import chat_log_service
+    from app.services.chatbot_service import CricVerseChatbot, cricverse_chatbot
+
+    CricVerseChatbot()
+    assert chat_log_service.flush_listeners.count(cricverse_chatbot.on_interactions_logged) == 1
+
+    batch = [make_interaction(0), make_interaction(1), make_interaction(2, customer_id=None)]
+    batch[1].intent = 'food_inquiry'
+    with patch.object(cricverse_chatbot, 'update_user_interaction_profile') as update:
+        cricverse_chatbot.on_interactions_logged(batch)
+    update.assert_called_once_with(1, 'food_inquiry', 'question 1')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.stats import percentile, summarize, compare_metrics
+
+
+class TestBenchmarkStats(unittest.TestCase):
+    """Test cases for the benchmark statistics helpers."""
+
+    def test_nearest_rank_percentiles(self):
+        """Test percentiles and summaries over a known sample set."""
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(summarize(samples)['max'], 100)
+
+    def test_compare_metrics_flags_regressions(self):
+        """Test that only changes beyond tolerance and minimum delta are flagged."""
+        baseline = {'total_ms.p95': 10.0, 'stages_ms.model.p95': 0.1, 'peak_memory_kb': 800}
+        current = {'total_ms.p95': 15.0, 'stages_ms.model.p95': 0.5, 'peak_memory_kb': 820}
+        regressions = compare_metrics(current, baseline, tolerance=0.2, min_delta=1.0)
+        self.assertEqual([r['metric'] for r in regressions], ['total_ms.p95'])
+        self.assertEqual(regressions[0]['change_pct'], 50.0)
+
+
+def test_benchmark_smoke_run(monkeypatch, caplog):
+    """Test a short offline run exercises every response stage against valid seed data."""
+    from benchmarks.chatbot_benchmark import run_benchmark, baseline_metrics
+
+    monkeypatch.setenv('SUPABASE_URL', '')
+    monkeypatch.setenv('SUPABASE_ANON_KEY', '')
+    report = run_benchmark(iterations=1, corpus=["Hi there!", "What food is available?",
+                                                 "When is the next Melbourne Stars match?",
+                                                 "Tell me about the Sixers team"])
+    assert report['config']['requests'] == 4
+    assert report['stages_ms']['model']['count'] == 4
+    assert report['log_flush']['interactions'] == 4
+    assert 'total_ms.p95' in baseline_metrics(report)
+    assert 'total_ms.p99' not in baseline_metrics(report)
+    assert not [record for record in caplog.records if 'Error getting database context' in record.getMessage()]
+
+
+if __name__ == '__main__':
+    unittest.main()
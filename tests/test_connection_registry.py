@@ -0,0 +1,179 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from connection_registry import RedisConnectionRegistry, InMemoryConnectionRegistry, room_kind
+
+
+def _score(bound):
+    return {'-inf': float('-inf'), '+inf': float('inf')}.get(bound, bound)
+
+
+class FakeRedis:
+    """The hash, set and sorted set commands the registry uses, with decoded responses"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update({field: str(value) for field, value in mapping.items()})
+        return len(mapping)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def sadd(self, key, member):
+        members = self.data.setdefault(key, set())
+        added = member not in members
+        members.add(member)
+        return int(added)
+
+    def srem(self, key, member):
+        members = self.data.get(key, set())
+        removed = member in members
+        members.discard(member)
+        return int(removed)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def zadd(self, key, mapping):
+        scores = self.data.setdefault(key, {})
+        added = len(set(mapping) - set(scores))
+        scores.update(mapping)
+        return added
+
+    def zrem(self, key, member):
+        return int(self.data.get(key, {}).pop(member, None) is not None)
+
+    def zincrby(self, key, amount, member):
+        scores = self.data.setdefault(key, {})
+        scores[member] = scores.get(member, 0) + amount
+        return scores[member]
+
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+
+    def zrangebyscore(self, key, low, high):
+        scores = self.data.get(key, {})
+        return sorted((member for member, score in scores.items() if _score(low) <= score <= _score(high)),
+                      key=scores.get)
+
+    def zcount(self, key, low, high):
+        return len(self.zrangebyscore(key, low, high))
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.zrangebyscore(key, low, high)
+        for member in members:
+            self.zrem(key, member)
+        return len(members)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.commands.append((name, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.commands]
+
+
+class TestConnectionRegistry(unittest.TestCase):
+    """Test cases for the in-memory WebSocket connection registry."""
+
+    def setUp(self):
+        self.registry = InMemoryConnectionRegistry()
+        for i, sid in enumerate(['a', 'b', 'c']):
+            self.registry.connect(sid, {'ip_address': f"10.0.0.{i}"}, connected_at=1000 + i * 100)
+        self.registry.join('a', 'match_1')
+        self.registry.join('b', 'match_1')
+        self.registry.join('c', 'match_2')
+        self.registry.join('c', 'stadium_4')
+
+    def test_counts(self):
+        """Test connection and per-kind room counts are maintained incrementally."""
+        self.assertEqual(self.registry.count_connections(), 3)
+        self.assertEqual(self.registry.count_rooms('match'), 2)
+        self.assertEqual(self.registry.count_rooms('stadium'), 1)
+        self.assertEqual(self.registry.room_size('match_1'), 2)
+
+    def test_leave_and_disconnect(self):
+        """Test rooms stop counting once their last member goes."""
+        self.registry.join('a', 'match_1')  # Duplicate join is ignored
+        self.registry.leave('a', 'match_1')
+        self.assertEqual(self.registry.count_rooms('match'), 2)
+        self.registry.disconnect('b')
+        self.assertEqual(self.registry.count_rooms('match'), 1)
+        self.assertEqual(self.registry.count_connections(), 2)
+        self.assertEqual(self.registry.get_connection('b'), {})
+
+    def test_expire_is_a_range_delete(self):
+        """Test expiry removes only connections older than the cutoff."""
+        expired = self.registry.expire_connections(max_age=150, now=1250)
+        self.assertEqual(expired, 2)
+        self.assertEqual(self.registry.count_connections(), 1)
+        self.assertEqual(self.registry.count_rooms('match'), 1)
+        self.assertEqual(self.registry.get_connection('c'), {'ip_address': '10.0.0.2'})
+
+    def test_room_kind(self):
+        """Test room kinds are taken from the room prefix."""
+        self.assertEqual(room_kind('match_12'), 'match')
+        self.assertEqual(room_kind('live_matches'), 'live')
+        self.assertEqual(room_kind('general'), 'general')
+
+
+class TestRedisConnectionRegistry(TestConnectionRegistry):
+    """Test cases for the Redis WebSocket connection registry, against a fake Redis."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.registry = RedisConnectionRegistry(self.redis, connection_ttl=600)
+        for i, sid in enumerate(['a', 'b', 'c']):
+            self.registry.connect(sid, {'ip_address': f"10.0.0.{i}"}, connected_at=1000 + i * 100)
+        self.registry.join('a', 'match_1')
+        self.registry.join('b', 'match_1')
+        self.registry.join('c', 'match_2')
+        self.registry.join('c', 'stadium_4')
+
+    def test_empty_rooms_leave_the_counts(self):
+        """Test a room's count entry is removed with its last member and connection details expire."""
+        self.registry.disconnect('c')
+        self.assertNotIn('match_2', self.redis.data['ws:room_counts:match'])
+        self.assertEqual(self.redis.data['ws:room_counts:stadium'], {})
+        self.assertNotIn('ws:client_rooms:c', self.redis.data)
+        self.assertEqual(self.redis.expiry['ws_connection:a'], 600)
+
+
+def test_realtime_stats_use_registry():
+    """Test realtime_server stats read the registry instead of scanning keys."""
+    import realtime_server
+
+    registry = InMemoryConnectionRegistry()
+    registry.connect('x', {}, connected_at=0)
+    registry.join('x', 'match_9')
+    with patch.object(realtime_server, 'connection_registry', registry):
+        stats = realtime_server.get_realtime_stats()
+        assert stats['active_connections'] == 1
+        assert stats['active_matches'] == 1
+        assert stats['active_stadiums'] == 0
+        realtime_server.cleanup_expired_connections()
+        assert realtime_server.get_active_connections() == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.conversation_memory_service import ConversationMemoryService, detect_topics
+
+
+class TestConversationMemoryService(unittest.TestCase):
+    """Test cases for the conversation memory service."""
+
+    def setUp(self):
+        self.memory = ConversationMemoryService(window_size=4, summary_snippets=2, max_sessions=3)
+
+    def test_detect_topics(self):
+        """Test keyword topic detection."""
+        self.assertEqual(detect_topics("Can I book a ticket and park my car?"), ['booking'])
+        self.assertEqual(detect_topics("What food is on the menu and where is parking?"), ['food', 'parking'])
+        self.assertEqual(detect_topics(None), [])
+
+    def test_window_is_bounded_and_compacted(self):
+        """Test that old turns are folded into the session summary."""
+        for i in range(5):
+            self.memory.record_turn('s1', 7, f"book ticket {i}", f"answer {i}")
+
+        window = self.memory.get_window('s1')
+        self.assertEqual(len(window), 4)
+        self.assertEqual(window[-1]['content'], 'answer 4')
+
+        context = self.memory.build_context('s1', 7)
+        self.assertEqual(context[0]['role'], 'system')
+        self.assertIn('6 messages', context[0]['content'])
+        self.assertIn('booking (3)', context[0]['content'])
+        self.assertIn("'booking': 5", context[-1]['content'])
+        self.assertEqual(len(context), 6)
+
+    def test_topic_profile_seed_and_satisfaction(self):
+        """Test profile seeding from stored history and running satisfaction."""
+        self.memory.seed_topic_profile(3, ["where is parking", "food menu"], [5, None, 3])
+        self.memory.record_turn(None, 3, "which team is playing", "Sixers")
+
+        profile = self.memory.get_topic_profile(3)
+        self.assertEqual(profile['frequent_topics'], {'parking': 1, 'food': 1, 'teams': 1})
+        self.assertEqual(profile['average_satisfaction'], 4.0)
+        self.assertTrue(self.memory.has_topic_profile(3))
+        self.assertFalse(self.memory.has_session(None))
+
+    def test_sessions_evicted_least_recently_used(self):
+        """Test the session store stays within max_sessions."""
+        for session_id in ['a', 'b', 'c']:
+            self.memory.record_turn(session_id, None, "hi", "hello")
+        self.memory.record_turn('a', None, "hi again", "hello again")
+        self.memory.record_turn('d', None, "hi", "hello")
+
+        self.assertFalse(self.memory.has_session('b'))
+        self.assertTrue(self.memory.has_session('a'))
+        self.assertEqual(self.memory.get_stats()['sessions_evicted'], 1)
+
+    def test_unknown_session_has_no_context(self):
+        """Test empty context for sessions with no history."""
+        self.memory.seed_session('empty', 1, [])
+        self.assertEqual(self.memory.build_context('empty', 1), [])
+        self.assertEqual(self.memory.build_context('missing'), [])
+
+
+def test_chat_rating_is_stored_on_the_conversation():
+    """Test a rating is saved on the conversation row and a re-rating replaces it in the profile."""
+    from unittest.mock import patch
+    from flask import Flask
+    from app import db
+    from app.models import ChatConversation
+    from app.services import chatbot_service
+
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(flask_app)
+    memory = ConversationMemoryService()
+
+    with flask_app.app_context(), patch.object(chatbot_service, 'conversation_memory_service', memory):
+        db.create_all()
+        db.session.add(ChatConversation(customer_id=8, session_id='rated', message_count=2,
+                                        satisfaction_rating=None))
+        db.session.add(ChatConversation(customer_id=8, session_id='earlier', satisfaction_rating=2))
+        db.session.commit()
+
+        assert chatbot_service.record_chat_satisfaction(8, 'rated', 5)
+        assert memory.get_topic_profile(8)['average_satisfaction'] == 3.5
+        assert chatbot_service.record_chat_satisfaction(8, 'rated', 4)
+        assert memory.get_topic_profile(8)['average_satisfaction'] == 3.0
+        assert ChatConversation.query.filter_by(session_id='rated').one().satisfaction_rating == 4
+        assert not chatbot_service.record_chat_satisfaction(9, 'rated', 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
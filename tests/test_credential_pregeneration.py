@@ -0,0 +1,154 @@
+import unittest
+import tempfile
+import sys
+import os
+from datetime import datetime, date, time, timezone, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from celery_tasks import celery_app
+from credential_store import PregeneratedCredentials
+import credential_pregeneration
+from credential_pregeneration import (pregenerate_event, schedule_credential_pregeneration, get_pregeneration_status,
+                                      events_starting_within)
+from qr_generator import qr_generator, QRCodeCache
+from qr_tokens import ADMITTED, NOT_ISSUED
+
+NOW = datetime(2026, 1, 5, 13, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def event_data(ticket_ids, parking_ids=(1,)):
+    return {
+        'starts_at': (NOW + timedelta(hours=6)).isoformat(),
+        'tickets': [{'ticket_id': ticket_id, 'event_id': 9, 'seat_id': ticket_id, 'customer_id': ticket_id % 3 + 1}
+                    for ticket_id in ticket_ids],
+        'customers': [{'customer_id': customer_id, 'customer_name': f"Fan {customer_id}"}
+                      for customer_id in sorted({ticket_id % 3 + 1 for ticket_id in ticket_ids})],
+        'parking': [{'booking_id': booking_id, 'parking_id': 2, 'vehicle_number': f"BBL{booking_id}"}
+                    for booking_id in parking_ids]
+    }
+
+
+class TestPregeneratedCredentials(unittest.TestCase):
+    """Test cases for the per-event credential manifests."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.writer = PregeneratedCredentials(self.directory)
+        self.reader = PregeneratedCredentials(self.directory, refresh_interval=30, clock=self.clock)
+
+    def test_save_merges_and_other_processes_pick_it_up(self):
+        """Test a second process sees saved credentials once its refresh interval passes."""
+        expires_at = (NOW + timedelta(hours=1)).isoformat()
+        self.writer.save(9, {'a': {'verification_code': 'x'}}, {'ticket': [1]}, [1], expires_at)
+        self.assertEqual(self.reader.get('a'), {'verification_code': 'x'})
+
+        self.writer.save(9, {'b': {'verification_code': 'y'}}, {'ticket': [2]}, [1, 2], expires_at)
+        self.clock.now = 10
+        self.assertIsNone(self.reader.get('b'))
+        self.clock.now = 31
+        self.assertEqual(self.reader.get('b'), {'verification_code': 'y'})
+        self.assertEqual(self.reader.ticket_ids(9), {1, 2})
+        self.assertEqual(self.writer.generated_ids(9)['ticket'], {1, 2})
+
+    def test_prune_drops_expired_events(self):
+        """Test manifests past their expiry are deleted and forgotten."""
+        self.writer.save(9, {'a': {}}, {}, [1], (NOW - timedelta(minutes=1)).isoformat())
+        self.writer.save(10, {'b': {}}, {}, [2], (NOW + timedelta(hours=1)).isoformat())
+        self.assertEqual(self.writer.prune(NOW), [9])
+        self.assertIsNone(self.writer.status(9))
+        self.assertIsNone(self.writer.get('a'))
+        self.assertEqual(self.writer.status(10)['tickets'], 1)
+
+
+class TestCredentialPregeneration(unittest.TestCase):
+    """Test cases for pre-generating an event's credentials before the gates open."""
+
+    def setUp(self):
+        celery_app.conf.update(task_always_eager=True, task_eager_propagates=True)
+        self.addCleanup(celery_app.conf.update, task_always_eager=False, task_eager_propagates=False)
+        directory = tempfile.mkdtemp()
+        self.event = event_data(range(1, 7))
+        patch('credential_pregeneration._load_event_credentials',
+              side_effect=lambda event_id: self.event if event_id == 9 else None).start()
+        patch.object(qr_generator, '_get_qr_directory', return_value=directory).start()
+        patch.object(qr_generator, '_bulk_update_ticket_paths', side_effect=len).start()
+        patch.object(qr_generator, '_pregenerated', None).start()
+        patch.object(qr_generator, 'cache', QRCodeCache()).start()
+        self.addCleanup(patch.stopall)
+        self.addCleanup(qr_generator.gate_index.clear, 9)
+
+    def test_all_credential_types_generated_and_served_on_demand(self):
+        """Test one run covers tickets, entry QR codes, passes and parking, and on-demand calls hit them."""
+        progress = []
+        report = pregenerate_event(9, now=NOW, on_progress=lambda p: progress.append(p['stage']))
+        self.assertTrue(report['success'])
+        self.assertEqual({name: counts['done'] for name, counts in report['types'].items()},
+                         {'ticket': 6, 'entry': 3, 'pass': 3, 'parking': 1})
+        self.assertEqual(progress, ['ticket', 'entry', 'pass', 'parking'])
+
+        qr_generator.cache.clear()
+        entry = qr_generator.generate_event_entry_qr({'customer_id': 2, 'customer_name': 'Fan 2', 'event_id': 9})
+        self.assertIn('entry_info', entry)
+        self.assertTrue(os.path.exists(os.path.join(qr_generator._get_qr_directory(),
+                                                    os.path.basename(entry['qr_code_base64']))))
+        self.assertEqual(qr_generator.generate_digital_pass(
+            {'customer_id': 2, 'customer_name': 'Fan 2', 'event_id': 9}, pass_type='event')['pass_info']['event_id'], 9)
+        self.assertEqual(qr_generator.generate_parking_qr({'booking_id': 1, 'parking_id': 2})['parking_info']
+                         ['vehicle_number'], 'BBL1')
+        ticket = qr_generator.generate_ticket_qr({'ticket_id': 4, 'event_id': 9, 'customer_id': 2})
+        self.assertEqual(get_pregeneration_status(9)['generated'], {'ticket': 6, 'entry': 3, 'pass': 3, 'parking': 1})
+        self.assertEqual(qr_generator.verify_qr_code(ticket['token'])['status'], ADMITTED)
+
+    def test_top_up_only_generates_late_bookings(self):
+        """Test a second run issues credentials only for new bookings and lets them through the gates."""
+        pregenerate_event(9, now=NOW)
+        self.event = event_data(range(1, 9), parking_ids=(1, 2))
+        report = pregenerate_event(9, now=NOW + timedelta(minutes=15))
+        self.assertEqual({name: counts['total'] for name, counts in report['types'].items()},
+                         {'ticket': 2, 'entry': 0, 'pass': 0, 'parking': 1})
+
+        qr_generator.gate_index.clear(9)
+        late = qr_generator.generate_ticket_qr_batch([{'ticket_id': 99, 'event_id': 9, 'customer_id': 1}])
+        self.assertEqual(qr_generator.verify_qr_code(late['results'][0]['token'])['status'], NOT_ISSUED)
+        self.assertTrue(qr_generator.gate_index.is_issued(9, 8))
+
+    def test_local_start_times_set_the_window_and_expiry(self):
+        """Test a 19:15 Sydney start is 08:15 UTC, for both the lead window and token expiry."""
+        night_match = SimpleNamespace(id=9, event_name='Sixers vs Scorchers', event_date=date(2026, 1, 5),
+                                      start_time=time(19, 15))
+        afternoon = datetime(2026, 1, 5, 3, 0, tzinfo=timezone.utc)
+        upcoming = events_starting_within([night_match], afternoon, 6)
+        self.assertEqual(upcoming[0]['starts_at'], '2026-01-05T19:15:00+11:00')
+        self.assertEqual(events_starting_within([night_match], afternoon + timedelta(hours=10), 6), [])
+
+        self.event['starts_at'] = upcoming[0]['starts_at']
+        pregenerate_event(9, now=afternoon)
+        self.assertEqual(datetime.fromisoformat(get_pregeneration_status(9)['expires_at']),
+                         datetime(2026, 1, 5, 8, 15, tzinfo=timezone.utc) + timedelta(hours=12))
+
+    def test_scan_queues_events_inside_lead_time(self):
+        """Test the beat task pre-generates each upcoming event."""
+        with patch('credential_pregeneration._load_upcoming_events',
+                   return_value=[{'event_id': 9, 'event_name': 'Sixers vs Scorchers',
+                                  'starts_at': self.event['starts_at']}]) as upcoming:
+            result = schedule_credential_pregeneration.apply(kwargs={'lead_hours': 4}).get()
+        self.assertEqual(upcoming.call_args[0][1], 4)
+        self.assertEqual(list(result['scheduled']), ['9'])
+        self.assertEqual(get_pregeneration_status(9)['progress']['stage'], 'done')
+        self.assertEqual(credential_pregeneration.pregenerate_event_credentials.apply(args=[404]).get()['error'],
+                         'Event not found')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import time
+import sys
+import os
+from datetime import date, time as dt_time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.customer_feature_service import CustomerFeatureService, CustomerFeatures, TTLCache
+
+
+class TestCustomerFeatureService(unittest.TestCase):
+    """Test cases for the customer feature store."""
+
+    def setUp(self):
+        self.service = CustomerFeatureService()
+        self.features = CustomerFeatures(1, favorite_team_id=4, home_ground='MCG')
+        self.features.visited_stadiums = 1 << 2
+        self.service.put_features(self.features)
+
+    def test_score_stadiums(self):
+        """Test visited and home ground boosts across all stadiums."""
+        scores = self.service.score_stadiums(self.features, [
+            {'id': 1, 'name': 'MCG'},
+            {'id': 2, 'name': 'SCG'},
+            {'id': 3, 'name': 'Gabba'},
+        ])
+        self.assertEqual(scores, [(False, 0.9), (True, 0.8), (False, 0.5)])
+
+    def test_score_matches(self):
+        """Test favourite team detection for home and away sides."""
+        scores = self.service.score_matches(self.features, [
+            {'home_team_id': 4, 'away_team_id': 5},
+            {'home_team_id': 6, 'away_team_id': 4},
+            {'home_team_id': 6, 'away_team_id': 7},
+        ])
+        self.assertEqual([s[0] for s in scores], [True, True, False])
+        self.assertEqual(scores[2][1], 0.5)
+
+    def test_incremental_booking_and_order(self):
+        """Test cached features are updated in place on bookings and orders."""
+        self.service.record_booking(1, 7, 6000)
+        self.service.record_order(1, 3, 250)
+        self.service.record_booking(99, 1, 100)  # Not cached, ignored
+
+        features = self.service.get_features(1)
+        self.assertTrue(features.has_visited(7))
+        self.assertTrue(features.has_ordered_from(3))
+        self.assertEqual(features.spend_tier, 1)
+        self.assertEqual(features.to_dict()['visited_stadium_ids'], [2, 7])
+        self.assertEqual(self.service.get_stats()['incremental_updates'], 2)
+
+    def test_score_menu_items(self):
+        """Test vegetarian, price and repeat-concession boosts."""
+        self.features.ordered_concessions = 1 << 5
+        scores = self.service.score_menu_items(self.features, [
+            {'price': 300, 'is_vegetarian': True, 'concession_id': 5},
+            {'price': 900, 'is_vegetarian': False, 'concession_id': 1},
+        ])
+        self.assertEqual([round(s, 2) for s in scores], [0.8, 0.5])
+
+    def test_ttl_cache_bounds_and_expiry(self):
+        """Test LRU eviction and expiry in the bounded cache."""
+        cache = TTLCache(max_entries=2, ttl=0.05)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('a'))
+
+
+def test_load_features_from_database():
+    """Test features are loaded with aggregate queries."""
+    from flask import Flask
+    from app import db
+    from app.models import Customer, Team, Stadium, Event, Booking, Ticket, Order
+
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(flask_app)
+
+    with flask_app.app_context():
+        db.create_all()
+        team = Team(id=1, team_name='Melbourne Stars', home_ground='MCG')
+        db.session.add_all([
+            team,
+            Stadium(id=3, name='MCG', location='Melbourne', capacity=100000),
+            Customer(id=10, name='Fan', email='fan@example.com', favorite_team_id=1),
+            Event(id=5, stadium_id=3, event_name='Stars v Sixers', event_date=date(2026, 1, 5),
+                  start_time=dt_time(19, 0), home_team_id=1, away_team_id=1),
+            Booking(id=1, customer_id=10, total_amount=4000),
+            Ticket(event_id=5, customer_id=10, booking_id=1),
+            Order(concession_id=2, customer_id=10, total_amount=1500),
+        ])
+        db.session.commit()
+
+        service = CustomerFeatureService()
+        features = service.get_features(10)
+        assert features.home_ground == 'MCG'
+        assert features.has_visited(3)
+        assert features.has_ordered_from(2)
+        assert features.total_spent == 5500
+        assert features.spend_tier == 1
+        assert service.get_features(404) is None
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    unittest.main()
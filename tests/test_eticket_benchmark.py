@@ -0,0 +1,23 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.eticket_benchmark import sample_bookings, run_benchmark
+
+
+def test_sample_bookings_share_events():
+    """Test generated bookings are spread over a few reused events."""
+    pairs = sample_bookings(40, events=3)
+    assert len(pairs) == 40
+    assert len({event['event_id'] for event, _ in pairs}) == 3
+    assert all(1 <= len(booking['tickets']) <= 4 for _, booking in pairs)
+
+
+def test_benchmark_compares_both_renderers():
+    """Test a small run reports throughput for the original and template renderers."""
+    report = run_benchmark(bookings=6, workers=1, events=2)
+    assert report['original']['render_ms']['count'] == 6
+    assert report['engine']['render_ms']['count'] == 6
+    assert report['templates_built'] == 2
+    assert report['engine']['pdfs_per_second_per_core'] > 0
+    assert report['engine_pool'] is None
@@ -0,0 +1,87 @@
+import unittest
+import tempfile
+import zlib
+import re
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from reportlab.lib.rl_accel import asciiBase85Decode
+
+import eticket_renderer
+from eticket_renderer import render_eticket, render_etickets, ETICKET_BATCH_INLINE_MAX
+
+
+def page_text(pdf):
+    """Decoded page content of a ReportLab PDF (ASCII85 over Flate)"""
+    streams = re.findall(rb'stream\r?\n(.*?)endstream', pdf, re.S)
+    return ''.join(zlib.decompress(asciiBase85Decode(stream.strip().decode('latin-1'))).decode('latin-1')
+                   for stream in streams)
+
+
+class TestEticketRenderer(unittest.TestCase):
+    """Test cases for the template-cached e-ticket renderer."""
+
+    def setUp(self):
+        eticket_renderer.clear_templates()
+        self.event = {'event_id': 3, 'name': 'Sixers vs Scorchers', 'date': 'Monday, January 05, 2026',
+                      'time': '07:15 PM', 'venue': 'Sydney Cricket Ground', 'location': 'Sydney'}
+
+    def booking(self, booking_id):
+        return {'booking_id': booking_id, 'booking_date': 'January 01, 2026 at 10:00 AM',
+                'customer_name': f"Fan {booking_id}", 'customer_email': f"fan{booking_id}@example.com",
+                'tickets': [{'ticket_type': 'Adult', 'section': 'B', 'row': '12', 'seat': '7', 'price': 45.0,
+                             'qr_payload': f"CV{booking_id}.abc"}]}
+
+    def test_pdf_has_static_page_and_booking_fields(self):
+        """Test the replayed template and the stamped fields both reach the page."""
+        pdf = render_eticket(self.event, self.booking(11))
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        text = page_text(pdf)
+        for expected in ('CricVerse E-Ticket', 'Sixers vs Scorchers', 'Sydney Cricket Ground',
+                         'Important Information', 'fan11@example.com', '$45.00'):
+            self.assertIn(expected, text)
+        self.assertIn(' re', text)
+
+    def test_each_ticket_gets_its_own_qr_code(self):
+        """Test every ticket's token is drawn, side by side inside the page margins."""
+        booking = self.booking(5)
+        booking['tickets'].append(dict(booking['tickets'][0], seat='8', qr_payload='CV6.def'))
+        with patch('eticket_renderer.draw_qr') as draw_qr:
+            render_eticket(self.event, booking)
+        self.assertEqual([call.args[1] for call in draw_qr.call_args_list], ['CV5.abc', 'CV6.def'])
+        xs = sorted(call.args[2] for call in draw_qr.call_args_list)
+        self.assertGreaterEqual(xs[0], 50)
+        self.assertGreater(xs[1] - xs[0], draw_qr.call_args_list[0].args[4])
+
+    def test_template_is_built_once_per_event(self):
+        """Test bookings share their event's template until the event changes."""
+        stats = dict(eticket_renderer.template_stats)
+        render_eticket(self.event, self.booking(1))
+        render_eticket(self.event, self.booking(2))
+        self.assertEqual(eticket_renderer.template_stats['builds'] - stats['builds'], 1)
+        self.assertEqual(eticket_renderer.template_stats['hits'] - stats['hits'], 1)
+
+        moved = dict(self.event, time='08:00 PM')
+        self.assertIn('08:00 PM', page_text(render_eticket(moved, self.booking(3))))
+        self.assertEqual(eticket_renderer.template_stats['builds'] - stats['builds'], 2)
+
+    def test_batch_across_workers_keeps_paths(self):
+        """Test a pooled batch writes each booking's PDF to its own path."""
+        directory = tempfile.mkdtemp()
+        other = dict(self.event, event_id=4, name='Stars vs Heat')
+        jobs = [(other if i % 2 else self.event, self.booking(i), os.path.join(directory, f"eticket_{i}.pdf"))
+                for i in range(ETICKET_BATCH_INLINE_MAX * 3)]
+        errors = render_etickets(jobs, workers=2)
+        self.assertEqual(errors, [None] * len(jobs))
+        for event, booking, path in jobs:
+            with open(path, 'rb') as f:
+                text = page_text(f.read())
+            self.assertIn(booking['customer_email'], text)
+            self.assertIn(event['name'], text)
+        eticket_renderer._render_pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import importlib
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.live_cricket_service import LiveCricketService, flatten_status, diff_status
+
+# app.services re-exports the service instance under the module's name
+live_cricket_module = importlib.import_module('app.services.live_cricket_service')
+
+
+def make_status(match_id=1):
+    return {
+        'match_id': match_id,
+        'status': 'Live',
+        'team1': {'id': 1, 'name': 'Melbourne Stars', 'score': 100, 'wickets': 2, 'overs': '12.3'},
+        'team2': {'id': 2, 'name': 'Sydney Sixers', 'score': 0, 'wickets': 0, 'overs': '0.0'},
+        'current_over': '12.3',
+        'current_innings': 1,
+        'batting_team': 1,
+        'venue': 'MCG',
+        'match_type': 'T20',
+        'is_live': True,
+        'summary': 'Melbourne Stars 100/2 (12.3 overs)',
+        'last_updated': '2026-01-05T09:00:00'
+    }
+
+
+class FakeSocketIO:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data, room=None):
+        self.emitted.append((event, data, room))
+
+
+class TestLiveCricketDelta(unittest.TestCase):
+    """Test cases for delta-encoded live score broadcasts."""
+
+    def setUp(self):
+        self.service = LiveCricketService()
+        self.service.socketio = FakeSocketIO()
+        for match_id in (1, 2, 3):
+            self.service.match_states[match_id] = {'seq': 5, 'state': make_status(match_id)}
+
+    def test_flatten_and_diff(self):
+        """Test dotted paths and that volatile fields are never diffed."""
+        old = make_status()
+        new = make_status()
+        new['team1']['score'] = 104
+        new['last_updated'] = 'later'
+        self.assertEqual(flatten_status(old)['team1.score'], 100)
+        self.assertNotIn('last_updated', flatten_status(old))
+        self.assertEqual(diff_status(old, new), {'team1.score': 104})
+
+    def test_delta_contains_only_changed_fields(self):
+        """Test one ball produces a small delta and advances the sequence."""
+        delta = self.service.broadcast_match_delta(1, {'team1_score': 104, 'team1_overs': '12.4'})
+        self.assertEqual(delta['seq'], 6)
+        self.assertEqual(delta['changes'], {
+            'team1.score': 104,
+            'team1.overs': '12.4',
+            'summary': 'Melbourne Stars 104/2 (12.4 overs)'
+        })
+        # One emit per room regardless of how many matches are live
+        rooms = [room for _, _, room in self.service.socketio.emitted]
+        self.assertEqual(rooms, ['match_1', 'live_matches'])
+
+    def test_unchanged_update_sends_nothing(self):
+        """Test that a repeated update does not advance the sequence."""
+        self.assertIsNone(self.service.broadcast_match_delta(1, {'team1_score': 100}))
+        self.assertEqual(self.service.match_states[1]['seq'], 5)
+        self.assertEqual(self.service.socketio.emitted, [])
+
+    def test_innings_change_moves_batting_team(self):
+        """Test that current_innings also updates the batting team."""
+        delta = self.service.apply_match_delta(2, {'current_innings': 2, 'team2_score': 7})
+        self.assertEqual(delta['changes']['batting_team'], 2)
+        self.assertEqual(delta['changes']['summary'], 'Sydney Sixers 7/0 (0.0 overs)')
+
+    def test_snapshot_is_a_copy(self):
+        """Test snapshots carry the sequence and are isolated from later deltas."""
+        snapshot = self.service.get_match_snapshot(3)
+        self.service.apply_match_delta(3, {'team1_wickets': 3})
+        self.assertEqual(snapshot['seq'], 5)
+        self.assertEqual(snapshot['state']['team1']['wickets'], 2)
+        self.assertEqual(self.service.get_match_snapshot(3)['seq'], 6)
+
+    def test_end_match_forgets_its_state(self):
+        """Test the final delta goes out and the ended match's state is dropped."""
+        final = make_status(2)
+        final.update(status='Completed', is_live=False)
+        match = SimpleNamespace(is_live=True, event=SimpleNamespace(match_status='Live'))
+        with patch.object(live_cricket_module, 'Match', SimpleNamespace(query=SimpleNamespace(get=lambda _: match))), \
+                patch.object(live_cricket_module.db, 'session'), \
+                patch.object(self.service, '_load_live_match_status', return_value=final):
+            self.assertTrue(self.service.end_match(2))
+        deltas = [data for event, data, _ in self.service.socketio.emitted if event == 'live_match_delta']
+        self.assertEqual((deltas[-1]['seq'], deltas[-1]['changes']['is_live']), (6, False))
+        self.assertEqual(sorted(self.service.match_states), [1, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
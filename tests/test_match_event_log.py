@@ -0,0 +1,122 @@
+import unittest
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from match_event_log import MatchEventLog, MatchEventStore, RECENT_COMMENTARY
+
+
+def play_balls(event_log, balls, start_score=0):
+    score = start_score
+    for ball in range(balls):
+        score += ball % 4
+        event_log.append('score_update', {
+            'team1_score': score,
+            'current_ball': ball + 1,
+            'commentary': f"Ball {ball + 1}: {ball % 4} runs"
+        }, timestamp=1000.0 + ball)
+    return score
+
+
+class TestMatchEventLog(unittest.TestCase):
+    """Test cases for the ball-by-ball match event log."""
+
+    def setUp(self):
+        self.log = MatchEventLog(7, snapshot_interval=10)
+        self.log.append('match_start', {'team1': 'Melbourne Stars', 'team2': 'Sydney Sixers',
+                                        'team1_score': 0, 'status': 'live'}, timestamp=999.0)
+
+    def test_append_and_state(self):
+        """Test events get sequence numbers and fold into state."""
+        score = play_balls(self.log, 5)
+        state = self.log.get_state()
+        self.assertEqual(self.log.last_seq, 6)
+        self.assertEqual(state['team1_score'], score)
+        self.assertEqual(state['seq'], 6)
+        self.assertEqual(state['team1'], 'Melbourne Stars')
+
+    def test_commentary_is_bounded(self):
+        """Test state keeps only recent commentary while the log keeps all of it."""
+        play_balls(self.log, 30)
+        self.assertEqual(len(self.log.get_state()['recent_commentary']), RECENT_COMMENTARY)
+        self.assertEqual(len(self.log.events_since(0)), 31)
+
+    def test_catch_up_from_snapshot(self):
+        """Test a new joiner gets the latest snapshot plus the event tail."""
+        play_balls(self.log, 24)  # 25 events, snapshots at 10 and 20
+        catch_up = self.log.catch_up()
+        self.assertEqual(catch_up['snapshot']['seq'], 20)
+        self.assertEqual([e['seq'] for e in catch_up['events']], [21, 22, 23, 24, 25])
+
+        # Applying the tail to the snapshot reaches the live state
+        from match_event_log import apply_event
+        state = catch_up['snapshot']['state']
+        for event in catch_up['events']:
+            apply_event(state, event)
+        self.assertEqual(state, self.log.get_state())
+
+    def test_catch_up_since_seq(self):
+        """Test a client that is nearly current gets only missed events."""
+        play_balls(self.log, 24)
+        catch_up = self.log.catch_up(since_seq=23)
+        self.assertIsNone(catch_up['snapshot'])
+        self.assertEqual([e['seq'] for e in catch_up['events']], [24, 25])
+
+    def test_replay_is_deterministic(self):
+        """Test replaying the full log rebuilds the live state."""
+        play_balls(self.log, 40)
+        self.log.append('wicket', {'batsman': 'Maxwell', 'team1_wickets': 1})
+        self.assertEqual(self.log.replay(), self.log.get_state())
+        self.assertEqual(self.log.replay(upto_seq=1)['team1_score'], 0)
+
+    def test_file_backed_log_recovers(self):
+        """Test reopening a log file rebuilds state and drops a torn record."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'match_7.log')
+            event_log = MatchEventLog(7, path, snapshot_interval=10)
+            score = play_balls(event_log, 15)
+            expected = event_log.get_state()
+            event_log.close()
+
+            with open(path, 'ab') as f:
+                f.write(b'\x20\x00\x00')  # Partial header from an interrupted write
+
+            reopened = MatchEventLog(7, path, snapshot_interval=10)
+            self.assertEqual(reopened.get_state(), expected)
+            self.assertEqual(reopened.get_state()['team1_score'], score)
+            event = reopened.append('status_change', {'status': 'innings_break'})
+            self.assertEqual(event['seq'], 16)
+            self.assertEqual(reopened.events_since(15)[0]['data'], {'status': 'innings_break'})
+            reopened.close()
+
+    def test_store_registry(self):
+        """Test the store creates one log per match."""
+        store = MatchEventStore()
+        store.append(1, 'score_update', {'team1_score': 4})
+        store.append(1, 'score_update', {'team1_score': 10})
+        self.assertIsNone(store.get(2, create=False))
+        self.assertEqual(store.get_stats()['events'], 2)
+        store.drop(1)
+        self.assertEqual(store.match_ids(), [])
+
+    def test_idle_logs_evicted_when_a_new_match_opens(self):
+        """Test finished matches' logs are closed once idle, and recovered if the match returns."""
+        with tempfile.TemporaryDirectory() as directory:
+            now = [1000.0]
+            store = MatchEventStore(directory, max_idle=600, clock=lambda: now[0])
+            store.get(1).append('score_update', {'team1_score': 150}, timestamp=1000.0)
+            store.get(2).append('score_update', {'team1_score': 20}, timestamp=1500.0)
+            now[0] = 1700.0
+            store.append(3, 'status_change', {'status': 'live'})
+            self.assertEqual(sorted(store.match_ids()), [2, 3])
+            self.assertEqual(store.get_stats()['evicted'], 1)
+
+            self.assertEqual(store.get(1).get_state()['team1_score'], 150)
+            now[0] = 10 ** 10
+            self.assertEqual(sorted(store.evict_idle()), [1, 2, 3])
+            self.assertEqual(store.match_ids(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import unittest
+import random
+import json
+import tempfile
+import threading
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app
+from flask_socketio import SocketIO
+from match_event_log import MatchEventStore
+from match_registry import (MatchRegistry, TimerScheduler, SimulatedScoreSource, ReplayScoreSource,
+                            AdminScoreSource, score_source_from_env)
+
+# The service registers SocketIO handlers at import time
+with patch.object(app, 'socketio', SocketIO()):
+    from app.services import realtime_notification_service as realtime_module
+    from app.services.realtime_notification_service import RealtimeNotificationService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTimerScheduler(unittest.TestCase):
+    """Test cases for the single-thread match timer heap."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = TimerScheduler(clock=self.clock)
+        self.fired = []
+
+    def test_timers_fire_in_due_order(self):
+        """Test timers run when due, in due order, and cancelled ones are skipped."""
+        self.scheduler.call_later(30, self.fired.append, 'late')
+        self.scheduler.call_later(10, self.fired.append, 'early')
+        self.scheduler.call_later(20, self.fired.append, 'cancelled').cancel()
+        self.assertEqual(self.scheduler.run_due(5), 0)
+        self.assertEqual(self.scheduler.run_due(30), 2)
+        self.assertEqual(self.fired, ['early', 'late'])
+        self.assertEqual(self.scheduler.pending(), 0)
+
+    def test_repeating_timer(self):
+        """Test call_every repeats until cancelled."""
+        handle = self.scheduler.call_every(5, self.fired.append, 'tick')
+        for now in (5, 10, 15):
+            self.scheduler.run_due(now)
+        handle.cancel()
+        self.scheduler.run_due(100)
+        self.assertEqual(self.fired, ['tick'] * 3)
+
+    def test_background_thread(self):
+        """Test the scheduler thread runs callbacks without polling."""
+        scheduler = TimerScheduler().start()
+        done = threading.Event()
+        try:
+            scheduler.call_later(0.01, done.set)
+            self.assertTrue(done.wait(2))
+        finally:
+            scheduler.stop()
+
+
+class TestMatchRegistry(unittest.TestCase):
+    """Test cases for the copy-on-write match registry."""
+
+    def test_snapshots_are_stable(self):
+        """Test readers keep a consistent view while matches are added and removed."""
+        registry = MatchRegistry()
+        registry.add(1, 'log-1')
+        snapshot = registry.snapshot()
+        registry.add(2, 'log-2')
+        self.assertIsNone(registry.remove(1, expected='other-log'))
+        self.assertEqual(registry.remove(1), 'log-1')
+        self.assertEqual(dict(snapshot), {1: 'log-1'})
+        self.assertEqual(dict(registry), {2: 'log-2'})
+        self.assertIn(2, registry)
+
+
+class TestLiveMatchLifecycle(unittest.TestCase):
+    """Test cases for live matches driven by the scheduler and score sources."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = TimerScheduler(clock=self.clock)
+
+    def make_service(self, source):
+        return RealtimeNotificationService(event_store=MatchEventStore(), dispatcher_workers=0,
+                                           score_source=source, scheduler=self.scheduler)
+
+    def test_simulator_and_cleanup_share_one_scheduler(self):
+        """Test simulator ticks and post-match cleanup are timers, not threads."""
+        service = self.make_service(SimulatedScoreSource(interval=5, probability=1.0, rng=random.Random(7)))
+        threads = threading.active_count()
+        for match_id in range(1, 6):
+            service.start_live_match(match_id, 'Sixers', 'Scorchers')
+        self.scheduler.run_due(5)
+        self.assertGreater(service.get_match_status(1)['seq'], 1)
+
+        service.end_live_match(1, 'Sixers won')
+        self.clock.now = 5 + service.COMPLETED_MATCH_RETENTION
+        self.scheduler.run_due()
+        self.assertNotIn(1, service.active_matches)
+        self.assertEqual(len(service.active_matches), 4)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_replay_source(self):
+        """Test recorded updates are replayed at their offsets."""
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write(json.dumps({'match_id': 3, 'offset': 10, 'update': {'team1_score': 4}}) + '\n')
+            f.write(json.dumps({'match_id': 3, 'offset': 20, 'update': {'team1_score': 10}}) + '\n')
+            f.write(json.dumps({'match_id': 4, 'offset': 5, 'update': {'team1_score': 99}}) + '\n')
+        self.addCleanup(os.remove, f.name)
+
+        service = self.make_service(ReplayScoreSource(f.name, speed=2.0))
+        service.start_live_match(3, 'Stars', 'Renegades')
+        self.scheduler.run_due(5)
+        self.assertEqual(service.get_match_status(3)['team1_score'], 4)
+        self.scheduler.run_due(10)
+        self.assertEqual(service.get_match_status(3)['team1_score'], 10)
+
+    def test_admin_source(self):
+        """Test operator-entered scores are applied directly."""
+        source = AdminScoreSource()
+        service = self.make_service(source)
+        service.start_live_match(5, 'Heat', 'Thunder')
+        self.assertTrue(service.submit_score(5, {'team1_score': 12, 'team1_wickets': 1}))
+        self.assertEqual(service.get_match_status(5)['team1_wickets'], 1)
+        self.assertFalse(service.submit_score(6, {'team1_score': 1}))
+        self.assertFalse(self.make_service(SimulatedScoreSource()).submit_score(5, {'team1_score': 1}))
+        self.assertEqual(self.scheduler.pending(), 0)
+        self.assertEqual(score_source_from_env('admin').name, 'admin')
+        self.assertEqual(score_source_from_env('replay:/tmp/x.jsonl').name, 'replay')
+
+    def test_submit_score_event_is_admin_only(self):
+        """Test a signed-in fan is refused and an admin's update reaches the match."""
+        service = self.make_service(AdminScoreSource())
+        service.start_live_match(5, 'Heat', 'Thunder')
+        emitted = []
+        data = {'match_id': 5, 'score_update': {'team1_score': 30}}
+        with patch.object(realtime_module, 'realtime_notification_service', service), \
+                patch.object(realtime_module, 'emit', lambda event, payload: emitted.append((event, payload))):
+            fan = SimpleNamespace(is_authenticated=True, is_admin=lambda: False)
+            with patch.object(realtime_module, 'current_user', fan):
+                realtime_module.handle_submit_score(data)
+            self.assertEqual(emitted[-1], ('error', {'message': 'Access denied'}))
+            self.assertEqual(service.get_match_status(5)['team1_score'], 0)
+
+            admin = SimpleNamespace(is_authenticated=True, is_admin=lambda: True)
+            with patch.object(realtime_module, 'current_user', admin):
+                realtime_module.handle_submit_score(data)
+            self.assertEqual(emitted[-1], ('score_status', {'status': 'accepted', 'match_id': 5}))
+            self.assertEqual(service.get_match_status(5)['team1_score'], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import threading
+import sys
+import os
+from datetime import datetime, timedelta
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app
+from flask_socketio import SocketIO
+
+# The service registers SocketIO handlers at import time
+with patch.object(app, 'socketio', SocketIO()):
+    from app.services.realtime_notification_service import (
+        NotificationDispatcher, NotificationMessage, NotificationType
+    )
+
+
+def make_notification(notification_id, priority='normal', rooms=('match_1',), expires_at=None):
+    return NotificationMessage(
+        id=notification_id,
+        type=NotificationType.LIVE_SCORE,
+        title='Update',
+        message=notification_id,
+        data={},
+        timestamp=datetime.utcnow(),
+        priority=priority,
+        expires_at=expires_at,
+        target_rooms=list(rooms)
+    )
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+    """Test cases for the priority notification dispatcher."""
+
+    def setUp(self):
+        self.emitted = []
+        self.dispatcher = NotificationDispatcher(
+            lambda key, batch: self.emitted.append((key, [n.id for n in batch])), workers=1)
+
+    def test_priority_order(self):
+        """Test urgent and high notifications are dispatched before normal and low."""
+        self.dispatcher.put(make_notification('low', 'low', rooms=('a',)))
+        self.dispatcher.put(make_notification('normal', 'normal', rooms=('b',)))
+        self.dispatcher.put(make_notification('urgent', 'urgent', rooms=('c',)))
+        self.dispatcher.put(make_notification('high', 'high', rooms=('d',)))
+        self.dispatcher.dispatch_pending()
+        self.assertEqual([ids[0] for _, ids in self.emitted], ['urgent', 'high', 'normal', 'low'])
+
+    def test_same_room_notifications_are_coalesced(self):
+        """Test queued notifications for one room go out as a single batch."""
+        for i in range(5):
+            self.dispatcher.put(make_notification(f"ball-{i}"))
+        self.dispatcher.put(make_notification('other', rooms=('match_2',)))
+        self.dispatcher.dispatch_pending()
+
+        self.assertEqual(self.emitted[0], (((), ('match_1',)), [f"ball-{i}" for i in range(5)]))
+        self.assertEqual(len(self.emitted), 2)
+        stats = self.dispatcher.get_stats()
+        self.assertEqual(stats['coalesced'], 4)
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def test_expired_notifications_are_dropped(self):
+        """Test notifications past expires_at are not emitted."""
+        self.dispatcher.put(make_notification('stale', expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        self.assertEqual(self.dispatcher.dispatch_pending(), 0)
+        self.assertEqual(self.emitted, [])
+        self.assertEqual(self.dispatcher.get_stats()['expired'], 1)
+
+    def test_workers_block_until_notified(self):
+        """Test background workers dispatch promptly and report latency."""
+        dispatched = threading.Event()
+        dispatcher = NotificationDispatcher(lambda key, batch: dispatched.set(), workers=2)
+        dispatcher.start()
+        try:
+            dispatcher.put(make_notification('wicket', 'urgent'))
+            self.assertTrue(dispatched.wait(timeout=1))
+        finally:
+            dispatcher.stop()
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats['dispatched'], 1)
+        self.assertLess(stats['dispatch_latency_ms']['max'], 1000)
+
+    def test_stop_drains_queue(self):
+        """Test stopping the workers still dispatches queued notifications."""
+        self.dispatcher.put(make_notification('final'))
+        self.dispatcher.start()
+        self.dispatcher.stop()
+        self.assertEqual(self.emitted[0][1], ['final'])
+
+
+if __name__ == '__main__':
+    unittest.main()
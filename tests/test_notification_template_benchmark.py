@@ -0,0 +1,22 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.notification_template_benchmark import sample_bookings, render_original, run_benchmark
+
+
+def test_sample_bookings_have_tickets():
+    """Test generated bookings carry the fields the templates use."""
+    bookings = sample_bookings(20)
+    assert len(bookings) == 20
+    assert all(1 <= len(booking['tickets']) <= 4 for booking in bookings)
+    assert 'Sydney Sixers' in render_original(bookings[0])
+
+
+def test_benchmark_reports_each_renderer():
+    """Test a small run reports time and size for the original, Jinja, compiled and bulk renderers."""
+    report = run_benchmark(bookings=50)
+    for name in ('original', 'jinja', 'compiled', 'bulk'):
+        assert report[name]['us_per_message'] > 0
+        assert report[name]['bytes_per_message'] > 0
+    assert report['bulk']['bytes_per_message'] < report['original']['bytes_per_message']
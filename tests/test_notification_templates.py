@@ -0,0 +1,106 @@
+import unittest
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bulk_notifications import substitute
+from notification_templates import NotificationTemplates, CompiledBlock, MARKER, placeholder_values
+
+BOOKING = {
+    'booking_id': 42,
+    'event_name': 'Sixers & <Stars>',
+    'event_date': 'Monday, January 05, 2026',
+    'amount': '90.00',
+    'tickets': [{'type': 'Adult', 'seat_info': 'A1'}, {'type': 'Child'}]
+}
+
+
+class TestNotificationTemplates(unittest.TestCase):
+    """Test cases for the compiled notification templates."""
+
+    def setUp(self):
+        self.templates = NotificationTemplates()
+
+    def test_templates_compiled_at_startup(self):
+        """Test every notification template is loaded, and the layout is not."""
+        self.assertEqual(sorted(self.templates.names()), ['booking_confirmation', 'payment_confirmation'])
+
+    def test_html_escaped_and_text_variant_from_same_template(self):
+        """Test one definition yields escaped HTML, plain text, subject and SMS."""
+        rendered = self.templates.render('booking_confirmation', BOOKING)
+        self.assertEqual(rendered.subject, 'Booking Confirmation - Sixers & <Stars>')
+        self.assertIn('Sixers &amp; &lt;Stars&gt;', rendered.html)
+        self.assertIn('<li><strong>Child</strong> - Seat information not available</li>', rendered.html)
+        self.assertIn('This is an automated email', rendered.html)
+        self.assertIn('Event: Sixers & <Stars>', rendered.text)
+        self.assertIn('- Adult: A1', rendered.text)
+        self.assertIn('Venue: N/A', rendered.text)
+        self.assertTrue(rendered.sms.startswith('CricVerse Booking Confirmed!\nBooking ID: 42'))
+
+    def test_substitution_template_is_cached(self):
+        """Test the placeholder render happens once and carries the tokens."""
+        fields = ('booking_id', 'event_name')
+        first = self.templates.substitution_template('booking_confirmation', fields,
+                                                     {'ticket_items_html': '%tickets%'})
+        self.assertIs(first, self.templates.substitution_template('booking_confirmation', fields,
+                                                                  {'ticket_items_html': '%tickets%'}))
+        self.assertEqual(first.subject, 'Booking Confirmation - %event_name%')
+        self.assertIn('<ul>\n    %tickets%\n</ul>', first.html)
+
+    def test_substituted_html_is_escaped(self):
+        """Test bulk substitutions fill the HTML part with escaped values and the text part with raw ones."""
+        rendered = self.templates.substitution_template('booking_confirmation', ('event_name',))
+        self.assertIn('%event_name_html%', rendered.html)
+        self.assertNotIn('%event_name%', rendered.html)
+        substitutions = placeholder_values({'event_name': BOOKING['event_name']})
+        self.assertIn('Sixers &amp; &lt;Stars&gt;', substitute(rendered.html, substitutions))
+        self.assertIn('Event: Sixers & <Stars>', substitute(rendered.text, substitutions))
+        self.assertEqual(list(placeholder_values({'event_name': 'x'}, html=False)), ['%event_name%'])
+
+    def test_render_list_matches_jinja(self):
+        """Test compiled ticket rows render exactly what the template loop renders."""
+        cases = [[], BOOKING['tickets'], [{'seat_info': 'B"2\'', 'type': '<VIP>'}, {'type': None}]]
+        for tickets in cases:
+            for block, row in (('ticket_items', 'ticket_item'), ('ticket_lines', 'ticket_line')):
+                self.assertEqual(
+                    self.templates.render_list('booking_confirmation', block, row, 'ticket', tickets),
+                    self.templates.render_block('booking_confirmation', block, {'tickets': tickets}))
+
+    def test_single_sends_render_what_jinja_renders(self):
+        """Test the compiled single-send confirmation matches a full Jinja render, missing fields included."""
+        from notification import render_booking_confirmation
+
+        blocks = ('subject', 'html', 'text', 'sms')
+        for booking in (BOOKING, {'booking_id': 7, 'event_name': None, 'tickets': []}, {}):
+            self.assertEqual(render_booking_confirmation(booking, blocks),
+                             self.templates.render('booking_confirmation', booking))
+
+    def test_filtered_fields_fall_back_to_jinja(self):
+        """Test a row that transforms its fields is rendered by Jinja instead of compiled."""
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'alert.jinja'), 'w') as f:
+                f.write("{% block rows %}{% for gate in gates %}{% block row scoped %}"
+                        "{{ gate.name|upper }}:{{ gate.queue }};{% endblock %}{% endfor %}{% endblock %}")
+            templates = NotificationTemplates(directory)
+            gates = [{'name': 'north', 'queue': 12}, {'name': 'south', 'queue': 3}]
+            self.assertEqual(templates.render_list('alert', 'rows', 'row', 'gate', gates), 'NORTH:12;SOUTH:3;')
+            self.assertIsNone(templates._compiled[('alert', 'row', 'gate', ('name', 'queue'))])
+
+
+class TestCompiledBlock(unittest.TestCase):
+    """Test cases for splitting marker renders into slots."""
+
+    def test_escaped_and_raw_slots(self):
+        """Test each slot remembers whether the template escaped it."""
+        rendered = f"<b>{MARKER}name&lt;{MARKER}</b> {MARKER}note<{MARKER}!"
+        block = CompiledBlock.parse(rendered, ('name', 'note'))
+        self.assertEqual(block.render({'name': 'A&B', 'note': '<i>'}), '<b>A&amp;B</b> <i>!')
+
+    def test_unknown_slot_rejected(self):
+        """Test a marker that does not name a field cannot be compiled."""
+        self.assertIsNone(CompiledBlock.parse(f"{MARKER}NAME<{MARKER}", ('name',)))
+
+
+if __name__ == '__main__':
+    unittest.main()
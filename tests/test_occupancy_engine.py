@@ -0,0 +1,136 @@
+import unittest
+import importlib
+import time
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from match_registry import TimerScheduler
+from occupancy_engine import SlidingWindowCounter, OccupancyEngine
+from qr_generator import QRGenerator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    """Test cases for the one-second bucket ring."""
+
+    def test_counts_expire_after_window(self):
+        """Test only events inside the window are counted."""
+        counter = SlidingWindowCounter(window=60)
+        counter.add(100.0, 3)
+        counter.add(130.5)
+        self.assertEqual(counter.total(130.9), 4)
+        self.assertEqual(counter.total(160.0), 1)
+        self.assertEqual(counter.total(191.0), 0)
+
+    def test_reused_bucket_is_reset(self):
+        """Test a bucket from a previous lap of the ring does not leak into the count."""
+        counter = SlidingWindowCounter(window=10)
+        counter.add(5.0, 7)
+        counter.add(15.0, 2)
+        self.assertEqual(counter.total(15.0), 2)
+        self.assertEqual(counter.rate_per_minute(15.0), 12.0)
+
+
+class TestOccupancyEngine(unittest.TestCase):
+    """Test cases for live occupancy from gate scans."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.published = []
+        self.engine = OccupancyEngine(publish=lambda stadium_id, data: self.published.append(data),
+                                      clock=self.clock, capacity_lookup=lambda stadium_id: 200)
+
+    def scan(self, gate='A', section='North', direction='entry', stadium_id=1, valid=True):
+        self.engine.record_scan({'stadium_id': stadium_id, 'gate': gate, 'section': section,
+                                 'direction': direction, 'valid': valid})
+
+    def test_entries_and_exits(self):
+        """Test in-stadium, gate and section counts follow entries and exits."""
+        for _ in range(3):
+            self.scan(gate='A')
+        self.scan(gate='B', section='South')
+        self.scan(gate='A', direction='exit')
+        self.scan(valid=False)
+
+        snapshot = self.engine.snapshot(1)
+        self.assertEqual(snapshot['in_stadium'], 3)
+        self.assertEqual(snapshot['occupancy_percentage'], 1.5)
+        self.assertEqual(snapshot['total_seats'], 200)
+        self.assertEqual(snapshot['gates']['A'], {'entries': 3, 'exits': 1, 'entry_rate_per_min': 3.0})
+        self.assertEqual(snapshot['sections'], {'North': 2, 'South': 1})
+        self.assertEqual(snapshot['rejected_scans'], 1)
+        self.assertIsNone(self.engine.snapshot(2))
+
+    def test_publishes_active_stadiums_on_cadence(self):
+        """Test the fixed cadence publishes changed stadiums until entry rates wind down."""
+        scheduler = TimerScheduler(clock=self.clock)
+        self.engine.start(scheduler, interval=2)
+        self.scan(stadium_id=1)
+        self.scan(stadium_id=2)
+
+        self.clock.now += 2
+        scheduler.run_due()
+        self.assertEqual(sorted(data['stadium_id'] for data in self.published), [1, 2])
+
+        self.clock.now += 120
+        self.published.clear()
+        scheduler.run_due()
+        # One last update each as the entry windows empty
+        self.assertEqual([data['entry_rate_per_min'] for data in self.published], [0.0, 0.0])
+        self.published.clear()
+        self.clock.now += 2
+        scheduler.run_due()
+        self.assertEqual(self.published, [])
+
+        self.engine.stop()
+        self.assertFalse(self.engine.get_stats()['publishing'])
+
+    def test_qr_verification_feeds_engine(self):
+        """Test gate verifications reach registered listeners."""
+        generator = QRGenerator()
+        generator.add_verification_listener(self.engine.record_scan)
+        token = generator.token_signer.issue(11, 5, 3, time.time() + 3600)
+        result = generator.verify_qr_code(token, stadium_id=1, gate='C', section='East')
+        self.assertTrue(result['valid'])
+        self.assertEqual(self.engine.snapshot(1)['gates']['C']['entries'], 1)
+        generator.verify_qr_code(token, stadium_id=1, gate='D')
+        self.assertEqual(self.engine.snapshot(1)['rejected_scans'], 1)
+        generator.verify_qr_code(token)
+        self.assertEqual(self.engine.get_stats()['ignored'], 1)
+
+    def test_gate_scan_endpoint_feeds_engine(self):
+        """Test scans posted by gate scanners carry their stadium and gate into the engine."""
+        from flask import Flask
+        import qr_generator
+
+        admin_routes = importlib.import_module('app.routes.admin')
+        flask_app = Flask(__name__)
+        flask_app.register_blueprint(admin_routes.admin_bp)
+        generator = QRGenerator()
+        generator.add_verification_listener(self.engine.record_scan)
+        token = generator.token_signer.issue(12, 5, 3, time.time() + 3600)
+        scan = {'token': token, 'stadium_id': 1, 'gate': 'C', 'section': 'East'}
+        with patch.object(admin_routes, 'current_user', SimpleNamespace(is_authenticated=True, role='admin')), \
+                patch.object(qr_generator, 'qr_generator', generator):
+            client = flask_app.test_client()
+            client.post('/admin/api/gates/scan', json=scan)
+            client.post('/admin/api/gates/scan', json=scan)
+            client.post('/admin/api/gates/scan', json={**scan, 'gate': 'D', 'direction': 'exit'})
+
+        occupancy = self.engine.snapshot(1)
+        self.assertEqual((occupancy['gates']['C']['entries'], occupancy['gates']['D']['exits']), (1, 1))
+        self.assertEqual(occupancy['rejected_scans'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from qr_analytics import QRAnalytics, BucketSeries
+
+# 2026-01-05 00:00:00 UTC
+MIDNIGHT = 1767571200.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = MIDNIGHT + 19 * 3600
+
+    def __call__(self):
+        return self.now
+
+
+class TestBucketSeries(unittest.TestCase):
+    """Test cases for the time-bucketed counter ring."""
+
+    def test_stale_buckets_are_reset_and_skipped(self):
+        """Test reused slots restart and buckets outside the range are ignored."""
+        series = BucketSeries(60, 3)
+        series.add(0, True)
+        series.add(30, False)
+        series.add(120, True)
+        self.assertEqual(series.buckets(150), [(0, 2, 1), (120, 1, 1)])
+        series.add(180, True)
+        self.assertEqual(series.buckets(180), [(120, 1, 1), (180, 1, 1)])
+        self.assertEqual(series.total(180, 1), 1)
+
+
+class TestQRAnalytics(unittest.TestCase):
+    """Test cases for QR verification analytics."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.analytics = QRAnalytics(capacity=100, tracked_codes=3, clock=self.clock)
+
+    def test_verification_stats_per_code(self):
+        """Test per-code totals and first and last attempt times."""
+        self.analytics.track_verification_attempt('CODE1', 'ticket', 'admitted', True, gate='North')
+        self.clock.now += 90
+        self.analytics.track_verification_attempt('CODE1', 'ticket', 'duplicate', False, gate='South')
+        stats = self.analytics.get_verification_stats('CODE1')
+        self.assertEqual((stats['total_attempts'], stats['successful_attempts'], stats['failed_attempts']), (2, 1, 1))
+        self.assertEqual(stats['first_attempt'], '2026-01-05T19:00:00+00:00')
+        self.assertEqual(stats['last_attempt'], '2026-01-05T19:01:30+00:00')
+        self.assertEqual(self.analytics.get_verification_stats('MISSING')['total_attempts'], 0)
+
+    def test_daily_and_hourly_stats(self):
+        """Test attempts roll up by UTC day and type, and by hour."""
+        for _ in range(3):
+            self.analytics.track_verification_attempt('A', 'ticket', 'admitted', True)
+        self.analytics.track_verification_attempt('B', 'parking', 'verification_failed', False)
+        self.clock.now += 6 * 3600
+        self.analytics.track_verification_attempt('C', 'ticket', 'admitted', False)
+
+        daily = self.analytics.get_daily_stats(days=7)
+        self.assertEqual([(row['date'], row['qr_type'], row['total_attempts']) for row in daily[:1]],
+                         [('2026-01-06', 'ticket', 1)])
+        previous = {row['qr_type']: row for row in daily if row['date'] == '2026-01-05'}
+        self.assertEqual(previous['ticket']['total_attempts'], 3)
+        self.assertEqual(previous['ticket']['success_rate'], 100)
+        self.assertEqual(previous['parking']['successful_attempts'], 0)
+
+        hourly = self.analytics.get_hourly_stats(hours=24)
+        self.assertEqual([(row['hour'], row['total_attempts']) for row in hourly],
+                         [('2026-01-06T01:00:00+00:00', 1), ('2026-01-05T19:00:00+00:00', 4)])
+        self.assertEqual(len(self.analytics.get_hourly_stats(hours=24, qr_type='parking')), 1)
+        self.assertEqual(self.analytics.get_daily_stats(days=0), [])
+
+    def test_minute_and_gate_stats(self):
+        """Test per-minute series and per-gate totals with a recent window."""
+        self.analytics.track_verification_attempt('A', 'ticket', 'admitted', True, gate='North')
+        self.clock.now += 20 * 60
+        self.analytics.track_verification_attempt('B', 'ticket', 'admitted', True, gate='North')
+        self.analytics.track_verification_attempt('C', 'ticket', 'duplicate', False, gate='South')
+
+        minutes = self.analytics.get_minute_stats(minutes=60)
+        self.assertEqual([row['total_attempts'] for row in minutes], [2, 1])
+        gates = self.analytics.get_gate_stats(minutes=15)
+        self.assertEqual(gates['North'], {'total_attempts': 2, 'successful_attempts': 2,
+                                          'failed_attempts': 0, 'recent_attempts': 1})
+        self.assertEqual(gates['South']['failed_attempts'], 1)
+
+    def test_memory_is_bounded(self):
+        """Test the ring and the per-code index stop growing at their limits."""
+        for i in range(250):
+            self.clock.now += 1
+            self.analytics.track_verification_attempt(f"CODE{i}", 'ticket', 'admitted', i % 2 == 0, gate='East')
+        stats = self.analytics.get_stats()
+        self.assertEqual(stats['total_attempts'], 250)
+        self.assertEqual((stats['recent_attempts'], stats['tracked_codes']), (100, 3))
+        self.assertEqual(stats['qr_types']['ticket'], {'total_attempts': 250, 'successful_attempts': 125})
+        recent = self.analytics.get_recent_attempts(limit=2)
+        self.assertEqual([row['verification_code'] for row in recent], ['CODE249', 'CODE248'])
+        self.assertEqual((recent[0]['gate'], recent[0]['action'], recent[0]['success']), ('East', 'admitted', False))
+        self.assertEqual(self.analytics.get_verification_stats('CODE0')['total_attempts'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+from qr_generator import QRGenerator, QR_BATCH_INLINE_MAX
+from qr_render import content_key
+
+
+class TestTicketQRBatch(unittest.TestCase):
+    """Test cases for batch ticket QR generation."""
+
+    def setUp(self):
+        self.generator = QRGenerator()
+        self.directory = tempfile.mkdtemp()
+        self.updates = {}
+        patch.object(self.generator, '_get_qr_directory', return_value=self.directory).start()
+        patch.object(self.generator, '_bulk_update_ticket_paths',
+                     side_effect=lambda paths: self.updates.update(paths) or len(paths)).start()
+        self.addCleanup(patch.stopall)
+
+    def tickets(self, count):
+        return [{'ticket_id': i, 'event_id': 42, 'customer_id': 7, 'seat_id': i} for i in range(1, count + 1)]
+
+    def check_results(self, report, count, rendered=True):
+        self.assertEqual(report['generated'], count)
+        self.assertEqual(report['updated'], count)
+        self.assertGreater(report['tickets_per_second'], 0)
+        self.assertEqual(sorted(self.updates), list(range(1, count + 1)))
+        store = self.generator._get_image_store()
+        for result in report['results']:
+            self.assertEqual(result['qr_code_base64'], f"/qr/{result['token']}.png")
+            self.assertEqual(self.updates[result['ticket_info']['ticket_id']], result['qr_code_base64'])
+            path = store.path_for(content_key(result['token']))
+            self.assertEqual(os.path.exists(path), rendered)
+            if rendered:
+                with Image.open(path) as image:
+                    self.assertEqual(image.format, 'PNG')
+            token = self.generator.token_signer.verify(result['token'])
+            self.assertEqual(token.ticket_id, result['ticket_info']['ticket_id'])
+        self.assertEqual(store.get_stats()['disk_entries'], count if rendered else 0)
+
+    def test_batch_defers_rendering(self):
+        """Test a batch only issues tokens and URLs, leaving images to first request."""
+        with patch.object(self.generator, '_render_batch') as render:
+            report = self.generator.generate_ticket_qr_batch(self.tickets(5))
+        render.assert_not_called()
+        self.check_results(report, 5, rendered=False)
+
+    def test_small_batch_renders_inline(self):
+        """Test a small prerendered batch is rendered in-process, skipping invalid tickets."""
+        tickets = self.tickets(3) + [{'ticket_id': 99, 'event_id': 42}]
+        with patch.object(self.generator, '_get_render_pool') as pool:
+            report = self.generator.generate_ticket_qr_batch(tickets, prerender=True)
+        pool.assert_not_called()
+        self.check_results(report, 3)
+        self.assertEqual(report['errors'][0]['ticket_id'], 99)
+        self.assertEqual(report['errors'][0]['error_type'], 'validation_error')
+
+    def test_large_batch_uses_process_pool(self):
+        """Test a large prerendered batch is rendered by worker processes with one bulk update."""
+        count = QR_BATCH_INLINE_MAX + 8
+        report = self.generator.generate_ticket_qr_batch(self.tickets(count), workers=2, prerender=True)
+        self.check_results(report, count)
+        self.assertEqual(report['errors'], [])
+        self.generator._render_pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import tempfile
+import threading
+import time
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import qr_render
+from qr_render import QRImageStore, content_key
+from qr_generator import QRGenerator
+from qr_tokens import InvalidQRToken
+
+
+class TestQRImageStore(unittest.TestCase):
+    """Test cases for the content-addressed QR image store."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = QRImageStore(self.directory)
+
+    def test_renders_once_then_serves_from_memory_and_disk(self):
+        """Test a miss renders to a hashed path and later hits skip rendering."""
+        digest, png = self.store.get_png('CVTOKENONE')
+        self.assertEqual(digest, content_key('CVTOKENONE'))
+        self.assertTrue(png.startswith(b'\x89PNG'))
+        with open(self.store.path_for(digest), 'rb') as f:
+            self.assertEqual(f.read(), png)
+
+        self.assertEqual(self.store.get_png('CVTOKENONE'), (digest, png))
+        self.store.clear_memory()
+        self.assertEqual(self.store.get_png('CVTOKENONE'), (digest, png))
+        stats = self.store.get_stats()
+        self.assertEqual((stats['renders'], stats['memory_hits'], stats['disk_hits']), (1, 1, 1))
+
+    def test_concurrent_misses_render_once(self):
+        """Test simultaneous requests for a new token share one render."""
+        rendered = threading.Event()
+        real_render = qr_render.render_png
+
+        def render(payload):
+            rendered.wait(timeout=1)
+            return real_render(payload)
+
+        with patch('qr_render.render_png', side_effect=render) as renderer:
+            threads = [threading.Thread(target=self.store.get_png, args=('CVSHARED',)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.05)
+            rendered.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(renderer.call_count, 1)
+        self.assertEqual(self.store.get_stats()['disk_entries'], 1)
+
+    def test_disk_budget_evicts_least_recently_used(self):
+        """Test files over the disk budget are removed oldest-use first."""
+        _, png = self.store.get_png('CVFIRST')
+        store = QRImageStore(self.directory, disk_budget=len(png) * 2 + len(png) // 2)
+        store.get_png('CVSECOND')
+        store.get_png('CVFIRST')
+        store.get_png('CVTHIRD')
+        self.assertTrue(os.path.exists(store.path_for(content_key('CVFIRST'))))
+        self.assertFalse(os.path.exists(store.path_for(content_key('CVSECOND'))))
+        self.assertTrue(os.path.exists(store.path_for(content_key('CVTHIRD'))))
+        self.assertEqual(store.get_stats()['evictions'], 1)
+
+    def test_memory_budget_bounds_hot_images(self):
+        """Test the in-memory LRU keeps within its byte budget."""
+        _, png = self.store.get_png('CVA')
+        store = QRImageStore(self.directory, memory_budget=len(png) * 2)
+        for token in ('CVA', 'CVB', 'CVC'):
+            store.get_png(token)
+        stats = store.get_stats()
+        self.assertLessEqual(stats['memory_bytes'], len(png) * 2 + 64)
+        self.assertEqual(stats['memory_entries'], 2)
+
+
+class TestTicketQRImage(unittest.TestCase):
+    """Test cases for serving ticket QR images by token."""
+
+    def setUp(self):
+        self.generator = QRGenerator()
+        patch.object(self.generator, '_get_qr_directory', return_value=tempfile.mkdtemp()).start()
+        self.addCleanup(patch.stopall)
+
+    def test_only_signed_tokens_render(self):
+        """Test signed tokens render, even once expired, and forged ones are refused."""
+        token = self.generator.token_signer.issue(5, 42, 12, 1000)
+        digest, png = self.generator.get_ticket_qr_png(token)
+        self.assertEqual(digest, content_key(token))
+        self.assertTrue(png.startswith(b'\x89PNG'))
+        forged = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+        with self.assertRaises(InvalidQRToken):
+            self.generator.get_ticket_qr_png(forged)
+        with self.assertRaises(InvalidQRToken):
+            self.generator.get_ticket_qr_png('not-a-token')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import unittest
+import importlib
+import time
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from qr_tokens import (QRTokenSigner, GateVerificationIndex, InvalidQRToken, ALGORITHM_ED25519,
+                       ADMITTED, DUPLICATE, NOT_ISSUED, EXITED, NOT_INSIDE)
+from qr_generator import QRGenerator
+
+
+class TestQRTokenSigner(unittest.TestCase):
+    """Test cases for compact signed ticket tokens."""
+
+    def setUp(self):
+        self.signer = QRTokenSigner(b'gate-secret')
+        self.expires_at = time.time() + 3600
+
+    def test_round_trip(self):
+        """Test a token decodes to the ticket it was issued for and stays short."""
+        token = self.signer.issue(123456, 42, 7, self.expires_at)
+        self.assertLess(len(token), 60)
+        self.assertTrue(token.isalnum() and token.isupper())
+        decoded = self.signer.verify(token)
+        self.assertEqual((decoded.ticket_id, decoded.event_id, decoded.seat_id), (123456, 42, 7))
+        self.assertIsNone(self.signer.verify(self.signer.issue(1, 42, None, self.expires_at)).seat_id)
+
+    def test_rejects_forged_and_expired_tokens(self):
+        """Test tampered, foreign, expired and malformed tokens are refused with a reason."""
+        token = self.signer.issue(1, 42, 7, self.expires_at)
+        forged = token[:-3] + ('AAA' if token[-3:] != 'AAA' else 'BBB')
+        cases = {
+            forged: 'bad_signature',
+            QRTokenSigner(b'other-secret').issue(1, 42, 7, self.expires_at): 'bad_signature',
+            QRTokenSigner(b'gate-secret', key_id=2).issue(1, 42, 7, self.expires_at): 'unknown_key',
+            self.signer.issue(1, 42, 7, time.time() - 1): 'expired',
+            'CV-123': 'malformed',
+            '{"ticket_id": 1}': 'malformed'
+        }
+        for candidate, reason in cases.items():
+            with self.assertRaises(InvalidQRToken) as raised:
+                self.signer.verify(candidate)
+            self.assertEqual(raised.exception.reason, reason)
+
+    def test_key_rotation(self):
+        """Test tokens signed with a retired key still verify once it is added."""
+        old = QRTokenSigner(b'old-secret', key_id=1)
+        new = QRTokenSigner(b'new-secret', key_id=2)
+        new.add_verify_key(1, b'old-secret')
+        self.assertEqual(new.verify(old.issue(9, 1, 1, self.expires_at)).ticket_id, 9)
+
+    def test_ed25519_scanner_needs_only_public_key(self):
+        """Test Ed25519 tokens verify with the public key alone."""
+        private_key = Ed25519PrivateKey.generate()
+        issuer = QRTokenSigner(private_key, algorithm=ALGORITHM_ED25519)
+        scanner = QRTokenSigner(private_key.public_key(), algorithm=ALGORITHM_ED25519)
+        token = issuer.issue(5, 6, 7, self.expires_at)
+        self.assertEqual(scanner.verify(token).event_id, 6)
+        with self.assertRaises(ValueError):
+            scanner.issue(5, 6, 7, self.expires_at)
+
+    def test_from_env_signers_agree_without_a_qr_key(self):
+        """Test separate processes fall back to the same app secret rather than a random key."""
+        with patch.dict(os.environ, {'QR_SIGNING_ALGORITHM': 'hmac'}):
+            os.environ.pop('QR_SIGNING_KEY', None)
+            token = QRTokenSigner.from_env().issue(3, 4, 5, self.expires_at)
+            self.assertEqual(QRTokenSigner.from_env().verify(token).ticket_id, 3)
+
+
+class TestGateVerificationIndex(unittest.TestCase):
+    """Test cases for the per-event gate index."""
+
+    def setUp(self):
+        self.index = GateVerificationIndex()
+
+    def test_preloaded_event(self):
+        """Test issued tickets enter once and unknown or revoked tickets are refused."""
+        self.index.preload(42, [1, 2, 3])
+        self.assertEqual(self.index.admit(42, 1, 'A', now=100.0), (ADMITTED, None))
+        self.assertEqual(self.index.admit(42, 1, 'B'), (DUPLICATE, {'gate': 'A', 'at': 100.0}))
+        self.assertEqual(self.index.admit(42, 9)[0], NOT_ISSUED)
+        self.index.revoke(42, 2)
+        self.assertEqual(self.index.admit(42, 2)[0], NOT_ISSUED)
+        self.index.add(42, 9)
+        self.assertEqual(self.index.admit(42, 9)[0], ADMITTED)
+
+        # Reloading keeps who is already inside
+        self.index.preload(42, [1, 2, 3, 9])
+        self.assertEqual(self.index.admit(42, 1)[0], DUPLICATE)
+        self.assertEqual(self.index.get_stats()['inside'], 2)
+
+    def test_exit_allows_reentry(self):
+        """Test a released ticket may enter again, and unloaded events rely on the signature."""
+        self.assertEqual(self.index.admit(7, 1)[0], ADMITTED)
+        self.assertFalse(self.index.is_loaded(7))
+        self.assertEqual(self.index.release(7, 1), EXITED)
+        self.assertEqual(self.index.admit(7, 1)[0], ADMITTED)
+
+    def test_exit_only_for_tickets_inside(self):
+        """Test exit scans of tickets that never entered, or already left, release and count nothing."""
+        self.index.preload(42, [1, 2])
+        self.index.admit(42, 1)
+        self.assertEqual(self.index.release(42, 2), NOT_INSIDE)
+        self.assertEqual(self.index.release(42, 1), EXITED)
+        self.assertEqual(self.index.release(42, 1), NOT_INSIDE)
+        self.assertEqual(self.index.release(99, 1), NOT_INSIDE)
+        stats = self.index.get_stats()
+        self.assertEqual((stats[EXITED], stats[NOT_INSIDE]), (1, 3))
+
+
+class TestVerifyQRCode(unittest.TestCase):
+    """Test cases for gate verification through the QR generator."""
+
+    def test_verify_ticket_token(self):
+        """Test verify_qr_code admits a signed ticket once and rejects everything else."""
+        generator = QRGenerator()
+        generator.gate_index.preload(42, [1])
+        token = generator.token_signer.issue(1, 42, 7, time.time() + 3600)
+
+        admitted = generator.verify_qr_code(token, gate='A')
+        self.assertTrue(admitted['valid'])
+        self.assertEqual(admitted['data']['seat_id'], 7)
+
+        duplicate = generator.verify_qr_code(token, gate='B')
+        self.assertFalse(duplicate['valid'])
+        self.assertEqual(duplicate['status'], DUPLICATE)
+        self.assertEqual(duplicate['first_use']['gate'], 'A')
+
+        self.assertTrue(generator.verify_qr_code(token, direction='exit')['valid'])
+        self.assertEqual(generator.verify_qr_code(token, direction='exit')['status'], NOT_INSIDE)
+        self.assertTrue(generator.verify_qr_code(token, gate='A')['valid'])
+
+        self.assertFalse(generator.verify_qr_code('not-a-token')['valid'])
+
+    def test_gate_scan_endpoint(self):
+        """Test gate scanners admit, refuse and release tickets through the admin API."""
+        from flask import Flask
+        import qr_generator
+
+        admin_routes = importlib.import_module('app.routes.admin')
+        flask_app = Flask(__name__)
+        flask_app.register_blueprint(admin_routes.admin_bp)
+        client = flask_app.test_client()
+        generator = QRGenerator()
+        token = generator.token_signer.issue(21, 5, 3, time.time() + 3600)
+        scan = {'token': token, 'stadium_id': 1, 'gate': 'C'}
+
+        def post(body):
+            return client.post('/admin/api/gates/scan', json=body)
+
+        with patch.object(qr_generator, 'qr_generator', generator):
+            with patch.object(admin_routes, 'current_user', SimpleNamespace(is_authenticated=True, role='admin')):
+                self.assertEqual(post(scan).get_json()['status'], ADMITTED)
+                self.assertEqual(post(scan).get_json()['status'], DUPLICATE)
+                self.assertEqual(post({**scan, 'direction': 'exit'}).get_json()['status'], EXITED)
+                self.assertEqual(post({**scan, 'stadium_id': '1'}).status_code, 400)
+                self.assertEqual(post({**scan, 'direction': 'sideways'}).status_code, 400)
+
+            owner = SimpleNamespace(is_authenticated=True, role='stadium_owner', id=7)
+            no_stadiums = SimpleNamespace(query=SimpleNamespace(filter_by=lambda **_: SimpleNamespace(all=list)))
+            with patch.object(admin_routes, 'current_user', owner), \
+                    patch.object(admin_routes, 'StadiumAdmin', no_stadiums):
+                self.assertEqual(post(scan).status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
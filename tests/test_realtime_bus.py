@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import realtime_bus
+from realtime_bus import LocalMessageBus, FanoutWorker
+
+
+class TestRealtimeBus(unittest.TestCase):
+    """Test cases for multi-worker realtime fan-out."""
+
+    def setUp(self):
+        self.bus = LocalMessageBus()
+        self.emitted = {'w1': [], 'w2': []}
+        self.w1 = FanoutWorker(self.bus, lambda e, d, room=None: self.emitted['w1'].append((e, d, room)), worker_id='w1').start()
+        self.w2 = FanoutWorker(self.bus, lambda e, d, room=None: self.emitted['w2'].append((e, d, room)), worker_id='w2').start()
+        self.w1.join('match_1', 'a')
+        self.w2.join('match_1', 'b')
+        self.w2.join('match_2', 'c')
+
+    def tearDown(self):
+        realtime_bus.shutdown_fanout()
+
+    def test_publish_once_every_worker_emits_locally(self):
+        """Test one publish reaches each worker with clients in the room."""
+        self.w1.publish('match_delta', {'seq': 1}, 'match_1')
+        self.assertEqual(self.emitted['w1'], [('match_delta', {'seq': 1}, 'match_1')])
+        self.assertEqual(self.emitted['w2'], [('match_delta', {'seq': 1}, 'match_1')])
+        self.assertEqual(self.w1.get_stats()['published'], 1)
+
+    def test_workers_without_room_members_skip(self):
+        """Test workers with no local clients in a room do not emit."""
+        self.w2.publish('match_delta', {'seq': 1}, 'match_2')
+        self.assertEqual(self.emitted['w1'], [])
+        self.assertEqual(len(self.emitted['w2']), 1)
+        self.assertEqual(self.w1.get_stats()['skipped'], 1)
+
+    def test_disconnect_removes_membership(self):
+        """Test leave and disconnect keep local room membership accurate."""
+        self.w2.leave('match_1', 'b')
+        self.assertFalse(self.w2.has_local_clients('match_1'))
+        self.w2.disconnect('c')
+        self.assertEqual(self.w2.get_stats()['local_rooms'], 0)
+
+    def test_broadcast_helper_modes(self):
+        """Test broadcast goes direct without fan-out and through the bus with it."""
+        class DirectSocketIO:
+            def __init__(self):
+                self.emitted = []
+
+            def emit(self, event, data, room=None):
+                self.emitted.append((event, room))
+
+        direct = DirectSocketIO()
+        realtime_bus.broadcast(direct, 'notification', {'id': 1}, 'user_5')
+        self.assertEqual(direct.emitted, [('notification', 'user_5')])
+
+        worker = realtime_bus.init_fanout(LocalMessageBus(), direct.emit)
+        realtime_bus.track_join('user_5', 'sid-1')
+        realtime_bus.broadcast(direct, 'notification', {'id': 2}, 'user_5')
+        realtime_bus.broadcast(direct, 'notification', {'id': 3}, 'user_6')
+        self.assertEqual(direct.emitted[-1], ('notification', 'user_5'))
+        self.assertEqual(worker.get_stats()['delivered'], 1)
+
+
+def test_fanout_benchmark_smoke():
+    """Test a tiny multi-process fan-out run reports latency for every broadcast."""
+    from benchmarks.fanout_benchmark import run_fanout
+
+    report = run_fanout(workers=2, connections=40, matches=2, messages=10, rate=0)
+    assert report['broadcast_latency_ms']['count'] == 10
+    assert report['client_writes'] == 10 * 20
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.realtime_load_test import recorded_match, parse_packet, event_packet
+
+
+def test_recorded_match_is_replayable():
+    """Test the generated match is in replay score source format with one record per ball."""
+    records = recorded_match(matches=2, balls=12, seconds_per_ball=30)
+    assert len(records) == 24
+    assert {record['match_id'] for record in records} == {1, 2}
+    first, last = records[0], records[11]
+    assert first['offset'] == 0 and last['offset'] == 330
+    assert last['update']['current_over'] == '1.6'
+    scores = [record['update']['team1_score'] for record in records[:12]]
+    assert scores == sorted(scores)
+
+
+def test_socketio_packets():
+    """Test fans frame and parse Socket.IO event packets."""
+    message = event_packet('join_match', {'match_id': 3})
+    assert message.startswith('42')
+    assert parse_packet(message) == ('join_match', {'match_id': 3})
+    assert parse_packet('2') is None
+    assert parse_packet('40{"sid":"abc"}') is None
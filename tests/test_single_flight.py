@@ -0,0 +1,114 @@
+import unittest
+import asyncio
+import threading
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from single_flight import SingleFlight, SingleFlightTimeout, bbl_single_flight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for single-flight request coalescing."""
+
+    def setUp(self):
+        self.flight = SingleFlight('test', default_timeout=2.0)
+        self.calls = 0
+        self.release = threading.Event()
+
+    def slow_fetch(self):
+        self.calls += 1
+        self.release.wait(timeout=2)
+        return {'score': '120/3'}
+
+    def run_concurrently(self, target, count=5):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        while self.flight.stats['leaders'] + self.flight.stats['shared'] < count:
+            time.sleep(0.01)
+        self.release.set()
+        for thread in threads:
+            thread.join(timeout=2)
+        return results
+
+    def test_concurrent_sync_calls_share_one_fetch(self):
+        """Test that concurrent callers for one key trigger a single fetch."""
+        results = self.run_concurrently(lambda: self.flight.do('bbl:live_scores', self.slow_fetch))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [{'score': '120/3'}] * 5)
+        self.assertEqual(self.flight.stats['shared'], 4)
+        self.assertEqual(self.flight.in_flight(), 0)
+
+    def test_concurrent_async_calls_share_across_event_loops(self):
+        """Test that callers on separate asyncio.run loops share one fetch."""
+        async def fetch():
+            self.calls += 1
+            await asyncio.get_running_loop().run_in_executor(None, self.release.wait, 2)
+            return ['Stars v Sixers']
+
+        results = self.run_concurrently(lambda: asyncio.run(self.flight.do_async('bbl:live_scores', fetch)))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [['Stars v Sixers']] * 5)
+
+    def test_callers_get_their_own_copy(self):
+        """Test one caller mutating a shared BBL result does not change the others'."""
+        self.flight.copy_result = bbl_single_flight.copy_result
+        results = self.run_concurrently(lambda: self.flight.do('bbl:standings', self.slow_fetch), count=3)
+        results[0]['score'] = 'changed'
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results[1:], [{'score': '120/3'}] * 2)
+
+    def test_errors_propagate_to_waiters(self):
+        """Test that a failed fetch raises in every waiting caller."""
+        def failing_fetch():
+            self.release.wait(timeout=2)
+            raise ConnectionError("Supabase unavailable")
+
+        errors = []
+
+        def call():
+            try:
+                self.flight.do('bbl:standings', failing_fetch)
+            except ConnectionError as e:
+                errors.append(e)
+
+        self.run_concurrently(call, count=3)
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.flight.stats['errors'], 1)
+
+    def test_waiter_timeout(self):
+        """Test that waiters give up after the key's timeout."""
+        self.flight.set_timeout('live_match', 0.05)
+        leader = threading.Thread(target=lambda: self.flight.do('live_match:7', self.slow_fetch))
+        leader.start()
+        while not self.flight.in_flight():
+            time.sleep(0.01)
+        with self.assertRaises(SingleFlightTimeout):
+            self.flight.do('live_match:7', self.slow_fetch)
+        self.release.set()
+        leader.join(timeout=2)
+        self.assertEqual(self.flight.stats['timeouts'], 1)
+
+    def test_timeout_resolution(self):
+        """Test explicit, exact key, namespace and default timeouts."""
+        flight = SingleFlight(default_timeout=10, key_timeouts={'bbl:live_scores': 5, 'live_match': 3})
+        self.assertEqual(flight.timeout_for('bbl:live_scores'), 5)
+        self.assertEqual(flight.timeout_for('live_match:12'), 3)
+        self.assertEqual(flight.timeout_for('bbl:teams'), 10)
+        self.assertEqual(flight.timeout_for('bbl:teams', timeout=1), 1)
+
+    def test_async_leader_timeout(self):
+        """Test that a slow async fetch times out instead of hanging callers."""
+        async def never_returns():
+            await asyncio.sleep(1)
+
+        with self.assertRaises(SingleFlightTimeout):
+            asyncio.run(self.flight.do_async('bbl:teams', never_returns, timeout=0.05))
+        self.assertEqual(self.flight.in_flight(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+import json
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from celery.app.task import Context
+from task_telemetry import (TaskMetrics, TelemetryPublisher, PUBLISHED_AT_HEADER, TELEMETRY_KEY, queue_wait_ms,
+                            merge_snapshots, summarize, outcome_state)
+import celery_tasks
+from celery_tasks import celery_app, task_metrics, get_task_telemetry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.expiry = {}
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field.encode()] = value.encode()
+
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes[key].pop(field.encode(), None)
+
+
+class TestTaskMetrics(unittest.TestCase):
+    """Test cases for the per-task telemetry collector."""
+
+    def test_queue_wait_run_time_and_outcomes(self):
+        """Test queue wait, run time, retries and failures are kept per task name."""
+        metrics = TaskMetrics()
+        for task_id, state, wait in (('a', 'SUCCESS', 40.0), ('b', 'RETRY', None), ('c', 'FAILURE', 10.0)):
+            metrics.started(task_id, wait)
+            metrics.finished(task_id, 'payments.charge', state)
+        stats = metrics.get_stats()['payments.charge']
+        self.assertEqual((stats['count'], stats['retries'], stats['failures']), (3, 1, 1))
+        self.assertEqual(stats['failure_rate'], round(1 / 3, 4))
+        self.assertEqual(stats['queue_wait']['mean_ms'], 25.0)
+        self.assertEqual(stats['queue_wait']['max_ms'], 40.0)
+        self.assertGreaterEqual(stats['p95_ms'], stats['p50_ms'])
+
+    def test_queue_wait_from_publish_header_or_eta(self):
+        """Test the wait is measured from publish, or from the ETA for delayed tasks."""
+        self.assertEqual(queue_wait_ms(Context({PUBLISHED_AT_HEADER: 100.0}), now=100.25), 250.0)
+        self.assertEqual(queue_wait_ms(Context({PUBLISHED_AT_HEADER: 100.0,
+                                                'eta': '1970-01-01T00:03:00+00:00'}), now=180.5), 500.0)
+        self.assertIsNone(queue_wait_ms(Context({}), now=1.0))
+
+    def test_returned_failures_count_as_failures(self):
+        """Test a task that catches its error and returns success False is counted as failed."""
+        self.assertEqual(outcome_state('SUCCESS', {'success': False, 'error': 'boom'}), 'FAILURE')
+        self.assertEqual(outcome_state('SUCCESS', {'success': True}), 'SUCCESS')
+        self.assertEqual(outcome_state('SUCCESS', None), 'SUCCESS')
+        self.assertEqual(outcome_state('RETRY', None), 'RETRY')
+
+        celery_app.conf.update(task_always_eager=True)
+        self.addCleanup(celery_app.conf.update, task_always_eager=False)
+        task_metrics.reset()
+        celery_tasks.send_booking_confirmation.apply(args=[{'booking_id': 1}])
+        stats = task_metrics.get_stats()['celery_tasks.send_booking_confirmation']
+        self.assertEqual((stats['count'], stats['failures']), (1, 1))
+
+    def test_snapshots_merge_across_processes(self):
+        """Test counters add up and samples pool when several workers report."""
+        first, second = TaskMetrics(), TaskMetrics()
+        first.started('a', 5.0)
+        first.finished('a', 'tickets.render', 'SUCCESS')
+        second.started('b')
+        second.finished('b', 'tickets.render', 'FAILURE')
+        merged = summarize(merge_snapshots([first.snapshot(), json.loads(json.dumps(second.snapshot()))]))
+        self.assertEqual((merged['tickets.render']['count'], merged['tickets.render']['failures']), (2, 1))
+        self.assertEqual(merged['tickets.render']['queue_wait']['p50_ms'], 5.0)
+
+
+class TestTelemetryPublisher(unittest.TestCase):
+    """Test cases for sharing worker telemetry through Redis."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.redis = FakeRedis()
+        self.metrics = TaskMetrics()
+        self.publisher = TelemetryPublisher(self.metrics, interval=15, ttl=300, clock=self.clock)
+
+    def test_publish_is_throttled_and_stale_processes_dropped(self):
+        """Test each process writes at most once per interval and dead ones age out."""
+        self.metrics.started('a')
+        self.metrics.finished('a', 'notifications.send', 'SUCCESS')
+        self.assertTrue(self.publisher.maybe_publish(self.redis))
+        self.assertFalse(self.publisher.maybe_publish(self.redis))
+        self.assertEqual(self.redis.expiry[TELEMETRY_KEY], 300)
+        self.redis.hset(TELEMETRY_KEY, 'old-worker:1', json.dumps({'updated_at': 0, 'tasks': {}}))
+
+        snapshots = self.publisher.collect(self.redis)
+        self.assertEqual(list(snapshots), [self.publisher.field])
+        self.assertEqual(snapshots[self.publisher.field]['notifications.send']['count'], 1)
+        self.assertNotIn(b'old-worker:1', self.redis.hashes[TELEMETRY_KEY])
+
+    def test_health_telemetry_merges_worker_snapshots(self):
+        """Test the health report combines this process with every worker process."""
+        self.metrics.started('a', 12.0)
+        self.metrics.finished('a', 'celery_tasks.process_refund', 'SUCCESS')
+        self.publisher.maybe_publish(self.redis)
+        task_metrics.reset()
+        with patch('celery_tasks._result_client', return_value=self.redis), \
+                patch.object(celery_tasks.telemetry_publisher, 'clock', self.clock):
+            telemetry = get_task_telemetry()
+        self.assertEqual(telemetry['processes'], 1)
+        self.assertEqual(telemetry['tasks']['celery_tasks.process_refund']['queue_wait']['max_ms'], 12.0)
+        self.assertEqual(telemetry['result_expires_seconds'], celery_app.conf.result_expires)
+
+
+class TestResultBackendUsage(unittest.TestCase):
+    """Test cases for what reaches the result backend."""
+
+    def test_results_expire_and_fire_and_forget_tasks_skip_backend(self):
+        """Test stored results expire and tasks nobody reads back store nothing."""
+        celery_app.loader.import_default_modules()
+        self.assertEqual(celery_app.conf.result_expires, 24 * 3600)
+        for name in ('celery_tasks.process_payment_notification', 'celery_tasks.send_booking_confirmation',
+                     'booking_workflow.render_booking_etickets', 'booking_workflow.render_booking_qr_codes',
+                     'credential_pregeneration.schedule_credential_pregeneration'):
+            self.assertTrue(celery_app.tasks[name].ignore_result, name)
+        for name in ('booking_workflow.send_booking_eticket_emails', 'booking_workflow.summarize_post_booking',
+                     'credential_pregeneration.pregenerate_event_credentials', 'celery_tasks.health_check'):
+            self.assertFalse(celery_app.tasks[name].ignore_result, name)
+
+    def test_publish_stamps_header(self):
+        """Test published messages carry the publish time used for the queue wait."""
+        headers = {}
+        celery_tasks._stamp_publish_time(headers=headers)
+        self.assertIn(PUBLISHED_AT_HEADER, headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
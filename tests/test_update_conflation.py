@@ -0,0 +1,122 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from update_conflation import (LiveUpdateConflator, is_critical, merge_update, parse_tier_rates,
+                               tier_for_membership)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLiveUpdateConflator(unittest.TestCase):
+    """Test cases for per-tier conflation of live updates"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sent = []
+        self.conflator = LiveUpdateConflator(
+            lambda event, data, room=None: self.sent.append((event, data, room)),
+            tier_rates={'basic': 1.0, 'premium': 4.0}, clock=self.clock)
+        self.conflator.set_tier('slow', 'basic')
+        self.conflator.set_tier('fast', 'premium')
+        self.conflator.join('match_1', 'slow')
+        self.conflator.join('match_1', 'fast')
+
+    def score(self, runs):
+        return {'match_id': 1, 'type': 'score_update', 'team1_score': runs}
+
+    def test_latest_state_only(self):
+        """Test a burst sends once per tier, then only the latest pending update"""
+        for runs in range(100, 110):
+            self.conflator.emit('live_score_update', self.score(runs), 'match_1')
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.conflator.pending_count(), 2)
+
+        self.clock.now += 0.25
+        self.conflator.flush_due()
+        self.assertEqual(self.sent[-1], ('live_score_update', self.score(109), 'match_1@premium'))
+        self.assertEqual(self.conflator.pending_count(), 1)
+
+        self.clock.now += 0.75
+        self.conflator.flush_due()
+        self.assertEqual(self.sent[-1], ('live_score_update', self.score(109), 'match_1@basic'))
+        self.assertEqual(len(self.sent), 4)
+
+    def test_critical_flushes_pending_then_goes_to_room(self):
+        """Test a wicket is delivered immediately after anything pending"""
+        self.conflator.emit('match_update', self.score(100), 'match_1')
+        self.conflator.emit('match_update', self.score(104), 'match_1')
+        wicket = {'match_id': 1, 'type': 'wicket', 'batsman': 'Maxwell'}
+        self.conflator.emit('match_update', wicket, 'match_1')
+
+        rooms = [room for _, _, room in self.sent]
+        self.assertEqual(rooms[-1], 'match_1')
+        self.assertEqual(self.sent[-1][1], wicket)
+        self.assertIn(('match_update', self.score(104), 'match_1@basic'), self.sent[:-1])
+        self.assertEqual(self.conflator.pending_count(), 0)
+
+    def test_passthrough_and_bounded_groups(self):
+        """Test untracked rooms pass through and groups go when their members leave"""
+        self.conflator.emit('live_score_update', self.score(1), 'match_2')
+        self.conflator.emit('booking_notification', {}, 'match_1')
+        self.assertEqual([room for _, _, room in self.sent], ['match_2', 'match_1'])
+
+        self.conflator.emit('live_score_update', self.score(1), 'match_1')
+        self.conflator.emit('live_score_update', self.score(2), 'match_1')
+        self.conflator.disconnect('slow')
+        self.conflator.leave('match_1', 'fast')
+        self.assertEqual(self.conflator.get_stats()['groups'], 0)
+        self.assertEqual(self.conflator.flush_due(self.clock.now + 10), 0)
+
+    def test_merged_deltas(self):
+        """Test conflated deltas keep every change and record their base sequence"""
+        first = {'match_id': 1, 'seq': 5, 'changes': {'team1.score': 120, 'current_over': '15.1'}}
+        second = {'match_id': 1, 'seq': 6, 'changes': {'team1.score': 124}}
+        merged = merge_update('match_delta', first, second)
+        self.assertEqual(merged['changes'], {'team1.score': 124, 'current_over': '15.1'})
+        self.assertEqual((merged['seq'], merged['base_seq']), (6, 4))
+        self.assertTrue(is_critical('match_delta', {'changes': {'team2.wickets': 3}}))
+        self.assertFalse(is_critical('match_delta', second))
+
+    def test_matches_sharing_a_room_stay_apart(self):
+        """Test updates for different matches in one room are conflated separately"""
+        self.conflator.join('live_matches', 'slow')
+        self.conflator.emit('live_match_delta', {'match_id': 1, 'seq': 1, 'changes': {'team1.score': 10}},
+                            'live_matches')
+        self.conflator.emit('live_match_delta', {'match_id': 2, 'seq': 2, 'changes': {'team1.score': 50}},
+                            'live_matches')
+        self.conflator.emit('live_match_delta', {'match_id': 3, 'seq': 4, 'changes': {'team2.score': 7}},
+                            'live_matches')
+        self.conflator.emit('live_score_update', {'match_id': 2, 'team1_score': 50}, 'live_matches')
+        self.conflator.emit('live_score_update', {'match_id': 3, 'team1_score': 90}, 'live_matches')
+        self.assertEqual(self.conflator.pending_count(), 4)
+
+        self.sent.clear()
+        self.clock.now += 1
+        self.conflator.flush_due()
+        sent = sorted((event, data['match_id'], data.get('base_seq')) for event, data, _ in self.sent)
+        self.assertEqual(sent,
+                         [('live_match_delta', 2, None), ('live_match_delta', 3, None),
+                          ('live_score_update', 2, None), ('live_score_update', 3, None)])
+        self.assertIn(('live_match_delta', {'match_id': 3, 'seq': 4, 'changes': {'team2.score': 7}},
+                       'live_matches@basic'), self.sent)
+
+    def test_tier_settings(self):
+        """Test tier rates and membership mapping"""
+        rates = parse_tier_rates('basic=0.5, premium=10,bad=x')
+        self.assertEqual((rates['basic'], rates['premium']), (0.5, 10.0))
+        self.assertNotIn('bad', rates)
+        self.assertEqual(tier_for_membership('VIP'), 'vip')
+        self.assertEqual(tier_for_membership(None), 'basic')
+        self.assertEqual(tier_for_membership('Platinum'), 'basic')
+
+
+if __name__ == '__main__':
+    unittest.main()
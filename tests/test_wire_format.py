@@ -0,0 +1,135 @@
+import unittest
+import json
+import shutil
+import subprocess
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from wire_format import (WireFormatRouter, encode_compact, decode_compact, encode_payload, decode_payload,
+                         negotiate_format)
+
+
+class TestCompactEncoding(unittest.TestCase):
+    """Test cases for the compact binary layouts."""
+
+    def test_round_trip(self):
+        """Test live score payloads decode to exactly what was encoded."""
+        data = {
+            'match_id': 42, 'team1_score': 187, 'team2_score': 0, 'team1_wickets': 6, 'team2_wickets': 0,
+            'current_over': '19.4', 'current_ball': 4, 'batting_team': 'Sydney Sixers',
+            'bowling_team': 'Perth Scorchers', 'last_ball': 'SIX', 'commentary': 'Into the stands! 🏏',
+            'timestamp': '2026-01-05T09:30:00.250000', 'type': 'score_update'
+        }
+        frame = encode_compact('live_score_update', data)
+        self.assertEqual(decode_compact(frame), ('live_score_update', data))
+        self.assertLess(len(frame), len(str(data)) // 2)
+
+    def test_unfit_values_travel_as_extras(self):
+        """Test unknown keys and values that do not fit their slot are kept."""
+        data = {
+            'match_id': 1, 'seq': 9, 'type': 'wicket', 'timestamp': 'not a time',
+            'data': {'home_score': 70000, 'current_score': '120/3', 'fielder': 'Hughes'},
+            'source': 'scorer'
+        }
+        event, decoded = decode_payload(encode_payload('match_update', data))
+        self.assertEqual(event, 'match_update')
+        self.assertEqual(decoded, data)
+
+    def test_no_layout(self):
+        """Test events without a layout are not encoded."""
+        self.assertIsNone(encode_compact('booking_notification', {'a': 1}))
+        self.assertEqual(negotiate_format('Compact'), 'compact')
+        self.assertEqual(negotiate_format('protobuf'), 'json')
+        self.assertEqual(negotiate_format(None), 'json')
+
+
+CLIENT_JS = os.path.join(os.path.dirname(__file__), '..', 'static', 'js', 'realtime_client.js')
+# Runs the browser decoder (everything before the client class) on base64 frames from stdin
+NODE_DECODER = """
+const fs = require('fs');
+const source = fs.readFileSync(process.argv[1], 'utf8');
+const decoder = source.slice(source.indexOf('// Compact binary layouts'), source.indexOf('class CricVerseRealtime'));
+const decodeCompact = new Function(decoder + '; return decodeCompact;')();
+const frames = JSON.parse(fs.readFileSync(0, 'utf8'));
+console.log(JSON.stringify(frames.map((frame) => decodeCompact(Uint8Array.from(Buffer.from(frame, 'base64')).buffer))));
+"""
+
+
+@unittest.skipUnless(shutil.which('node'), 'node is not installed')
+class TestBrowserDecoder(unittest.TestCase):
+    """Test cases for decoding Python frames with the browser client's decoder."""
+
+    def test_browser_decodes_python_frames(self):
+        """Test realtime_client.js reads fixed fields before variable ones, as the encoder writes them."""
+        payloads = [
+            ('live_score_update', {
+                'match_id': 42, 'type': 'score_update', 'timestamp': '2026-01-05T09:30:00.250000',
+                'team1_score': 187, 'team1_wickets': 6, 'current_over': '19.4', 'current_ball': 4,
+                'batting_team': 'Sydney Sixers', 'commentary': 'Into the stands! 🏏', 'source': 'scorer'}),
+            ('match_update', {
+                'match_id': 7, 'seq': 3, 'type': 'wicket', 'timestamp': '2026-01-05T09:31:00',
+                'data': {'home_score': 120, 'home_wickets': 3, 'batsman': 'Smith', 'current_score': {'runs': 120},
+                         'fielder': 'Hughes'}}),
+            ('occupancy_update', {
+                'stadium_id': 2, 'type': 'occupancy', 'timestamp': '2026-01-05T09:32:00',
+                'data': {'stadium_id': 2, 'total_seats': 48000, 'occupancy_percentage': 87.5}}),
+        ]
+        frames = [encode_payload(event, data) for event, data in payloads]
+        output = subprocess.run(['node', '-e', NODE_DECODER, CLIENT_JS], input=json.dumps(frames),
+                                capture_output=True, text=True, timeout=30, check=True).stdout
+        for (event, data), decoded in zip(payloads, json.loads(output)):
+            self.assertEqual(datetime.fromisoformat(decoded.pop('timestamp').rstrip('Z')),
+                             datetime.fromisoformat(data['timestamp']))
+            self.assertEqual(decoded, {key: value for key, value in data.items() if key != 'timestamp'})
+
+
+class TestWireFormatRouter(unittest.TestCase):
+    """Test cases for per-client wire format routing."""
+
+    def setUp(self):
+        self.sent = []
+        self.entered = []
+        self.router = WireFormatRouter(lambda event, data, room=None: self.sent.append((event, data, room)),
+                                       enter_room=lambda sid, room: self.entered.append((sid, room)))
+        self.router.set_format('web', 'json')
+        self.router.set_format('app', 'compact')
+        self.update = {'event_id': 3, 'available_seats': 120, 'timestamp': '2026-01-05T09:30:00'}
+
+    def test_json_only_rooms_pass_through(self):
+        """Test rooms without compact clients are emitted to as before."""
+        self.router.join('event_3', 'web')
+        self.router.emit('seat_availability', self.update, 'event_3')
+        self.assertEqual(self.sent, [('seat_availability', self.update, 'event_3')])
+
+    def test_mixed_rooms_are_split_by_format(self):
+        """Test each format sub-room gets its own encoding of one broadcast."""
+        self.router.join('event_3', 'web')
+        self.router.join('event_3', 'app')
+        self.router.emit('seat_availability', self.update, 'event_3')
+        self.router.emit('booking_notification', {'x': 1}, 'event_3')
+
+        self.assertIn(('app', 'event_3|compact'), self.entered)
+        self.assertEqual(self.sent[0], ('seat_availability', self.update, 'event_3|json'))
+        self.assertEqual(decode_payload(self.sent[1][1]), ('seat_availability', self.update))
+        self.assertEqual(self.sent[1][2], 'event_3|compact')
+        self.assertEqual(self.sent[2][2], 'event_3')
+
+        self.router.disconnect('app')
+        self.router.emit('seat_availability', self.update, 'event_3')
+        self.assertEqual(self.sent[-1][2], 'event_3')
+        self.assertEqual(self.router.get_stats()['compact_clients'], 0)
+
+
+def test_wire_format_benchmark_smoke():
+    """Test the benchmark runs and compact payloads are smaller."""
+    from benchmarks.wire_format_benchmark import run_benchmark
+
+    report = run_benchmark(fans=50, messages=5)
+    for result in report['events'].values():
+        assert result['compact']['bytes_per_message'] < result['json']['bytes_per_message']
+
+
+if __name__ == '__main__':
+    unittest.main()
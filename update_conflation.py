@@ -0,0 +1,329 @@
+"""
+Live Update Conflation for CricVerse
+Throttles high-frequency live score events per client tier, keeping only the
+latest state for each match while critical events go out immediately
+Big Bash League Cricket Platform
+"""
+
+import os
+import heapq
+import logging
+import itertools
+import time
+from threading import Thread, Condition, RLock
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Maximum live updates per second sent to a connection, by client tier
+CLIENT_TIER_RATES = {'basic': 1.0, 'standard': 2.0, 'premium': 4.0, 'vip': 4.0}
+DEFAULT_TIER = 'basic'
+
+# Events that may be conflated; delta events are merged, the rest replaced
+CONFLATED_EVENTS = frozenset({'live_score_update', 'match_update', 'match_delta', 'live_match_delta'})
+DELTA_EVENTS = frozenset({'match_delta', 'live_match_delta'})
+
+# Update types and delta fields that are always delivered straight away
+CRITICAL_UPDATE_TYPES = frozenset({'wicket', 'match_start', 'match_end', 'status_change', 'innings_break'})
+CRITICAL_DELTA_FIELDS = frozenset({'wickets', 'status', 'is_live', 'current_innings'})
+
+
+def parse_tier_rates(spec: Optional[str]) -> Dict[str, float]:
+    """Tier rates from a 'basic=1,premium=4' style setting, over the defaults"""
+    rates = dict(CLIENT_TIER_RATES)
+    for item in (spec or '').split(','):
+        if '=' in item:
+            tier, rate = item.split('=', 1)
+            try:
+                rates[tier.strip().lower()] = float(rate)
+            except ValueError:
+                logger.warning(f"Ignoring invalid live update rate '{item}'")
+    return rates
+
+
+def tier_for_membership(membership_level: Optional[str]) -> str:
+    """Client tier for a customer membership level ('Premium' -> 'premium')"""
+    tier = (membership_level or DEFAULT_TIER).strip().lower()
+    return tier if tier in CLIENT_TIER_RATES else DEFAULT_TIER
+
+
+def is_critical(event: str, data: Any) -> bool:
+    """Whether an update must bypass conflation (wickets, status changes, match end)"""
+    if not isinstance(data, dict):
+        return False
+    if data.get('type') in CRITICAL_UPDATE_TYPES:
+        return True
+    if event in DELTA_EVENTS:
+        return any(path.rsplit('.', 1)[-1] in CRITICAL_DELTA_FIELDS for path in data.get('changes', {}))
+    return False
+
+
+def merge_update(event: str, pending: Optional[Dict[str, Any]], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Conflate an update onto the one still waiting to be sent
+
+    Full-state events simply replace the pending one. Deltas are merged so
+    no change is lost; the merged delta carries ``base_seq``, the sequence
+    number a client must already have for it to apply.
+    """
+    if pending is None or event not in DELTA_EVENTS:
+        return data
+    merged = dict(data)
+    merged['changes'] = {**pending.get('changes', {}), **data.get('changes', {})}
+    merged['base_seq'] = pending.get('base_seq', pending.get('seq', 1) - 1)
+    return merged
+
+
+def update_key(event: str, data: Any) -> Tuple[str, Any]:
+    """Pending slot for an update: one per event and match, since live_matches carries every match"""
+    return event, data.get('match_id') if isinstance(data, dict) else None
+
+
+def tier_room(room: str, tier: str) -> str:
+    """SocketIO room holding one tier's members of ``room``"""
+    return f"{room}@{tier}"
+
+
+class ConflationGroup:
+    """Send budget and latest pending updates for one tier of one room"""
+
+    __slots__ = ('next_due', 'pending', 'scheduled')
+
+    def __init__(self):
+        self.next_due = 0.0
+        self.pending: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        self.scheduled = False
+
+
+class LiveUpdateConflator:
+    """Per-tier throttling of live updates in front of ``socketio.emit``
+
+    Each connection has a tier with a maximum update rate. Members of a room
+    are grouped by tier into SocketIO sub-rooms (``match_5@premium``), and
+    each group keeps only the latest pending state per event and match, so
+    memory is bounded by rooms, tiers and matches rather than by how far a
+    client has fallen behind. An update for a group that is within its
+    budget is sent at once; otherwise it replaces (or, for deltas, merges
+    into) the pending one and a single flusher thread sends it when the
+    group is next due.
+
+    Critical updates skip the budget: anything pending for the room is
+    flushed first to keep ordering, then the update goes to the whole room.
+    Emits only queue packets on the server, so a slow client never holds up
+    the broadcasting thread or other clients.
+    """
+
+    def __init__(self, emit_room: Callable, enter_room: Optional[Callable] = None,
+                 leave_room: Optional[Callable] = None, tier_rates: Optional[Dict[str, float]] = None,
+                 default_tier: str = DEFAULT_TIER, clock: Callable[[], float] = time.monotonic):
+        self.emit_room = emit_room
+        self.enter_room = enter_room
+        self.leave_room = leave_room
+        self.tier_rates = dict(tier_rates or CLIENT_TIER_RATES)
+        self.default_tier = default_tier
+        self.clock = clock
+        self._tiers: Dict[str, str] = {}
+        self._members: Dict[str, Dict[str, set]] = {}
+        self._client_rooms: Dict[str, set] = {}
+        self._groups: Dict[Tuple[str, str], ConflationGroup] = {}
+        self._heap: List[Tuple] = []
+        self._order = itertools.count()
+        self._condition = Condition()
+        self._send_lock = RLock()
+        self._thread: Optional[Thread] = None
+        self._running = False
+        self.stats = {'sent': 0, 'conflated': 0, 'flushed': 0, 'critical': 0, 'passthrough': 0}
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = Thread(target=self._flush_loop, name='live-update-conflation', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the flusher, sending whatever is still pending"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush_due(float('inf'))
+
+    def interval(self, tier: str) -> float:
+        rate = self.tier_rates.get(tier) or self.tier_rates.get(self.default_tier) or 1.0
+        return 1.0 / rate
+
+    # Connections and rooms
+    def set_tier(self, sid: str, tier: Optional[str]):
+        """Set a connection's tier, moving it between tier rooms it already joined"""
+        tier = tier if tier in self.tier_rates else self.default_tier
+        with self._condition:
+            old_tier = self._tiers.get(sid)
+            self._tiers[sid] = tier
+            rooms = list(self._client_rooms.get(sid, ())) if old_tier not in (None, tier) else []
+        for room in rooms:
+            self._remove_member(room, sid, old_tier)
+            self._add_member(room, sid, tier)
+
+    def join(self, room: str, sid: str):
+        with self._condition:
+            rooms = self._client_rooms.setdefault(sid, set())
+            if room in rooms:
+                return
+            rooms.add(room)
+            tier = self._tiers.setdefault(sid, self.default_tier)
+        self._add_member(room, sid, tier)
+
+    def leave(self, room: str, sid: str):
+        with self._condition:
+            rooms = self._client_rooms.get(sid)
+            if not rooms or room not in rooms:
+                return
+            rooms.discard(room)
+            tier = self._tiers.get(sid, self.default_tier)
+        self._remove_member(room, sid, tier)
+
+    def disconnect(self, sid: str):
+        with self._condition:
+            rooms = self._client_rooms.pop(sid, set())
+            tier = self._tiers.pop(sid, self.default_tier)
+        for room in rooms:
+            self._remove_member(room, sid, tier, connected=False)
+
+    # Emitting
+    def emit(self, event: str, data: Any, room: Optional[str] = None, **kwargs):
+        """socketio.emit-compatible entry point that conflates live updates"""
+        room = room or kwargs.get('to')
+        if event not in CONFLATED_EVENTS or room is None or not self._members.get(room):
+            self.stats['passthrough'] += 1
+            if room:
+                self.emit_room(event, data, room=room)
+            else:
+                self.emit_room(event, data)
+            return
+
+        if is_critical(event, data):
+            with self._send_lock:
+                self._flush_room(room)
+                self.emit_room(event, data, room=room)
+            self.stats['critical'] += 1
+            return
+
+        now = self.clock()
+        with self._send_lock:
+            sends = []
+            with self._condition:
+                for tier, sids in self._members.get(room, {}).items():
+                    if not sids:
+                        continue
+                    group = self._groups.setdefault((room, tier), ConflationGroup())
+                    if not group.pending and now >= group.next_due:
+                        group.next_due = now + self.interval(tier)
+                        sends.append(tier_room(room, tier))
+                        continue
+                    key = update_key(event, data)
+                    group.pending[key] = merge_update(event, group.pending.get(key), data)
+                    self.stats['conflated'] += 1
+                    if not group.scheduled:
+                        group.scheduled = True
+                        heapq.heappush(self._heap, (group.next_due, next(self._order), room, tier, group))
+                        self._condition.notify()
+            for target in sends:
+                self.emit_room(event, data, room=target)
+            self.stats['sent'] += len(sends)
+
+    def flush_due(self, now: Optional[float] = None) -> int:
+        """Send pending updates for every group that is due; returns updates sent"""
+        now = self.clock() if now is None else now
+        sent = 0
+        with self._send_lock:
+            while True:
+                with self._condition:
+                    if not self._heap or self._heap[0][0] > now:
+                        return sent
+                    _, _, room, tier, group = heapq.heappop(self._heap)
+                    if self._groups.get((room, tier)) is not group:
+                        continue  # Group was dropped when its last member left
+                    pending = self._take_pending(room, tier, now)
+                for event, payload in pending:
+                    self.emit_room(event, payload, room=tier_room(room, tier))
+                sent += len(pending)
+                self.stats['flushed'] += len(pending)
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return sum(len(group.pending) for group in self._groups.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                **self.stats,
+                'connections': len(self._tiers),
+                'groups': len(self._groups),
+                'pending': sum(len(group.pending) for group in self._groups.values()),
+                'tier_rates': dict(self.tier_rates)
+            }
+
+    # Internal helpers
+    def _flush_loop(self):
+        while True:
+            with self._condition:
+                while self._running and (not self._heap or self._heap[0][0] > self.clock()):
+                    wait = self._heap[0][0] - self.clock() if self._heap else None
+                    self._condition.wait(wait)
+                if not self._running:
+                    return
+            try:
+                self.flush_due()
+            except Exception as e:
+                logger.error(f"Error flushing conflated live updates: {e}")
+
+    def _take_pending(self, room: str, tier: str, now: float) -> List[Tuple[str, Dict[str, Any]]]:
+        group = self._groups.get((room, tier))
+        if group is None:
+            return []
+        pending = [(event, payload) for (event, _), payload in group.pending.items()]
+        group.pending.clear()
+        group.scheduled = False
+        if pending:
+            group.next_due = now + self.interval(tier)
+        return pending
+
+    def _flush_room(self, room: str):
+        """Send everything pending for ``room`` ahead of a critical update"""
+        now = self.clock()
+        with self._condition:
+            flushed = [(tier, self._take_pending(room, tier, now)) for tier in list(self._members.get(room, {}))]
+        for tier, pending in flushed:
+            for event, payload in pending:
+                self.emit_room(event, payload, room=tier_room(room, tier))
+            self.stats['flushed'] += len(pending)
+
+    def _add_member(self, room: str, sid: str, tier: str):
+        with self._condition:
+            self._members.setdefault(room, {}).setdefault(tier, set()).add(sid)
+        if self.enter_room:
+            self.enter_room(sid, tier_room(room, tier))
+
+    def _remove_member(self, room: str, sid: str, tier: str, connected: bool = True):
+        with self._condition:
+            tiers = self._members.get(room, {})
+            sids = tiers.get(tier)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    # Last member of this tier: drop the group and anything pending
+                    del tiers[tier]
+                    self._groups.pop((room, tier), None)
+                if not tiers:
+                    self._members.pop(room, None)
+        if connected and self.leave_room:
+            self.leave_room(sid, tier_room(room, tier))
+
+
+def conflation_enabled() -> bool:
+    return os.getenv('LIVE_UPDATE_CONFLATION', 'on').lower() not in ('0', 'off', 'false', 'no')
@@ -0,0 +1,404 @@
+"""
+Compact Wire Format for CricVerse
+Fixed binary layouts for high-volume realtime events, negotiated per client
+Big Bash League Cricket Platform
+"""
+
+import json
+import base64
+import struct
+import logging
+from datetime import datetime, timezone
+from threading import RLock
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JSON_FORMAT = 'json'
+COMPACT_FORMAT = 'compact'
+WIRE_FORMATS = (JSON_FORMAT, COMPACT_FORMAT)
+
+# Frame header: schema id, layout version, presence bitmask of the fields that follow
+FRAME_HEADER = struct.Struct('<BBI')
+LAYOUT_VERSION = 1
+
+# Fixed-width field kinds (struct codes); 'str' is u8-length prefixed, 'text' and 'json' u16.
+# A frame holds every present fixed-width field first, packed as one block, then
+# the variable-length fields, each group in schema order.
+FIXED_CODES = {'u8': 'B', 'u16': 'H', 'u32': 'I', 'f32': 'f', 'ts': 'd'}
+LENGTH_PREFIX = {'str': struct.Struct('<B'), 'text': struct.Struct('<H'), 'json': struct.Struct('<H')}
+STRING_LIMITS = {'str': 255, 'text': 65535, 'json': 65535}
+
+# Field that carries anything a layout has no slot for, so encoding is lossless
+EXTRAS_FIELD = ('_extra', 'json')
+
+# Layouts by event: (schema id, fields). Dotted names reach into nested dicts.
+# Field order is part of the format; only append, and bump LAYOUT_VERSION otherwise.
+COMPACT_SCHEMAS: Dict[str, Tuple[int, Tuple[Tuple[str, str], ...]]] = {
+    'live_score_update': (1, (
+        ('match_id', 'u32'), ('type', 'str'), ('timestamp', 'ts'),
+        ('team1_score', 'u16'), ('team2_score', 'u16'), ('team1_wickets', 'u8'), ('team2_wickets', 'u8'),
+        ('current_over', 'str'), ('current_ball', 'u8'), ('batting_team', 'str'), ('bowling_team', 'str'),
+        ('last_ball', 'str'), ('commentary', 'text'), EXTRAS_FIELD,
+    )),
+    'match_update': (2, (
+        ('match_id', 'u32'), ('seq', 'u32'), ('type', 'str'), ('timestamp', 'ts'),
+        ('data.home_score', 'u16'), ('data.away_score', 'u16'), ('data.home_wickets', 'u8'),
+        ('data.away_wickets', 'u8'), ('data.current_over', 'str'), ('data.team', 'str'),
+        ('data.batsman', 'str'), ('data.bowler', 'str'), ('data.wicket_type', 'str'),
+        ('data.current_score', 'json'), ('data.status', 'str'), ('data.winner', 'str'), EXTRAS_FIELD,
+    )),
+    'occupancy_update': (3, (
+        ('stadium_id', 'u32'), ('type', 'str'), ('timestamp', 'ts'),
+        ('data.stadium_id', 'u32'), ('data.total_seats', 'u32'), ('data.booked_seats', 'u32'),
+        ('data.available_seats', 'u32'), ('data.occupancy_percentage', 'f32'), ('data.events_today', 'u16'),
+        ('data.timestamp', 'ts'), EXTRAS_FIELD,
+    )),
+    'seat_availability': (4, (
+        ('event_id', 'u32'), ('available_seats', 'u32'), ('timestamp', 'ts'), EXTRAS_FIELD,
+    )),
+}
+SCHEMAS_BY_ID = {schema_id: (event, fields) for event, (schema_id, fields) in COMPACT_SCHEMAS.items()}
+
+
+def negotiate_format(requested: Optional[str]) -> str:
+    """Wire format for a client from what it asked for at connect"""
+    requested = (requested or '').strip().lower()
+    return requested if requested in WIRE_FORMATS else JSON_FORMAT
+
+
+def _set_path(target: Dict[str, Any], path: str, value: Any):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def _to_epoch(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _fixed_value(kind: str, value: Any):
+    """Value ready for a fixed-width slot, or None if it does not fit the kind"""
+    value_type = type(value)
+    if kind == 'ts':
+        try:
+            return _to_epoch(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+    if kind == 'f32':
+        return value if value_type in (int, float) else None
+    return value if value_type is int else None
+
+
+def _pack_string(kind: str, value: Any) -> Optional[bytes]:
+    """Length-prefixed bytes for a variable-length slot, or None if it does not fit"""
+    if kind == 'json':
+        raw = json.dumps(value, separators=(',', ':'), default=str).encode('utf-8')
+    elif type(value) is str:
+        raw = value.encode('utf-8')
+    else:
+        return None
+    if len(raw) > STRING_LIMITS[kind]:
+        return None
+    return LENGTH_PREFIX[kind].pack(len(raw)) + raw
+
+
+def _slot_value(data: Dict[str, Any], keys: Tuple[str, ...]):
+    if len(keys) == 1:
+        return data.get(keys[0])
+    parent = data.get(keys[0])
+    return parent.get(keys[1]) if type(parent) is dict else None
+
+
+class _Layout:
+    """A schema compiled for encoding: fixed and variable slots plus the keys it knows"""
+
+    def __init__(self, schema_id: int, fields: Tuple[Tuple[str, str], ...]):
+        self.schema_id = schema_id
+        slots = [(1 << index, tuple(path.split('.')), kind) for index, (path, kind) in enumerate(fields[:-1])]
+        self.fixed_slots = [slot for slot in slots if slot[2] in FIXED_CODES]
+        self.var_slots = [slot for slot in slots if slot[2] not in FIXED_CODES]
+        self.extras_bit = 1 << (len(fields) - 1)
+        self.top_keys = frozenset(keys[0] for _, keys, _ in slots)
+        self.nested_keys: Dict[str, frozenset] = {}
+        for _, keys, _ in slots:
+            if len(keys) == 2:
+                self.nested_keys[keys[0]] = self.nested_keys.get(keys[0], frozenset()) | {keys[1]}
+        # One struct per combination of present fixed fields, built on first use
+        self._blocks: Dict[int, struct.Struct] = {}
+
+    def fixed_block(self, mask: int) -> struct.Struct:
+        block = self._blocks.get(mask)
+        if block is None:
+            codes = ''.join(FIXED_CODES[kind] for bit, _, kind in self.fixed_slots if mask & bit)
+            block = self._blocks[mask] = struct.Struct('<' + codes)
+        return block
+
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        extras = {}
+        fixed_mask = 0
+        fixed_values = []
+        for bit, keys, kind in self.fixed_slots:
+            value = _slot_value(data, keys)
+            if value is None:
+                continue
+            packed = _fixed_value(kind, value)
+            if packed is None:
+                extras['.'.join(keys)] = value
+                continue
+            fixed_mask |= bit
+            fixed_values.append(packed)
+        try:
+            fixed = self.fixed_block(fixed_mask).pack(*fixed_values)
+        except struct.error:
+            fixed, fixed_mask = self._pack_fixed_slowly(data, extras)
+
+        present = fixed_mask
+        parts = [fixed]
+        for bit, keys, kind in self.var_slots:
+            value = _slot_value(data, keys)
+            if value is None:
+                continue
+            packed = _pack_string(kind, value)
+            if packed is None:
+                extras['.'.join(keys)] = value
+                continue
+            parts.append(packed)
+            present |= bit
+
+        # Keys the layout has no slot for
+        for key in data.keys() - self.top_keys:
+            if data[key] is not None:
+                extras[key] = data[key]
+        for key, known in self.nested_keys.items():
+            parent = data.get(key)
+            if type(parent) is dict:
+                if not parent:
+                    extras[key] = parent
+                for nested_key in parent.keys() - known:
+                    if parent[nested_key] is not None:
+                        extras[f"{key}.{nested_key}"] = parent[nested_key]
+            elif parent is not None:
+                extras[key] = parent
+
+        if extras:
+            parts.append(_pack_string('json', extras))
+            present |= self.extras_bit
+        return FRAME_HEADER.pack(self.schema_id, LAYOUT_VERSION, present) + b''.join(parts)
+
+    def _pack_fixed_slowly(self, data: Dict[str, Any], extras: Dict[str, Any]):
+        """Pack fixed fields one by one, moving out-of-range values to extras"""
+        mask = 0
+        values = []
+        for bit, keys, kind in self.fixed_slots:
+            value = _slot_value(data, keys)
+            packed = _fixed_value(kind, value) if value is not None else None
+            if packed is None:
+                continue
+            try:
+                struct.pack('<' + FIXED_CODES[kind], packed)
+            except struct.error:
+                extras['.'.join(keys)] = value
+                continue
+            mask |= bit
+            values.append(packed)
+        return self.fixed_block(mask).pack(*values), mask
+
+
+_LAYOUTS = {event: _Layout(schema_id, fields) for event, (schema_id, fields) in COMPACT_SCHEMAS.items()}
+
+
+def encode_compact(event: str, data: Dict[str, Any]) -> Optional[bytes]:
+    """Encode ``data`` for ``event`` in its fixed layout (None if the event has none)
+
+    Values that do not fit their slot (wrong type, out of range) and keys
+    the layout does not know travel in the trailing extras field.
+    """
+    layout = _LAYOUTS.get(event)
+    if layout is None or not isinstance(data, dict):
+        return None
+    return layout.encode(data)
+
+
+def encode_payload(event: str, data: Dict[str, Any]) -> Optional[str]:
+    """Compact frame as sent over Socket.IO: base64 text
+
+    Binary attachments would cost every client a second websocket frame
+    and a placeholder header; base64 keeps each message to one frame and is
+    still far smaller than the JSON it replaces.
+    """
+    frame = encode_compact(event, data)
+    return base64.b64encode(frame).decode('ascii') if frame is not None else None
+
+
+def decode_payload(payload: str) -> Tuple[str, Dict[str, Any]]:
+    return decode_compact(base64.b64decode(payload))
+
+
+def decode_compact(frame: bytes) -> Tuple[str, Dict[str, Any]]:
+    """Decode a compact frame back into (event, data)"""
+    schema_id, version, present = FRAME_HEADER.unpack_from(frame, 0)
+    if version != LAYOUT_VERSION:
+        raise ValueError(f"Unsupported compact layout version {version}")
+    event, _ = SCHEMAS_BY_ID[schema_id]
+    layout = _LAYOUTS[event]
+    offset = FRAME_HEADER.size
+    data: Dict[str, Any] = {}
+
+    fixed_mask = sum(bit for bit, _, _ in layout.fixed_slots if present & bit)
+    block = layout.fixed_block(fixed_mask)
+    values = iter(block.unpack_from(frame, offset))
+    offset += block.size
+    for bit, keys, kind in layout.fixed_slots:
+        if present & bit:
+            value = next(values)
+            if kind == 'ts':
+                value = datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None).isoformat()
+            _set_path(data, '.'.join(keys), value)
+
+    var_slots = layout.var_slots + [(layout.extras_bit, (EXTRAS_FIELD[0],), EXTRAS_FIELD[1])]
+    for bit, keys, kind in var_slots:
+        if not present & bit:
+            continue
+        prefix = LENGTH_PREFIX[kind]
+        length = prefix.unpack_from(frame, offset)[0]
+        offset += prefix.size
+        raw = bytes(frame[offset:offset + length])
+        offset += length
+        value = json.loads(raw) if kind == 'json' else raw.decode('utf-8')
+        if bit == layout.extras_bit:
+            for extra_path, extra_value in value.items():
+                _set_path(data, extra_path, extra_value)
+        else:
+            _set_path(data, '.'.join(keys), value)
+    return event, data
+
+
+def format_room(room: str, wire_format: str) -> str:
+    """SocketIO room holding the members of ``room`` that use ``wire_format``"""
+    return f"{room}|{wire_format}"
+
+
+class WireFormatRouter:
+    """Sends each event in the wire format every client negotiated
+
+    Connections that asked for the compact format are tracked per room.
+    Events with a compact layout, sent to a room that has compact members,
+    are encoded once per format and emitted to the format sub-rooms
+    (``match_5|json`` and ``match_5|compact``). Everything else goes
+    straight to ``emit_room``, so a room with no compact clients costs
+    nothing extra.
+    """
+
+    def __init__(self, emit_room: Callable, enter_room: Optional[Callable] = None,
+                 leave_room: Optional[Callable] = None):
+        self.emit_room = emit_room
+        self.enter_room_fn = enter_room
+        self.leave_room_fn = leave_room
+        self._formats: Dict[str, str] = {}
+        self._rooms: Dict[str, Dict[str, set]] = {}
+        self._client_rooms: Dict[str, set] = {}
+        self._lock = RLock()
+        self.stats = {'json': 0, 'compact': 0, 'passthrough': 0, 'compact_bytes': 0, 'encode_errors': 0}
+
+    def set_format(self, sid: str, wire_format: Optional[str]):
+        with self._lock:
+            self._formats[sid] = negotiate_format(wire_format)
+
+    def get_format(self, sid: str) -> str:
+        return self._formats.get(sid, JSON_FORMAT)
+
+    # Room membership (base rooms from track_join and conflation tier rooms)
+    def enter_room(self, sid: str, room: str):
+        """Put ``sid`` in ``room`` and in the sub-room for its wire format"""
+        wire_format = self.get_format(sid)
+        with self._lock:
+            self._rooms.setdefault(room, {}).setdefault(wire_format, set()).add(sid)
+            self._client_rooms.setdefault(sid, set()).add(room)
+        if self.enter_room_fn:
+            self.enter_room_fn(sid, room)
+            self.enter_room_fn(sid, format_room(room, wire_format))
+
+    def leave_room(self, sid: str, room: str):
+        wire_format = self.get_format(sid)
+        self._forget(sid, room, wire_format)
+        if self.leave_room_fn:
+            self.leave_room_fn(sid, room)
+            self.leave_room_fn(sid, format_room(room, wire_format))
+
+    def join(self, room: str, sid: str):
+        """Track a base room the client already joined through join_room"""
+        wire_format = self.get_format(sid)
+        with self._lock:
+            self._rooms.setdefault(room, {}).setdefault(wire_format, set()).add(sid)
+            self._client_rooms.setdefault(sid, set()).add(room)
+        if self.enter_room_fn:
+            self.enter_room_fn(sid, format_room(room, wire_format))
+
+    def leave(self, room: str, sid: str):
+        wire_format = self.get_format(sid)
+        self._forget(sid, room, wire_format)
+        if self.leave_room_fn:
+            self.leave_room_fn(sid, format_room(room, wire_format))
+
+    def disconnect(self, sid: str):
+        with self._lock:
+            wire_format = self._formats.pop(sid, JSON_FORMAT)
+            rooms = self._client_rooms.pop(sid, set())
+        for room in rooms:
+            self._forget(sid, room, wire_format)
+
+    # Emitting
+    def emit(self, event: str, data: Any, room: Optional[str] = None, **kwargs):
+        """socketio.emit-compatible entry point"""
+        room = room or kwargs.get('to')
+        members = self._rooms.get(room) if room else None
+        if event not in COMPACT_SCHEMAS or not members or not members.get(COMPACT_FORMAT):
+            self.stats['passthrough'] += 1
+            if room:
+                self.emit_room(event, data, room=room)
+            else:
+                self.emit_room(event, data)
+            return
+
+        try:
+            frame = encode_payload(event, data)
+        except Exception as e:
+            # Compact clients still understand JSON payloads
+            self.stats['encode_errors'] += 1
+            logger.error(f"Compact encoding of {event} failed: {e}")
+            self.emit_room(event, data, room=room)
+            return
+
+        if members.get(JSON_FORMAT):
+            self.emit_room(event, data, room=format_room(room, JSON_FORMAT))
+            self.stats['json'] += 1
+        self.emit_room(event, frame, room=format_room(room, COMPACT_FORMAT))
+        self.stats['compact'] += 1
+        self.stats['compact_bytes'] += len(frame)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            compact_clients = sum(1 for wire_format in self._formats.values() if wire_format == COMPACT_FORMAT)
+            return {**self.stats, 'compact_clients': compact_clients, 'json_clients': len(self._formats) - compact_clients}
+
+    # Internal helpers
+    def _forget(self, sid: str, room: str, wire_format: str):
+        with self._lock:
+            formats = self._rooms.get(room)
+            if formats and wire_format in formats:
+                formats[wire_format].discard(sid)
+                if not formats[wire_format]:
+                    del formats[wire_format]
+                if not formats:
+                    del self._rooms[room]
+            rooms = self._client_rooms.get(sid)
+            if rooms is not None:
+                rooms.discard(room)